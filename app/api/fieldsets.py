@@ -0,0 +1,37 @@
+"""Dependency и ответ для sparse fieldsets (?fields=)."""
+from __future__ import annotations
+from typing import Any, Callable, Optional, Type
+
+from fastapi import Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.exceptions import ValidationException
+from app.schemas.fields import parse_fields
+
+
+def fieldset(model: Type[BaseModel]) -> Callable[..., Optional[tuple[str, ...]]]:
+    """Фабрика dependency: разбирает `fields` и проверяет имена по схеме ответа."""
+    allowed = sorted({*model.model_fields, *model.model_computed_fields})
+
+    def _parse(
+        fields: Optional[str] = Query(None, max_length=1000, description="Список полей через запятую"),
+    ) -> Optional[tuple[str, ...]]:
+        try:
+            return parse_fields(fields, model)
+        except ValueError as exc:
+            unknown = exc.args[0]
+            raise ValidationException(
+                f"Неизвестные поля: {', '.join(unknown)}",
+                detail={"unknown": unknown, "allowed": allowed},
+            ) from exc
+
+    return _parse
+
+
+def sparse_response(result: Any, fields: Optional[tuple[str, ...]]) -> Any:
+    """Ответ с урезанной схемой отдаётся напрямую, минуя полный response_model."""
+    if fields is None:
+        return result
+    return JSONResponse(content=jsonable_encoder(result))
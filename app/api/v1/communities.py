@@ -1,35 +1,87 @@
 """Endpoints для Communities."""
 from __future__ import annotations
 import uuid
-from typing import Optional
+from typing import List, Literal, Optional
 
 from fastapi import APIRouter, Depends, Query
 
 from app.api.deps import get_container, get_current_user_dep, get_pagination
+from app.api.fieldsets import fieldset, sparse_response
 from app.core.security import UserContext
 from app.infrastructure.container import Container
-from app.schemas.common import PaginatedResponse, MessageResponse, PaginationParams
-from app.schemas.community import CommunityCreate, CommunityUpdate, CommunityResponse, CommunityListResponse
+from app.schemas.common import PaginatedResponse, MessageResponse, PaginationParams, Suggestion
+from app.schemas.community import (
+    CommunityCreate, CommunityUpdate, CommunityResponse, CommunityListResponse, LeaderboardEntry,
+)
 
 router = APIRouter()
 
+CommunityType = Literal["public", "private", "restricted"]
+
 
 @router.get("", response_model=PaginatedResponse[CommunityListResponse])
 async def list_communities(
     pagination: PaginationParams = Depends(get_pagination),
     search: Optional[str] = Query(None, max_length=255),
+    cursor: Optional[str] = Query(None, max_length=200, description="next_cursor предыдущей страницы поиска"),
+    fields: Optional[tuple[str, ...]] = Depends(fieldset(CommunityListResponse)),
     container: Container = Depends(get_container),
 ):
     async with container.db_session() as session:
         service = _build_service(container, session)
-        return await service.list_communities(page=pagination.page, page_size=pagination.page_size, search=search)
+        result = await service.list_communities(page=pagination.page, page_size=pagination.page_size,
+                                                search=search, fields=fields, cursor=cursor)
+        return sparse_response(result, fields)
+
+
+@router.get("/autocomplete", response_model=List[Suggestion])
+async def autocomplete_communities(q: str = Query(..., min_length=1, max_length=100),
+                                   limit: int = Query(10, ge=1, le=20),
+                                   container: Container = Depends(get_container)):
+    """Подсказки по началу названия для выбора сообщества — из префиксного индекса в Redis."""
+    return await container.autocomplete.communities(q, limit)
+
+
+@router.get("/popular", response_model=List[LeaderboardEntry])
+async def popular_communities(community_type: Optional[CommunityType] = Query(None),
+                              limit: int = Query(20, ge=1, le=100),
+                              container: Container = Depends(get_container)):
+    """Топ по числу участников; score — member_count."""
+    async with container.db_session() as session:
+        return await _build_service(container, session).leaderboard("popular", community_type, limit)
+
+
+@router.get("/trending", response_model=List[LeaderboardEntry])
+async def trending_communities(community_type: Optional[CommunityType] = Query(None),
+                               limit: int = Query(20, ge=1, le=100),
+                               container: Container = Depends(get_container)):
+    """Топ по недавним вступлениям и постам с затуханием (TRENDING_HALF_LIFE)."""
+    async with container.db_session() as session:
+        return await _build_service(container, session).leaderboard("trending", community_type, limit)
+
+
+@router.get("/suggested", response_model=List[LeaderboardEntry])
+async def suggested_communities(limit: int = Query(10, ge=1, le=50), user: UserContext = Depends(get_current_user_dep),
+                                container: Container = Depends(get_container)):
+    """Сообщества, похожие по аудитории на те, где состоит пользователь."""
+    async with container.db_session() as session:
+        return await _build_service(container, session).suggested(user, limit)
+
+
+@router.get("/{id}/similar", response_model=List[LeaderboardEntry])
+async def similar_communities(id: uuid.UUID, limit: int = Query(10, ge=1, le=50),
+                              container: Container = Depends(get_container)):
+    """Похожие сообщества по общим участникам (косинус по аудитории)."""
+    async with container.db_session() as session:
+        return await _build_service(container, session).similar(id, limit)
 
 
 @router.get("/{id}", response_model=CommunityResponse)
-async def get_community(id: uuid.UUID, container: Container = Depends(get_container)):
+async def get_community(id: uuid.UUID, fields: Optional[tuple[str, ...]] = Depends(fieldset(CommunityResponse)),
+                        container: Container = Depends(get_container)):
     async with container.db_session() as session:
         service = _build_service(container, session)
-        return await service.get_community(id)
+        return sparse_response(await service.get_community(id, fields=fields), fields)
 
 
 @router.post("", response_model=CommunityResponse, status_code=201)
@@ -62,5 +114,7 @@ def _build_service(container, session):
     return CommunityService(
         community_repo=container.community_repo(session), member_repo=container.member_repo(session),
         role_repo=container.role_repo(session), channel_repo=container.channel_repo(session),
-        cache=container.redis, event_publisher=container.event_publisher,
+        media_repo=container.media_repo(session), cache=container.redis, event_publisher=container.session_event_publisher(session),
+        autocomplete=container.session_autocomplete(session), leaderboard=container.session_leaderboard(session),
+        recommendation_repo=container.recommendation_repo(session),
     )
@@ -32,4 +32,4 @@ async def create_donation(id: uuid.UUID, data: DonationCreate, user: UserContext
 def _build_service(container, session):
     from app.services.donation_service import DonationService
     return DonationService(donation_repo=container.donation_repo(session), community_repo=container.community_repo(session),
-                           cache=container.redis, event_publisher=container.event_publisher)
+                           cache=container.redis, event_publisher=container.session_event_publisher(session))
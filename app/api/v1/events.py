@@ -57,4 +57,4 @@ async def delete_event(id: uuid.UUID, user: UserContext = Depends(get_current_us
 def _build_service(container, session):
     from app.services.event_service import EventService
     return EventService(event_repo=container.event_repo(session), community_repo=container.community_repo(session),
-                        event_publisher=container.event_publisher)
+                        media_repo=container.media_repo(session), event_publisher=container.session_event_publisher(session))
@@ -0,0 +1,62 @@
+"""Endpoints для потокового экспорта данных сообщества."""
+from __future__ import annotations
+import uuid
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import get_container
+from app.core.rbac import Permission, require_permissions
+from app.core.security import UserContext
+from app.infrastructure.container import Container
+from app.services.export_service import MEDIA_TYPES
+
+router = APIRouter()
+
+FORMAT_QUERY = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson или csv")
+
+
+@router.get("/communities/{id}/members/export")
+async def export_members(id: uuid.UUID, format: str = FORMAT_QUERY,
+                          user: UserContext = Depends(require_permissions(Permission.MEMBER_MANAGE)),
+                          container: Container = Depends(get_container)):
+    return await _streaming_export(container, id, format, "members")
+
+
+@router.get("/communities/{id}/posts/export")
+async def export_posts(id: uuid.UUID, format: str = FORMAT_QUERY,
+                        user: UserContext = Depends(require_permissions(Permission.POST_MODERATE)),
+                        container: Container = Depends(get_container)):
+    return await _streaming_export(container, id, format, "posts")
+
+
+@router.get("/communities/{id}/donations/export")
+async def export_donations(id: uuid.UUID, format: str = FORMAT_QUERY,
+                            user: UserContext = Depends(require_permissions(Permission.DONATION_VIEW)),
+                            container: Container = Depends(get_container)):
+    return await _streaming_export(container, id, format, "donations")
+
+
+async def _streaming_export(container: Container, community_id: uuid.UUID, fmt: str, name: str) -> StreamingResponse:
+    # 404 отдаём до начала стрима — после отправки заголовков статус уже не поменять
+    async with container.db_session() as session:
+        await _build_service(container, session).ensure_community(community_id)
+
+    async def body() -> AsyncIterator[bytes]:
+        # Сессия живёт столько же, сколько стрим: курсор читается по мере отправки клиенту
+        async with container.db_session() as session:
+            export = getattr(_build_service(container, session), f"export_{name}")
+            async for chunk in export(community_id, fmt):
+                yield chunk
+
+    return StreamingResponse(
+        body(), media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}-{community_id}.{fmt}"'},
+    )
+
+
+def _build_service(container, session):
+    from app.services.export_service import ExportService
+    return ExportService(community_repo=container.community_repo(session), member_repo=container.member_repo(session),
+                         post_repo=container.post_repo(session), donation_repo=container.donation_repo(session))
@@ -0,0 +1,32 @@
+"""Endpoints для загрузки медиа-файлов."""
+from __future__ import annotations
+import uuid
+
+from fastapi import APIRouter, Depends, Request
+
+from app.api.deps import get_container
+from app.core.rbac import Permission, require_permissions
+from app.core.security import UserContext
+from app.infrastructure.container import Container
+from app.schemas.media import MediaUploadResponse
+from app.services.media_service import MediaService
+
+router = APIRouter()
+
+
+@router.post("/communities/{id}/media", response_model=MediaUploadResponse, status_code=201)
+async def upload_media(id: uuid.UUID, request: Request,
+                       user: UserContext = Depends(require_permissions(Permission.POST_CREATE)),
+                       container: Container = Depends(get_container)):
+    """Тело запроса — сам файл; Content-Type — его тип. Повторно загруженный файл не копируется в S3."""
+    content_length = request.headers.get("content-length")
+    content_type = MediaService.validate(request.headers.get("content-type", ""),
+                                         int(content_length) if content_length and content_length.isdigit() else None)
+    service = _build_service(container)
+    await service.ensure_community(id)
+    return await service.upload(id, request.stream(), content_type)
+
+
+def _build_service(container):
+    return MediaService(session_scope=container.db_session, s3_client=container.s3_client,
+                        variants=container.variant_pipeline)
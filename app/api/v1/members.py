@@ -1,15 +1,23 @@
 """Endpoints для Members."""
 from __future__ import annotations
 import uuid
-from typing import Optional
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Request
 
 from app.api.deps import get_container, get_current_user_dep, get_pagination
+from app.core.config import settings
+from app.core.exceptions import PayloadTooLargeException, ValidationException
+from app.core.logging import get_logger
+from app.core.rbac import Permission, require_permissions
 from app.core.security import UserContext
 from app.infrastructure.container import Container
-from app.schemas.common import PaginatedResponse, MessageResponse, PaginationParams
-from app.schemas.member import MemberCreate, MemberUpdate, MemberResponse
+from app.schemas.common import PaginatedResponse, MessageResponse, PaginationParams, Suggestion
+from app.schemas.member import (
+    MemberCreate, MemberUpdate, MemberResponse, MemberImportJob, MemberRoleBulkUpdate, MemberRoleBulkResult,
+)
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
@@ -22,6 +30,14 @@ async def list_members(id: uuid.UUID, pagination: PaginationParams = Depends(get
         return await service.list_members(community_id=id, page=pagination.page, page_size=pagination.page_size, status_filter=status)
 
 
+@router.get("/communities/{id}/members/autocomplete", response_model=List[Suggestion])
+async def autocomplete_members(id: uuid.UUID, q: str = Query(..., min_length=1, max_length=100),
+                               limit: int = Query(10, ge=1, le=20),
+                               container: Container = Depends(get_container)):
+    """Подсказки для @-упоминаний: user_id и ник активных участников по началу ника."""
+    return await container.autocomplete.nicknames(id, q, limit)
+
+
 @router.post("/communities/{id}/members", response_model=MemberResponse, status_code=201)
 async def join_community(id: uuid.UUID, data: MemberCreate, user: UserContext = Depends(get_current_user_dep),
                           container: Container = Depends(get_container)):
@@ -38,6 +54,15 @@ async def update_member(id: uuid.UUID, user_id: uuid.UUID, data: MemberUpdate,
         return await service.update_member(id, user_id, data, user)
 
 
+@router.post("/communities/{id}/roles/{role_id}/members", response_model=MemberRoleBulkResult)
+async def bulk_update_role(id: uuid.UUID, role_id: uuid.UUID, data: MemberRoleBulkUpdate,
+                            user: UserContext = Depends(require_permissions(Permission.ROLE_MANAGE)),
+                            container: Container = Depends(get_container)):
+    async with container.db_session() as session:
+        service = _build_service(container, session)
+        return await service.bulk_update_role(id, role_id, data, user)
+
+
 @router.delete("/communities/{id}/members/{user_id}", response_model=MessageResponse)
 async def remove_member(id: uuid.UUID, user_id: uuid.UUID, user: UserContext = Depends(get_current_user_dep),
                          container: Container = Depends(get_container)):
@@ -47,7 +72,76 @@ async def remove_member(id: uuid.UUID, user_id: uuid.UUID, user: UserContext = D
         return MessageResponse(message="Участник удалён")
 
 
+@router.post("/communities/{id}/members/import", response_model=MemberImportJob, status_code=202)
+async def import_members(id: uuid.UUID, request: Request, background_tasks: BackgroundTasks,
+                          user: UserContext = Depends(require_permissions(Permission.MEMBER_MANAGE)),
+                          container: Container = Depends(get_container)):
+    payload = await _read_upload(request, settings.MEMBER_IMPORT_MAX_BYTES)
+    if not payload.strip():
+        raise ValidationException("Пустой файл импорта")
+    fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    async with container.db_session() as session:
+        job = await _build_import_service(container, session).create_job(id)
+    background_tasks.add_task(_run_import, container, job, payload, fmt)
+    return job
+
+
+@router.get("/communities/{id}/members/import/{job_id}", response_model=MemberImportJob)
+async def get_import_job(id: uuid.UUID, job_id: uuid.UUID,
+                          user: UserContext = Depends(require_permissions(Permission.MEMBER_MANAGE)),
+                          container: Container = Depends(get_container)):
+    async with container.db_session() as session:
+        return await _build_import_service(container, session).get_job(id, job_id)
+
+
+async def _read_upload(request: Request, max_bytes: int) -> bytes:
+    """Тело запроса не больше max_bytes: Content-Length проверяется до чтения, поток — по мере поступления."""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise PayloadTooLargeException(f"Файл больше {max_bytes} байт")
+    payload = bytearray()
+    async for chunk in request.stream():
+        payload += chunk
+        if len(payload) > max_bytes:
+            raise PayloadTooLargeException(f"Файл больше {max_bytes} байт")
+    return bytes(payload)
+
+
+async def _run_import(container: Container, job: MemberImportJob, payload: bytes, fmt: str) -> None:
+    from app.services.member_import_service import parse_import_rows
+
+    member_status = "active"
+    try:
+        rows, errors = parse_import_rows(payload, fmt)
+        async with container.db_session() as session:
+            member_status, role_id = await _build_import_service(container, session).start_job(
+                job, len(rows) + len(errors), errors)
+
+        # Каждая пачка — отдельная транзакция: прогресс виден сразу, повтор идемпотентен
+        chunk_size = settings.MEMBER_IMPORT_CHUNK_SIZE
+        for start in range(0, len(rows), chunk_size):
+            async with container.db_session() as session:
+                await _build_import_service(container, session).import_chunk(
+                    job, rows[start:start + chunk_size], member_status, role_id)
+        error = None
+    except Exception as exc:
+        logger.exception("Ошибка импорта участников", extra={"community_id": str(job.community_id)})
+        error = f"{type(exc).__name__}: {exc}"
+
+    async with container.db_session() as session:
+        await _build_import_service(container, session).finish_job(job, member_status, error)
+
+
+def _build_import_service(container, session):
+    from app.services.member_import_service import MemberImportService
+    return MemberImportService(member_repo=container.member_repo(session), community_repo=container.community_repo(session),
+                               role_repo=container.role_repo(session), cache=container.redis,
+                               event_publisher=container.session_event_publisher(session),
+                               leaderboard=container.session_leaderboard(session))
+
+
 def _build_service(container, session):
     from app.services.member_service import MemberService
     return MemberService(member_repo=container.member_repo(session), community_repo=container.community_repo(session),
-                         role_repo=container.role_repo(session), cache=container.redis, event_publisher=container.event_publisher)
+                         role_repo=container.role_repo(session), cache=container.redis, event_publisher=container.session_event_publisher(session),
+                         autocomplete=container.session_autocomplete(session), leaderboard=container.session_leaderboard(session))
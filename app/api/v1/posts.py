@@ -6,27 +6,57 @@ from typing import Optional
 from fastapi import APIRouter, Depends, Query
 
 from app.api.deps import get_container, get_current_user_dep, get_pagination
+from app.api.fieldsets import fieldset, sparse_response
 from app.core.security import UserContext
 from app.infrastructure.container import Container
-from app.schemas.common import PaginatedResponse, MessageResponse, PaginationParams
-from app.schemas.post import PostCreate, PostUpdate, PostResponse
+from app.schemas.common import CursorPage, PaginatedResponse, MessageResponse, PaginationParams
+from app.schemas.post import PostCreate, PostUpdate, PostResponse, PostListResponse, PostSearchHit
 
 router = APIRouter()
 
 
-@router.get("/communities/{id}/posts", response_model=PaginatedResponse[PostResponse])
+@router.get("/communities/{id}/posts", response_model=PaginatedResponse[PostListResponse])
 async def list_posts(id: uuid.UUID, pagination: PaginationParams = Depends(get_pagination),
-                      channel_id: Optional[uuid.UUID] = Query(None), container: Container = Depends(get_container)):
+                      channel_id: Optional[uuid.UUID] = Query(None),
+                      fields: Optional[tuple[str, ...]] = Depends(fieldset(PostListResponse)),
+                      container: Container = Depends(get_container)):
     async with container.db_session() as session:
         service = _build_service(container, session)
-        return await service.list_posts(community_id=id, page=pagination.page, page_size=pagination.page_size, channel_id=channel_id)
+        result = await service.list_posts(community_id=id, page=pagination.page, page_size=pagination.page_size,
+                                          channel_id=channel_id, fields=fields)
+        return sparse_response(result, fields)
+
+
+@router.get("/communities/{id}/posts/search", response_model=CursorPage[PostSearchHit])
+async def search_community_posts(id: uuid.UUID, q: str = Query(..., min_length=1, max_length=255),
+                                 channel_id: Optional[uuid.UUID] = Query(None),
+                                 cursor: Optional[str] = Query(None, max_length=200),
+                                 pagination: PaginationParams = Depends(get_pagination),
+                                 container: Container = Depends(get_container)):
+    """Полнотекстовый поиск по опубликованным постам сообщества (websearch-синтаксис: "фраза", -слово, or)."""
+    async with container.db_session() as session:
+        service = _build_service(container, session)
+        return await service.search_posts(q, page_size=pagination.page_size, cursor=cursor,
+                                          community_id=id, channel_id=channel_id)
+
+
+@router.get("/posts/search", response_model=CursorPage[PostSearchHit])
+async def search_posts(q: str = Query(..., min_length=1, max_length=255),
+                       cursor: Optional[str] = Query(None, max_length=200),
+                       pagination: PaginationParams = Depends(get_pagination),
+                       container: Container = Depends(get_container)):
+    """Поиск по опубликованным постам всех публичных сообществ."""
+    async with container.db_session() as session:
+        service = _build_service(container, session)
+        return await service.search_posts(q, page_size=pagination.page_size, cursor=cursor)
 
 
 @router.get("/posts/{id}", response_model=PostResponse)
-async def get_post(id: uuid.UUID, container: Container = Depends(get_container)):
+async def get_post(id: uuid.UUID, fields: Optional[tuple[str, ...]] = Depends(fieldset(PostResponse)),
+                   container: Container = Depends(get_container)):
     async with container.db_session() as session:
         service = _build_service(container, session)
-        return await service.get_post(id)
+        return sparse_response(await service.get_post(id, fields=fields), fields)
 
 
 @router.post("/communities/{id}/posts", response_model=PostResponse, status_code=201)
@@ -57,4 +87,5 @@ async def delete_post(id: uuid.UUID, user: UserContext = Depends(get_current_use
 def _build_service(container, session):
     from app.services.post_service import PostService
     return PostService(post_repo=container.post_repo(session), community_repo=container.community_repo(session),
-                       cache=container.redis, event_publisher=container.event_publisher)
+                       media_repo=container.media_repo(session), cache=container.redis, event_publisher=container.session_event_publisher(session),
+                       leaderboard=container.session_leaderboard(session))
@@ -1,7 +1,7 @@
 """Главный роутер API v1."""
 from fastapi import APIRouter
 
-from app.api.v1 import communities, members, roles, posts, channels, events, subscriptions, donations, analytics
+from app.api.v1 import communities, members, roles, posts, channels, events, subscriptions, donations, analytics, exports, media
 
 api_router = APIRouter()
 
@@ -14,3 +14,5 @@ api_router.include_router(events.router, tags=["Events"])
 api_router.include_router(subscriptions.router, tags=["Subscriptions"])
 api_router.include_router(donations.router, tags=["Donations"])
 api_router.include_router(analytics.router, tags=["Analytics"])
+api_router.include_router(exports.router, tags=["Exports"])
+api_router.include_router(media.router, tags=["Media"])
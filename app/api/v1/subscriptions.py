@@ -31,4 +31,4 @@ async def subscribe(id: uuid.UUID, data: SubscriptionCreate, user: UserContext =
 def _build_service(container, session):
     from app.services.subscription_service import SubscriptionService
     return SubscriptionService(subscription_repo=container.subscription_repo(session),
-                                community_repo=container.community_repo(session), event_publisher=container.event_publisher)
+                                community_repo=container.community_repo(session), event_publisher=container.session_event_publisher(session))
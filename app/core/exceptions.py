@@ -50,6 +50,11 @@ class ValidationException(AppException):
         super().__init__(message=message, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail)
 
 
+class PayloadTooLargeException(AppException):
+    def __init__(self, message: str = "Слишком большой запрос"):
+        super().__init__(message=message, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+
 class UnauthorizedException(AppException):
     def __init__(self, message: str = "Не авторизован"):
         super().__init__(message=message, status_code=status.HTTP_401_UNAUTHORIZED)
@@ -31,7 +31,7 @@ class JSONFormatter(logging.Formatter):
             log_data["request_id"] = record.request_id
 
         for key in ("user_id", "community_id", "action", "duration_ms",
-                     "status_code", "method", "path"):
+                     "status_code", "method", "path", "metrics"):
             if hasattr(record, key):
                 log_data[key] = getattr(record, key)
 
@@ -1,5 +1,6 @@
 """RBAC — контроль доступа на основе ролей и прав."""
-from __future__ import annotations
+# Без `from __future__ import annotations`: FastAPI разбирает сигнатуру RBACChecker.__call__ у экземпляра,
+# где строковую аннотацию `Request` не в чем разрешить, — request становился обязательным query-параметром
 import uuid
 from enum import Enum
 
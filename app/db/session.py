@@ -1,6 +1,6 @@
 """Сессия и движок БД (async SQLAlchemy 2.0)."""
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable
 
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
@@ -38,6 +38,29 @@ def create_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSessi
 engine = create_engine()
 async_session_factory = create_session_factory(engine)
 
+AFTER_COMMIT_KEY = "after_commit"
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """Действие вне БД (индексы в Redis и т.п.), которое выполняется только после коммита сессии.
+
+    Выполняет run_after_commit в session scope после успешного commit; при откате действия отбрасываются.
+    """
+    session.info.setdefault(AFTER_COMMIT_KEY, []).append(callback)
+
+
+def discard_after_commit(session: AsyncSession) -> None:
+    session.info.pop(AFTER_COMMIT_KEY, None)
+
+
+async def run_after_commit(session: AsyncSession) -> None:
+    """Отложенные действия по порядку; ошибка одного не отменяет остальные — данные уже закоммичены."""
+    for callback in session.info.pop(AFTER_COMMIT_KEY, []):
+        try:
+            await callback()
+        except Exception as e:
+            logger.warning(f"Ошибка действия после коммита: {e!r}", extra={"action": "after_commit_failed"})
+
 
 @asynccontextmanager
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
@@ -46,8 +69,11 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
             yield session
             await session.commit()
         except Exception:
+            discard_after_commit(session)
             await session.rollback()
             raise
+        else:
+            await run_after_commit(session)
         finally:
             await session.close()
 
@@ -58,5 +84,8 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             yield session
             await session.commit()
         except Exception:
+            discard_after_commit(session)
             await session.rollback()
             raise
+        else:
+            await run_after_commit(session)
@@ -7,10 +7,14 @@ from decimal import Decimal
 from typing import List, Optional
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
+    Computed,
+    DDL,
     DateTime,
     Enum as SAEnum,
+    Float,
     ForeignKey,
     Index,
     Integer,
@@ -20,11 +24,19 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
     JSON,
+    LargeBinary,
+    event,
+    func,
+    text,
 )
-from sqlalchemy.dialects.postgresql import UUID as PGUUID, ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, ARRAY, TSVECTOR
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
+# Конфигурация полнотекстового поиска: названия и описания на разных языках, поэтому без стемминга.
+SEARCH_CONFIG = "simple"
+
+
 class Base(DeclarativeBase):
     """Базовая модель."""
     pass
@@ -67,16 +79,28 @@ class Community(Base, TimestampMixin):
         nullable=False,
     )
     status: Mapped[str] = mapped_column(
-        SAEnum("active", "suspended", "archived", name="community_status_enum", create_constraint=False),
+        SAEnum("active", "suspended", "archived", "deleted", name="community_status_enum", create_constraint=False),
         default="active",
         nullable=False,
     )
+    # Удалённое сообщество скрыто сразу, а строки дочерних таблиц удаляет CommunityPurger
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     owner_id: Mapped[uuid.UUID] = mapped_column(PGUUID(as_uuid=True), nullable=False, index=True)
     avatar_url: Mapped[Optional[str]] = mapped_column(String(1024), nullable=True)
     banner_url: Mapped[Optional[str]] = mapped_column(String(1024), nullable=True)
     settings: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True, default=dict)
     member_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     post_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Название весит больше описания (A > B); колонку вычисляет сама БД
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     members: Mapped[List["Member"]] = relationship("Member", back_populates="community", lazy="selectin", cascade="all, delete-orphan")
     roles: Mapped[List["Role"]] = relationship("Role", back_populates="community", lazy="selectin", cascade="all, delete-orphan")
@@ -89,9 +113,16 @@ class Community(Base, TimestampMixin):
     __table_args__ = (
         Index("idx_communities_status", "status"),
         Index("idx_communities_type_status", "community_type", "status"),
+        Index("idx_communities_deleted", "deleted_at", postgresql_where=text("status = 'deleted'")),
+        Index("idx_communities_search", "search_vector", postgresql_using="gin"),
+        # Поиск с опечатками: name % :query
+        Index("idx_communities_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
     )
 
 
+event.listen(Community.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
 class Role(Base, TimestampMixin):
     __tablename__ = "roles"
 
@@ -148,6 +179,9 @@ class Post(Base, TimestampMixin):
     author_id: Mapped[uuid.UUID] = mapped_column(PGUUID(as_uuid=True), nullable=False, index=True)
     title: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     content: Mapped[str] = mapped_column(Text, nullable=False)
+    excerpt: Mapped[Optional[str]] = mapped_column(String(300), nullable=True)
+    word_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    has_media: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     status: Mapped[str] = mapped_column(
         SAEnum("draft", "published", "archived", "moderated", name="post_status_enum", create_constraint=False),
         default="published",
@@ -159,6 +193,9 @@ class Post(Base, TimestampMixin):
     comment_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     view_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     published_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Заполняет PostService при записи title/content: генерируемая колонка пересчитывалась бы
+    # при каждом обновлении счётчиков
+    search_vector: Mapped[Optional[str]] = mapped_column(TSVECTOR, nullable=True, deferred=True)
 
     community: Mapped["Community"] = relationship("Community", back_populates="posts")
     channel: Mapped[Optional["Channel"]] = relationship("Channel", back_populates="posts")
@@ -168,6 +205,9 @@ class Post(Base, TimestampMixin):
         Index("idx_posts_author", "author_id"),
         Index("idx_posts_published", "published_at"),
         Index("idx_posts_community_pinned", "community_id", "is_pinned"),
+        # Поиск ссылок на медиа при сверке бакета (media_urls && ARRAY[...])
+        Index("idx_posts_media_urls", "media_urls", postgresql_using="gin"),
+        Index("idx_posts_search", "search_vector", postgresql_using="gin"),
     )
 
 
@@ -300,3 +340,125 @@ class Donation(Base, TimestampMixin):
         Index("idx_donations_donor", "donor_id"),
         Index("idx_donations_status", "status"),
     )
+
+
+class OutboxEvent(Base):
+    """Transactional outbox: событие пишется в той же транзакции, что и доменное изменение."""
+    __tablename__ = "outbox"
+
+    id: Mapped[uuid.UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    routing_key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    aggregate_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False,
+    )
+    # Relay не берёт событие раньше этого момента: окно коалесцирования update-событий.
+    # Время берётся из БД, как и в условиях relay, чтобы не зависеть от часов приложения.
+    available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now(), nullable=False)
+    published_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(String(1000), nullable=True)
+    # Событие припарковано после OUTBOX_MAX_ATTEMPTS неудачных попыток: relay его больше не берёт
+    failed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("idx_outbox_pending", "created_at", postgresql_where=text("published_at IS NULL")),
+        Index("idx_outbox_pending_aggregate", "aggregate_id", postgresql_where=text("published_at IS NULL")),
+        Index("idx_outbox_published", "published_at"),
+        Index("idx_outbox_failed", "failed_at", postgresql_where=text("failed_at IS NOT NULL")),
+    )
+
+
+class ProcessedEvent(Base):
+    """Входящие события, уже применённые обработчиком: идемпотентность по event_id."""
+    __tablename__ = "processed_events"
+
+    consumer: Mapped[str] = mapped_column(String(100), primary_key=True)
+    event_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    processed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False,
+    )
+
+    __table_args__ = (
+        Index("idx_processed_events_processed_at", "processed_at"),
+    )
+
+
+class DeadLetterEvent(Base):
+    """Входящие события, которые не удалось обработать после всех попыток."""
+    __tablename__ = "dead_letter_events"
+
+    id: Mapped[uuid.UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    consumer: Mapped[str] = mapped_column(String(100), nullable=False)
+    event_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    event_type: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    source: Mapped[str] = mapped_column(String(255), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    error: Mapped[str] = mapped_column(String(1000), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False,
+    )
+
+    __table_args__ = (
+        Index("idx_dead_letter_events_consumer", "consumer", "created_at"),
+    )
+
+
+class MediaObject(Base):
+    """Индекс content-addressed медиа: один объект S3 на содержимое, ссылки считаются."""
+    __tablename__ = "media_objects"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    content_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    ref_count: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+    # Момент, когда ссылок не осталось: reaper удаляет объект после grace-периода.
+    orphaned_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Имена готовых вариантов изображения; NULL — ещё не построены, [] — построить нельзя.
+    variants: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    # Кто-то из воркеров строит варианты: до истечения MEDIA_VARIANT_CLAIM_TTL обход строку не берёт.
+    variants_claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    variant_attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False,
+    )
+
+    __table_args__ = (
+        Index("idx_media_objects_orphaned", "orphaned_at", postgresql_where=text("ref_count = 0")),
+        Index("idx_media_objects_variants_pending", "created_at", postgresql_where=text("variants IS NULL")),
+    )
+
+
+class CommunitySignature(Base):
+    """MinHash-подпись множества участников сообщества (пересчитывается джобой рекомендаций)."""
+    __tablename__ = "community_signatures"
+
+    community_id: Mapped[uuid.UUID] = mapped_column(
+        PGUUID(as_uuid=True), ForeignKey("communities.id", ondelete="CASCADE"), primary_key=True,
+    )
+    # uint64 × RECOMMENDATIONS_NUM_PERM, little-endian
+    signature: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    member_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class CommunitySimilarity(Base):
+    """Top-K похожих сообществ по оценке Jaccard общих участников."""
+    __tablename__ = "community_similarities"
+
+    community_id: Mapped[uuid.UUID] = mapped_column(
+        PGUUID(as_uuid=True), ForeignKey("communities.id", ondelete="CASCADE"), primary_key=True,
+    )
+    similar_id: Mapped[uuid.UUID] = mapped_column(
+        PGUUID(as_uuid=True), ForeignKey("communities.id", ondelete="CASCADE"), primary_key=True,
+    )
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("idx_community_similarities_rank", "community_id", "score"),
+        # Каскадное удаление по similar_id при очистке сообщества
+        Index("idx_community_similarities_similar", "similar_id"),
+    )
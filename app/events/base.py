@@ -3,28 +3,55 @@ from __future__ import annotations
 import uuid
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
-from typing import Any, Optional
-
-from pydantic import BaseModel
+from typing import Any, Optional, Sequence
 
 from app.events.event_types import EventType
 
 
-class DomainEvent(BaseModel):
-    """Доменное событие."""
-    event_id: str = ""
-    event_type: str
-    timestamp: str = ""
-    service: str = "community-service"
-    payload: dict[str, Any] = {}
-    metadata: dict[str, Any] = {}
+class DomainEvent:
+    """Доменное событие: лёгкий конверт без валидации, создаётся на каждый publish."""
+
+    __slots__ = ("event_id", "event_type", "timestamp", "service", "aggregate_id", "payload", "metadata")
+
+    def __init__(
+        self,
+        event_type: str,
+        event_id: str = "",
+        timestamp: str = "",
+        service: str = "community-service",
+        aggregate_id: str = "",
+        payload: Optional[dict[str, Any]] = None,
+        metadata: Optional[dict[str, Any]] = None,
+    ):
+        self.event_type = event_type
+        self.event_id = event_id or str(uuid.uuid4())
+        self.timestamp = timestamp or datetime.now(timezone.utc).isoformat()
+        self.service = service
+        self.aggregate_id = aggregate_id
+        self.payload = payload if payload is not None else {}
+        self.metadata = metadata if metadata is not None else {}
 
-    def __init__(self, **data):
-        super().__init__(**data)
-        if not self.event_id:
-            self.event_id = str(uuid.uuid4())
-        if not self.timestamp:
-            self.timestamp = datetime.now(timezone.utc).isoformat()
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, DomainEvent) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"DomainEvent({self.event_type!r}, event_id={self.event_id!r})"
+
+    @property
+    def partition_key(self) -> str:
+        """Ключ сообщения: id агрегата, для событий без агрегата — id события."""
+        return self.aggregate_id or self.event_id
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "event_id": self.event_id,
+            "event_type": self.event_type,
+            "timestamp": self.timestamp,
+            "service": self.service,
+            "aggregate_id": self.aggregate_id,
+            "payload": self.payload,
+            "metadata": self.metadata,
+        }
 
 
 class EventPublisher(ABC):
@@ -38,10 +65,43 @@ class EventPublisher(ABC):
     async def disconnect(self) -> None:
         ...
 
+    @property
+    @abstractmethod
+    def is_connected(self) -> bool:
+        ...
+
     @abstractmethod
     async def publish(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
+        """Публикация без исключений: ошибки логируются."""
+        ...
+
+    @abstractmethod
+    async def send(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
+        """Доставка в брокер; ошибки пробрасываются вызывающему (outbox relay)."""
         ...
 
+    async def submit(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
+        """Передача события брокеру для publish(); буферизующие реализации возвращаются после постановки в очередь."""
+        await self.send(event, routing_key)
+
+    async def send_many(
+        self, items: Sequence[tuple[DomainEvent, Optional[str]]],
+    ) -> tuple[int, Optional[Exception]]:
+        """Доставка пачки по порядку.
+
+        Возвращает число доставленных событий (префикс пачки) и ошибку, на которой остановились.
+        """
+        for index, (event, routing_key) in enumerate(items):
+            try:
+                await self.send(event, routing_key)
+            except Exception as exc:
+                return index, exc
+        return len(items), None
+
+    async def flush(self, timeout: float) -> None:
+        """Дождаться отправки буферизованных событий (не дольше timeout секунд)."""
+        return None
+
     async def publish_event(
         self,
         event_type: EventType,
@@ -50,6 +110,7 @@ class EventPublisher(ABC):
     ) -> None:
         event = DomainEvent(
             event_type=event_type.value,
+            aggregate_id=str(payload.get(event_type.aggregate_key) or ""),
             payload=payload,
             metadata=metadata or {},
         )
@@ -0,0 +1,19 @@
+"""Фабрика для Event Consumer."""
+from typing import AsyncContextManager, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.events.consumer_base import BatchProcessor, EventConsumer, EventHandler
+from app.events.kafka_consumer import KafkaEventConsumer
+from app.events.rabbitmq_consumer import RabbitMQEventConsumer
+
+
+def create_event_consumer(
+    session_scope: Callable[[], AsyncContextManager[AsyncSession]],
+    handlers: list[EventHandler],
+) -> EventConsumer:
+    processor = BatchProcessor(session_scope, handlers)
+    if settings.EVENT_BROKER_TYPE.lower() == "rabbitmq":
+        return RabbitMQEventConsumer(processor)
+    return KafkaEventConsumer(processor)
@@ -0,0 +1,235 @@
+"""Каркас входящих событий: пачечные обработчики, идемпотентность и dead letters."""
+from __future__ import annotations
+import asyncio
+from abc import ABC, abstractmethod
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import AsyncContextManager, Callable, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.domain.models import DeadLetterEvent
+from app.events.base import DomainEvent
+from app.events.serialization import decode_event
+from app.repositories.consumer_repo import ConsumerRepository
+
+logger = get_logger(__name__)
+
+DECODER_CONSUMER = "decoder"
+MAX_BACKOFF = 30.0
+RETRY_BASE_DELAY = 0.2
+PURGE_INTERVAL = 3600.0
+
+
+@dataclass
+class InboundMessage:
+    event: Optional[DomainEvent]
+    raw: bytes
+    source: str
+
+    @classmethod
+    def decode(cls, raw: bytes, source: str) -> "InboundMessage":
+        try:
+            return cls(decode_event(raw), raw, source)
+        except (ValueError, KeyError, TypeError):
+            return cls(None, raw, source)
+
+
+@dataclass
+class ConsumerMetrics:
+    received: int = 0
+    processed: int = 0
+    duplicates: int = 0
+    dead_lettered: int = 0
+    batches: int = 0
+    retries: int = 0
+
+
+class EventHandler(ABC):
+    """Обработчик получает все события своих типов из пачки — для set-based SQL.
+
+    handle вызывается внутри транзакции, в которой события отмечаются обработанными:
+    побочные эффекты в БД и отметка об обработке коммитятся вместе.
+    """
+
+    name: str
+    event_types: tuple[str, ...]
+
+    @abstractmethod
+    async def handle(self, session: AsyncSession, events: Sequence[DomainEvent]) -> None:
+        ...
+
+
+class BatchProcessor:
+    """Раздаёт пачку обработчикам. Ошибка пачки — повторы, затем поштучно; не прошедшие — в dead letters.
+
+    Исключение наружу означает, что пачку нельзя подтверждать (например, БД недоступна).
+    """
+
+    def __init__(
+        self,
+        session_scope: Callable[[], AsyncContextManager[AsyncSession]],
+        handlers: Sequence[EventHandler],
+        max_attempts: int = settings.CONSUMER_MAX_ATTEMPTS,
+    ):
+        self._session_scope = session_scope
+        self._handlers = {event_type: handler for handler in handlers for event_type in handler.event_types}
+        self._max_attempts = max(1, max_attempts)
+        self.metrics = ConsumerMetrics()
+
+    @property
+    def event_types(self) -> list[str]:
+        return sorted(self._handlers)
+
+    async def process(self, messages: Sequence[InboundMessage]) -> None:
+        self.metrics.received += len(messages)
+        self.metrics.batches += 1
+        undecodable = [(message, "не удалось разобрать сообщение") for message in messages if message.event is None]
+
+        routed: dict[str, list[InboundMessage]] = {}
+        for message in messages:
+            if message.event is None:
+                continue
+            handler = self._handlers.get(message.event.event_type)
+            if handler is not None:
+                routed.setdefault(handler.name, []).append(message)
+
+        handlers = {handler.name: handler for handler in self._handlers.values()}
+        for name, batch in routed.items():
+            await self._dispatch(handlers[name], batch)
+        if undecodable:
+            await self._dead_letter(DECODER_CONSUMER, undecodable)
+
+    async def purge_processed(self) -> int:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.CONSUMER_IDEMPOTENCY_RETENTION_HOURS)
+        async with self._session_scope() as session:
+            return await ConsumerRepository(session).purge_processed(cutoff)
+
+    async def _dispatch(self, handler: EventHandler, batch: list[InboundMessage]) -> None:
+        for attempt in range(1, self._max_attempts + 1):
+            try:
+                await self._apply(handler, batch)
+                return
+            except Exception as e:
+                self.metrics.retries += 1
+                logger.warning(f"Consumer {handler.name}: ошибка пачки (попытка {attempt}): {e}",
+                               extra={"action": "consumer_batch_failed"})
+                if attempt < self._max_attempts:
+                    await asyncio.sleep(min(RETRY_BASE_DELAY * 2 ** attempt, MAX_BACKOFF))
+
+        # Пачка так и не прошла — ищем «ядовитые» события поштучно.
+        failed: list[tuple[InboundMessage, str]] = []
+        for message in batch:
+            try:
+                await self._apply(handler, [message])
+            except Exception as e:
+                failed.append((message, f"{type(e).__name__}: {e}"))
+        if failed:
+            await self._dead_letter(handler.name, failed)
+
+    async def _apply(self, handler: EventHandler, batch: list[InboundMessage]) -> None:
+        events = list({message.event.event_id: message.event for message in batch}.values())
+        async with self._session_scope() as session:
+            fresh_ids = await ConsumerRepository(session).claim(handler.name, [event.event_id for event in events])
+            fresh = [event for event in events if event.event_id in fresh_ids]
+            if fresh:
+                await handler.handle(session, fresh)
+        self.metrics.processed += len(fresh)
+        self.metrics.duplicates += len(batch) - len(fresh)
+
+    async def _dead_letter(self, consumer: str, failed: list[tuple[InboundMessage, str]]) -> None:
+        rows = [
+            DeadLetterEvent(
+                consumer=consumer,
+                event_id=message.event.event_id if message.event else None,
+                event_type=message.event.event_type if message.event else None,
+                source=message.source[:255],
+                payload=message.event.to_dict() if message.event else {"raw": message.raw.decode("utf-8", "replace")},
+                error=error[:1000],
+            )
+            for message, error in failed
+        ]
+        async with self._session_scope() as session:
+            await ConsumerRepository(session).add_dead_letters(rows)
+        self.metrics.dead_lettered += len(rows)
+        logger.error(f"Consumer {consumer}: события отправлены в dead letters: {len(rows)}",
+                     extra={"action": "consumer_dead_letter", "metrics": asdict(self.metrics)})
+
+
+class EventConsumer(ABC):
+    """Фоновый цикл: подключение с backoff, чтение пачек, периодическая чистка идемпотентности."""
+
+    def __init__(self, processor: BatchProcessor):
+        self._processor = processor
+        self._stopping: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def metrics(self) -> ConsumerMetrics:
+        return self._processor.metrics
+
+    async def start(self) -> None:
+        self._stopping = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"{type(self).__name__}-run"),
+            asyncio.create_task(self._maintenance(), name=f"{type(self).__name__}-maintenance"),
+        ]
+
+    async def stop(self) -> None:
+        if self._stopping is None:
+            return
+        self._stopping.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._stopping = None
+        logger.info(f"{type(self).__name__} остановлен", extra={"metrics": asdict(self.metrics)})
+
+    @abstractmethod
+    async def _connect(self) -> None:
+        ...
+
+    @abstractmethod
+    async def _consume(self) -> None:
+        """Одна итерация: прочитать пачку, обработать, подтвердить."""
+        ...
+
+    @abstractmethod
+    async def _close(self) -> None:
+        ...
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while not self._stopping.is_set():
+            try:
+                await self._connect()
+                backoff = 1.0
+                while not self._stopping.is_set():
+                    await self._consume()
+            except ImportError as e:
+                logger.warning(f"{type(self).__name__}: клиент брокера не установлен ({e}), consumer не запущен")
+                return
+            except Exception as e:
+                logger.error(f"{type(self).__name__}: {e}; переподключение через {backoff:.0f} с")
+                with suppress(Exception):
+                    await self._close()
+                await self._sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+        with suppress(Exception):
+            await self._close()
+
+    async def _maintenance(self) -> None:
+        while not self._stopping.is_set():
+            await self._sleep(PURGE_INTERVAL)
+            if self._stopping.is_set():
+                return
+            try:
+                await self._processor.purge_processed()
+            except Exception as e:
+                logger.warning(f"Не удалось очистить processed_events: {e}")
+
+    async def _sleep(self, seconds: float) -> None:
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
@@ -3,11 +3,14 @@ from enum import Enum
 
 
 class EventType(str, Enum):
+    """Тип события; `aggregate_key` — поле payload с id агрегата."""
+
     COMMUNITY_CREATED = "community.created"
     COMMUNITY_UPDATED = "community.updated"
     COMMUNITY_DELETED = "community.deleted"
     MEMBER_JOINED = "member.joined"
     MEMBER_LEFT = "member.left"
+    MEMBERS_IMPORTED = "member.imported"
     POST_CREATED = "post.created"
     POST_UPDATED = "post.updated"
     POST_DELETED = "post.deleted"
@@ -17,3 +20,41 @@ class EventType(str, Enum):
     EVENT_CREATED = "event.created"
     EVENT_UPDATED = "event.updated"
     EVENT_DELETED = "event.deleted"
+
+    @property
+    def aggregate_key(self) -> str:
+        return AGGREGATE_KEYS[self]
+
+
+# Поле payload, по которому события ключуются в брокере.
+# Один агрегат -> одна партиция -> сохранённый порядок и возможность log compaction.
+AGGREGATE_KEYS: dict[EventType, str] = {
+    EventType.COMMUNITY_CREATED: "community_id",
+    EventType.COMMUNITY_UPDATED: "community_id",
+    EventType.COMMUNITY_DELETED: "community_id",
+    EventType.MEMBER_JOINED: "community_id",
+    EventType.MEMBER_LEFT: "community_id",
+    EventType.MEMBERS_IMPORTED: "community_id",
+    EventType.POST_CREATED: "post_id",
+    EventType.POST_UPDATED: "post_id",
+    EventType.POST_DELETED: "post_id",
+    EventType.DONATION_RECEIVED: "community_id",
+    EventType.SUBSCRIPTION_STARTED: "community_id",
+    EventType.SUBSCRIPTION_ENDED: "community_id",
+    EventType.EVENT_CREATED: "event_id",
+    EventType.EVENT_UPDATED: "event_id",
+    EventType.EVENT_DELETED: "event_id",
+}
+
+# Update-события с payload["updated_fields"]: их можно сливать в окне EVENT_COALESCE_WINDOWS_MS.
+COALESCABLE_EVENT_TYPES: frozenset[EventType] = frozenset({
+    EventType.COMMUNITY_UPDATED,
+    EventType.POST_UPDATED,
+    EventType.EVENT_UPDATED,
+})
+
+
+class InboundEventType(str, Enum):
+    """События других сервисов, на которые подписан community-service."""
+
+    USER_DELETED = "user.deleted"
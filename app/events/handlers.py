@@ -0,0 +1,64 @@
+"""Обработчики входящих событий других сервисов."""
+from __future__ import annotations
+import uuid
+from typing import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logging import get_logger
+from app.events.base import DomainEvent
+from app.events.consumer_base import EventHandler
+from app.events.event_types import InboundEventType
+from app.infrastructure.cache.cache_keys import CacheKeys
+from app.infrastructure.cache.redis_client import RedisClient
+from app.infrastructure.media.keys import media_url_prefix
+from app.repositories.community_repo import CommunityRepository
+from app.repositories.media_repo import MediaRepository
+from app.repositories.member_repo import MemberRepository
+from app.repositories.post_repo import PostRepository
+from app.repositories.subscription_repo import SubscriptionRepository
+from app.services.leaderboard import CommunityLeaderboard, SessionLeaderboard
+
+logger = get_logger(__name__)
+
+
+class UserDeletedHandler(EventHandler):
+    """Удаление пользователя в auth-сервисе: участие, подписки и посты во всех сообществах.
+
+    Вся пачка — по одному DELETE на таблицу и один UPDATE счётчиков. Участие владельцев
+    не удаляется: сообщество не должно остаться без владельца.
+    """
+
+    name = "user-purge"
+    event_types = (InboundEventType.USER_DELETED.value,)
+
+    def __init__(self, cache: RedisClient, leaderboard: CommunityLeaderboard):
+        self._cache = cache
+        self._leaderboard = leaderboard
+
+    async def handle(self, session: AsyncSession, events: Sequence[DomainEvent]) -> None:
+        user_ids = sorted({uuid.UUID(str(event.payload["user_id"])) for event in events})
+
+        members = await MemberRepository(session).purge_users(user_ids)
+        await MediaRepository(session).release_author_posts(user_ids, media_url_prefix())
+        posts = await PostRepository(session).purge_authors(user_ids)
+        subscriptions = await SubscriptionRepository(session).purge_users(user_ids)
+        await CommunityRepository(session).decrement_counters(members, posts)
+        # Сессия — session scope консьюмера: рейтинги меняются после коммита пачки
+        leaderboard = SessionLeaderboard(self._leaderboard, session)
+        for community_id, count in members.items():
+            await leaderboard.members_changed(community_id, -count)
+
+        communities = set(members) | set(posts) | subscriptions
+        if communities:
+            await self._cache.delete(*(
+                key for community_id in communities
+                for key in (CacheKeys.community(str(community_id)), CacheKeys.community_fieldsets(str(community_id)),
+                            CacheKeys.community_nicknames(str(community_id)))
+            ))
+        logger.info("Пользователи удалены из сообществ", extra={
+            "action": "users_purged", "metrics": {
+                "users": len(user_ids), "communities": len(communities),
+                "members": sum(members.values()), "posts": sum(posts.values()),
+            },
+        })
@@ -0,0 +1,68 @@
+"""Kafka Event Consumer."""
+from __future__ import annotations
+import asyncio
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.events.consumer_base import BatchProcessor, EventConsumer, InboundMessage
+
+logger = get_logger(__name__)
+
+POLL_TIMEOUT_MS = 1000
+
+
+class KafkaEventConsumer(EventConsumer):
+    """Партиции обрабатываются параллельно (не больше CONSUMER_CONCURRENCY), внутри — по порядку.
+
+    Offset партиции коммитится только после успешной обработки её пачки; при ошибке
+    consumer откатывается на начало пачки и перечитывает её.
+    """
+
+    def __init__(self, processor: BatchProcessor):
+        super().__init__(processor)
+        self._consumer = None
+        self._semaphore = asyncio.Semaphore(settings.CONSUMER_CONCURRENCY)
+        self._failed = False
+
+    async def _connect(self) -> None:
+        from aiokafka import AIOKafkaConsumer
+        consumer = AIOKafkaConsumer(
+            *settings.CONSUMER_KAFKA_TOPICS,
+            bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+            group_id=settings.CONSUMER_GROUP_ID,
+            enable_auto_commit=False,
+            auto_offset_reset="earliest",
+            max_poll_records=settings.CONSUMER_BATCH_SIZE,
+        )
+        await consumer.start()
+        self._consumer = consumer
+        logger.info("Kafka consumer подключён", extra={"metrics": {"topics": settings.CONSUMER_KAFKA_TOPICS}})
+
+    async def _close(self) -> None:
+        consumer, self._consumer = self._consumer, None
+        if consumer is not None:
+            await consumer.stop()
+
+    async def _consume(self) -> None:
+        batches = await self._consumer.getmany(timeout_ms=POLL_TIMEOUT_MS, max_records=settings.CONSUMER_BATCH_SIZE)
+        if not batches:
+            return
+        self._failed = False
+        await asyncio.gather(*(self._process_partition(tp, records) for tp, records in batches.items()))
+        if self._failed:
+            await self._sleep(1.0)
+
+    async def _process_partition(self, tp, records) -> None:
+        async with self._semaphore:
+            messages = [
+                InboundMessage.decode(record.value, f"{tp.topic}/{tp.partition}@{record.offset}")
+                for record in records
+            ]
+            try:
+                await self._processor.process(messages)
+            except Exception as e:
+                self._failed = True
+                logger.error(f"Kafka consumer: пачка {tp.topic}/{tp.partition} не обработана: {e}")
+                self._consumer.seek(tp, records[0].offset)
+                return
+            await self._consumer.commit({tp: records[-1].offset + 1})
@@ -1,34 +1,96 @@
 """Kafka Event Publisher."""
 from __future__ import annotations
+import asyncio
 from contextlib import suppress
-import json
-from typing import Optional
+from dataclasses import asdict, dataclass
+from functools import partial
+from typing import Optional, Sequence
 
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.events.base import DomainEvent, EventPublisher
+from app.events.serialization import content_type, encode_event, wire_format
+from app.events.spool import DiskSpool
 
 logger = get_logger(__name__)
 
+BACKPRESSURE_POLICIES = ("block", "drop_oldest", "spill")
+COMPRESSION_PREFERENCE = ("zstd", "lz4", "gzip")
+SENDER_DRAIN_LIMIT = 500
+
+
+@dataclass
+class PublisherMetrics:
+    enqueued: int = 0
+    sent: int = 0
+    failed: int = 0
+    dropped: int = 0
+    spilled: int = 0
+    queue_depth: int = 0
+
+
+def resolve_compression(requested: str) -> Optional[str]:
+    """Кодек сжатия: явно заданный (если доступен) или лучший из установленных при `auto`."""
+    from aiokafka import codec
+
+    available = {name for name in COMPRESSION_PREFERENCE if getattr(codec, f"has_{name}")()}
+    requested = requested.lower()
+    if requested in ("", "none"):
+        return None
+    if requested == "auto":
+        return next((name for name in COMPRESSION_PREFERENCE if name in available), None)
+    if requested not in available:
+        fallback = next((name for name in COMPRESSION_PREFERENCE if name in available), None)
+        logger.warning(f"Kafka: кодек {requested} недоступен, используется {fallback}")
+        return fallback
+    return requested
+
 
 class KafkaEventPublisher(EventPublisher):
-    def __init__(self):
+    """Синхронный режим: publish ждёт подтверждения брокера.
+
+    Асинхронный (KAFKA_ASYNC_MODE): publish кладёт событие в ограниченную очередь,
+    фоновый sender отдаёт его producer.send() без ожидания ack — пачки собирает
+    aiokafka (linger_ms / max_batch_size). При переполнении очереди действует
+    KAFKA_BACKPRESSURE: block, drop_oldest или spill (в дисковый spool, его отдаёт
+    SpoolingEventPublisher). Туда же уходят недоставленные в async-режиме события.
+    """
+
+    def __init__(self, spool: Optional[DiskSpool] = None):
         self._producer = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._sender_task: Optional[asyncio.Task] = None
+        self._in_flight: set[asyncio.Future] = set()
+        self._spilling: set[asyncio.Task] = set()
+        self._spool = spool
+        self._backpressure = settings.KAFKA_BACKPRESSURE
+        if self._backpressure not in BACKPRESSURE_POLICIES:
+            logger.warning(f"Неизвестная политика backpressure: {self._backpressure}, используется block")
+            self._backpressure = "block"
+        elif self._backpressure == "spill" and spool is None:
+            logger.warning("Backpressure spill требует EVENT_SPOOL_ENABLED, используется block")
+            self._backpressure = "block"
+        self.metrics = PublisherMetrics()
 
     async def connect(self) -> None:
         producer = None
         try:
             from aiokafka import AIOKafkaProducer
+            from aiokafka.partitioner import DefaultPartitioner
+            compression = resolve_compression(settings.KAFKA_COMPRESSION)
             producer = AIOKafkaProducer(
                 bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
-                value_serializer=lambda v: json.dumps(v, default=str).encode("utf-8"),
                 key_serializer=lambda k: k.encode("utf-8") if k else None,
                 acks="all",
                 enable_idempotence=True,
+                compression_type=compression,
+                partitioner=DefaultPartitioner(),
+                linger_ms=settings.KAFKA_LINGER_MS,
+                max_batch_size=settings.KAFKA_MAX_BATCH_SIZE,
             )
             await producer.start()
             self._producer = producer
-            logger.info("Kafka producer подключён")
+            logger.info(f"Kafka producer подключён (compression={compression})")
         except ImportError:
             logger.warning("aiokafka не установлен, Kafka publisher в stub-режиме")
             self._producer = None
@@ -39,25 +101,192 @@ class KafkaEventPublisher(EventPublisher):
             logger.error(f"Не удалось подключиться к Kafka: {e}")
             self._producer = None
 
+        if self._producer is not None and settings.KAFKA_ASYNC_MODE:
+            self._queue = asyncio.Queue(maxsize=settings.KAFKA_QUEUE_SIZE)
+            self._start_sender()
+
     async def disconnect(self) -> None:
+        if self._sender_task:
+            task, self._sender_task = self._sender_task, None
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        if self._queue is not None and not self._queue.empty():
+            await self._spill_queue()
+        if self._spilling:
+            await asyncio.gather(*list(self._spilling), return_exceptions=True)
+        self._queue = None
         if self._producer:
             await self._producer.stop()
             self._producer = None
-            logger.info("Kafka producer отключён")
+            logger.info("Kafka producer отключён", extra={"metrics": asdict(self.metrics)})
 
-    async def publish(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
-        topic = f"{settings.KAFKA_TOPIC_PREFIX}.{routing_key or event.event_type}"
+    async def flush(self, timeout: float) -> None:
+        if self._producer is None:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Kafka: очередь не успела опустеть до дедлайна", extra={"metrics": asdict(self.metrics)})
+
+    @property
+    def is_connected(self) -> bool:
+        return self._producer is not None
 
+    async def publish(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
         if self._producer is None:
             logger.debug(f"Kafka stub: событие {event.event_type}", extra={"event_id": event.event_id})
             return
 
         try:
-            await self._producer.send_and_wait(
-                topic=topic,
-                value=event.model_dump(),
-                key=event.event_id,
-            )
-            logger.info("Событие опубликовано в Kafka", extra={"event_type": event.event_type, "event_id": event.event_id})
+            await self.submit(event, routing_key)
+        except Exception as e:
+            logger.error(f"Ошибка публикации в Kafka: {e}", extra={"event_type": event.event_type})
+
+    async def submit(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
+        if self._queue is not None:
+            await self._enqueue((event, routing_key))
+            return
+        await self.send(event, routing_key)
+
+    async def send(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
+        if self._producer is None:
+            raise RuntimeError("Kafka producer не подключён")
+
+        await self._producer.send_and_wait(**self._record(event, routing_key))
+        logger.info("Событие опубликовано в Kafka", extra={"event_type": event.event_type, "event_id": event.event_id})
+
+    async def send_many(
+        self, items: Sequence[tuple[DomainEvent, Optional[str]]],
+    ) -> tuple[int, Optional[Exception]]:
+        """Пачка уходит конвейером: все send() сразу, затем ожидание ack по порядку."""
+        if self._producer is None:
+            return 0, RuntimeError("Kafka producer не подключён")
+
+        futures: list[asyncio.Future] = []
+        enqueue_error: Optional[Exception] = None
+        for event, routing_key in items:
+            try:
+                futures.append(await self._producer.send(**self._record(event, routing_key)))
+            except Exception as exc:
+                enqueue_error = exc
+                break
+
+        for index, future in enumerate(futures):
+            try:
+                await future
+            except Exception as exc:
+                return index, exc
+        return len(futures), enqueue_error
+
+    @staticmethod
+    def _record(event: DomainEvent, routing_key: Optional[str]) -> dict:
+        routing_key = routing_key or event.event_type
+        fmt = wire_format(routing_key)
+        return {
+            "topic": f"{settings.KAFKA_TOPIC_PREFIX}.{routing_key}",
+            "value": encode_event(event, fmt),
+            "key": event.partition_key,
+            "headers": [("content-type", content_type(fmt).encode("ascii"))],
+        }
+
+    async def _enqueue(self, item: tuple[DomainEvent, Optional[str]]) -> None:
+        if self._queue.full():
+            if self._backpressure == "drop_oldest":
+                with suppress(asyncio.QueueEmpty):
+                    dropped, _ = self._queue.get_nowait()
+                    self._queue.task_done()
+                    self.metrics.dropped += 1
+                    logger.warning("Kafka: очередь переполнена, событие отброшено",
+                                   extra={"event_id": dropped.event_id, "action": "kafka_dropped"})
+            elif self._backpressure == "spill":
+                await self._spill([item])
+                return
+        await self._queue.put(item)
+        self.metrics.enqueued += 1
+        self.metrics.queue_depth = self._queue.qsize()
+
+    def _start_sender(self) -> None:
+        self._sender_task = asyncio.create_task(self._sender_loop(), name="kafka-sender")
+        self._sender_task.add_done_callback(self._on_sender_done)
+
+    def _on_sender_done(self, task: asyncio.Task) -> None:
+        """Sender не должен умирать молча: без него очередь не разбирается и block вешает publish."""
+        if task is not self._sender_task or task.cancelled() or self._queue is None:
+            return
+        logger.error(f"Kafka: sender остановился с ошибкой, перезапуск: {task.exception()!r}",
+                     extra={"action": "kafka_sender_restarted", "metrics": asdict(self.metrics)})
+        self._start_sender()
+
+    async def _sender_loop(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < SENDER_DRAIN_LIMIT and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            for event, routing_key in batch:
+                try:
+                    await self._send_nowait(event, routing_key)
+                except Exception as e:
+                    self.metrics.failed += 1
+                    logger.error(f"Kafka: событие не отправлено: {e!r}",
+                                 extra={"event_id": event.event_id, "action": "kafka_send_failed"})
+                finally:
+                    self._queue.task_done()
+            self.metrics.queue_depth = self._queue.qsize()
+
+    async def _send_nowait(self, event: DomainEvent, routing_key: Optional[str]) -> None:
+        record = self._record(event, routing_key)
+        try:
+            future = await self._producer.send(**record)
         except Exception as e:
+            self.metrics.failed += 1
             logger.error(f"Ошибка публикации в Kafka: {e}", extra={"event_type": event.event_type})
+            await self._spill([(event, routing_key)])
+            return
+        self._in_flight.add(future)
+        future.add_done_callback(partial(self._on_delivery, (event, routing_key)))
+
+    def _on_delivery(self, item: tuple[DomainEvent, Optional[str]], future: asyncio.Future) -> None:
+        self._in_flight.discard(future)
+        if future.cancelled() or future.exception() is not None:
+            self.metrics.failed += 1
+            logger.error(f"Kafka: событие не доставлено: {None if future.cancelled() else future.exception()}",
+                         extra={"event_id": item[0].event_id, "action": "kafka_delivery_failed"})
+            # Колбэк синхронный, а запись в spool идёт в пуле потоков — отдельной задачей, её ждут flush и disconnect
+            task = asyncio.ensure_future(self._spill([item]))
+            self._spilling.add(task)
+            task.add_done_callback(self._spilling.discard)
+            return
+        self.metrics.sent += 1
+
+    async def _drain(self) -> None:
+        if self._queue is not None:
+            await self._queue.join()
+        if self._in_flight:
+            await asyncio.gather(*list(self._in_flight), return_exceptions=True)
+        if self._spilling:
+            await asyncio.gather(*list(self._spilling), return_exceptions=True)
+        await self._producer.flush()
+
+    async def _spill(self, items: Sequence[tuple[DomainEvent, Optional[str]]]) -> None:
+        if self._spool is None:
+            logger.error(f"Kafka: spool отключён, потеряно событий: {len(items)}", extra={"action": "kafka_lost"})
+            return
+        for event, routing_key in items:
+            try:
+                spilled = await asyncio.to_thread(self._spool.append, event, routing_key)
+            except OSError as e:
+                # Диск переполнен или недоступен: событие теряется, но sender и колбэки доставки живут дальше
+                logger.error(f"Kafka: не удалось записать событие в spool: {e}",
+                             extra={"event_id": event.event_id, "action": "kafka_lost"})
+                continue
+            if spilled:
+                self.metrics.spilled += 1
+
+    async def _spill_queue(self) -> None:
+        items = []
+        while not self._queue.empty():
+            items.append(self._queue.get_nowait())
+            self._queue.task_done()
+        await self._spill(items)
+        logger.warning("Kafka: несданные события сохранены в spool", extra={"metrics": asdict(self.metrics)})
@@ -0,0 +1,77 @@
+"""Outbox Event Publisher — запись событий в таблицу outbox текущей транзакции."""
+from __future__ import annotations
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.domain.models import OutboxEvent
+from app.events.base import DomainEvent, EventPublisher
+from app.events.event_types import COALESCABLE_EVENT_TYPES
+from app.repositories.outbox_repo import OutboxRepository
+
+
+def coalesce_window_ms(event_type: str) -> int:
+    """Окно слияния для типа события; 0 — без коалесцирования."""
+    if event_type not in COALESCABLE_EVENT_TYPES:
+        return 0
+    return max(0, settings.EVENT_COALESCE_WINDOWS_MS.get(event_type, 0))
+
+
+def merge_updates(pending: dict, event: DomainEvent) -> dict:
+    """Слить update-событие в отложенное: объединение updated_fields, прочие поля — последние."""
+    payload = {**pending["payload"], **event.payload}
+    fields = list(pending["payload"].get("updated_fields") or [])
+    fields += [name for name in event.payload.get("updated_fields") or [] if name not in fields]
+    payload["updated_fields"] = fields
+    metadata = {**pending.get("metadata", {}), **event.metadata}
+    metadata["coalesced"] = pending.get("metadata", {}).get("coalesced", 1) + 1
+    return {**pending, "payload": payload, "metadata": metadata}
+
+
+class OutboxEventPublisher(EventPublisher):
+    """Событие уходит в брокер только после коммита: его доставляет OutboxRelay.
+
+    Update-события с окном (EVENT_COALESCE_WINDOWS_MS) откладываются на окно и сливаются
+    с последующими update того же агрегата. Любое другое событие агрегата закрывает окно,
+    поэтому порядок относительно created/deleted сохраняется.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+        self._repo = OutboxRepository(session)
+
+    async def connect(self) -> None:
+        return None
+
+    async def disconnect(self) -> None:
+        return None
+
+    @property
+    def is_connected(self) -> bool:
+        return True
+
+    async def publish(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
+        await self.send(event, routing_key)
+
+    async def send(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
+        window_ms = coalesce_window_ms(event.event_type) if event.aggregate_id else 0
+        if window_ms:
+            pending = await self._repo.find_coalescable(event.event_type, event.aggregate_id)
+            if pending is not None:
+                pending.payload = merge_updates(pending.payload, event)
+                return
+        elif event.aggregate_id and settings.EVENT_COALESCE_WINDOWS_MS:
+            await self._repo.release_pending(event.aggregate_id)
+
+        self._session.add(OutboxEvent(
+            id=uuid.UUID(event.event_id),
+            event_type=event.event_type,
+            routing_key=routing_key,
+            aggregate_id=event.aggregate_id or None,
+            payload=event.to_dict(),
+            available_at=func.now() + timedelta(milliseconds=window_ms),
+        ))
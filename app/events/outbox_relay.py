@@ -0,0 +1,161 @@
+"""Relay: доставка событий из outbox в брокер."""
+from __future__ import annotations
+import asyncio
+import time
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import AsyncContextManager, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.events.base import DomainEvent, EventPublisher
+from app.repositories.outbox_repo import OutboxRepository
+
+logger = get_logger(__name__)
+
+MONITOR_INTERVAL = 10.0
+PURGE_INTERVAL = 3600.0
+MAX_BACKOFF = 30.0
+
+
+@dataclass
+class RelayMetrics:
+    published_total: int = 0
+    failed_total: int = 0
+    parked_total: int = 0
+    batches_total: int = 0
+    lag_seconds: float = 0.0
+    pending_since: Optional[str] = None
+
+
+class OutboxRelay:
+    """Несколько воркеров разбирают outbox пачками через FOR UPDATE SKIP LOCKED.
+
+    Порядок по агрегату сохраняется между воркерами и процессами: claim_batch отдаёт только
+    первое неопубликованное событие агрегата, следующее становится доступно после коммита
+    пачки. Внутри пачки после ошибки остаток не отправляется.
+    """
+
+    def __init__(
+        self,
+        session_scope: Callable[[], AsyncContextManager[AsyncSession]],
+        publisher: EventPublisher,
+        batch_size: int = settings.OUTBOX_BATCH_SIZE,
+        parallelism: int = settings.OUTBOX_RELAY_PARALLELISM,
+        poll_interval: float = settings.OUTBOX_POLL_INTERVAL,
+        max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+        retry_backoff: float = settings.OUTBOX_RETRY_BACKOFF,
+        retry_backoff_max: float = settings.OUTBOX_RETRY_BACKOFF_MAX,
+    ):
+        self._session_scope = session_scope
+        self._publisher = publisher
+        self._batch_size = batch_size
+        self._parallelism = max(1, parallelism)
+        self._poll_interval = poll_interval
+        self._max_attempts = max(1, max_attempts)
+        self._retry_backoff = retry_backoff
+        self._retry_backoff_max = retry_backoff_max
+        self._stopping: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+        self.metrics = RelayMetrics()
+
+    async def start(self) -> None:
+        self._stopping = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"outbox-relay-{i}") for i in range(self._parallelism)
+        ]
+        self._tasks.append(asyncio.create_task(self._monitor(), name="outbox-relay-monitor"))
+        logger.info("Outbox relay запущен", extra={"metrics": {"parallelism": self._parallelism}})
+
+    async def stop(self) -> None:
+        if self._stopping is None:
+            return
+        self._stopping.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._stopping = None
+        logger.info("Outbox relay остановлен", extra={"metrics": asdict(self.metrics)})
+
+    async def relay_once(self) -> tuple[int, bool]:
+        """Одна пачка. Возвращает (число отправленных, была ли ошибка доставки)."""
+        if not self._publisher.is_connected:
+            return 0, False
+
+        async with self._session_scope() as session:
+            repo = OutboxRepository(session)
+            rows = await repo.claim_batch(self._batch_size)
+            if not rows:
+                return 0, False
+            delivered, error = await self._publisher.send_many(
+                [(DomainEvent(**row.payload), row.routing_key) for row in rows]
+            )
+            await repo.mark_published([row.id for row in rows[:delivered]])
+            if error is not None and delivered < len(rows):
+                await self._fail(repo, rows[delivered], f"{type(error).__name__}: {error}")
+
+        failed = error is not None
+        self.metrics.batches_total += 1
+        self.metrics.published_total += delivered
+        self.metrics.failed_total += int(failed)
+        return delivered, failed
+
+    async def _fail(self, repo: OutboxRepository, row, error: str) -> None:
+        attempt = row.attempts + 1
+        if attempt >= self._max_attempts:
+            await repo.park(row.id, error)
+            self.metrics.parked_total += 1
+            logger.error(f"Outbox: событие {row.event_type} припарковано после {attempt} попыток: {error}",
+                         extra={"action": "outbox_parked", "event_id": str(row.id), "aggregate_id": row.aggregate_id})
+            return
+        retry_in = min(self._retry_backoff * 2 ** (attempt - 1), self._retry_backoff_max)
+        await repo.mark_failed(row.id, error, retry_in)
+        logger.warning(f"Outbox: ошибка доставки {row.event_type} (попытка {attempt}), повтор через {retry_in:.0f} с: "
+                       f"{error}", extra={"action": "outbox_failed", "event_id": str(row.id)})
+
+    async def _worker(self) -> None:
+        backoff = self._poll_interval
+        while not self._stopping.is_set():
+            try:
+                sent, failed = await self.relay_once()
+            except Exception as e:
+                logger.error(f"Outbox relay: ошибка обработки пачки: {e}")
+                sent, failed = 0, True
+
+            if failed:
+                backoff = min(backoff * 2, MAX_BACKOFF)
+                await self._sleep(backoff)
+                continue
+            backoff = self._poll_interval
+            # Короткая пачка не значит, что outbox пуст: следующие события агрегатов открываются
+            # только после коммита этой — ждём лишь когда забирать было нечего
+            if sent == 0:
+                await self._sleep(self._poll_interval)
+
+    async def _monitor(self) -> None:
+        last_purge = 0.0
+        while not self._stopping.is_set():
+            try:
+                async with self._session_scope() as session:
+                    repo = OutboxRepository(session)
+                    oldest = await repo.oldest_pending_at()
+                    if time.monotonic() - last_purge > PURGE_INTERVAL:
+                        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+                        await repo.purge_published(cutoff)
+                        last_purge = time.monotonic()
+                self._record_lag(oldest)
+            except Exception as e:
+                logger.warning(f"Outbox relay: не удалось снять метрики: {e}")
+            await self._sleep(MONITOR_INTERVAL)
+
+    def _record_lag(self, oldest: Optional[datetime]) -> None:
+        self.metrics.pending_since = oldest.isoformat() if oldest else None
+        self.metrics.lag_seconds = (datetime.now(timezone.utc) - oldest).total_seconds() if oldest else 0.0
+        log = logger.warning if self.metrics.lag_seconds > settings.OUTBOX_LAG_WARN_SECONDS else logger.debug
+        log("Outbox relay lag", extra={"action": "outbox_lag", "metrics": asdict(self.metrics)})
+
+    async def _sleep(self, seconds: float) -> None:
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
@@ -1,21 +1,40 @@
 """Фабрика для Event Publisher."""
+from typing import Optional
+
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.events.base import EventPublisher
 from app.events.kafka_publisher import KafkaEventPublisher
 from app.events.rabbitmq_publisher import RabbitMQEventPublisher
+from app.events.serialization import ensure_binary_codec
+from app.events.spool import DiskSpool
+from app.events.spooling_publisher import SpoolingEventPublisher
 
 logger = get_logger(__name__)
 
 
 def create_event_publisher() -> EventPublisher:
+    ensure_binary_codec()
+    if not settings.EVENT_SPOOL_ENABLED:
+        return _create_broker_publisher(None)
+    spool = DiskSpool(
+        settings.EVENT_SPOOL_DIR,
+        segment_bytes=settings.EVENT_SPOOL_SEGMENT_BYTES,
+        max_bytes=settings.EVENT_SPOOL_MAX_BYTES,
+        fsync_batch=settings.EVENT_SPOOL_FSYNC_BATCH,
+        fsync_interval=settings.EVENT_SPOOL_FSYNC_INTERVAL,
+    )
+    return SpoolingEventPublisher(_create_broker_publisher(spool), spool)
+
+
+def _create_broker_publisher(spool: Optional[DiskSpool]) -> EventPublisher:
     broker_type = settings.EVENT_BROKER_TYPE.lower()
     if broker_type == "kafka":
         logger.info("Используется Kafka Event Publisher")
-        return KafkaEventPublisher()
+        return KafkaEventPublisher(spool)
     elif broker_type == "rabbitmq":
         logger.info("Используется RabbitMQ Event Publisher")
         return RabbitMQEventPublisher()
     else:
         logger.warning(f"Неизвестный тип брокера: {broker_type}, используется Kafka")
-        return KafkaEventPublisher()
+        return KafkaEventPublisher(spool)
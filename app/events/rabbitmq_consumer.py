@@ -0,0 +1,80 @@
+"""RabbitMQ Event Consumer."""
+from __future__ import annotations
+import asyncio
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.events.consumer_base import BatchProcessor, EventConsumer, InboundMessage
+
+logger = get_logger(__name__)
+
+BATCH_LINGER = 0.05
+POLL_TIMEOUT = 1.0
+
+
+class RabbitMQEventConsumer(EventConsumer):
+    """Одна durable-очередь, привязанная к типам событий обработчиков.
+
+    prefetch ограничивает число неподтверждённых сообщений; пачка подтверждается одним
+    ack(multiple=True) после успешной обработки, при ошибке возвращается в очередь.
+    """
+
+    def __init__(self, processor: BatchProcessor):
+        super().__init__(processor)
+        self._connection = None
+        self._inbox: asyncio.Queue = asyncio.Queue()
+
+    async def _connect(self) -> None:
+        import aio_pika
+        connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
+        try:
+            channel = await connection.channel()
+            await channel.set_qos(prefetch_count=settings.CONSUMER_BATCH_SIZE * settings.CONSUMER_CONCURRENCY)
+            exchange = await channel.declare_exchange(
+                settings.CONSUMER_RABBITMQ_EXCHANGE, aio_pika.ExchangeType.TOPIC, durable=True,
+            )
+            queue = await channel.declare_queue(settings.CONSUMER_RABBITMQ_QUEUE, durable=True)
+            for event_type in self._processor.event_types:
+                await queue.bind(exchange, routing_key=event_type)
+            self._inbox = asyncio.Queue()
+            await queue.consume(self._inbox.put)
+        except Exception:
+            await connection.close()
+            raise
+        self._connection = connection
+        logger.info("RabbitMQ consumer подключён", extra={"metrics": {"queue": settings.CONSUMER_RABBITMQ_QUEUE}})
+
+    async def _close(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            await connection.close()
+
+    async def _consume(self) -> None:
+        try:
+            first = await asyncio.wait_for(self._inbox.get(), timeout=POLL_TIMEOUT)
+        except asyncio.TimeoutError:
+            return
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + BATCH_LINGER
+        while len(batch) < settings.CONSUMER_BATCH_SIZE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._inbox.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        messages = [
+            InboundMessage.decode(message.body, f"{settings.CONSUMER_RABBITMQ_QUEUE}/{message.routing_key}")
+            for message in batch
+        ]
+        try:
+            await self._processor.process(messages)
+        except Exception as e:
+            logger.error(f"RabbitMQ consumer: пачка не обработана: {e}")
+            await batch[-1].nack(multiple=True, requeue=True)
+            await self._sleep(1.0)
+            return
+        await batch[-1].ack(multiple=True)
@@ -1,75 +1,223 @@
 """RabbitMQ Event Publisher."""
 from __future__ import annotations
+import asyncio
+import time
 from contextlib import suppress
-import json
-from typing import Optional
+from dataclasses import asdict, dataclass, field
+from typing import Optional, Sequence
 
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.events.base import DomainEvent, EventPublisher
+from app.events.serialization import content_type, encode_event, wire_format
 
 logger = get_logger(__name__)
 
+COALESCE_LIMIT = 200
+
+
+@dataclass
+class RabbitMQMetrics:
+    published: int = 0
+    confirmed: int = 0
+    nacked: int = 0
+    returned: int = 0
+    failed: int = 0
+    confirm_latency_ms_total: float = 0.0
+    confirm_latency_ms_max: float = 0.0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def observe_confirm(self, started: float, count: int = 1) -> None:
+        if count <= 0:
+            return
+        latency_ms = (time.monotonic() - started) * 1000
+        self.confirmed += count
+        self.confirm_latency_ms_total += latency_ms * count
+        self.confirm_latency_ms_max = max(self.confirm_latency_ms_max, latency_ms)
+
+    def snapshot(self) -> dict:
+        data = asdict(self)
+        data.pop("started_at")
+        data.pop("confirm_latency_ms_total")
+        elapsed = time.monotonic() - self.started_at
+        data["confirm_latency_ms_avg"] = round(self.confirm_latency_ms_total / self.confirmed, 2) if self.confirmed else 0.0
+        data["confirmed_per_sec"] = round(self.confirmed / elapsed, 1) if elapsed else 0.0
+        return data
+
+
+class RabbitMQDeliveryError(Exception):
+    """Брокер ответил nack на публикацию или вернул mandatory-сообщение без очереди."""
+
 
 class RabbitMQEventPublisher(EventPublisher):
+    """Публикация через пул каналов в confirm-режиме.
+
+    Каждый publish берёт канал из пула (RABBITMQ_CHANNEL_POOL_SIZE), поэтому конкурентные
+    запросы не стоят в очереди за одним каналом. send_many отправляет пачку на одном канале
+    конвейером и ждёт подтверждений (delivery tag отслеживает aiormq) разом — один round-trip
+    на пачку. publish под нагрузкой коалесцируется: пока летит одна пачка, следующие события
+    копятся и уходят следующей пачкой. Сообщение с mandatory, не попавшее ни в одну очередь,
+    брокер возвращает (basic.return) — это ошибка доставки, как и nack: событие не считается
+    опубликованным, и outbox повторит его.
+    """
+
     def __init__(self):
         self._connection = None
-        self._channel = None
-        self._exchange = None
+        self._channel_pool = None
+        self._pending: list[tuple[DomainEvent, Optional[str], asyncio.Future]] = []
+        self._coalesce_task: Optional[asyncio.Task] = None
+        self.metrics = RabbitMQMetrics()
 
     async def connect(self) -> None:
         connection = None
         try:
             import aio_pika
+            from aio_pika.pool import Pool
             connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
             channel = await connection.channel()
-            exchange = await channel.declare_exchange(
+            await channel.declare_exchange(
                 settings.RABBITMQ_EXCHANGE,
                 aio_pika.ExchangeType.TOPIC,
                 durable=True,
             )
+            await channel.close()
             self._connection = connection
-            self._channel = channel
-            self._exchange = exchange
+            self._channel_pool = Pool(self._open_channel, max_size=settings.RABBITMQ_CHANNEL_POOL_SIZE)
+            self.metrics = RabbitMQMetrics()
             logger.info("RabbitMQ publisher подключён")
         except ImportError:
             logger.warning("aio_pika не установлен, RabbitMQ publisher в stub-режиме")
             self._connection = None
-            self._channel = None
-            self._exchange = None
+            self._channel_pool = None
         except Exception as e:
             if connection is not None:
                 with suppress(Exception):
                     await connection.close()
             logger.error(f"Не удалось подключиться к RabbitMQ: {e}")
             self._connection = None
-            self._channel = None
-            self._exchange = None
+            self._channel_pool = None
 
     async def disconnect(self) -> None:
+        if self._coalesce_task:
+            with suppress(Exception):
+                await self._coalesce_task
+            self._coalesce_task = None
         if self._connection:
+            with suppress(Exception):
+                await self._channel_pool.close()
             await self._connection.close()
             self._connection = None
-            self._channel = None
-            self._exchange = None
-            logger.info("RabbitMQ publisher отключён")
+            self._channel_pool = None
+            logger.info("RabbitMQ publisher отключён", extra={"metrics": self.metrics.snapshot()})
 
-    async def publish(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
-        rk = routing_key or event.event_type
+    async def flush(self, timeout: float) -> None:
+        if self._coalesce_task is None or self._coalesce_task.done():
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._coalesce_task), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("RabbitMQ: пачка не подтверждена до дедлайна", extra={"metrics": self.metrics.snapshot()})
 
+    @property
+    def is_connected(self) -> bool:
+        return self._connection is not None
+
+    async def publish(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
         if self._connection is None:
             logger.debug(f"RabbitMQ stub: событие {event.event_type}", extra={"event_id": event.event_id})
             return
 
         try:
-            import aio_pika
-            message = aio_pika.Message(
-                body=json.dumps(event.model_dump(), default=str).encode("utf-8"),
-                content_type="application/json",
-                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-                message_id=event.event_id,
-            )
-            await self._exchange.publish(message, routing_key=rk)
-            logger.info("Событие опубликовано в RabbitMQ", extra={"event_type": event.event_type})
+            await self.submit(event, routing_key)
         except Exception as e:
             logger.error(f"Ошибка публикации в RabbitMQ: {e}", extra={"event_type": event.event_type})
+
+    async def submit(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
+        confirmation = asyncio.get_running_loop().create_future()
+        self._pending.append((event, routing_key, confirmation))
+        if self._coalesce_task is None or self._coalesce_task.done():
+            self._coalesce_task = asyncio.create_task(self._drain_pending(), name="rabbitmq-coalesce")
+        await confirmation
+
+    async def send(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
+        _, error = await self.send_many([(event, routing_key)])
+        if error is not None:
+            raise error
+        logger.info("Событие опубликовано в RabbitMQ", extra={"event_type": event.event_type})
+
+    async def send_many(
+        self, items: Sequence[tuple[DomainEvent, Optional[str]]],
+    ) -> tuple[int, Optional[Exception]]:
+        if self._connection is None:
+            return 0, RuntimeError("RabbitMQ publisher не подключён")
+
+        async with self._channel_pool.acquire() as channel:
+            exchange = await channel.get_exchange(settings.RABBITMQ_EXCHANGE, ensure=False)
+            started = time.monotonic()
+            confirmations = [
+                asyncio.ensure_future(exchange.publish(
+                    self._message(event, routing_key or event.event_type),
+                    routing_key=routing_key or event.event_type,
+                    mandatory=settings.RABBITMQ_MANDATORY,
+                    timeout=settings.RABBITMQ_CONFIRM_TIMEOUT,
+                ))
+                for event, routing_key in items
+            ]
+            self.metrics.published += len(confirmations)
+            results = await asyncio.gather(*confirmations, return_exceptions=True)
+
+        # Nack и возврат aiormq не возвращает, а выставляет future исключение: DeliveryError(None, frame)
+        # и PublishError (канал открыт с on_return_raises)
+        from aiormq.exceptions import DeliveryError, PublishError
+        for index, result in enumerate(results):
+            if not isinstance(result, BaseException):
+                continue
+            event_id = items[index][0].event_id
+            if isinstance(result, PublishError):
+                self.metrics.returned += 1
+                reply = result.message.delivery
+                logger.warning("RabbitMQ: сообщение не попало ни в одну очередь", extra={
+                    "event_id": event_id, "event_type": reply.routing_key, "action": "rabbitmq_returned"})
+                result = RabbitMQDeliveryError(f"событие {event_id} возвращено брокером: {reply.reply_text}")
+            elif isinstance(result, DeliveryError):
+                self.metrics.nacked += 1
+                result = RabbitMQDeliveryError(f"nack для события {event_id}: {result.frame!r}")
+            else:
+                self.metrics.failed += 1
+            # Остаток пачки после первой ошибки не считается доставленным — его повторит вызывающий
+            self.metrics.failed += len(results) - index - 1
+            self.metrics.observe_confirm(started, index)
+            return index, result
+        self.metrics.observe_confirm(started, len(results))
+        return len(results), None
+
+    async def _drain_pending(self) -> None:
+        while self._pending:
+            batch = self._pending[:COALESCE_LIMIT]
+            del self._pending[:COALESCE_LIMIT]
+            try:
+                delivered, error = await self.send_many([(event, routing_key) for event, routing_key, _ in batch])
+            except Exception as exc:
+                delivered, error = 0, exc
+            for index, (_, _, confirmation) in enumerate(batch):
+                if confirmation.done():
+                    continue
+                if index < delivered:
+                    confirmation.set_result(None)
+                else:
+                    confirmation.set_exception(error)
+
+    async def _open_channel(self):
+        return await self._connection.channel(publisher_confirms=True, on_return_raises=True)
+
+    @staticmethod
+    def _message(event: DomainEvent, routing_key: str):
+        import aio_pika
+        fmt = wire_format(routing_key)
+        return aio_pika.Message(
+            body=encode_event(event, fmt),
+            content_type=content_type(fmt),
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            message_id=event.event_id,
+            headers={"aggregate_id": event.partition_key},
+        )
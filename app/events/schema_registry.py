@@ -0,0 +1,54 @@
+"""Локальный реестр версий схем payload по типам событий."""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional
+
+from app.events.event_types import EventType
+
+
+@dataclass(frozen=True)
+class EventSchema:
+    """Версия схемы: schema_id уходит в заголовок бинарного сообщения, поля кодируются по позиции."""
+    schema_id: int
+    event_type: EventType
+    version: int
+    fields: tuple[str, ...]
+
+
+# schema_id уникален и никогда не переиспользуется: новая версия — новый id в конце списка.
+SCHEMAS: tuple[EventSchema, ...] = (
+    EventSchema(1, EventType.COMMUNITY_CREATED, 1, ("community_id", "owner_id", "name")),
+    EventSchema(2, EventType.COMMUNITY_UPDATED, 1, ("community_id", "updated_fields")),
+    EventSchema(3, EventType.COMMUNITY_DELETED, 1, ("community_id", "deleted_by")),
+    EventSchema(4, EventType.MEMBER_JOINED, 1, ("community_id", "user_id", "status")),
+    EventSchema(5, EventType.MEMBER_LEFT, 1, ("community_id", "user_id", "removed_by")),
+    EventSchema(6, EventType.MEMBERS_IMPORTED, 1, ("community_id", "job_id", "imported", "status")),
+    EventSchema(7, EventType.POST_CREATED, 1, ("post_id", "community_id", "author_id")),
+    EventSchema(8, EventType.POST_UPDATED, 1, ("post_id", "updated_fields")),
+    EventSchema(9, EventType.POST_DELETED, 1, ("post_id", "community_id")),
+    EventSchema(10, EventType.DONATION_RECEIVED, 1, ("donation_id", "community_id", "donor_id", "amount", "currency")),
+    EventSchema(11, EventType.SUBSCRIPTION_STARTED, 1, ("subscription_id", "community_id", "user_id", "level")),
+    EventSchema(12, EventType.SUBSCRIPTION_ENDED, 1, ("subscription_id", "community_id", "user_id")),
+    EventSchema(13, EventType.EVENT_CREATED, 1, ("event_id", "community_id")),
+    EventSchema(14, EventType.EVENT_UPDATED, 1, ("event_id", "updated_fields")),
+    EventSchema(15, EventType.EVENT_DELETED, 1, ("event_id", "community_id")),
+)
+
+
+class SchemaRegistry:
+    def __init__(self, schemas: tuple[EventSchema, ...]):
+        self._by_id = {schema.schema_id: schema for schema in schemas}
+        self._latest: dict[str, EventSchema] = {}
+        for schema in schemas:
+            current = self._latest.get(schema.event_type.value)
+            if current is None or schema.version > current.version:
+                self._latest[schema.event_type.value] = schema
+
+    def latest(self, event_type: str) -> Optional[EventSchema]:
+        return self._latest.get(event_type)
+
+    def get(self, schema_id: int) -> EventSchema:
+        return self._by_id[schema_id]
+
+
+registry = SchemaRegistry(SCHEMAS)
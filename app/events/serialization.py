@@ -0,0 +1,80 @@
+"""Форматы сообщений событий: JSON и компактный бинарный конверт со schema id."""
+from __future__ import annotations
+import json
+import struct
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.events.base import DomainEvent
+from app.events.schema_registry import SchemaRegistry, registry
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Заголовок бинарного формата: magic, кодек тела, schema_id.
+BINARY_HEADER = struct.Struct(">BBH")
+BINARY_MAGIC = 0xCE
+CODEC_MSGPACK = 1
+CODEC_JSON = 2
+
+JSON_CONTENT_TYPE = "application/json"
+BINARY_CONTENT_TYPE = "application/vnd.community.event"
+
+
+def ensure_binary_codec() -> None:
+    """Проверка при старте: без msgpack бинарные топики молча ушли бы в другом кодеке."""
+    if settings.EVENT_BINARY_TOPICS and msgpack is None:
+        raise RuntimeError("EVENT_BINARY_TOPICS задан, но msgpack не установлен")
+
+
+def wire_format(routing_key: str) -> str:
+    """binary для ключей из EVENT_BINARY_TOPICS (или всех при "*"), иначе json."""
+    topics = settings.EVENT_BINARY_TOPICS
+    return "binary" if "*" in topics or routing_key in topics else "json"
+
+
+def content_type(fmt: str) -> str:
+    return BINARY_CONTENT_TYPE if fmt == "binary" else JSON_CONTENT_TYPE
+
+
+def encode_event(event: DomainEvent, fmt: str = "json", schemas: SchemaRegistry = registry) -> bytes:
+    schema = schemas.latest(event.event_type) if fmt == "binary" else None
+    if schema is None:
+        return json.dumps(event.to_dict(), separators=(",", ":"), default=str).encode("utf-8")
+
+    payload = dict(event.payload)
+    values = [payload.pop(name, None) for name in schema.fields]
+    # Поля вне схемы не теряются: уходят хвостовым словарём.
+    body = [event.event_id, event.timestamp, event.service, event.aggregate_id, values, payload, event.metadata]
+    if msgpack is None:
+        raise RuntimeError("Бинарный формат требует msgpack")
+    return BINARY_HEADER.pack(BINARY_MAGIC, CODEC_MSGPACK, schema.schema_id) + msgpack.packb(body, default=str)
+
+
+def decode_event(data: bytes, schemas: SchemaRegistry = registry) -> DomainEvent:
+    if not data or data[0] != BINARY_MAGIC:
+        return DomainEvent(**json.loads(data))
+
+    _, codec, schema_id = BINARY_HEADER.unpack_from(data)
+    raw = data[BINARY_HEADER.size:]
+    body: list[Any]
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise ValueError("Сообщение закодировано msgpack, но msgpack не установлен")
+        body = msgpack.unpackb(raw)
+    elif codec == CODEC_JSON:
+        # Тело в JSON писали прежние версии без msgpack — такие сообщения ещё читаются
+        body = json.loads(raw)
+    else:
+        raise ValueError(f"Неизвестный кодек сообщения: {codec}")
+
+    schema = schemas.get(schema_id)
+    event_id, timestamp, service, aggregate_id, values, extra, metadata = body
+    payload: dict[str, Optional[Any]] = dict(zip(schema.fields, values))
+    payload.update(extra)
+    return DomainEvent(
+        event_type=schema.event_type.value, event_id=event_id, timestamp=timestamp, service=service,
+        aggregate_id=aggregate_id, payload=payload, metadata=metadata,
+    )
@@ -0,0 +1,381 @@
+"""Локальный дисковый spool событий на время недоступности брокера."""
+from __future__ import annotations
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from typing import BinaryIO, Optional, TextIO
+
+from app.core.logging import get_logger
+from app.events.base import DomainEvent
+
+logger = get_logger(__name__)
+
+# Запись: длина тела и crc32, затем JSON {"routing_key", "event"}.
+RECORD_HEADER = struct.Struct(">II")
+SEGMENT_SUFFIX = ".seg"
+CURSOR_FILE = "cursor"
+OWNER_FILE = "owner.lock"
+# Захват каталогов процессов и подбор осиротевших — под одним flock в корне spool.
+ADOPT_GUARD = ".adopt.lock"
+QUARANTINE_DIR = "quarantine"
+ADOPT_BATCH = 1000
+MAX_DIRECTORY_ATTEMPTS = 100
+
+SpoolPosition = tuple[int, int]
+SpoolItem = tuple[DomainEvent, Optional[str]]
+
+
+@dataclass
+class SpoolMetrics:
+    appended: int = 0
+    replayed: int = 0
+    dropped: int = 0
+    adopted: int = 0
+    quarantined: int = 0
+    fsyncs: int = 0
+    segments: int = 0
+    bytes: int = 0
+
+
+class DiskSpool:
+    """Append-only очередь из сегментов фиксированного размера.
+
+    Запись — дозапись в последний сегмент с fsync раз в fsync_batch записей или
+    fsync_interval секунд; чтение — через mmap с позиции курсора. Курсор (сегмент,
+    смещение) хранится в отдельном файле, прочитанные сегменты удаляются целиком.
+    При превышении max_bytes новые события отбрасываются, уже сохранённые не трогаются.
+
+    Каждый процесс (воркер gunicorn) пишет в свой подкаталог <directory>/<pid> и держит
+    на нём flock до close. При open каталоги, чей flock свободен (процесс завершился,
+    не отдав события), и сегменты старой раскладки прямо в корне переписываются в свой
+    spool и удаляются — повтор возможен, потеря нет. Повреждённые записи копируются
+    в <directory>/quarantine и пропускаются, чтобы не блокировать очередь.
+
+    Методы синхронные и потокобезопасные: из event loop их вызывают через asyncio.to_thread.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int, max_bytes: int,
+                 fsync_batch: int, fsync_interval: float, name: Optional[str] = None):
+        self._root = directory
+        self._name = str(os.getpid()) if name is None else name
+        self._directory = os.path.join(directory, self._name)
+        self._segment_bytes = segment_bytes
+        self._max_bytes = max_bytes
+        self._fsync_batch = fsync_batch
+        self._fsync_interval = fsync_interval
+        self._mutex = threading.RLock()
+        self._owner: Optional[TextIO] = None
+        self._writer: Optional[BinaryIO] = None
+        self._write_pos: SpoolPosition = (0, 0)
+        self._read_pos: SpoolPosition = (0, 0)
+        self._batch_ends: list[SpoolPosition] = []
+        # Сегмент → смещение повреждённого хвоста, уже отправленного в карантин
+        self._skips: dict[int, int] = {}
+        self._unsynced = 0
+        self._last_fsync = time.monotonic()
+        self.metrics = SpoolMetrics()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    @property
+    def pending(self) -> bool:
+        return self._read_pos < self._write_pos
+
+    def open(self) -> None:
+        with self._mutex:
+            if self._writer is not None:
+                return
+            os.makedirs(self._root, exist_ok=True)
+            with open(os.path.join(self._root, ADOPT_GUARD), "a") as guard:
+                fcntl.flock(guard, fcntl.LOCK_EX)
+                self._claim_directory()
+                self._open_segments()
+                self._adopt_orphans()
+            if self.pending:
+                logger.info("Spool: найдены несданные события", extra={"metrics": self.metrics_snapshot()})
+
+    def close(self) -> None:
+        with self._mutex:
+            if self._writer is None:
+                return
+            self._close_writer()
+            if not self.pending:
+                self._discard()
+            self._release()
+
+    def append(self, event: DomainEvent, routing_key: Optional[str]) -> bool:
+        """Дописать событие; False, если spool переполнен или не открыт."""
+        with self._mutex:
+            return self._append(event, routing_key)
+
+    def sync(self) -> None:
+        with self._mutex:
+            self._sync()
+
+    def read_batch(self, limit: int) -> list[SpoolItem]:
+        """Прочитать до limit событий с позиции курсора, не сдвигая его (см. commit)."""
+        with self._mutex:
+            self._batch_ends = []
+            items: list[SpoolItem] = []
+            if self._writer is not None:
+                self._writer.flush()
+            seq, offset = self._read_pos
+            while len(items) < limit and (seq, offset) < self._write_pos:
+                path = self._segment_path(seq)
+                size = os.path.getsize(path) if os.path.exists(path) else 0
+                end = min(size, self._skips.get(seq, size))
+                if offset < end:
+                    with open(path, "rb") as segment, mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                        for body, offset in self._records(view, offset, end):
+                            record = json.loads(body)
+                            items.append((DomainEvent(**record["event"]), record["routing_key"]))
+                            self._batch_ends.append((seq, offset))
+                            if len(items) >= limit:
+                                return items
+                        if offset < end:
+                            self._quarantine(seq, offset, view[offset:end])
+                            self._skips[seq] = offset
+                if seq == self._write_pos[0]:
+                    if seq not in self._skips:
+                        break
+                    # Повреждён активный сегмент: новые записи пойдут в следующий
+                    self._rotate()
+                seq, offset = seq + 1, 0
+                if not items:
+                    # Несданных записей до этой позиции нет — курсор сдвигается без commit
+                    self._advance((seq, offset))
+            return items
+
+    def commit(self, count: int) -> None:
+        """Сдвинуть курсор за первые count событий последней прочитанной пачки."""
+        if count <= 0:
+            return
+        with self._mutex:
+            position = self._batch_ends[count - 1]
+            self._batch_ends = self._batch_ends[count:]
+            self.metrics.replayed += count
+            self._advance(position)
+
+    def _append(self, event: DomainEvent, routing_key: Optional[str]) -> bool:
+        if self._writer is None:
+            self.metrics.dropped += 1
+            return False
+        body = json.dumps({"routing_key": routing_key, "event": event.to_dict()}, default=str).encode("utf-8")
+        record = RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body
+        if self.metrics.bytes + len(record) > self._max_bytes:
+            self.metrics.dropped += 1
+            logger.error("Spool переполнен, событие отброшено",
+                         extra={"event_id": event.event_id, "action": "spool_dropped"})
+            return False
+
+        seq, size = self._write_pos
+        if size and size + len(record) > self._segment_bytes:
+            self._rotate()
+            seq, size = self._write_pos
+        self._writer.write(record)
+        self._write_pos = (seq, size + len(record))
+        self.metrics.appended += 1
+        self.metrics.bytes += len(record)
+        self._unsynced += 1
+        if self._unsynced >= self._fsync_batch or time.monotonic() - self._last_fsync >= self._fsync_interval:
+            self._sync()
+        return True
+
+    def _sync(self) -> None:
+        if self._writer is None or not self._unsynced:
+            return
+        self._writer.flush()
+        os.fsync(self._writer.fileno())
+        self._unsynced = 0
+        self._last_fsync = time.monotonic()
+        self.metrics.fsyncs += 1
+
+    def _advance(self, position: SpoolPosition) -> None:
+        self._read_pos = position
+        self._store_cursor()
+        for seq in self._segments():
+            if seq >= position[0]:
+                break
+            path = self._segment_path(seq)
+            self.metrics.bytes -= os.path.getsize(path)
+            self.metrics.segments -= 1
+            self._skips.pop(seq, None)
+            os.remove(path)
+
+    def _rotate(self) -> None:
+        self._sync()
+        self._writer.close()
+        seq = self._write_pos[0] + 1
+        self._writer = open(self._segment_path(seq), "ab")
+        self._write_pos = (seq, 0)
+        self.metrics.segments += 1
+
+    def _claim_directory(self) -> None:
+        """Занять свой подкаталог; если имя держит живой процесс (общий том), взять <pid>-N."""
+        base = self._name
+        for attempt in range(MAX_DIRECTORY_ATTEMPTS):
+            self._name = base if not attempt else f"{base}-{attempt}"
+            self._directory = os.path.join(self._root, self._name)
+            if self._lock_directory():
+                return
+        raise RuntimeError(f"Spool: все каталоги {base}-N в {self._root} заняты")
+
+    def _lock_directory(self) -> bool:
+        os.makedirs(self._directory, exist_ok=True)
+        owner = open(os.path.join(self._directory, OWNER_FILE), "a")
+        try:
+            fcntl.flock(owner, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            owner.close()
+            return False
+        self._owner = owner
+        return True
+
+    def _release(self) -> None:
+        if self._owner is not None:
+            self._owner.close()
+            self._owner = None
+
+    def _open_segments(self) -> None:
+        segments = self._segments()
+        last = segments[-1] if segments else 1
+        self._read_pos = self._load_cursor() or (segments[0] if segments else last, 0)
+
+        path = self._segment_path(last)
+        valid = self._valid_length(path) if os.path.exists(path) else 0
+        self._writer = open(path, "ab")
+        size = self._writer.tell()
+        if size != valid:
+            logger.warning("Spool: обрезан недописанный хвост сегмента", extra={"action": "spool_truncated"})
+            with open(path, "rb") as segment:
+                segment.seek(valid)
+                self._quarantine(last, valid, segment.read())
+            self._writer.truncate(valid)
+            self._writer.seek(valid)
+        self._write_pos = (last, valid)
+
+        self.metrics.segments = len(segments) or 1
+        self.metrics.bytes = sum(os.path.getsize(self._segment_path(seq)) for seq in segments)
+
+    def _close_writer(self) -> None:
+        self._sync()
+        self._writer.close()
+        self._writer = None
+
+    def _adopt_orphans(self) -> None:
+        for name in sorted(os.listdir(self._root)):
+            if name not in (self._name, QUARANTINE_DIR) and os.path.isdir(os.path.join(self._root, name)):
+                self._adopt(name)
+        # Сегменты, записанные до раскладки по процессам, лежат прямо в корне
+        if any(name.endswith(SEGMENT_SUFFIX) for name in os.listdir(self._root)):
+            self._adopt("")
+
+    def _adopt(self, name: str) -> None:
+        orphan = DiskSpool(self._root, self._segment_bytes, self._max_bytes,
+                           self._fsync_batch, self._fsync_interval, name=name)
+        if not orphan._lock_directory():
+            return
+        adopted = 0
+        try:
+            orphan._open_segments()
+            while orphan.pending:
+                batch = orphan.read_batch(ADOPT_BATCH)
+                if not batch:
+                    break
+                for event, routing_key in batch:
+                    self._append(event, routing_key)
+                # Сначала durable у себя, потом курсор сироты: при сбое — повтор, а не потеря
+                self._sync()
+                orphan.commit(len(batch))
+                adopted += len(batch)
+            orphan._close_writer()
+            orphan._discard()
+        finally:
+            orphan._release()
+        self.metrics.adopted += adopted
+        if adopted:
+            logger.warning(f"Spool: подобраны события завершившегося процесса ({name or 'корень'}): {adopted}",
+                           extra={"action": "spool_adopted", "metrics": self.metrics_snapshot()})
+
+    def _discard(self) -> None:
+        """Удалить файлы отданного spool и сам каталог, если он опустел."""
+        for name in os.listdir(self._directory):
+            if name.endswith(SEGMENT_SUFFIX) or name in (CURSOR_FILE, f"{CURSOR_FILE}.tmp", OWNER_FILE):
+                os.remove(os.path.join(self._directory, name))
+        self._skips.clear()
+        with suppress(OSError):
+            os.rmdir(self._directory)
+
+    def _quarantine(self, seq: int, offset: int, data: bytes) -> None:
+        directory = os.path.join(self._root, QUARANTINE_DIR)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self._name or 'root'}-{seq:012d}-{offset}.bad")
+        with open(path, "wb") as quarantined:
+            quarantined.write(data)
+        self.metrics.quarantined += 1
+        logger.error(f"Spool: повреждённые записи ({len(data)} байт) перенесены в {path}",
+                     extra={"action": "spool_quarantined"})
+
+    @staticmethod
+    def _records(view: mmap.mmap, offset: int, size: int):
+        while offset + RECORD_HEADER.size <= size:
+            length, checksum = RECORD_HEADER.unpack_from(view, offset)
+            end = offset + RECORD_HEADER.size + length
+            if end > size:
+                return
+            body = view[offset + RECORD_HEADER.size:end]
+            if zlib.crc32(body) != checksum:
+                return
+            yield body, end
+            offset = end
+
+    def _valid_length(self, path: str) -> int:
+        size = os.path.getsize(path)
+        if not size:
+            return 0
+        valid = 0
+        with open(path, "rb") as segment, mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            for _, valid in self._records(view, 0, size):
+                pass
+        return valid
+
+    def _segments(self) -> list[int]:
+        return sorted(
+            int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self._directory)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self._directory, f"{seq:012d}{SEGMENT_SUFFIX}")
+
+    def _load_cursor(self) -> Optional[SpoolPosition]:
+        try:
+            with open(os.path.join(self._directory, CURSOR_FILE), encoding="utf-8") as cursor:
+                seq, offset = cursor.read().split()
+            return int(seq), int(offset)
+        except (OSError, ValueError):
+            return None
+
+    def _store_cursor(self) -> None:
+        path = os.path.join(self._directory, CURSOR_FILE)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as cursor:
+            cursor.write(f"{self._read_pos[0]} {self._read_pos[1]}")
+            cursor.flush()
+            os.fsync(cursor.fileno())
+        os.replace(f"{path}.tmp", path)
+
+    def metrics_snapshot(self) -> dict:
+        return {**asdict(self.metrics), "pending": self.pending}
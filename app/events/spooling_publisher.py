@@ -0,0 +1,162 @@
+"""Publisher с дисковым spool и circuit breaker поверх любого брокера."""
+from __future__ import annotations
+import asyncio
+import time
+from contextlib import suppress
+from typing import Optional, Sequence
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.events.base import DomainEvent, EventPublisher
+from app.events.spool import DiskSpool
+
+logger = get_logger(__name__)
+
+REPLAY_INTERVAL = 1.0
+
+
+class CircuitBreaker:
+    """closed → open после failure_threshold ошибок подряд; через reset_timeout — одна пробная попытка."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        return self._opened_at is None or time.monotonic() - self._opened_at >= self._reset_timeout
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("Брокер снова доступен, breaker закрыт")
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._opened_at is not None or self._failures >= self._failure_threshold:
+            if self._opened_at is None:
+                logger.warning("Брокер недоступен, breaker открыт: события пишутся в spool")
+            self._opened_at = time.monotonic()
+
+    def trip(self) -> None:
+        self._failures = self._failure_threshold
+        self.record_failure()
+
+
+class SpoolingEventPublisher(EventPublisher):
+    """Пока брокер недоступен (нет подключения или открыт breaker), publish пишет в spool.
+
+    Фоновая задача переподключается к брокеру и отдаёт spool по порядку через send_many;
+    пока в spool есть несданные события, новые тоже идут в spool, чтобы не обгонять их.
+    fsync и чтение сегментов выполняются в пуле потоков, а не в event loop.
+    send / send_many (outbox relay) не спулятся: у relay своё durable-хранилище.
+    """
+
+    def __init__(self, inner: EventPublisher, spool: DiskSpool):
+        self._inner = inner
+        self._spool = spool
+        self._breaker = CircuitBreaker(settings.EVENT_BREAKER_FAILURE_THRESHOLD, settings.EVENT_BREAKER_RESET_TIMEOUT)
+        self._replay_task: Optional[asyncio.Task] = None
+
+    @property
+    def spool(self) -> DiskSpool:
+        return self._spool
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._breaker
+
+    async def connect(self) -> None:
+        await asyncio.to_thread(self._spool.open)
+        await self._inner.connect()
+        if not self._inner.is_connected:
+            self._breaker.trip()
+        self._replay_task = asyncio.create_task(self._replay_loop(), name="event-spool-replay")
+
+    async def disconnect(self) -> None:
+        if self._replay_task:
+            self._replay_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._replay_task
+            self._replay_task = None
+        await self._inner.disconnect()
+        await asyncio.to_thread(self._spool.close)
+        logger.info("Event spool закрыт", extra={"metrics": self._spool.metrics_snapshot()})
+
+    async def flush(self, timeout: float) -> None:
+        await self._inner.flush(timeout)
+        await asyncio.to_thread(self._spool.sync)
+
+    @property
+    def is_connected(self) -> bool:
+        return self._inner.is_connected
+
+    async def publish(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
+        if self._spool.pending or not self._inner.is_connected or not self._breaker.allow():
+            await asyncio.to_thread(self._spool.append, event, routing_key)
+            return
+        try:
+            await self._inner.submit(event, routing_key)
+        except Exception as e:
+            self._breaker.record_failure()
+            logger.warning(f"Ошибка публикации, событие сохранено в spool: {e}",
+                           extra={"event_type": event.event_type, "event_id": event.event_id})
+            await asyncio.to_thread(self._spool.append, event, routing_key)
+            return
+        self._breaker.record_success()
+
+    async def send(self, event: DomainEvent, routing_key: Optional[str] = None) -> None:
+        try:
+            await self._inner.send(event, routing_key)
+        except Exception:
+            self._breaker.record_failure()
+            raise
+        self._breaker.record_success()
+
+    async def send_many(
+        self, items: Sequence[tuple[DomainEvent, Optional[str]]],
+    ) -> tuple[int, Optional[Exception]]:
+        delivered, error = await self._inner.send_many(items)
+        if error is None:
+            self._breaker.record_success()
+        else:
+            self._breaker.record_failure()
+        return delivered, error
+
+    async def _replay_loop(self) -> None:
+        while True:
+            await asyncio.sleep(REPLAY_INTERVAL)
+            await asyncio.to_thread(self._spool.sync)
+            if not self._spool.pending or not self._breaker.allow():
+                continue
+            try:
+                await self._replay()
+            except Exception as e:
+                self._breaker.record_failure()
+                logger.error(f"Ошибка повтора событий из spool: {e}")
+
+    async def _replay(self) -> None:
+        if not self._inner.is_connected:
+            await self._inner.connect()
+            if not self._inner.is_connected:
+                self._breaker.record_failure()
+                return
+
+        while self._spool.pending:
+            batch = await asyncio.to_thread(self._spool.read_batch, settings.EVENT_SPOOL_REPLAY_BATCH)
+            if not batch:
+                return
+            delivered, error = await self._inner.send_many(batch)
+            await asyncio.to_thread(self._spool.commit, delivered)
+            if error is not None:
+                self._breaker.record_failure()
+                logger.warning(f"Повтор из spool прерван: {error}", extra={"metrics": self._spool.metrics_snapshot()})
+                return
+            self._breaker.record_success()
+        logger.info("Spool отдан брокеру", extra={"metrics": self._spool.metrics_snapshot()})
@@ -9,13 +9,42 @@ class CacheKeys:
     def community(community_id: str) -> str:
         return f"{PREFIX}community:{community_id}"
 
+    @staticmethod
+    def community_fieldsets(community_id: str) -> str:
+        """Hash: набор полей (?fields=) -> урезанный ответ сообщества."""
+        return f"{PREFIX}community:{community_id}:fields"
+
     @staticmethod
     def community_list(page: int, page_size: int, filters_hash: str = "") -> str:
         return f"{PREFIX}communities:list:{page}:{page_size}:{filters_hash}"
 
     @staticmethod
-    def popular_communities() -> str:
-        return f"{PREFIX}communities:popular"
+    def community_search_count(query_hash: str) -> str:
+        return f"{PREFIX}communities:search_count:{query_hash}"
+
+    @staticmethod
+    def community_names() -> str:
+        """Sorted set для автодополнения названий активных сообществ."""
+        return f"{PREFIX}communities:names"
+
+    @staticmethod
+    def community_nicknames(community_id: str) -> str:
+        """Sorted set для автодополнения ников активных участников сообщества."""
+        return f"{PREFIX}community:{community_id}:nicknames"
+
+    @staticmethod
+    def popular_communities(scope: str) -> str:
+        """Sorted set id -> member_count; scope — all или community_type."""
+        return f"{PREFIX}communities:popular:{scope}"
+
+    @staticmethod
+    def trending_communities(scope: str, generation: int) -> str:
+        """Sorted set id -> trending-score поколения (интервала в TRENDING_HALF_LIFE секунд)."""
+        return f"{PREFIX}communities:trending:{scope}:{generation}"
+
+    @staticmethod
+    def popular_pattern() -> str:
+        return f"{PREFIX}communities:popular:*"
 
     @staticmethod
     def community_members(community_id: str, page: int) -> str:
@@ -25,6 +54,10 @@ class CacheKeys:
     def community_posts(community_id: str, page: int) -> str:
         return f"{PREFIX}community:{community_id}:posts:{page}"
 
+    @staticmethod
+    def member_import_job(community_id: str, job_id: str) -> str:
+        return f"{PREFIX}community:{community_id}:imports:{job_id}"
+
     @staticmethod
     def community_analytics(community_id: str) -> str:
         return f"{PREFIX}community:{community_id}:analytics"
@@ -48,3 +81,7 @@ class CacheKeys:
     @staticmethod
     def invalidation_pattern(community_id: str) -> str:
         return f"{PREFIX}community:{community_id}:*"
+
+    @staticmethod
+    def community_list_pattern() -> str:
+        return f"{PREFIX}communities:list:*"
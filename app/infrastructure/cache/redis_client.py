@@ -1,7 +1,8 @@
 """Redis-клиент для кэширования."""
 from __future__ import annotations
 import json
-from typing import Any, Optional
+import uuid
+from typing import Any, AsyncIterator, Mapping, Optional, Sequence
 
 import redis.asyncio as aioredis
 
@@ -10,6 +11,13 @@ from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# ARGV[1] — команда (ZADD или ZINCRBY), далее пары score/member; ключ не создаётся
+_ZSET_UPDATE_EXISTING = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+for i = 2, #ARGV, 2 do redis.call(ARGV[1], KEYS[1], ARGV[i], ARGV[i + 1]) end
+return 1
+"""
+
 
 class RedisClient:
     def __init__(self):
@@ -75,13 +83,37 @@ class RedisClient:
         except Exception as e:
             logger.warning(f"Redis SET ошибка: {e}", extra={"key": key})
 
-    async def delete(self, key: str) -> None:
+    async def delete(self, *keys: str) -> None:
+        if not self._redis or not keys:
+            return
+        try:
+            await self._redis.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Redis DELETE ошибка: {e}", extra={"key": keys})
+
+    async def hget(self, key: str, field: str) -> Optional[Any]:
+        if not self._redis:
+            return None
+        try:
+            value = await self._redis.hget(key, field)
+            if value:
+                return json.loads(value)
+            return None
+        except Exception as e:
+            logger.warning(f"Redis HGET ошибка: {e}", extra={"key": key})
+            return None
+
+    async def hset(self, key: str, field: str, value: Any, ttl: Optional[int] = None) -> None:
         if not self._redis:
             return
         try:
-            await self._redis.delete(key)
+            serialized = json.dumps(value, default=str)
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.hset(key, field, serialized)
+                pipe.expire(key, ttl or settings.CACHE_DEFAULT_TTL)
+                await pipe.execute()
         except Exception as e:
-            logger.warning(f"Redis DELETE ошибка: {e}", extra={"key": key})
+            logger.warning(f"Redis HSET ошибка: {e}", extra={"key": key})
 
     async def delete_pattern(self, pattern: str) -> None:
         if not self._redis:
@@ -105,3 +137,115 @@ class RedisClient:
         except Exception as e:
             logger.warning(f"Redis INCR ошибка: {e}", extra={"key": key})
             return None
+
+    async def zrangebylex(self, key: str, start: bytes, stop: bytes, limit: int) -> Optional[list[str]]:
+        """Члены sorted set в лексикографическом диапазоне; None — ключа нет или Redis недоступен."""
+        if not self._redis:
+            return None
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.exists(key)
+                pipe.zrangebylex(key, start, stop, start=0, num=limit)
+                exists, members = await pipe.execute()
+            return members if exists else None
+        except Exception as e:
+            logger.warning(f"Redis ZRANGEBYLEX ошибка: {e}", extra={"key": key})
+            return None
+
+    async def zadd_existing(self, key: str, members: Mapping[str, float]) -> None:
+        """ZADD только если ключ уже есть: неполный набор не создаётся."""
+        await self._update_existing("ZADD", key, members)
+
+    async def zincrby_existing(self, key: str, members: Mapping[str, float]) -> None:
+        """ZINCRBY только если ключ уже есть; отсутствующий в наборе член добавляется."""
+        await self._update_existing("ZINCRBY", key, members)
+
+    async def _update_existing(self, command: str, key: str, members: Mapping[str, float]) -> None:
+        if not self._redis or not members:
+            return
+        try:
+            args = [item for member, score in members.items() for item in (score, member)]
+            await self._redis.eval(_ZSET_UPDATE_EXISTING, 1, key, command, *args)
+        except Exception as e:
+            logger.warning(f"Redis {command} ошибка: {e}", extra={"key": key})
+
+    async def zincr_members(self, keys: Sequence[str], member: str, delta: float) -> None:
+        """ZADD XX INCR в каждом из keys: меняет score только там, где member уже есть."""
+        if not self._redis or not keys:
+            return
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.zadd(key, {member: delta}, xx=True, incr=True)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis ZADD XX INCR ошибка: {e}", extra={"key": keys})
+
+    async def zrevrange(self, key: str, limit: int) -> Optional[list[tuple[str, float]]]:
+        """Первые limit членов по убыванию score; None — ключа нет или Redis недоступен."""
+        if not self._redis:
+            return None
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.exists(key)
+                pipe.zrevrange(key, 0, limit - 1, withscores=True)
+                exists, members = await pipe.execute()
+            return members if exists else None
+        except Exception as e:
+            logger.warning(f"Redis ZREVRANGE ошибка: {e}", extra={"key": key})
+            return None
+
+    async def zscore(self, key: str, member: str) -> Optional[float]:
+        if not self._redis:
+            return None
+        try:
+            return await self._redis.zscore(key, member)
+        except Exception as e:
+            logger.warning(f"Redis ZSCORE ошибка: {e}", extra={"key": key})
+            return None
+
+    async def zrem(self, keys: Sequence[str], *members: str) -> None:
+        if not self._redis or not keys or not members:
+            return
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.zrem(key, *members)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis ZREM ошибка: {e}", extra={"key": keys})
+
+    async def replace_zset(self, key: str, batches: AsyncIterator[Mapping[str, float]], ttl: int) -> bool:
+        """Собирает sorted set во временном ключе и атомарно подменяет key через RENAME."""
+        if not self._redis:
+            return False
+        staging = f"{key}:build:{uuid.uuid4().hex}"
+        try:
+            async for batch in batches:
+                if batch:
+                    async with self._redis.pipeline(transaction=False) as pipe:
+                        pipe.zadd(staging, batch)
+                        pipe.expire(staging, ttl)
+                        await pipe.execute()
+            async with self._redis.pipeline(transaction=True) as pipe:
+                # Пустой набор тоже должен существовать, иначе считался бы непостроенным;
+                # читатели пропускают пустой член
+                pipe.zadd(staging, {"": 0})
+                pipe.expire(staging, ttl)
+                pipe.rename(staging, key)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Redis REPLACE_ZSET ошибка: {e}", extra={"key": key})
+            await self.delete(staging)
+            return False
+
+    async def acquire(self, key: str, ttl: int) -> bool:
+        """SET NX: True — ключ поставлен этим вызовом (простая блокировка между процессами)."""
+        if not self._redis:
+            return False
+        try:
+            return bool(await self._redis.set(key, "1", nx=True, ex=ttl))
+        except Exception as e:
+            logger.warning(f"Redis SET NX ошибка: {e}", extra={"key": key})
+            return False
@@ -0,0 +1,48 @@
+"""Фоновая сборка sorted set в Redis из БД."""
+from __future__ import annotations
+import asyncio
+from typing import AsyncIterator, Callable, Mapping
+
+from app.core.logging import get_logger
+from app.infrastructure.cache.redis_client import RedisClient
+
+logger = get_logger(__name__)
+
+BUILD_LOCK_TTL = 60
+
+
+class SortedSetBuilder:
+    """Собирает отсутствующие наборы в фоне: одна задача на ключ в процессе и одна на кластер.
+
+    Блокировка SET NX не снимается после сборки — истекает сама через BUILD_LOCK_TTL
+    и заодно не даёт пересобирать один ключ чаще.
+    """
+
+    def __init__(self, cache: RedisClient):
+        self._cache = cache
+        self._builds: dict[str, asyncio.Task] = {}
+
+    def schedule(self, key: str, ttl: int, members: Callable[[], AsyncIterator[Mapping[str, float]]]) -> None:
+        if key in self._builds or not self._cache.is_connected:
+            return
+        task = asyncio.create_task(self._build(key, ttl, members), name=f"zset-build:{key}")
+        self._builds[key] = task
+        task.add_done_callback(lambda _: self._builds.pop(key, None))
+
+    async def wait(self) -> None:
+        await asyncio.gather(*self._builds.values(), return_exceptions=True)
+
+    async def stop(self) -> None:
+        for task in self._builds.values():
+            task.cancel()
+        await self.wait()
+        self._builds.clear()
+
+    async def _build(self, key: str, ttl: int, members: Callable[[], AsyncIterator[Mapping[str, float]]]) -> None:
+        if not await self._cache.acquire(f"{key}:lock", ttl=BUILD_LOCK_TTL):
+            return
+        try:
+            if await self._cache.replace_zset(key, members(), ttl):
+                logger.info("Sorted set построен", extra={"key": key, "action": "zset_built"})
+        except Exception as e:
+            logger.warning(f"Sorted set build {key}: {e}")
@@ -5,9 +5,15 @@ from typing import AsyncGenerator
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.logging import get_logger
-from app.db.session import async_session_factory, engine
+from app.db.session import async_session_factory, discard_after_commit, engine, run_after_commit
 from app.events.base import EventPublisher
+from app.events.consumer import create_event_consumer
+from app.events.consumer_base import EventConsumer
+from app.events.handlers import UserDeletedHandler
+from app.events.outbox import OutboxEventPublisher
+from app.events.outbox_relay import OutboxRelay
 from app.events.publisher import create_event_publisher
 from app.infrastructure.cache.redis_client import RedisClient
 from app.infrastructure.media.s3_client import S3Client
@@ -19,6 +25,13 @@ from app.repositories.channel_repo import ChannelRepository
 from app.repositories.event_repo import EventRepository
 from app.repositories.subscription_repo import SubscriptionRepository
 from app.repositories.donation_repo import DonationRepository
+from app.repositories.media_repo import MediaRepository
+from app.repositories.recommendation_repo import RecommendationRepository
+from app.services.autocomplete import AutocompleteIndex, SessionAutocomplete
+from app.services.community_purger import CommunityPurger
+from app.services.leaderboard import CommunityLeaderboard, SessionLeaderboard
+from app.services.media_reaper import MediaReaper
+from app.services.media_variants import VariantPipeline
 
 logger = get_logger(__name__)
 
@@ -28,14 +41,41 @@ class Container:
         self._redis: RedisClient = RedisClient()
         self._event_publisher: EventPublisher = create_event_publisher()
         self._s3_client: S3Client = S3Client()
+        self._outbox_relay: OutboxRelay = OutboxRelay(self.db_session, self._event_publisher)
+        self._leaderboard: CommunityLeaderboard = CommunityLeaderboard(self.db_session, self._redis)
+        self._event_consumer: EventConsumer = create_event_consumer(
+            self.db_session, [UserDeletedHandler(self._redis, self._leaderboard)],
+        )
+        self._media_reaper: MediaReaper = MediaReaper(self.db_session, self._s3_client)
+        self._variant_pipeline: VariantPipeline = VariantPipeline(self.db_session, self._s3_client)
+        self._community_purger: CommunityPurger = CommunityPurger(self.db_session)
+        self._autocomplete: AutocompleteIndex = AutocompleteIndex(self.db_session, self._redis)
 
     async def init_resources(self) -> None:
         await self._redis.connect()
         await self._event_publisher.connect()
         await self._s3_client.connect()
+        if settings.OUTBOX_ENABLED and settings.OUTBOX_RELAY_ENABLED:
+            await self._outbox_relay.start()
+        if settings.CONSUMER_ENABLED:
+            await self._event_consumer.start()
+        if settings.MEDIA_REAPER_ENABLED:
+            await self._media_reaper.start()
+        if settings.MEDIA_VARIANTS_ENABLED:
+            await self._variant_pipeline.start()
+        if settings.COMMUNITY_PURGE_ENABLED:
+            await self._community_purger.start()
         logger.info("Все ресурсы контейнера инициализированы")
 
     async def shutdown_resources(self) -> None:
+        await self._event_consumer.stop()
+        await self._community_purger.stop()
+        await self._autocomplete.stop()
+        await self._leaderboard.stop()
+        await self._media_reaper.stop()
+        await self._variant_pipeline.stop()
+        await self._outbox_relay.stop()
+        await self._event_publisher.flush(settings.EVENT_FLUSH_TIMEOUT)
         await self._redis.disconnect()
         await self._event_publisher.disconnect()
         await self._s3_client.disconnect()
@@ -54,6 +94,48 @@ class Container:
     def s3_client(self) -> S3Client:
         return self._s3_client
 
+    @property
+    def outbox_relay(self) -> OutboxRelay:
+        return self._outbox_relay
+
+    @property
+    def event_consumer(self) -> EventConsumer:
+        return self._event_consumer
+
+    @property
+    def media_reaper(self) -> MediaReaper:
+        return self._media_reaper
+
+    @property
+    def variant_pipeline(self) -> VariantPipeline:
+        return self._variant_pipeline
+
+    @property
+    def community_purger(self) -> CommunityPurger:
+        return self._community_purger
+
+    @property
+    def autocomplete(self) -> AutocompleteIndex:
+        return self._autocomplete
+
+    def session_autocomplete(self, session: AsyncSession) -> SessionAutocomplete:
+        """Индекс автодополнения для сервисов: изменения попадают в Redis только после коммита сессии."""
+        return SessionAutocomplete(self._autocomplete, session)
+
+    @property
+    def leaderboard(self) -> CommunityLeaderboard:
+        return self._leaderboard
+
+    def session_leaderboard(self, session: AsyncSession) -> SessionLeaderboard:
+        """Рейтинги для сервисов: инкременты попадают в Redis только после коммита сессии."""
+        return SessionLeaderboard(self._leaderboard, session)
+
+    def session_event_publisher(self, session: AsyncSession) -> EventPublisher:
+        """Publisher для сервисов: при включённом outbox события коммитятся вместе с данными."""
+        if settings.OUTBOX_ENABLED:
+            return OutboxEventPublisher(session)
+        return self._event_publisher
+
     @asynccontextmanager
     async def db_session(self) -> AsyncGenerator[AsyncSession, None]:
         async with async_session_factory() as session:
@@ -61,8 +143,11 @@ class Container:
                 yield session
                 await session.commit()
             except Exception:
+                discard_after_commit(session)
                 await session.rollback()
                 raise
+            else:
+                await run_after_commit(session)
 
     def community_repo(self, session: AsyncSession) -> CommunityRepository:
         return CommunityRepository(session)
@@ -87,3 +172,9 @@ class Container:
 
     def donation_repo(self, session: AsyncSession) -> DonationRepository:
         return DonationRepository(session)
+
+    def media_repo(self, session: AsyncSession) -> MediaRepository:
+        return MediaRepository(session)
+
+    def recommendation_repo(self, session: AsyncSession) -> RecommendationRepository:
+        return RecommendationRepository(session)
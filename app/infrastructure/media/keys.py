@@ -0,0 +1,54 @@
+"""Content-addressed ключи медиа и их связь с URL в данных сообществ."""
+from __future__ import annotations
+import mimetypes
+import re
+from collections import Counter
+from typing import Iterable, Optional
+
+from app.core.config import settings
+
+# Тот же разбор в SQL (substring ... from) — для подсчёта ссылок без выгрузки URL в приложение.
+MEDIA_URL_SHA_PATTERN = r"/media/[0-9a-f]{2}/([0-9a-f]{64})\.[a-z0-9]+$"
+_MEDIA_URL_SHA = re.compile(MEDIA_URL_SHA_PATTERN)
+# Оригинал (media/ab/<sha>.jpg) или его вариант (media/ab/<sha>/thumbnail.webp).
+_OBJECT_KEY_SHA = re.compile(r"^media/[0-9a-f]{2}/([0-9a-f]{64})(?:\.[a-z0-9]+|/[a-z]+\.webp)$")
+
+
+def media_key(sha256: str, content_type: str) -> str:
+    """Ключ определяется содержимым: одинаковые файлы разных сообществ — один объект."""
+    extension = mimetypes.guess_extension(content_type) or ""
+    return f"media/{sha256[:2]}/{sha256}{extension}"
+
+
+def variant_key(sha256: str, name: str) -> str:
+    return f"media/{sha256[:2]}/{sha256}/{name}.webp"
+
+
+def media_url_prefix() -> str:
+    return f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET}/"
+
+
+def media_url(key: str) -> str:
+    return f"{media_url_prefix()}{key}"
+
+
+def key_sha256(key: str) -> Optional[str]:
+    """SHA-256 для ключа content-addressed объекта или его варианта; None для прочих ключей."""
+    match = _OBJECT_KEY_SHA.match(key)
+    return match.group(1) if match else None
+
+
+def media_sha256(url: Optional[str]) -> Optional[str]:
+    """SHA-256 объекта, если URL указывает на content-addressed медиа нашего бакета."""
+    prefix = media_url_prefix()
+    if not url or not url.startswith(prefix):
+        return None
+    match = _MEDIA_URL_SHA.search(url, len(prefix) - 1)
+    return match.group(1) if match else None
+
+
+def reference_delta(before: Iterable[Optional[str]], after: Iterable[Optional[str]]) -> dict[str, int]:
+    """Изменение числа ссылок по sha256 при замене набора URL `before` на `after`."""
+    delta = Counter(sha for sha in map(media_sha256, after) if sha)
+    delta.subtract(sha for sha in map(media_sha256, before) if sha)
+    return {sha: count for sha, count in delta.items() if count}
@@ -1,70 +1,324 @@
 """S3/MinIO клиент для работы с медиа-файлами."""
 from __future__ import annotations
-from typing import Optional, BinaryIO
+import asyncio
+import base64
+import hashlib
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Optional, BinaryIO, Sequence
 
 from app.core.config import settings
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Предел S3 DeleteObjects на один запрос.
+DELETE_BATCH_SIZE = 1000
+
+
+class PresignCache:
+    """Ограниченный LRU подписанных ссылок.
+
+    Ссылка живёт в кэше на S3_PRESIGN_CACHE_MARGIN меньше подписи: клиент не получит URL,
+    который истечёт раньше, чем он успеет им воспользоваться.
+    """
+
+    def __init__(self, max_size: int, margin: float):
+        self._max_size = max_size
+        self._margin = margin
+        self._items: OrderedDict[tuple[str, str, int], tuple[str, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, bucket: str, key: str, expires_in: int) -> Optional[str]:
+        item = self._items.get((bucket, key, expires_in))
+        if item is None or item[1] <= time.monotonic():
+            self.misses += 1
+            return None
+        self._items.move_to_end((bucket, key, expires_in))
+        self.hits += 1
+        return item[0]
+
+    def put(self, bucket: str, key: str, expires_in: int, url: str) -> None:
+        ttl = expires_in - max(self._margin, expires_in * 0.1)
+        if self._max_size <= 0 or ttl <= 0:
+            return
+        self._items[(bucket, key, expires_in)] = (url, time.monotonic() + ttl)
+        self._items.move_to_end((bucket, key, expires_in))
+        while len(self._items) > self._max_size:
+            self._items.popitem(last=False)
+
+    def discard(self, bucket: str, key: str) -> None:
+        for cache_key in [cache_key for cache_key in self._items if cache_key[:2] == (bucket, key)]:
+            del self._items[cache_key]
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+class UploadTooLarge(Exception):
+    """Поток превысил лимит размера; multipart-загрузка уже отменена."""
+
+
+@dataclass
+class UploadResult:
+    key: str
+    url: str
+    size: int
+    sha256: str
+    parts: int
+
+
+@dataclass(frozen=True)
+class StoredObject:
+    key: str
+    size: int
+    last_modified: datetime
+
 
 class S3Client:
+    """Один долгоживущий клиент на процесс: пул соединений и учётные данные создаются в connect()."""
+
     def __init__(self):
-        self._session = None
+        self._client = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._presign_cache = PresignCache(settings.S3_PRESIGN_CACHE_SIZE, settings.S3_PRESIGN_CACHE_MARGIN)
+
+    @property
+    def presign_cache(self) -> PresignCache:
+        return self._presign_cache
 
     async def connect(self) -> None:
         try:
             import aioboto3
-            self._session = aioboto3.Session()
-            logger.info("S3 клиент инициализирован")
+            from botocore.config import Config
         except ImportError:
             logger.warning("aioboto3 не установлен, S3 клиент в stub-режиме")
-            self._session = None
+            self._client = None
+            return
+
+        config = Config(
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+            tcp_keepalive=True,
+            connect_timeout=settings.S3_CONNECT_TIMEOUT,
+            read_timeout=settings.S3_READ_TIMEOUT,
+            retries={"max_attempts": settings.S3_MAX_ATTEMPTS, "mode": "standard"},
+            signature_version="s3v4",
+        )
+        exit_stack = AsyncExitStack()
+        try:
+            self._client = await exit_stack.enter_async_context(aioboto3.Session().client(
+                "s3", endpoint_url=settings.S3_ENDPOINT,
+                aws_access_key_id=settings.S3_ACCESS_KEY,
+                aws_secret_access_key=settings.S3_SECRET_KEY,
+                region_name=settings.S3_REGION,
+                config=config,
+            ))
+        except Exception as e:
+            await exit_stack.aclose()
+            logger.error(f"Не удалось создать S3 клиент: {e}")
+            self._client = None
+            return
+        self._exit_stack = exit_stack
+        logger.info("S3 клиент инициализирован", extra={
+            "metrics": {"max_pool_connections": settings.S3_MAX_POOL_CONNECTIONS},
+        })
 
     async def disconnect(self) -> None:
-        self._session = None
+        exit_stack, self._exit_stack = self._exit_stack, None
+        self._client = None
+        self._presign_cache.clear()
+        if exit_stack is not None:
+            await exit_stack.aclose()
 
     async def upload_file(self, file_data: BinaryIO, key: str,
                           content_type: str = "application/octet-stream",
                           bucket: Optional[str] = None) -> str:
         target_bucket = bucket or settings.S3_BUCKET
-        if not self._session:
+        if not self._client:
             logger.debug(f"S3 stub: upload {key}")
             return f"{settings.S3_ENDPOINT}/{target_bucket}/{key}"
+        await self._client.upload_fileobj(file_data, target_bucket, key,
+                                          ExtraArgs={"ContentType": content_type})
+        return f"{settings.S3_ENDPOINT}/{target_bucket}/{key}"
 
-        async with self._session.client(
-            "s3", endpoint_url=settings.S3_ENDPOINT,
-            aws_access_key_id=settings.S3_ACCESS_KEY,
-            aws_secret_access_key=settings.S3_SECRET_KEY,
-            region_name=settings.S3_REGION,
-        ) as client:
-            await client.upload_fileobj(file_data, target_bucket, key,
-                                        ExtraArgs={"ContentType": content_type})
-            return f"{settings.S3_ENDPOINT}/{target_bucket}/{key}"
+    async def put_bytes(self, data: bytes, key: str, content_type: str,
+                        bucket: Optional[str] = None) -> str:
+        """Небольшой объект целиком одним PUT (варианты изображений, служебные файлы)."""
+        target_bucket = bucket or settings.S3_BUCKET
+        if self._client:
+            await self._client.put_object(
+                Bucket=target_bucket, Key=key, Body=data, ContentType=content_type,
+                ContentMD5=base64.b64encode(hashlib.md5(data).digest()).decode(),
+            )
+        return f"{settings.S3_ENDPOINT}/{target_bucket}/{key}"
+
+    async def download(self, key: str, bucket: Optional[str] = None) -> Optional[bytes]:
+        """Содержимое объекта; None в stub-режиме."""
+        if not self._client:
+            return None
+        response = await self._client.get_object(Bucket=bucket or settings.S3_BUCKET, Key=key)
+        async with response["Body"] as body:
+            return await body.read()
+
+    async def upload_stream(self, chunks: AsyncIterator[bytes], key: str,
+                            content_type: str = "application/octet-stream",
+                            bucket: Optional[str] = None,
+                            max_bytes: Optional[int] = None) -> UploadResult:
+        """Загрузить поток частями фиксированного размера, не буферизуя файл целиком.
+
+        Одновременно в полёте не больше S3_UPLOAD_CONCURRENCY частей: следующая часть не
+        читается, пока не освободится слот, — память ограничена (concurrency + 1) * part_size.
+        SHA-256 объекта считается по ходу чтения, каждая часть проверяется S3 по Content-MD5.
+        Поток короче одной части уходит обычным put_object.
+        """
+        target_bucket = bucket or settings.S3_BUCKET
+        part_size = settings.S3_UPLOAD_PART_SIZE
+        digest = hashlib.sha256()
+        buffer = bytearray()
+        size = 0
+        upload_id: Optional[str] = None
+        slots = asyncio.Semaphore(settings.S3_UPLOAD_CONCURRENCY)
+        tasks: list[asyncio.Task] = []
+
+        async def upload_part(number: int, body: bytes) -> dict:
+            try:
+                md5 = base64.b64encode(hashlib.md5(body).digest()).decode()
+                response = await self._client.upload_part(
+                    Bucket=target_bucket, Key=key, UploadId=upload_id,
+                    PartNumber=number, Body=body, ContentMD5=md5,
+                )
+                return {"PartNumber": number, "ETag": response["ETag"]}
+            finally:
+                slots.release()
+
+        async def start_part(body: bytes) -> None:
+            nonlocal upload_id
+            if upload_id is None:
+                created = await self._client.create_multipart_upload(
+                    Bucket=target_bucket, Key=key, ContentType=content_type)
+                upload_id = created["UploadId"]
+            await slots.acquire()
+            failed = next((task for task in tasks if task.done() and task.exception()), None)
+            if failed is not None:
+                slots.release()
+                raise failed.exception()
+            tasks.append(asyncio.create_task(upload_part(len(tasks) + 1, body)))
+
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLarge(f"Файл больше {max_bytes} байт")
+                digest.update(chunk)
+                if not self._client:
+                    continue
+                buffer += chunk
+                while len(buffer) >= part_size:
+                    body = bytes(buffer[:part_size])
+                    del buffer[:part_size]
+                    await start_part(body)
+
+            url = f"{settings.S3_ENDPOINT}/{target_bucket}/{key}"
+            if not self._client:
+                logger.debug(f"S3 stub: upload {key}")
+                return UploadResult(key, url, size, digest.hexdigest(), 0)
+            if upload_id is None:
+                await self._client.put_object(
+                    Bucket=target_bucket, Key=key, Body=bytes(buffer), ContentType=content_type,
+                    ContentMD5=base64.b64encode(hashlib.md5(buffer).digest()).decode(),
+                )
+                return UploadResult(key, url, size, digest.hexdigest(), 1)
+            if buffer:
+                await start_part(bytes(buffer))
+                buffer.clear()
+            parts = await asyncio.gather(*tasks)
+            await self._client.complete_multipart_upload(
+                Bucket=target_bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts})
+            return UploadResult(key, url, size, digest.hexdigest(), len(parts))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if upload_id is not None:
+                try:
+                    await self._client.abort_multipart_upload(Bucket=target_bucket, Key=key, UploadId=upload_id)
+                except Exception as e:
+                    logger.warning(f"Не удалось отменить multipart-загрузку {key}: {e}")
+            raise
 
     async def delete_file(self, key: str, bucket: Optional[str] = None) -> None:
         target_bucket = bucket or settings.S3_BUCKET
-        if not self._session:
+        self._presign_cache.discard(target_bucket, key)
+        if not self._client:
+            return
+        await self._client.delete_object(Bucket=target_bucket, Key=key)
+
+    async def delete_files(self, keys: Sequence[str], bucket: Optional[str] = None) -> list[str]:
+        """Удалить ключи пачками DeleteObjects по DELETE_BATCH_SIZE; возвращает ключи, которые удалить не удалось."""
+        target_bucket = bucket or settings.S3_BUCKET
+        for key in keys:
+            self._presign_cache.discard(target_bucket, key)
+        if not self._client or not keys:
+            return []
+
+        async def delete_batch(batch: Sequence[str]) -> list[str]:
+            try:
+                response = await self._client.delete_objects(
+                    Bucket=target_bucket,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                )
+            except Exception as e:
+                logger.warning(f"S3 DeleteObjects: {e}")
+                return list(batch)
+            return [error["Key"] for error in response.get("Errors", ())]
+
+        batches = [keys[i:i + DELETE_BATCH_SIZE] for i in range(0, len(keys), DELETE_BATCH_SIZE)]
+        failed = await asyncio.gather(*(delete_batch(batch) for batch in batches))
+        return [key for batch in failed for key in batch]
+
+    async def list_objects(self, prefix: str, bucket: Optional[str] = None,
+                           page_size: int = DELETE_BATCH_SIZE) -> AsyncIterator[list[StoredObject]]:
+        """Содержимое бакета постранично: в памяти не больше одной страницы листинга."""
+        if not self._client:
             return
-        async with self._session.client(
-            "s3", endpoint_url=settings.S3_ENDPOINT,
-            aws_access_key_id=settings.S3_ACCESS_KEY,
-            aws_secret_access_key=settings.S3_SECRET_KEY,
-            region_name=settings.S3_REGION,
-        ) as client:
-            await client.delete_object(Bucket=target_bucket, Key=key)
+        paginator = self._client.get_paginator("list_objects_v2")
+        async for page in paginator.paginate(Bucket=bucket or settings.S3_BUCKET, Prefix=prefix,
+                                             PaginationConfig={"PageSize": page_size}):
+            yield [StoredObject(item["Key"], item["Size"], item["LastModified"]) for item in page.get("Contents", ())]
 
     async def generate_presigned_url(self, key: str, bucket: Optional[str] = None,
                                       expires_in: int = 3600) -> str:
+        urls = await self.generate_presigned_urls([key], bucket, expires_in)
+        return urls[key]
+
+    async def generate_presigned_urls(self, keys: Sequence[str], bucket: Optional[str] = None,
+                                      expires_in: int = 3600) -> dict[str, str]:
+        """Подписать пачку ключей: из кэша — без подписи, остальные — локально, без запросов к S3."""
         target_bucket = bucket or settings.S3_BUCKET
-        if not self._session:
-            return f"{settings.S3_ENDPOINT}/{target_bucket}/{key}?presigned=stub"
-        async with self._session.client(
-            "s3", endpoint_url=settings.S3_ENDPOINT,
-            aws_access_key_id=settings.S3_ACCESS_KEY,
-            aws_secret_access_key=settings.S3_SECRET_KEY,
-            region_name=settings.S3_REGION,
-        ) as client:
-            url = await client.generate_presigned_url(
-                "get_object", Params={"Bucket": target_bucket, "Key": key}, ExpiresIn=expires_in)
-            return url
+        urls: dict[str, str] = {}
+        missing: list[str] = []
+        for key in dict.fromkeys(keys):
+            cached = self._presign_cache.get(target_bucket, key, expires_in)
+            if cached is not None:
+                urls[key] = cached
+            else:
+                missing.append(key)
+        if not missing:
+            return urls
+
+        if not self._client:
+            signed = [f"{settings.S3_ENDPOINT}/{target_bucket}/{key}?presigned=stub" for key in missing]
+        else:
+            signed = await asyncio.gather(*(
+                self._client.generate_presigned_url(
+                    "get_object", Params={"Bucket": target_bucket, "Key": key}, ExpiresIn=expires_in)
+                for key in missing
+            ))
+        for key, url in zip(missing, signed):
+            self._presign_cache.put(target_bucket, key, expires_in, url)
+            urls[key] = url
+        return urls
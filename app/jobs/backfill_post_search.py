@@ -0,0 +1,45 @@
+"""Заполнение search_vector у постов, созданных до поиска: python -m app.jobs.backfill_post_search."""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import time
+from typing import Optional, Sequence
+
+from app.core.logging import setup_logging
+from app.db.session import engine, get_db_session
+from app.repositories.post_repo import PostRepository
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Заполнить search_vector постов keyset-пачками")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.05, help="пауза между пачками, секунды")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    setup_logging()
+    started = time.monotonic()
+    after, scanned, updated = None, 0, 0
+    try:
+        while True:
+            # Каждая пачка — своя короткая транзакция
+            async with get_db_session() as session:
+                last, count = await PostRepository(session).backfill_search_vector(after, args.batch_size)
+            if last is None:
+                break
+            after = last
+            scanned += args.batch_size
+            updated += count
+            await asyncio.sleep(args.pause)
+    finally:
+        await engine.dispose()
+    print(json.dumps({"updated": updated, "scanned_batches": scanned // args.batch_size,
+                      "elapsed_seconds": round(time.monotonic() - started, 3)}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
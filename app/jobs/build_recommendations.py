@@ -0,0 +1,38 @@
+"""Расчёт похожих сообществ по общим участникам: python -m app.jobs.build_recommendations."""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+from typing import Optional, Sequence
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.db.session import engine, get_db_session
+from app.services.recommendations import RecommendationBuilder
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Пересчитать MinHash-подписи и списки похожих сообществ")
+    parser.add_argument("--full", action="store_true",
+                        help="подписать все сообщества заново, а не только изменённые с прошлого прогона")
+    parser.add_argument("--top-k", type=int, default=settings.RECOMMENDATIONS_TOP_K)
+    parser.add_argument("--min-members", type=int, default=settings.RECOMMENDATIONS_MIN_MEMBERS)
+    parser.add_argument("--chunk-size", type=int, default=settings.RECOMMENDATIONS_CHUNK_SIZE)
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    setup_logging()
+    try:
+        builder = RecommendationBuilder(get_db_session, k=args.top_k, min_members=args.min_members,
+                                        chunk_size=args.chunk_size)
+        report = await builder.run(full=args.full)
+    finally:
+        await engine.dispose()
+    print(json.dumps(report.to_dict(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,47 @@
+"""Пересчёт денормализованных счётчиков и кэшей: python -m app.jobs.rebuild_projections."""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+from typing import Optional, Sequence
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.db.session import engine, get_db_session
+from app.infrastructure.cache.redis_client import RedisClient
+from app.services.projection_service import COUNTERS, ProjectionRebuilder
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Пересчитать счётчики сообществ по базовым таблицам")
+    parser.add_argument("--counters", default=",".join(COUNTERS),
+                        help=f"через запятую, по умолчанию все: {','.join(COUNTERS)}")
+    parser.add_argument("--workers", type=int, default=settings.PROJECTION_REBUILD_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=settings.PROJECTION_REBUILD_CHUNK_SIZE)
+    parser.add_argument("--lock-timeout-ms", type=int, default=settings.PROJECTION_REBUILD_LOCK_TIMEOUT_MS)
+    parser.add_argument("--dry-run", action="store_true", help="только отчёт о расхождениях, без записи")
+    parser.add_argument("--caches", action="store_true",
+                        help="сбросить кэши всех сообществ, а не только исправленных")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    setup_logging()
+    cache = RedisClient()
+    await cache.connect()
+    try:
+        rebuilder = ProjectionRebuilder(
+            get_db_session, cache, workers=args.workers, chunk_size=args.chunk_size,
+            dry_run=args.dry_run, rebuild_caches=args.caches, lock_timeout_ms=args.lock_timeout_ms,
+        )
+        report = await rebuilder.run([name.strip() for name in args.counters.split(",") if name.strip()])
+    finally:
+        await cache.disconnect()
+        await engine.dispose()
+    print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+    return 1 if report.failed_chunks else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,42 @@
+"""Сверка бакета медиа с базой: python -m app.jobs.reconcile_media."""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+from typing import Optional, Sequence
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.db.session import engine, get_db_session
+from app.infrastructure.media.s3_client import DELETE_BATCH_SIZE, S3Client
+from app.services.media_reconciler import MediaReconciler
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Удалить из S3 медиа, на которые нет ссылок в базе")
+    parser.add_argument("--prefix", default="media/", help="префикс ключей для сверки")
+    parser.add_argument("--grace-seconds", type=int, default=settings.MEDIA_ORPHAN_GRACE_SECONDS,
+                        help="не трогать объекты моложе этого возраста")
+    parser.add_argument("--page-size", type=int, default=DELETE_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="только отчёт, без удаления")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    setup_logging()
+    s3 = S3Client()
+    await s3.connect()
+    try:
+        reconciler = MediaReconciler(get_db_session, s3, grace_seconds=args.grace_seconds,
+                                     dry_run=args.dry_run, page_size=args.page_size)
+        report = await reconciler.run(args.prefix)
+    finally:
+        await s3.disconnect()
+        await engine.dispose()
+    print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
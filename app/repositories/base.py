@@ -1,23 +1,59 @@
 """Базовый репозиторий с общими CRUD-операциями."""
 from __future__ import annotations
+import base64
+import json
 import uuid
-from typing import Any, Generic, Optional, Sequence, Type, TypeVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Generic, Optional, Sequence, Type, TypeVar
 
-from sqlalchemy import delete, func, select, update
+from sqlalchemy import RowMapping, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, raiseload
 
 from app.domain.models import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 
 
+@dataclass(frozen=True)
+class RankCursor:
+    """Позиция keyset-пагинации по (rank DESC, id DESC); клиенту отдаётся непрозрачной строкой."""
+    rank: float
+    id: uuid.UUID
+
+    def encode(self) -> str:
+        raw = json.dumps([self.rank, str(self.id)], separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "RankCursor":
+        """ValueError, если строка не выдана encode."""
+        try:
+            rank, entity_id = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+            return cls(float(rank), uuid.UUID(entity_id))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Некорректный cursor: {token}") from e
+
+
 class BaseRepository(Generic[ModelType]):
     def __init__(self, model: Type[ModelType], session: AsyncSession):
         self._model = model
         self._session = session
 
-    async def get_by_id(self, entity_id: uuid.UUID) -> Optional[ModelType]:
-        result = await self._session.get(self._model, entity_id)
+    def _column_options(self, columns: Optional[Sequence[str]]) -> list:
+        """load_only по именам колонок — в SELECT попадают только нужные поля.
+
+        Связи не загружаются вовсе (в том числе lazy="selectin"): выборка колонок —
+        это проверка существования или проекция, обращение к связи — ошибка.
+        """
+        if not columns:
+            return []
+        return [load_only(*(getattr(self._model, name) for name in columns)), raiseload("*")]
+
+    async def get_by_id(
+        self, entity_id: uuid.UUID, columns: Optional[Sequence[str]] = None,
+    ) -> Optional[ModelType]:
+        result = await self._session.get(self._model, entity_id, options=self._column_options(columns))
         return result
 
     async def get_all(
@@ -26,8 +62,10 @@ class BaseRepository(Generic[ModelType]):
         limit: int = 20,
         filters: Optional[list] = None,
         order_by: Optional[Any] = None,
+        columns: Optional[Sequence[str]] = None,
+        options: Optional[list] = None,
     ) -> Sequence[ModelType]:
-        stmt = select(self._model)
+        stmt = select(self._model).options(*self._column_options(columns), *(options or []))
         if filters:
             for f in filters:
                 stmt = stmt.where(f)
@@ -47,6 +85,21 @@ class BaseRepository(Generic[ModelType]):
         result = await self._session.execute(stmt)
         return result.scalar_one()
 
+    async def stream_columns(
+        self,
+        columns: Sequence[str],
+        filters: Optional[list] = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[Sequence[RowMapping]]:
+        """Построчное чтение через server-side cursor, пачками по chunk_size."""
+        stmt = select(*(getattr(self._model, name) for name in columns))
+        if filters:
+            for f in filters:
+                stmt = stmt.where(f)
+        result = await self._session.stream(stmt.execution_options(yield_per=chunk_size))
+        async for partition in result.mappings().partitions():
+            yield partition
+
     async def create(self, entity: ModelType) -> ModelType:
         self._session.add(entity)
         await self._session.flush()
@@ -1,39 +1,152 @@
 """Репозиторий сообществ."""
 from __future__ import annotations
 import uuid
+from datetime import datetime
 from typing import Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import Integer, Row, column, exists, func, literal_column, or_, select, tuple_, union_all, update, values
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.domain.models import Community
-from app.repositories.base import BaseRepository
+from app.domain.models import SEARCH_CONFIG, Community, Member, Post
+from app.repositories.base import BaseRepository, RankCursor
+
+
+def _search_clauses(query: str):
+    """Условие поиска и ранг: полнотекстовое совпадение (GIN по search_vector) или похожее
+    название (pg_trgm, name % query); ранг — релевантность, умноженная на log популярности."""
+    tsquery = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), query)
+    match = or_(Community.search_vector.op("@@")(tsquery), Community.name.op("%")(query))
+    relevance = func.ts_rank_cd(Community.search_vector, tsquery) + func.similarity(Community.name, query)
+    rank = relevance * func.ln(Community.member_count + 2)
+    return match, rank
+
+
+def community_alive(community_id):
+    """Условие «сообщество не удалено» для строк дочерних таблиц до их очистки."""
+    return exists().where(Community.id == community_id, Community.status != "deleted")
 
 
 class CommunityRepository(BaseRepository[Community]):
     def __init__(self, session: AsyncSession):
         super().__init__(Community, session)
 
+    async def get_by_id(
+        self, entity_id: uuid.UUID, columns: Optional[Sequence[str]] = None,
+    ) -> Optional[Community]:
+        """Удалённое сообщество, ожидающее очистки, для API уже не существует."""
+        stmt = (
+            select(Community)
+            .options(*self._column_options(columns))
+            .where(Community.id == entity_id, Community.status != "deleted")
+        )
+        result = await self._session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def soft_delete(self, community_id: uuid.UUID) -> bool:
+        stmt = (
+            update(Community)
+            .where(Community.id == community_id, Community.status != "deleted")
+            .values(status="deleted", deleted_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        return result.rowcount > 0
+
     async def get_by_slug(self, slug: str) -> Optional[Community]:
         stmt = select(Community).where(Community.slug == slug)
         result = await self._session.execute(stmt)
         return result.scalar_one_or_none()
 
-    async def get_popular(self, limit: int = 10) -> Sequence[Community]:
+    async def get_popular(self, limit: int = 10, community_type: Optional[str] = None) -> Sequence[Community]:
         stmt = (
             select(Community)
             .where(Community.status == "active")
             .order_by(Community.member_count.desc())
             .limit(limit)
         )
+        if community_type is not None:
+            stmt = stmt.where(Community.community_type == community_type)
         result = await self._session.execute(stmt)
         return result.scalars().all()
 
-    async def search(self, query: str, offset: int = 0, limit: int = 20) -> tuple[Sequence[Community], int]:
-        search_filter = Community.name.ilike(f"%{query}%")
-        items = await self.get_all(offset=offset, limit=limit, filters=[search_filter, Community.status == "active"])
-        total = await self.count(filters=[search_filter, Community.status == "active"])
-        return items, total
+    async def get_by_ids(self, community_ids: Sequence[uuid.UUID],
+                         columns: Optional[Sequence[str]] = None) -> Sequence[Community]:
+        """Активные сообщества по списку id, порядок не гарантирован."""
+        if not community_ids:
+            return []
+        stmt = (
+            select(Community)
+            .options(*self._column_options(columns))
+            .where(Community.id.in_(community_ids), Community.status == "active")
+        )
+        return (await self._session.execute(stmt)).scalars().all()
+
+    async def trending_scores(
+        self, since: datetime, origin: datetime, half_life: float, join_weight: float, post_weight: float,
+        community_type: Optional[str] = None, limit: Optional[int] = None,
+    ) -> Sequence[Row]:
+        """(id, score) по вступлениям и постам после since: вклад каждого — вес × 2^((t − origin) / half_life)."""
+        def decayed(weight: float, moment):
+            return weight * func.power(2.0, func.extract("epoch", moment - origin) / half_life)
+
+        activity = union_all(
+            select(Member.community_id, decayed(join_weight, Member.joined_at).label("weight"))
+            .where(Member.joined_at >= since, Member.status == "active"),
+            select(Post.community_id, decayed(post_weight, Post.published_at).label("weight"))
+            .where(Post.published_at >= since, Post.status == "published"),
+        ).subquery()
+        score = func.sum(activity.c.weight)
+        stmt = (
+            select(Community.id, score.label("score"))
+            .join(activity, activity.c.community_id == Community.id)
+            .where(Community.status == "active")
+            .group_by(Community.id)
+            .order_by(score.desc())
+        )
+        if community_type is not None:
+            stmt = stmt.where(Community.community_type == community_type)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return (await self._session.execute(stmt)).all()
+
+    async def search(
+        self, query: str, limit: int = 20, cursor: Optional[RankCursor] = None, offset: int = 0,
+        columns: Optional[Sequence[str]] = None,
+    ) -> tuple[Sequence[Community], Optional[RankCursor]]:
+        """Страница результатов по рангу и курсор следующей; с cursor offset не используется."""
+        match, rank = _search_clauses(query)
+        stmt = (
+            select(Community, rank.label("rank"))
+            .options(*self._column_options(columns))
+            .where(match, Community.status == "active")
+            .order_by(rank.desc(), Community.id.desc())
+            .limit(limit + 1)
+        )
+        if cursor is not None:
+            stmt = stmt.where(tuple_(rank, Community.id) < tuple_(cursor.rank, cursor.id))
+        elif offset:
+            stmt = stmt.offset(offset)
+        rows = (await self._session.execute(stmt)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = RankCursor(last.rank, last.Community.id)
+        return [row.Community for row in rows[:limit]], next_cursor
+
+    async def count_search(self, query: str) -> int:
+        match, _ = _search_clauses(query)
+        return await self.count(filters=[match, Community.status == "active"])
+
+    async def names_with_prefix(self, prefix: str, limit: int) -> Sequence[Row]:
+        """(id, name) активных сообществ, чьё название начинается с prefix — запасной путь автодополнения."""
+        stmt = (
+            select(Community.id, Community.name)
+            .where(Community.status == "active", func.lower(Community.name).startswith(prefix, autoescape=True))
+            .order_by(func.lower(Community.name))
+            .limit(limit)
+        )
+        return (await self._session.execute(stmt)).all()
 
     async def increment_member_count(self, community_id: uuid.UUID, delta: int = 1) -> None:
         community = await self.get_by_id(community_id)
@@ -46,3 +159,26 @@ class CommunityRepository(BaseRepository[Community]):
         if community:
             community.post_count = max(0, community.post_count + delta)
             await self._session.flush()
+
+    async def decrement_counters(self, members: dict[uuid.UUID, int], posts: dict[uuid.UUID, int]) -> None:
+        """Уменьшить member_count / post_count сразу у многих сообществ одним UPDATE ... FROM (VALUES)."""
+        rows = [
+            (community_id, members.get(community_id, 0), posts.get(community_id, 0))
+            for community_id in set(members) | set(posts)
+            if members.get(community_id) or posts.get(community_id)
+        ]
+        if not rows:
+            return
+        deltas = values(
+            column("id", PGUUID(as_uuid=True)), column("members", Integer), column("posts", Integer), name="deltas",
+        ).data(rows)
+        stmt = (
+            update(Community)
+            .where(Community.id == deltas.c.id)
+            .values(
+                member_count=func.greatest(Community.member_count - deltas.c.members, 0),
+                post_count=func.greatest(Community.post_count - deltas.c.posts, 0),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self._session.execute(stmt)
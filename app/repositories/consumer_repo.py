@@ -0,0 +1,37 @@
+"""Репозиторий служебных таблиц consumer-ов: идемпотентность и dead letters."""
+from __future__ import annotations
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.models import DeadLetterEvent, ProcessedEvent
+from app.repositories.base import BaseRepository
+
+
+class ConsumerRepository(BaseRepository[ProcessedEvent]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(ProcessedEvent, session)
+
+    async def claim(self, consumer: str, event_ids: Sequence[str]) -> set[str]:
+        """Отметить события обработанными; возвращает id, которых раньше не было."""
+        if not event_ids:
+            return set()
+        stmt = (
+            pg_insert(ProcessedEvent)
+            .values([{"consumer": consumer, "event_id": event_id} for event_id in event_ids])
+            .on_conflict_do_nothing()
+            .returning(ProcessedEvent.event_id)
+        )
+        result = await self._session.execute(stmt)
+        return set(result.scalars().all())
+
+    async def add_dead_letters(self, rows: Sequence[DeadLetterEvent]) -> None:
+        self._session.add_all(rows)
+        await self._session.flush()
+
+    async def purge_processed(self, before: datetime) -> int:
+        result = await self._session.execute(delete(ProcessedEvent).where(ProcessedEvent.processed_at < before))
+        return result.rowcount or 0
@@ -3,16 +3,28 @@ from __future__ import annotations
 import uuid
 from typing import Optional, Sequence
 
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domain.models import Event
 from app.repositories.base import BaseRepository
+from app.repositories.community_repo import community_alive
 
 
 class EventRepository(BaseRepository[Event]):
     def __init__(self, session: AsyncSession):
         super().__init__(Event, session)
 
+    async def get_by_id(self, entity_id: uuid.UUID, columns: Optional[Sequence[str]] = None) -> Optional[Event]:
+        """Мероприятия удалённого сообщества не видны, пока их не удалил CommunityPurger."""
+        stmt = (
+            select(Event)
+            .options(*self._column_options(columns))
+            .where(Event.id == entity_id, community_alive(Event.community_id))
+        )
+        result = await self._session.execute(stmt)
+        return result.scalar_one_or_none()
+
     async def get_community_events(
         self, community_id: uuid.UUID, offset: int = 0, limit: int = 20,
         status_filter: Optional[str] = None,
@@ -0,0 +1,181 @@
+"""Репозиторий индекса content-addressed медиа."""
+from __future__ import annotations
+import uuid
+from datetime import datetime
+from typing import Optional, Sequence
+
+from sqlalchemy import Integer, String, case, column, delete, func, or_, select, text, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.models import Community, Event, MediaObject, Post
+from app.infrastructure.media.keys import MEDIA_URL_SHA_PATTERN
+from app.repositories.base import BaseRepository
+
+# Медиа всех постов авторов перед их удалением: URL считаются в БД и не выгружаются в приложение.
+_AUTHOR_POST_REFERENCES = text("""
+    WITH counts AS (
+        SELECT substring(url FROM :pattern) AS sha256, count(*) AS n
+        FROM posts, unnest(media_urls) AS url
+        WHERE author_id = ANY(:author_ids) AND starts_with(url, :prefix)
+        GROUP BY 1
+    )
+    UPDATE media_objects AS m
+    SET ref_count = greatest(m.ref_count - counts.n, 0),
+        orphaned_at = CASE WHEN m.ref_count - counts.n <= 0 THEN coalesce(m.orphaned_at, now()) END
+    FROM counts
+    WHERE m.sha256 = counts.sha256
+""")
+
+
+class MediaRepository(BaseRepository[MediaObject]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(MediaObject, session)
+
+    async def touch(self, sha256: str) -> Optional[MediaObject]:
+        """Повторная загрузка известного содержимого: у объекта без ссылок grace-период начинается заново."""
+        stmt = (
+            update(MediaObject)
+            .where(MediaObject.sha256 == sha256)
+            .values(orphaned_at=case((MediaObject.ref_count == 0, func.now()), else_=None))
+            .returning(MediaObject)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def register(self, sha256: str, key: str, size: int, content_type: str,
+                       claim_variants: bool = False) -> MediaObject:
+        """Новый объект без ссылок: если за grace-период его никуда не прикрепят, reaper его удалит.
+
+        claim_variants — варианты построит очередь этого воркера, обход других их не берёт.
+        """
+        stmt = (
+            pg_insert(MediaObject)
+            .values(sha256=sha256, key=key, size=size, content_type=content_type, ref_count=0,
+                    orphaned_at=func.now(), variants_claimed_at=func.now() if claim_variants else None)
+            .on_conflict_do_update(
+                index_elements=[MediaObject.sha256],
+                set_={"orphaned_at": case((MediaObject.ref_count == 0, func.now()), else_=None)},
+            )
+            .returning(MediaObject)
+        )
+        result = await self._session.execute(stmt)
+        return result.scalar_one()
+
+    async def adjust_references(self, delta: dict[str, int]) -> None:
+        """Изменить счётчики ссылок одним UPDATE ... FROM (VALUES); при нуле объект становится сиротой."""
+        if not delta:
+            return
+        changes = values(column("sha256", String), column("delta", Integer), name="changes").data(
+            sorted(delta.items())
+        )
+        remaining = MediaObject.ref_count + changes.c.delta
+        stmt = (
+            update(MediaObject)
+            .where(MediaObject.sha256 == changes.c.sha256)
+            .values(
+                ref_count=func.greatest(remaining, 0),
+                orphaned_at=case((remaining <= 0, func.coalesce(MediaObject.orphaned_at, func.now())), else_=None),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self._session.execute(stmt)
+
+    async def release_author_posts(self, author_ids: Sequence[uuid.UUID], url_prefix: str) -> int:
+        """Снять ссылки медиа всех постов авторов перед их удалением."""
+        result = await self._session.execute(_AUTHOR_POST_REFERENCES, {
+            "author_ids": list(author_ids), "pattern": MEDIA_URL_SHA_PATTERN, "prefix": url_prefix,
+        })
+        return result.rowcount or 0
+
+    async def set_variants(self, sha256: str, names: Sequence[str]) -> None:
+        await self._session.execute(
+            update(MediaObject).where(MediaObject.sha256 == sha256).values(variants=list(names))
+            .execution_options(synchronize_session=False)
+        )
+
+    async def ready_variants(self, hashes: Sequence[str]) -> dict[str, list[str]]:
+        """sha256 -> имена построенных вариантов; объекты без вариантов не попадают."""
+        if not hashes:
+            return {}
+        result = await self._session.execute(
+            select(MediaObject.sha256, MediaObject.variants)
+            .where(MediaObject.sha256.in_(hashes), MediaObject.variants.is_not(None))
+        )
+        return {row.sha256: row.variants for row in result if row.variants}
+
+    async def claim_missing_variants(self, content_types: Sequence[str], before: datetime, claimed_before: datetime,
+                                     max_claims: int, limit: int) -> Sequence[tuple[str, str]]:
+        """Захватить изображения без вариантов: очередь была полна, процесс перезапускался или все попытки упали.
+
+        SKIP LOCKED и отметка variants_claimed_at не дают воркерам взять одну строку дважды;
+        захват, не закончившийся до claimed_before, считается брошенным.
+        """
+        pending = (
+            select(MediaObject.sha256)
+            .where(
+                MediaObject.variants.is_(None),
+                MediaObject.content_type.in_(content_types), MediaObject.created_at < before,
+                or_(MediaObject.variants_claimed_at.is_(None), MediaObject.variants_claimed_at < claimed_before),
+                MediaObject.variant_attempts < max_claims,
+            )
+            .order_by(MediaObject.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(MediaObject)
+            .where(MediaObject.sha256.in_(pending.scalar_subquery()))
+            .values(variants_claimed_at=func.now(), variant_attempts=MediaObject.variant_attempts + 1)
+            .returning(MediaObject.sha256, MediaObject.key)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        return [(row.sha256, row.key) for row in result]
+
+    async def claim_orphans(self, before: datetime, limit: int) -> Sequence[MediaObject]:
+        """Осиротевшие объекты старше grace-периода. Строки блокируются до коммита:
+        параллельный touch ждёт и либо не найдёт строку, либо увидит её живой."""
+        stmt = (
+            select(MediaObject)
+            .where(MediaObject.ref_count == 0, MediaObject.orphaned_at < before)
+            .order_by(MediaObject.orphaned_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self._session.execute(stmt)
+        return result.scalars().all()
+
+    async def delete_many(self, hashes: Sequence[str]) -> int:
+        if not hashes:
+            return 0
+        result = await self._session.execute(delete(MediaObject).where(MediaObject.sha256.in_(hashes)))
+        return result.rowcount or 0
+
+    async def tracked(self, hashes: Sequence[str]) -> dict[str, tuple[str, list]]:
+        """sha256 -> (ключ, варианты) для объектов, которые есть в индексе."""
+        if not hashes:
+            return {}
+        result = await self._session.execute(
+            select(MediaObject.sha256, MediaObject.key, MediaObject.variants).where(MediaObject.sha256.in_(hashes))
+        )
+        return {row.sha256: (row.key, row.variants or []) for row in result}
+
+    async def referenced_urls(self, urls: Sequence[str]) -> set[str]:
+        """Какие из URL где-либо используются: медиа постов (GIN по media_urls), аватары, баннеры, обложки."""
+        if not urls:
+            return set()
+        candidates = list(urls)
+        post_urls = (
+            select(func.unnest(Post.media_urls).label("url"))
+            .where(Post.media_urls.overlap(candidates))
+            .subquery()
+        )
+        stmt = select(post_urls.c.url).where(post_urls.c.url.in_(candidates)).union(
+            select(Community.avatar_url).where(Community.avatar_url.in_(candidates)),
+            select(Community.banner_url).where(Community.banner_url.in_(candidates)),
+            select(Event.cover_url).where(Event.cover_url.in_(candidates)),
+        )
+        result = await self._session.execute(stmt)
+        return set(result.scalars().all())
@@ -3,11 +3,13 @@ from __future__ import annotations
 import uuid
 from typing import Optional, Sequence
 
-from sqlalchemy import select, and_
+from sqlalchemy import Row, select, and_, delete, func, literal, text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.util import identity_key
 
-from app.domain.models import Member, Role
+from app.domain.models import Member, Role, member_roles
 from app.repositories.base import BaseRepository
 
 
@@ -26,6 +28,17 @@ class MemberRepository(BaseRepository[Member]):
         result = await self._session.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def nicknames_with_prefix(self, community_id: uuid.UUID, prefix: str, limit: int) -> Sequence[Row]:
+        """(user_id, nickname) активных участников по началу ника — запасной путь автодополнения."""
+        stmt = (
+            select(Member.user_id, Member.nickname)
+            .where(Member.community_id == community_id, Member.status == "active",
+                   func.lower(Member.nickname).startswith(prefix, autoescape=True))
+            .order_by(func.lower(Member.nickname))
+            .limit(limit)
+        )
+        return (await self._session.execute(stmt)).all()
+
     async def get_community_members(
         self, community_id: uuid.UUID, offset: int = 0, limit: int = 20,
         status_filter: Optional[str] = None,
@@ -49,5 +62,125 @@ class MemberRepository(BaseRepository[Member]):
             member.roles.remove(role)
             await self._session.flush()
 
+    async def replace_roles(
+        self, member_id: uuid.UUID, community_id: uuid.UUID, role_ids: Sequence[uuid.UUID],
+    ) -> None:
+        """Замена набора ролей диффом: один DELETE лишних и один INSERT недостающих.
+
+        Роли чужих сообществ отсекаются в SQL по community_id.
+        """
+        allowed = and_(Role.community_id == community_id, Role.id.in_(role_ids))
+        await self._session.execute(
+            delete(member_roles).where(and_(
+                member_roles.c.member_id == member_id,
+                member_roles.c.role_id.not_in(select(Role.id).where(allowed)),
+            ))
+        )
+        await self._session.execute(
+            pg_insert(member_roles)
+            .from_select(["member_id", "role_id"], select(literal(member_id, PGUUID(as_uuid=True)), Role.id).where(allowed))
+            .on_conflict_do_nothing()
+        )
+        self._expire_roles([member_id])
+
+    async def bulk_set_role(
+        self, community_id: uuid.UUID, role_id: uuid.UUID, user_ids: Sequence[uuid.UUID], assign: bool = True,
+    ) -> int:
+        """Назначение / снятие одной роли сразу многим участникам сообщества."""
+        targets = select(Member.id).where(and_(Member.community_id == community_id, Member.user_id.in_(user_ids)))
+        role_in_community = select(Role.id).where(and_(Role.id == role_id, Role.community_id == community_id))
+        if assign:
+            stmt = (
+                pg_insert(member_roles)
+                .from_select(
+                    ["member_id", "role_id"],
+                    targets.add_columns(literal(role_id, PGUUID(as_uuid=True))).where(role_in_community.exists()),
+                )
+                .on_conflict_do_nothing()
+                .returning(member_roles.c.member_id)
+            )
+        else:
+            stmt = (
+                delete(member_roles)
+                .where(and_(
+                    member_roles.c.role_id.in_(role_in_community),
+                    member_roles.c.member_id.in_(targets),
+                ))
+                .returning(member_roles.c.member_id)
+            )
+        result = await self._session.execute(stmt)
+        changed = result.scalars().all()
+        self._expire_roles(changed)
+        return len(changed)
+
+    def _expire_roles(self, member_ids: Sequence[uuid.UUID]) -> None:
+        """Сбросить загруженные коллекции ролей, чтобы следующий select увидел изменения."""
+        for member_id in member_ids:
+            member = self._session.identity_map.get(identity_key(Member, member_id))
+            if member is not None:
+                self._session.expire(member, ["roles"])
+
+    async def purge_users(self, user_ids: Sequence[uuid.UUID]) -> dict[uuid.UUID, int]:
+        """Удалить участие пользователей во всех сообществах одним DELETE (владельцы не трогаются).
+
+        Возвращает {community_id: число удалённых активных участников} для пересчёта счётчиков.
+        """
+        stmt = (
+            delete(Member)
+            .where(Member.user_id.in_(user_ids), Member.is_owner.is_(False))
+            .returning(Member.community_id, Member.status)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        removed: dict[uuid.UUID, int] = {}
+        for community_id, status in result.all():
+            removed[community_id] = removed.get(community_id, 0) + int(status == "active")
+        return removed
+
     async def count_active_members(self, community_id: uuid.UUID) -> int:
         return await self.count(filters=[Member.community_id == community_id, Member.status == "active"])
+
+    async def bulk_import(
+        self, community_id: uuid.UUID, rows: Sequence[tuple[uuid.UUID, Optional[str]]],
+        status: str, default_role_id: Optional[uuid.UUID] = None,
+    ) -> int:
+        """COPY во временную таблицу + один INSERT ... ON CONFLICT DO NOTHING.
+
+        Роль по умолчанию назначается тем же запросом, только новым участникам.
+        Возвращает число реально добавленных участников.
+        """
+        connection = await self._session.connection()
+        await connection.execute(text(
+            "CREATE TEMP TABLE member_import_stage (user_id uuid NOT NULL, nickname varchar(100)) ON COMMIT DROP"
+        ))
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "member_import_stage", records=rows, columns=("user_id", "nickname"),
+        )
+
+        assign_role = ""
+        params = {"community_id": community_id, "status": status}
+        if default_role_id is not None:
+            assign_role = """, assigned AS (
+                INSERT INTO member_roles (member_id, role_id)
+                SELECT id, :role_id FROM inserted
+                ON CONFLICT DO NOTHING
+            )"""
+            params["role_id"] = default_role_id
+
+        result = await connection.execute(text(f"""
+            WITH staged AS (
+                SELECT DISTINCT ON (user_id) user_id, nickname
+                FROM member_import_stage ORDER BY user_id
+            ), inserted AS (
+                INSERT INTO members (id, community_id, user_id, status, is_owner, nickname, joined_at, created_at, updated_at)
+                SELECT gen_random_uuid(), :community_id, user_id, CAST(:status AS member_status_enum), false,
+                       nickname, now(), now(), now()
+                FROM staged
+                ON CONFLICT ON CONSTRAINT uq_member_community_user DO NOTHING
+                RETURNING id
+            ){assign_role}
+            SELECT count(*) FROM inserted
+        """), params)
+        await connection.execute(text("DROP TABLE IF EXISTS member_import_stage"))
+        return result.scalar_one()
@@ -0,0 +1,127 @@
+"""Репозиторий transactional outbox."""
+from __future__ import annotations
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Sequence
+
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.domain.models import OutboxEvent
+from app.repositories.base import BaseRepository
+
+
+class OutboxRepository(BaseRepository[OutboxEvent]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(OutboxEvent, session)
+
+    async def claim_batch(self, limit: int) -> Sequence[OutboxEvent]:
+        """Забрать пачку неопубликованных событий; строки, занятые другими relay, пропускаются.
+
+        Берётся только первое неопубликованное событие агрегата: пока более раннее ждёт повтора,
+        окна слияния или отправляется другим relay (в его незакоммиченной пачке оно ещё не
+        опубликовано), следующие события агрегата ждут. Так порядок по агрегату сохраняется
+        при любом числе relay и процессов. Припаркованные события очередь не держат.
+        """
+        earlier = aliased(OutboxEvent)
+        preceded = (
+            select(earlier.id)
+            .where(
+                earlier.aggregate_id == OutboxEvent.aggregate_id,
+                earlier.published_at.is_(None),
+                earlier.failed_at.is_(None),
+                tuple_(earlier.created_at, earlier.id) < tuple_(OutboxEvent.created_at, OutboxEvent.id),
+            )
+            .exists()
+        )
+        stmt = (
+            select(OutboxEvent)
+            .where(OutboxEvent.published_at.is_(None), OutboxEvent.failed_at.is_(None),
+                   OutboxEvent.available_at <= func.now(), ~preceded)
+            .order_by(OutboxEvent.created_at.asc(), OutboxEvent.id.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self._session.execute(stmt)
+        return result.scalars().all()
+
+    async def mark_published(self, event_ids: Sequence[uuid.UUID]) -> None:
+        if not event_ids:
+            return
+        await self._session.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(event_ids))
+            .values(published_at=datetime.now(timezone.utc), attempts=OutboxEvent.attempts + 1, last_error=None)
+        )
+
+    async def mark_failed(self, event_id: uuid.UUID, error: str, retry_in: float) -> None:
+        """Неудачная попытка: следующая не раньше чем через retry_in секунд."""
+        await self._session.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id == event_id)
+            .values(attempts=OutboxEvent.attempts + 1, last_error=error[:1000],
+                    available_at=func.now() + timedelta(seconds=retry_in))
+        )
+
+    async def park(self, event_id: uuid.UUID, error: str) -> None:
+        """Последняя попытка не удалась — событие остаётся в таблице с failed_at для разбора."""
+        await self._session.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id == event_id)
+            .values(attempts=OutboxEvent.attempts + 1, last_error=error[:1000], failed_at=func.now())
+        )
+
+    async def find_coalescable(self, event_type: str, aggregate_id: str) -> Optional[OutboxEvent]:
+        """Отложенное событие того же типа и агрегата, окно которого ещё открыто.
+
+        Строку, которую уже забрал relay, пропускаем (SKIP LOCKED) — тогда пишется новое событие.
+        Событие, отложенное повтором после ошибки доставки, окном не считается.
+        """
+        stmt = (
+            select(OutboxEvent)
+            .where(
+                OutboxEvent.published_at.is_(None),
+                OutboxEvent.aggregate_id == aggregate_id,
+                OutboxEvent.event_type == event_type,
+                *self._in_window(),
+            )
+            .order_by(OutboxEvent.created_at.desc())
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self._session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def release_pending(self, aggregate_id: str) -> None:
+        """Закрыть окна отложенных событий агрегата, чтобы новое событие их не обогнало.
+
+        Паузу повтора не трогаем: новое событие всё равно ждёт его в claim_batch.
+        """
+        await self._session.execute(
+            update(OutboxEvent)
+            .where(
+                OutboxEvent.published_at.is_(None),
+                OutboxEvent.aggregate_id == aggregate_id,
+                *self._in_window(),
+            )
+            .values(available_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _in_window() -> tuple:
+        """Событие ждёт окна слияния: отложено, но ещё ни разу не отправлялось."""
+        return (OutboxEvent.available_at > func.now(), OutboxEvent.attempts == 0, OutboxEvent.failed_at.is_(None))
+
+    async def oldest_pending_at(self) -> Optional[datetime]:
+        stmt = select(func.min(OutboxEvent.created_at)).where(
+            OutboxEvent.published_at.is_(None), OutboxEvent.failed_at.is_(None),
+        )
+        result = await self._session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def purge_published(self, before: datetime) -> int:
+        stmt = delete(OutboxEvent).where(OutboxEvent.published_at.is_not(None), OutboxEvent.published_at < before)
+        result = await self._session.execute(stmt)
+        return result.rowcount
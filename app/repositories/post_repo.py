@@ -3,26 +3,140 @@ from __future__ import annotations
 import uuid
 from typing import Optional, Sequence
 
+from sqlalchemy import Row, bindparam, delete, func, literal_column, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
 
-from app.domain.models import Post
-from app.repositories.base import BaseRepository
+from app.domain.models import SEARCH_CONFIG, Community, Post
+from app.repositories.base import BaseRepository, RankCursor
+from app.repositories.community_repo import community_alive
+
+_SEARCH_CONFIG = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+# Маркеры совпадений во фрагменте; сервис экранирует текст и заменяет их на <mark>
+HIGHLIGHT_START, HIGHLIGHT_STOP = "\x02", "\x03"
+_HEADLINE_OPTIONS = (
+    'MaxFragments=2, MaxWords=30, MinWords=10, FragmentDelimiter=" … ", '
+    f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_STOP}"'
+)
+
+
+def post_search_vector(title: Optional[str], content: str):
+    """tsvector поста: заголовок весит больше текста (A > B). Вычисляется в БД при INSERT/UPDATE."""
+    return func.setweight(func.to_tsvector(_SEARCH_CONFIG, func.coalesce(title, "")), literal_column("'A'")).op("||")(
+        func.setweight(func.to_tsvector(_SEARCH_CONFIG, content), literal_column("'B'"))
+    )
 
 
 class PostRepository(BaseRepository[Post]):
     def __init__(self, session: AsyncSession):
         super().__init__(Post, session)
 
+    async def get_by_id(self, entity_id: uuid.UUID, columns: Optional[Sequence[str]] = None) -> Optional[Post]:
+        """Посты удалённого сообщества не видны, пока их не удалил CommunityPurger."""
+        stmt = (
+            select(Post)
+            .options(*self._column_options(columns))
+            .where(Post.id == entity_id, community_alive(Post.community_id))
+        )
+        result = await self._session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def search(
+        self, query: str, limit: int = 20, cursor: Optional[RankCursor] = None,
+        community_id: Optional[uuid.UUID] = None, channel_id: Optional[uuid.UUID] = None,
+    ) -> tuple[Sequence[Row], Optional[RankCursor]]:
+        """Опубликованные посты по рангу: строки (Post, rank, headline) и курсор следующей страницы.
+
+        Без community_id — по всем публичным сообществам. ts_headline дорогой (разбирает весь
+        текст), поэтому считается только для строк страницы, отобранных подзапросом.
+        """
+        tsquery = func.websearch_to_tsquery(_SEARCH_CONFIG, query)
+        rank = func.ts_rank_cd(Post.search_vector, tsquery)
+        matches = select(Post.id, rank.label("rank")).where(Post.search_vector.op("@@")(tsquery),
+                                                              Post.status == "published")
+        if community_id is not None:
+            matches = matches.where(Post.community_id == community_id)
+        else:
+            matches = matches.join(Community, Community.id == Post.community_id).where(
+                Community.status == "active", Community.community_type == "public")
+        if channel_id is not None:
+            matches = matches.where(Post.channel_id == channel_id)
+        if cursor is not None:
+            matches = matches.where(tuple_(rank, Post.id) < tuple_(cursor.rank, cursor.id))
+        page = matches.order_by(rank.desc(), Post.id.desc()).limit(limit + 1).subquery()
+
+        headline = func.ts_headline(_SEARCH_CONFIG, Post.content, tsquery, _HEADLINE_OPTIONS)
+        stmt = (
+            select(Post, page.c.rank, headline.label("headline"))
+            .join(page, page.c.id == Post.id)
+            .options(defer(Post.content))
+            .order_by(page.c.rank.desc(), Post.id.desc())
+        )
+        rows = (await self._session.execute(stmt)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = RankCursor(last.rank, last.Post.id)
+        return rows[:limit], next_cursor
+
+    async def backfill_search_vector(self, after: Optional[uuid.UUID], limit: int) -> tuple[Optional[uuid.UUID], int]:
+        """Keyset-страница постов без search_vector: (последний просмотренный id, число обновлённых)."""
+        stmt = select(Post.id).order_by(Post.id).limit(limit)
+        if after is not None:
+            stmt = stmt.where(Post.id > after)
+        ids = (await self._session.execute(stmt)).scalars().all()
+        if not ids:
+            return None, 0
+        result = await self._session.execute(
+            update(Post)
+            .where(Post.id.in_(ids), Post.search_vector.is_(None))
+            .values(search_vector=post_search_vector(Post.title, Post.content), updated_at=Post.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        return ids[-1], result.rowcount or 0
+
+    async def missing_digests(self, after: Optional[uuid.UUID], limit: int) -> tuple[Optional[uuid.UUID], Sequence[Row]]:
+        """Keyset-страница постов: (последний просмотренный id, строки (id, content, media_urls) без excerpt)."""
+        stmt = select(Post.id).order_by(Post.id).limit(limit)
+        if after is not None:
+            stmt = stmt.where(Post.id > after)
+        ids = (await self._session.execute(stmt)).scalars().all()
+        if not ids:
+            return None, []
+        rows = await self._session.execute(
+            select(Post.id, Post.content, Post.media_urls).where(Post.id.in_(ids), Post.excerpt.is_(None))
+        )
+        return ids[-1], rows.all()
+
+    async def fill_digests(self, digests: Sequence[tuple[uuid.UUID, dict]]) -> None:
+        """Один executemany UPDATE по id. Пост, получивший excerpt при записи после чтения страницы,
+        не перезаписывается; updated_at не меняется."""
+        if not digests:
+            return
+        posts = Post.__table__
+        connection = await self._session.connection()
+        await connection.execute(
+            update(posts)
+            .where(posts.c.id == bindparam("b_id"), posts.c.excerpt.is_(None))
+            .values(excerpt=bindparam("b_excerpt"), word_count=bindparam("b_word_count"),
+                    has_media=bindparam("b_has_media"), updated_at=posts.c.updated_at),
+            [{"b_id": post_id, **{f"b_{key}": value for key, value in digest.items()}} for post_id, digest in digests],
+        )
+
     async def get_community_posts(
         self, community_id: uuid.UUID, offset: int = 0, limit: int = 20,
         status_filter: Optional[str] = "published", channel_id: Optional[uuid.UUID] = None,
+        columns: Optional[Sequence[str]] = None,
     ) -> tuple[Sequence[Post], int]:
         filters = [Post.community_id == community_id]
         if status_filter:
             filters.append(Post.status == status_filter)
         if channel_id:
             filters.append(Post.channel_id == channel_id)
-        items = await self.get_all(offset=offset, limit=limit, filters=filters, order_by=Post.is_pinned.desc())
+        # Тело поста в лентах не нужно — читается только в GET /posts/{id}
+        options = [] if columns else [defer(Post.content)]
+        items = await self.get_all(offset=offset, limit=limit, filters=filters, order_by=Post.is_pinned.desc(),
+                                   columns=columns, options=options)
         total = await self.count(filters=filters)
         return items, total
 
@@ -34,3 +148,17 @@ class PostRepository(BaseRepository[Post]):
 
     async def count_by_community(self, community_id: uuid.UUID) -> int:
         return await self.count(filters=[Post.community_id == community_id])
+
+    async def purge_authors(self, author_ids: Sequence[uuid.UUID]) -> dict[uuid.UUID, int]:
+        """Удалить посты авторов одним DELETE; {community_id: число удалённых опубликованных}."""
+        stmt = (
+            delete(Post)
+            .where(Post.author_id.in_(author_ids))
+            .returning(Post.community_id, Post.status)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        removed: dict[uuid.UUID, int] = {}
+        for community_id, status in result.all():
+            removed[community_id] = removed.get(community_id, 0) + int(status == "published")
+        return removed
@@ -0,0 +1,65 @@
+"""Репозиторий для пересчёта денормализованных счётчиков по базовым таблицам."""
+from __future__ import annotations
+import uuid
+from typing import Any, Optional, Sequence, Type
+
+from sqlalchemy import Integer, column, select, text, update, values
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.domain.models import Base
+
+
+class ProjectionRepository:
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def set_lock_timeout(self, milliseconds: int) -> None:
+        """Не ждать долго строки, занятые пользовательскими транзакциями (SET LOCAL — до конца транзакции)."""
+        await self._session.execute(text(f"SET LOCAL lock_timeout = {int(milliseconds)}"))
+
+    async def ids_after(self, model: Type[Base], after: Optional[uuid.UUID], limit: int) -> Sequence[uuid.UUID]:
+        """Keyset-страница id: память не растёт с размером таблицы."""
+        stmt = select(model.id).order_by(model.id).limit(limit)
+        if after is not None:
+            stmt = stmt.where(model.id > after)
+        result = await self._session.execute(stmt)
+        return result.scalars().all()
+
+    async def read_counters(
+        self, model: Type[Base], ids: Sequence[uuid.UUID], counters: dict[str, ColumnElement],
+        community_id: ColumnElement,
+    ) -> list[dict[str, Any]]:
+        """Сохранённые и фактические значения счётчиков одним запросом (один снимок)."""
+        stmt = select(
+            model.id,
+            community_id.label("community_id"),
+            *(getattr(model, name).label(name) for name in counters),
+            *(actual.label(f"{name}__actual") for name, actual in counters.items()),
+        ).where(model.id.in_(ids))
+        result = await self._session.execute(stmt)
+        return [dict(row) for row in result.mappings().all()]
+
+    async def apply_corrections(
+        self, model: Type[Base], counter: str, corrections: Sequence[tuple[uuid.UUID, int, int]],
+    ) -> int:
+        """Записать (id, прочитанное, фактическое) одним UPDATE ... FROM (VALUES).
+
+        Строка обновляется, только если счётчик не изменился после чтения: конкурентный
+        инкремент из запроса не перетирается, такая строка просто пропускается.
+        """
+        if not corrections:
+            return 0
+        fixes = values(
+            column("id", PGUUID(as_uuid=True)), column("expected", Integer), column("actual", Integer), name="fixes",
+        ).data(list(corrections))
+        target = getattr(model, counter)
+        stmt = (
+            update(model)
+            .where(model.id == fixes.c.id, target == fixes.c.expected)
+            .values({counter: fixes.c.actual})
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        return result.rowcount or 0
@@ -0,0 +1,63 @@
+"""Репозиторий пакетной очистки удалённых сообществ."""
+from __future__ import annotations
+import uuid
+from datetime import datetime
+from typing import Optional, Sequence, Type
+
+from sqlalchemy import Row, delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.models import Base, Community
+
+
+class CommunityPurgeRepository:
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def set_lock_timeout(self, milliseconds: int) -> None:
+        """Не ждать долго строки, занятые пользовательскими транзакциями (SET LOCAL — до конца транзакции)."""
+        await self._session.execute(text(f"SET LOCAL lock_timeout = {int(milliseconds)}"))
+
+    async def claim_next(self) -> Optional[Community]:
+        """Самое давнее удалённое сообщество. Строка блокируется до коммита пачки — другой
+        экземпляр приложения в это время берёт следующее сообщество, а не ту же пачку."""
+        stmt = (
+            select(Community)
+            .where(Community.status == "deleted")
+            .order_by(Community.deleted_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self._session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def delete_batch(self, model: Type[Base], community_id: uuid.UUID, limit: int,
+                           returning: Sequence = ()) -> Sequence[Row]:
+        """Удалить до limit строк сообщества из одной таблицы; возвращает удалённые строки (id и returning)."""
+        batch = select(model.id).where(model.community_id == community_id).limit(limit)
+        stmt = (
+            delete(model)
+            .where(model.id.in_(batch.scalar_subquery()))
+            .returning(model.id, *returning)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        return result.all()
+
+    async def delete_community(self, community_id: uuid.UUID) -> Optional[Row]:
+        """Последний шаг — сама строка; к этому моменту каскадам удалять уже нечего."""
+        stmt = (
+            delete(Community)
+            .where(Community.id == community_id, Community.status == "deleted")
+            .returning(Community.avatar_url, Community.banner_url)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        return result.one_or_none()
+
+    async def backlog(self) -> tuple[int, Optional[datetime]]:
+        """Число сообществ, ждущих очистки, и время удаления самого давнего."""
+        stmt = select(func.count(), func.min(Community.deleted_at)).where(Community.status == "deleted")
+        result = await self._session.execute(stmt)
+        count, oldest = result.one()
+        return count, oldest
@@ -0,0 +1,100 @@
+"""Репозиторий рекомендаций сообществ: MinHash-подписи и top-K похожих."""
+from __future__ import annotations
+import uuid
+from datetime import datetime
+from typing import Optional, Sequence
+
+from sqlalchemy import Row, delete, func, insert, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.models import Community, CommunitySignature, CommunitySimilarity, Member
+
+
+class RecommendationRepository:
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def last_computed(self) -> Optional[datetime]:
+        return (await self._session.execute(select(func.max(CommunitySignature.computed_at)))).scalar_one()
+
+    async def active_communities(self) -> Sequence[uuid.UUID]:
+        return (await self._session.execute(select(Community.id).where(Community.status == "active"))).scalars().all()
+
+    async def changed_since(self, since: datetime) -> Sequence[uuid.UUID]:
+        """Активные сообщества, изменённые после since (в т.ч. member_count) или ещё без подписи."""
+        stmt = (
+            select(Community.id)
+            .outerjoin(CommunitySignature, CommunitySignature.community_id == Community.id)
+            .where(Community.status == "active",
+                   or_(Community.updated_at >= since, CommunitySignature.community_id.is_(None)))
+        )
+        return (await self._session.execute(stmt)).scalars().all()
+
+    async def save_signatures(self, rows: Sequence[tuple[uuid.UUID, bytes, int]], computed_at: datetime) -> None:
+        if not rows:
+            return
+        stmt = pg_insert(CommunitySignature).values([
+            {"community_id": community_id, "signature": signature, "member_count": member_count,
+             "computed_at": computed_at}
+            for community_id, signature, member_count in rows
+        ])
+        await self._session.execute(stmt.on_conflict_do_update(
+            index_elements=[CommunitySignature.community_id],
+            set_={"signature": stmt.excluded.signature, "member_count": stmt.excluded.member_count,
+                  "computed_at": stmt.excluded.computed_at},
+        ))
+
+    async def load_signatures(self) -> Sequence[Row]:
+        """(community_id, signature, member_count) всех активных сообществ."""
+        stmt = (
+            select(CommunitySignature.community_id, CommunitySignature.signature, CommunitySignature.member_count)
+            .join(Community, Community.id == CommunitySignature.community_id)
+            .where(Community.status == "active")
+        )
+        return (await self._session.execute(stmt)).all()
+
+    async def replace_similar(self, community_ids: Sequence[uuid.UUID],
+                              rows: Sequence[tuple[uuid.UUID, uuid.UUID, float]]) -> None:
+        """Заменяет списки похожих у community_ids; rows — (community_id, similar_id, score) только для них."""
+        await self._session.execute(delete(CommunitySimilarity).where(CommunitySimilarity.community_id.in_(community_ids)))
+        if rows:
+            await self._session.execute(insert(CommunitySimilarity), [
+                {"community_id": community_id, "similar_id": similar_id, "score": score}
+                for community_id, similar_id, score in rows
+            ])
+
+    async def listing(self, community_ids: Sequence[uuid.UUID]) -> Sequence[uuid.UUID]:
+        """Сообщества, в чьих списках похожих есть community_ids, — по индексу similar_id."""
+        stmt = (
+            select(CommunitySimilarity.community_id).distinct()
+            .where(CommunitySimilarity.similar_id.in_(community_ids))
+        )
+        return (await self._session.execute(stmt)).scalars().all()
+
+    async def similar(self, community_id: uuid.UUID, limit: int) -> Sequence[Row]:
+        """(id, score) похожих активных сообществ — чтение по индексу (community_id, score)."""
+        stmt = (
+            select(CommunitySimilarity.similar_id.label("id"), CommunitySimilarity.score)
+            .join(Community, Community.id == CommunitySimilarity.similar_id)
+            .where(CommunitySimilarity.community_id == community_id, Community.status == "active")
+            .order_by(CommunitySimilarity.score.desc())
+            .limit(limit)
+        )
+        return (await self._session.execute(stmt)).all()
+
+    async def suggested(self, user_id: uuid.UUID, limit: int) -> Sequence[Row]:
+        """(id, score) для пользователя: сумма сходства со всеми его сообществами, кроме уже вступивших."""
+        joined = select(Member.community_id).where(Member.user_id == user_id)
+        score = func.sum(CommunitySimilarity.score)
+        stmt = (
+            select(CommunitySimilarity.similar_id.label("id"), score.label("score"))
+            .join(Member, Member.community_id == CommunitySimilarity.community_id)
+            .join(Community, Community.id == CommunitySimilarity.similar_id)
+            .where(Member.user_id == user_id, Member.status == "active", Community.status == "active",
+                   CommunitySimilarity.similar_id.not_in(joined))
+            .group_by(CommunitySimilarity.similar_id)
+            .order_by(score.desc())
+            .limit(limit)
+        )
+        return (await self._session.execute(stmt)).all()
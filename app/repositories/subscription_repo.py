@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from typing import Optional, Sequence
 
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domain.models import Subscription, SubscriptionLevel
@@ -31,6 +31,17 @@ class SubscriptionRepository(BaseRepository[Subscription]):
         total = await self.count(filters=filters)
         return items, total
 
+    async def purge_users(self, user_ids: Sequence[uuid.UUID]) -> set[uuid.UUID]:
+        """Удалить подписки пользователей одним DELETE; возвращает затронутые сообщества."""
+        stmt = (
+            delete(Subscription)
+            .where(Subscription.user_id.in_(user_ids))
+            .returning(Subscription.community_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        return set(result.scalars().all())
+
     async def count_active_by_community(self, community_id: uuid.UUID) -> int:
         return await self.count(filters=[Subscription.community_id == community_id, Subscription.status == "active"])
 
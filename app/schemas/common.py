@@ -1,5 +1,6 @@
 """Общие схемы."""
 from __future__ import annotations
+import uuid
 from typing import Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel, ConfigDict, Field
@@ -22,10 +23,24 @@ class PaginatedResponse(BaseModel, Generic[T]):
     page: int
     page_size: int
     pages: int
+    # Keyset-пагинация (поиск): передать в ?cursor= за следующей страницей
+    next_cursor: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class CursorPage(BaseModel, Generic[T]):
+    """Страница keyset-пагинации: без total, следующая — по ?cursor=<next_cursor>."""
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+class Suggestion(BaseModel):
+    """Подсказка автодополнения: id сообщества или пользователя и отображаемая строка."""
+    id: uuid.UUID
+    label: str
+
+
 class MessageResponse(BaseModel):
     message: str
     detail: Optional[str] = None
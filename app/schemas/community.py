@@ -3,9 +3,11 @@ from __future__ import annotations
 import uuid
 import re
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, computed_field, field_validator
+
+from app.schemas.media import MediaVariantsMixin
 
 
 class CommunityCreate(BaseModel):
@@ -42,7 +44,9 @@ class CommunityUpdate(BaseModel):
     settings: Optional[dict] = None
 
 
-class CommunityResponse(BaseModel):
+class CommunityResponse(MediaVariantsMixin):
+    VARIANT_SOURCES = {"avatar_variants": "avatar_url", "banner_variants": "banner_url"}
+
     id: uuid.UUID
     name: str
     slug: str
@@ -60,8 +64,20 @@ class CommunityResponse(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+    @computed_field
+    @property
+    def avatar_variants(self) -> Optional[Dict[str, str]]:
+        return self._variants(self.avatar_url)
+
+    @computed_field
+    @property
+    def banner_variants(self) -> Optional[Dict[str, str]]:
+        return self._variants(self.banner_url)
+
+
+class CommunityListResponse(MediaVariantsMixin):
+    VARIANT_SOURCES = {"avatar_variants": "avatar_url"}
 
-class CommunityListResponse(BaseModel):
     id: uuid.UUID
     name: str
     slug: str
@@ -74,3 +90,15 @@ class CommunityListResponse(BaseModel):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def avatar_variants(self) -> Optional[Dict[str, str]]:
+        return self._variants(self.avatar_url)
+
+
+class LeaderboardEntry(BaseModel):
+    """Место в рейтинге: score — member_count (popular), затухающая активность (trending)
+    или сходство аудитории (similar, suggested)."""
+    community: CommunityListResponse
+    score: float
@@ -2,9 +2,11 @@
 from __future__ import annotations
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, computed_field
+
+from app.schemas.media import MediaVariantsMixin
 
 
 class EventCreate(BaseModel):
@@ -30,7 +32,9 @@ class EventUpdate(BaseModel):
     cover_url: Optional[str] = None
 
 
-class EventResponse(BaseModel):
+class EventResponse(MediaVariantsMixin):
+    VARIANT_SOURCES = {"cover_variants": "cover_url"}
+
     id: uuid.UUID
     community_id: uuid.UUID
     creator_id: uuid.UUID
@@ -48,3 +52,8 @@ class EventResponse(BaseModel):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def cover_variants(self) -> Optional[Dict[str, str]]:
+        return self._variants(self.cover_url)
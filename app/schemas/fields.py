@@ -0,0 +1,61 @@
+"""Sparse fieldsets — выбор подмножества полей ответа (?fields=)."""
+from __future__ import annotations
+from copy import copy
+from functools import lru_cache
+from typing import Optional, Type
+
+from pydantic import BaseModel, computed_field
+
+ALWAYS_INCLUDED = ("id",)
+
+
+def parse_fields(raw: Optional[str], model: Type[BaseModel]) -> Optional[tuple[str, ...]]:
+    """Разбор `fields=a,b,c` в отсортированный кортеж; None — все поля.
+
+    Возвращает список неизвестных полей через ValueError, чтобы вызывающая
+    сторона сама решила, как оформить ошибку.
+    """
+    if raw is None or not raw.strip():
+        return None
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = requested - set(model.model_fields) - set(model.model_computed_fields)
+    if unknown:
+        raise ValueError(sorted(unknown))
+    requested.update(name for name in ALWAYS_INCLUDED if name in model.model_fields)
+    # Ссылки на варианты изображений считаются из URL — он отдаётся вместе с ними
+    sources = getattr(model, "VARIANT_SOURCES", {})
+    requested.update(sources[name] for name in list(requested) if name in sources)
+    return tuple(sorted(requested))
+
+
+def column_fields(model: Type[BaseModel], fields: Optional[tuple[str, ...]]) -> Optional[tuple[str, ...]]:
+    """Поля набора, которые читаются из БД, — без вычисляемых."""
+    if fields is None:
+        return None
+    return tuple(name for name in fields if name in model.model_fields)
+
+
+@lru_cache(maxsize=256)
+def narrow_model(model: Type[BaseModel], fields: tuple[str, ...]) -> Type[BaseModel]:
+    """Схема-проекция `model`, содержащая только `fields`.
+
+    Наследует те же базовые классы (у схем ответов они без полей) и конфигурацию, что и
+    `model`, — выбранные вычисляемые поля, например ссылки на варианты, работают как в полной схеме.
+    """
+    namespace: dict = {"__module__": model.__module__, "__annotations__": {}, "model_config": dict(model.model_config)}
+    for name, info in model.model_fields.items():
+        if name in fields:
+            namespace["__annotations__"][name] = info.annotation
+            namespace[name] = copy(info)
+    for name, info in model.model_computed_fields.items():
+        if name in fields:
+            namespace[name] = computed_field(info.wrapped_property, return_type=info.return_type)
+    sources = getattr(model, "VARIANT_SOURCES", None)
+    if sources is not None:
+        namespace["VARIANT_SOURCES"] = {name: source for name, source in sources.items() if name in fields}
+    return type(f"{model.__name__}Partial", model.__bases__, namespace)
+
+
+def fields_key(fields: Optional[tuple[str, ...]]) -> str:
+    """Канонический фрагмент ключа кэша для набора полей."""
+    return ",".join(fields) if fields else ""
@@ -0,0 +1,49 @@
+"""Схемы для медиа-файлов."""
+from __future__ import annotations
+from typing import ClassVar, Dict, List, Mapping, Optional, Sequence
+
+from pydantic import BaseModel, PrivateAttr, computed_field
+
+from app.infrastructure.media.images import variant_urls
+
+
+class MediaVariantsMixin(BaseModel):
+    """Ответ со ссылками на варианты изображений: VARIANT_SOURCES — вычисляемое поле → поле с URL.
+
+    Какие варианты уже построены, схема сама не знает: сервис подставляет их через
+    attach_variants (app.services.media_variants). Без этого ссылок на варианты нет.
+    """
+    VARIANT_SOURCES: ClassVar[Dict[str, str]] = {}
+    _variant_names: Dict[str, List[str]] = PrivateAttr(default_factory=dict)
+
+    def variant_source_urls(self) -> list[str]:
+        urls = []
+        for name in self.VARIANT_SOURCES.values():
+            value = getattr(self, name)
+            if isinstance(value, str):
+                urls.append(value)
+            elif value:
+                urls.extend(value)
+        return urls
+
+    def attach_variants(self, ready: Mapping[str, Sequence[str]]) -> None:
+        self._variant_names = {sha256: list(names) for sha256, names in ready.items()}
+
+    def _variants(self, url: Optional[str]) -> Optional[Dict[str, str]]:
+        return variant_urls(url, self._variant_names)
+
+
+class MediaUploadResponse(MediaVariantsMixin):
+    VARIANT_SOURCES = {"variants": "url"}
+
+    key: str
+    url: str
+    content_type: str
+    size: int
+    sha256: str
+
+    @computed_field
+    @property
+    def variants(self) -> Optional[Dict[str, str]]:
+        """Ссылки на варианты появляются после фоновой генерации; до неё — None."""
+        return self._variants(self.url)
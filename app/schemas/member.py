@@ -2,7 +2,7 @@
 from __future__ import annotations
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -26,6 +26,18 @@ class MemberUpdate(BaseModel):
     role_ids: Optional[List[uuid.UUID]] = None
 
 
+class MemberRoleBulkUpdate(BaseModel):
+    user_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=10000)
+    action: Literal["assign", "remove"] = "assign"
+
+
+class MemberRoleBulkResult(BaseModel):
+    role_id: uuid.UUID
+    action: str
+    requested: int
+    affected: int
+
+
 class MemberResponse(BaseModel):
     id: uuid.UUID
     community_id: uuid.UUID
@@ -39,3 +51,17 @@ class MemberResponse(BaseModel):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class MemberImportJob(BaseModel):
+    job_id: uuid.UUID
+    community_id: uuid.UUID
+    status: str = "queued"
+    total_rows: int = 0
+    processed_rows: int = 0
+    imported: int = 0
+    skipped: int = 0
+    invalid: int = 0
+    errors: List[str] = []
+    created_at: datetime
+    finished_at: Optional[datetime] = None
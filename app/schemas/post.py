@@ -2,9 +2,11 @@
 from __future__ import annotations
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, computed_field
+
+from app.schemas.media import MediaVariantsMixin
 
 
 class PostCreate(BaseModel):
@@ -24,13 +26,18 @@ class PostUpdate(BaseModel):
     media_urls: Optional[List[str]] = None
 
 
-class PostResponse(BaseModel):
+class PostResponse(MediaVariantsMixin):
+    VARIANT_SOURCES = {"media_variants": "media_urls"}
+
     id: uuid.UUID
     community_id: uuid.UUID
     channel_id: Optional[uuid.UUID] = None
     author_id: uuid.UUID
     title: Optional[str] = None
     content: str
+    excerpt: Optional[str] = None
+    word_count: int = 0
+    has_media: bool = False
     status: str
     is_pinned: bool
     media_urls: Optional[List[str]] = None
@@ -42,3 +49,51 @@ class PostResponse(BaseModel):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def media_variants(self) -> Optional[List[Optional[Dict[str, str]]]]:
+        """Варианты изображений по порядку media_urls; None — у ссылки вариантов нет или они не готовы."""
+        if not self.media_urls:
+            return None
+        return [self._variants(url) for url in self.media_urls]
+
+
+class PostListResponse(MediaVariantsMixin):
+    """Элемент ленты — без тела поста, только excerpt."""
+    VARIANT_SOURCES = {"media_variants": "media_urls"}
+
+    id: uuid.UUID
+    community_id: uuid.UUID
+    channel_id: Optional[uuid.UUID] = None
+    author_id: uuid.UUID
+    title: Optional[str] = None
+    excerpt: Optional[str] = None
+    word_count: int = 0
+    has_media: bool = False
+    status: str
+    is_pinned: bool
+    media_urls: Optional[List[str]] = None
+    like_count: int
+    comment_count: int
+    view_count: int
+    published_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def media_variants(self) -> Optional[List[Optional[Dict[str, str]]]]:
+        """Варианты изображений по порядку media_urls; None — у ссылки вариантов нет или они не готовы."""
+        if not self.media_urls:
+            return None
+        return [self._variants(url) for url in self.media_urls]
+
+
+class PostSearchHit(BaseModel):
+    """Результат поиска: пост без тела и фрагменты текста с совпадениями в <mark>."""
+    post: PostListResponse
+    rank: float
+    highlight: str
@@ -0,0 +1,169 @@
+"""Автодополнение названий сообществ и ников участников по префиксу."""
+from __future__ import annotations
+import unicodedata
+import uuid
+from functools import partial
+from typing import AsyncContextManager, AsyncIterator, Callable, Mapping, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.exceptions import NotFoundException
+from app.core.logging import get_logger
+from app.db.session import after_commit
+from app.domain.models import Community, Member
+from app.infrastructure.cache.cache_keys import CacheKeys
+from app.infrastructure.cache.redis_client import RedisClient
+from app.infrastructure.cache.sorted_set_builder import SortedSetBuilder
+from app.repositories.community_repo import CommunityRepository
+from app.repositories.member_repo import MemberRepository
+from app.schemas.common import Suggestion
+
+logger = get_logger(__name__)
+
+SEPARATOR = "\x00"
+
+
+def normalize(text: str) -> str:
+    """Ключ сравнения: NFKC, casefold и одиночные пробелы."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def index_entry(label: str, item_id: uuid.UUID) -> str:
+    """Член sorted set: нормализованная строка, оригинал и id — порядок и префикс задаёт первая часть."""
+    return f"{normalize(label)}{SEPARATOR}{label}{SEPARATOR}{item_id}"
+
+
+def parse_entry(entry: str) -> Suggestion:
+    _, label, item_id = entry.split(SEPARATOR)
+    return Suggestion(id=uuid.UUID(item_id), label=label)
+
+
+def community_entry(community: Optional[Community]) -> Optional[str]:
+    """Запись сообщества в индексе; None — сообщество в подсказках не показывается."""
+    if community is None or community.status != "active":
+        return None
+    return index_entry(community.name, community.id)
+
+
+def member_entry(member: Optional[Member]) -> Optional[str]:
+    if member is None or member.status != "active" or not member.nickname:
+        return None
+    return index_entry(member.nickname, member.user_id)
+
+
+def prefix_range(prefix: str) -> tuple[bytes, bytes]:
+    """Границы ZRANGEBYLEX для префикса: байт 0xFF не встречается в UTF-8 и больше любого другого."""
+    start = normalize(prefix).encode()
+    return b"[" + start, b"[" + start + b"\xff"
+
+
+class AutocompleteIndex:
+    """Префиксные индексы в Redis: sorted set с нулевыми score, поиск — ZRANGEBYLEX.
+
+    Один набор на все активные сообщества и по набору ников на сообщество. Сервисы обновляют
+    наборы при создании, переименовании и удалении; изменения применяются только к уже
+    построенному набору. Отсутствующий набор строится в фоне из БД (SortedSetBuilder),
+    а до готовности запрос обслуживает префиксный запрос к БД.
+    Наборы живут AUTOCOMPLETE_INDEX_TTL и затем пересобираются — так расхождения, например
+    от изменений во время сборки, не копятся.
+    """
+
+    def __init__(
+        self,
+        session_scope: Callable[[], AsyncContextManager[AsyncSession]],
+        cache: RedisClient,
+        ttl: int = settings.AUTOCOMPLETE_INDEX_TTL,
+        batch_size: int = settings.AUTOCOMPLETE_BUILD_BATCH_SIZE,
+    ):
+        self._session_scope = session_scope
+        self._cache = cache
+        self._ttl = ttl
+        self._batch_size = batch_size
+        self._builder = SortedSetBuilder(cache)
+
+    async def communities(self, prefix: str, limit: int) -> list[Suggestion]:
+        if not normalize(prefix):
+            return []
+        key = CacheKeys.community_names()
+        found = await self._lookup(key, prefix, limit)
+        if found is not None:
+            return found
+        self._builder.schedule(key, self._ttl, self._community_entries)
+        async with self._session_scope() as session:
+            rows = await CommunityRepository(session).names_with_prefix(normalize(prefix), limit)
+        return [Suggestion(id=row.id, label=row.name) for row in rows]
+
+    async def nicknames(self, community_id: uuid.UUID, prefix: str, limit: int) -> list[Suggestion]:
+        if not normalize(prefix):
+            return []
+        key = CacheKeys.community_nicknames(str(community_id))
+        found = await self._lookup(key, prefix, limit)
+        if found is not None:
+            return found
+        async with self._session_scope() as session:
+            # Набор строится только для существующего сообщества, иначе случайные id плодили бы ключи
+            if not await CommunityRepository(session).get_by_id(community_id, columns=("id",)):
+                raise NotFoundException("Community", community_id)
+            self._builder.schedule(key, self._ttl, lambda: self._nickname_entries(community_id))
+            rows = await MemberRepository(session).nicknames_with_prefix(community_id, normalize(prefix), limit)
+        return [Suggestion(id=row.user_id, label=row.nickname) for row in rows]
+
+    async def update_communities(self, before: Optional[str], after: Optional[str]) -> None:
+        """Замена записи сообщества: before/after — community_entry до и после изменения."""
+        await self._apply(CacheKeys.community_names(), before, after)
+
+    async def update_nicknames(self, community_id: uuid.UUID, before: Optional[str], after: Optional[str]) -> None:
+        await self._apply(CacheKeys.community_nicknames(str(community_id)), before, after)
+
+    async def stop(self) -> None:
+        await self._builder.stop()
+
+    async def _lookup(self, key: str, prefix: str, limit: int) -> Optional[list[Suggestion]]:
+        """Подсказки из набора; None — набора нет (не построен, истёк или Redis недоступен)."""
+        start, stop = prefix_range(prefix)
+        found = await self._cache.zrangebylex(key, start, stop, limit)
+        if found is None:
+            return None
+        return [parse_entry(entry) for entry in found if entry]
+
+    async def _apply(self, key: str, before: Optional[str], after: Optional[str]) -> None:
+        if before == after:
+            return
+        if before is not None:
+            await self._cache.zrem([key], before)
+        if after is not None:
+            await self._cache.zadd_existing(key, {after: 0})
+
+    async def _community_entries(self) -> AsyncIterator[Mapping[str, float]]:
+        async with self._session_scope() as session:
+            async for rows in CommunityRepository(session).stream_columns(
+                    ("id", "name"), filters=[Community.status == "active"], chunk_size=self._batch_size):
+                yield {index_entry(row["name"], row["id"]): 0 for row in rows}
+
+    async def _nickname_entries(self, community_id: uuid.UUID) -> AsyncIterator[Mapping[str, float]]:
+        async with self._session_scope() as session:
+            async for rows in MemberRepository(session).stream_columns(
+                    ("user_id", "nickname"),
+                    filters=[Member.community_id == community_id, Member.status == "active",
+                             Member.nickname.is_not(None)],
+                    chunk_size=self._batch_size):
+                yield {index_entry(row["nickname"], row["user_id"]): 0 for row in rows}
+
+
+class SessionAutocomplete:
+    """Изменения индексов из сервиса, работающего в транзакции.
+
+    ZADD/ZREM откладываются до коммита сессии: откат не оставляет в подсказках несуществующих
+    записей, а подсказка не появляется раньше, чем запись видна в БД.
+    """
+
+    def __init__(self, index: AutocompleteIndex, session: AsyncSession):
+        self._index = index
+        self._session = session
+
+    async def update_communities(self, before: Optional[str], after: Optional[str]) -> None:
+        after_commit(self._session, partial(self._index.update_communities, before, after))
+
+    async def update_nicknames(self, community_id: uuid.UUID, before: Optional[str], after: Optional[str]) -> None:
+        after_commit(self._session, partial(self._index.update_nicknames, community_id, before, after))
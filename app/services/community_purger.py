@@ -0,0 +1,155 @@
+"""Фоновая пакетная очистка удалённых сообществ."""
+from __future__ import annotations
+import asyncio
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import AsyncContextManager, Callable, Iterable, Optional, Sequence, Type
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.domain.models import Base, Channel, Donation, Event, Member, Post, Role, Subscription, SubscriptionLevel
+from app.infrastructure.media.keys import reference_delta
+from app.repositories.media_repo import MediaRepository
+from app.repositories.purge_repo import CommunityPurgeRepository
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class PurgeStep:
+    model: Type[Base]
+    # Колонки с URL медиа: ссылки снимаются в той же транзакции, что и удаление пачки
+    media_columns: tuple[str, ...] = ()
+
+
+# Порядок важен: сначала строки, на которые ссылаются другие таблицы, иначе ON DELETE
+# обновил бы или удалил их построчно внутри чужой пачки (posts.channel_id SET NULL,
+# subscriptions -> subscription_levels CASCADE). member_roles удаляется каскадом вместе с пачкой members.
+PURGE_STEPS: tuple[PurgeStep, ...] = (
+    PurgeStep(Post, ("media_urls",)),
+    PurgeStep(Event, ("cover_url",)),
+    PurgeStep(Donation),
+    PurgeStep(Subscription),
+    PurgeStep(Member),
+    PurgeStep(Role),
+    PurgeStep(Channel),
+    PurgeStep(SubscriptionLevel),
+)
+
+
+@dataclass
+class PurgeMetrics:
+    communities_purged_total: int = 0
+    rows_deleted_total: int = 0
+    batches_total: int = 0
+    failed_total: int = 0
+    pending: int = 0
+    lag_seconds: float = 0.0
+
+
+def _media_urls(rows: Sequence[Row]) -> Iterable[Optional[str]]:
+    for row in rows:
+        for value in row[1:]:
+            if isinstance(value, list):
+                yield from value
+            else:
+                yield value
+
+
+class CommunityPurger:
+    """Удаляет строки удалённых сообществ пачками по batch_size, каждая — отдельной транзакцией.
+
+    Между пачками — пауза, чтобы реплики и пользовательские запросы успевали; строка
+    самого сообщества удаляется последней, когда каскадам уже нечего трогать. Состояние
+    не хранится: следующая пачка берётся из первой непустой таблицы PURGE_STEPS, поэтому
+    перезапуск продолжает с того же места.
+    """
+
+    def __init__(
+        self,
+        session_scope: Callable[[], AsyncContextManager[AsyncSession]],
+        batch_size: int = settings.COMMUNITY_PURGE_BATCH_SIZE,
+        pause: float = settings.COMMUNITY_PURGE_PAUSE,
+        interval: float = settings.COMMUNITY_PURGE_INTERVAL,
+        lock_timeout_ms: int = settings.COMMUNITY_PURGE_LOCK_TIMEOUT_MS,
+    ):
+        self._session_scope = session_scope
+        self._batch_size = batch_size
+        self._pause = pause
+        self._interval = interval
+        self._lock_timeout_ms = lock_timeout_ms
+        self._stopping: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = PurgeMetrics()
+
+    async def start(self) -> None:
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="community-purger")
+
+    async def stop(self) -> None:
+        if self._stopping is None:
+            return
+        self._stopping.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._stopping = None
+
+    async def purge_batch(self) -> bool:
+        """Одна пачка одного сообщества; False — очищать нечего."""
+        async with self._session_scope() as session:
+            repo = CommunityPurgeRepository(session)
+            await repo.set_lock_timeout(self._lock_timeout_ms)
+            community = await repo.claim_next()
+            if community is None:
+                return False
+            community_id = community.id
+            media = MediaRepository(session)
+            deleted, table = 0, None
+            for step in PURGE_STEPS:
+                rows = await repo.delete_batch(step.model, community_id, self._batch_size,
+                                               [getattr(step.model, name) for name in step.media_columns])
+                if rows:
+                    await media.adjust_references(reference_delta(_media_urls(rows), ()))
+                    deleted, table = len(rows), step.model.__tablename__
+                    break
+            else:
+                row = await repo.delete_community(community_id)
+                if row is not None:
+                    await media.adjust_references(reference_delta(_media_urls([(community_id, *row)]), ()))
+        self.metrics.batches_total += 1
+        self.metrics.rows_deleted_total += deleted
+        if table is None:
+            self.metrics.communities_purged_total += 1
+            logger.info("Удалённое сообщество очищено", extra={
+                "community_id": str(community_id), "action": "community_purged", "metrics": asdict(self.metrics),
+            })
+        return True
+
+    async def observe(self) -> PurgeMetrics:
+        """Очередь и отставание: сколько сообществ ждёт и как давно удалено самое старое."""
+        async with self._session_scope() as session:
+            pending, oldest = await CommunityPurgeRepository(session).backlog()
+        self.metrics.pending = pending
+        self.metrics.lag_seconds = (datetime.now(timezone.utc) - oldest).total_seconds() if oldest else 0.0
+        return self.metrics
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                progressed = await self.purge_batch()
+                if not progressed or self.metrics.batches_total % 100 == 0:
+                    await self.observe()
+                    if self.metrics.pending:
+                        logger.info("Очистка удалённых сообществ", extra={
+                            "action": "community_purge_progress", "metrics": asdict(self.metrics),
+                        })
+            except Exception as e:
+                self.metrics.failed_total += 1
+                logger.warning(f"Community purger: {e}")
+                progressed = False
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._stopping.wait(), timeout=self._pause if progressed else self._interval)
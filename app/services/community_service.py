@@ -1,10 +1,12 @@
 """Сервис сообществ."""
 from __future__ import annotations
+import hashlib
 import re
 import uuid
 from typing import Optional
 
-from app.core.exceptions import ConflictException, NotFoundException, ForbiddenException
+from app.core.config import settings
+from app.core.exceptions import ConflictException, NotFoundException, ForbiddenException, ValidationException
 from app.core.logging import get_logger
 from app.core.security import UserContext
 from app.core.rbac import Permission
@@ -13,12 +15,22 @@ from app.events.base import EventPublisher
 from app.events.event_types import EventType
 from app.infrastructure.cache.cache_keys import CacheKeys
 from app.infrastructure.cache.redis_client import RedisClient
+from app.infrastructure.media.keys import reference_delta
 from app.repositories.community_repo import CommunityRepository
 from app.repositories.member_repo import MemberRepository
+from app.repositories.base import RankCursor
 from app.repositories.role_repo import RoleRepository
 from app.repositories.channel_repo import ChannelRepository
-from app.schemas.community import CommunityCreate, CommunityUpdate, CommunityResponse, CommunityListResponse
+from app.repositories.media_repo import MediaRepository
+from app.repositories.recommendation_repo import RecommendationRepository
+from app.services.autocomplete import SessionAutocomplete, community_entry
+from app.services.leaderboard import LeaderboardKind, SessionLeaderboard
+from app.services.media_variants import CACHED_VARIANTS_FIELD, apply_variants, attach_variants
+from app.schemas.community import (
+    CommunityCreate, CommunityUpdate, CommunityResponse, CommunityListResponse, LeaderboardEntry,
+)
 from app.schemas.common import PaginatedResponse
+from app.schemas.fields import column_fields, fields_key, narrow_model
 
 logger = get_logger(__name__)
 
@@ -30,57 +42,141 @@ class CommunityService:
         member_repo: MemberRepository,
         role_repo: RoleRepository,
         channel_repo: ChannelRepository,
+        media_repo: MediaRepository,
         cache: RedisClient,
         event_publisher: EventPublisher,
+        autocomplete: SessionAutocomplete,
+        leaderboard: SessionLeaderboard,
+        recommendation_repo: RecommendationRepository,
     ):
         self._community_repo = community_repo
         self._member_repo = member_repo
         self._role_repo = role_repo
         self._channel_repo = channel_repo
+        self._media_repo = media_repo
         self._cache = cache
         self._event_publisher = event_publisher
+        self._autocomplete = autocomplete
+        self._leaderboard = leaderboard
+        self._recommendation_repo = recommendation_repo
 
     async def list_communities(self, page: int = 1, page_size: int = 20,
-                                search: Optional[str] = None) -> PaginatedResponse[CommunityListResponse]:
+                                search: Optional[str] = None,
+                                fields: Optional[tuple[str, ...]] = None,
+                                cursor: Optional[str] = None) -> PaginatedResponse[CommunityListResponse]:
         offset = (page - 1) * page_size
+        item_model = narrow_model(CommunityListResponse, fields) if fields else CommunityListResponse
+        cache_key = CacheKeys.community_list(page, page_size, fields_key(fields))
+        next_cursor = None
 
         if search:
-            items, total = await self._community_repo.search(search, offset=offset, limit=page_size)
+            try:
+                position = RankCursor.decode(cursor) if cursor else None
+            except ValueError as e:
+                raise ValidationException(str(e)) from e
+            items, next_position = await self._community_repo.search(
+                search, limit=page_size, cursor=position, offset=offset,
+                columns=column_fields(CommunityListResponse, fields),
+            )
+            next_cursor = next_position.encode() if next_position else None
+            total = await self._search_total(search)
         else:
-            cache_key = CacheKeys.community_list(page, page_size)
             cached = await self._cache.get(cache_key)
             if cached:
-                return PaginatedResponse[CommunityListResponse](**cached)
+                result = PaginatedResponse[item_model](**cached)
+                apply_variants(result.items, cached.get(CACHED_VARIANTS_FIELD, {}))
+                return result
 
             filters = [Community.status == "active"]
-            items = await self._community_repo.get_all(offset=offset, limit=page_size, filters=filters)
+            items = await self._community_repo.get_all(offset=offset, limit=page_size, filters=filters,
+                                                       columns=column_fields(CommunityListResponse, fields))
             total = await self._community_repo.count(filters=filters)
 
-        response_items = [CommunityListResponse.model_validate(item) for item in items]
+        response_items = [item_model.model_validate(item) for item in items]
+        ready = await attach_variants(self._media_repo, response_items)
         pages = (total + page_size - 1) // page_size
 
-        result = PaginatedResponse[CommunityListResponse](
-            items=response_items, total=total, page=page, page_size=page_size, pages=pages,
+        result = PaginatedResponse[item_model](
+            items=response_items, total=total, page=page, page_size=page_size, pages=pages, next_cursor=next_cursor,
         )
 
         if not search:
-            cache_key = CacheKeys.community_list(page, page_size)
-            await self._cache.set(cache_key, result.model_dump())
+            await self._cache.set(cache_key, {**result.model_dump(), CACHED_VARIANTS_FIELD: ready})
 
         return result
 
-    async def get_community(self, community_id: uuid.UUID) -> CommunityResponse:
+    async def _search_total(self, search: str) -> int:
+        """COUNT по тому же условию — в кэше на CACHE_SEARCH_COUNT_TTL, страницы его не пересчитывают."""
+        normalized = " ".join(search.lower().split())
+        cache_key = CacheKeys.community_search_count(hashlib.sha1(normalized.encode()).hexdigest())
+        cached = await self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+        total = await self._community_repo.count_search(search)
+        await self._cache.set(cache_key, total, ttl=settings.CACHE_SEARCH_COUNT_TTL)
+        return total
+
+    async def leaderboard(self, kind: LeaderboardKind, community_type: Optional[str] = None,
+                          limit: int = 20) -> list[LeaderboardEntry]:
+        return await self._ranked(await self._leaderboard.top(kind, community_type, limit))
+
+    async def similar(self, community_id: uuid.UUID, limit: int = 10) -> list[LeaderboardEntry]:
+        """Сообщества с пересекающейся аудиторией — из последнего прогона build_recommendations."""
+        if not await self._community_repo.get_by_id(community_id, columns=("id",)):
+            raise NotFoundException("Community", community_id)
+        return await self._ranked(await self._recommendation_repo.similar(community_id, limit))
+
+    async def suggested(self, user: UserContext, limit: int = 10) -> list[LeaderboardEntry]:
+        """Рекомендации пользователю: похожие на его сообщества, в которых он ещё не состоит."""
+        return await self._ranked(await self._recommendation_repo.suggested(user.user_id, limit))
+
+    async def _ranked(self, ranked) -> list[LeaderboardEntry]:
+        communities = {c.id: c for c in await self._community_repo.get_by_ids([cid for cid, _ in ranked])}
+        # Сообщества, удалённые после попадания в набор, пропускаются
+        entries = [
+            LeaderboardEntry(community=CommunityListResponse.model_validate(communities[cid]), score=score)
+            for cid, score in ranked if cid in communities
+        ]
+        await attach_variants(self._media_repo, [entry.community for entry in entries])
+        return entries
+
+    async def get_community(self, community_id: uuid.UUID,
+                            fields: Optional[tuple[str, ...]] = None) -> CommunityResponse:
+        if fields:
+            return await self._get_community_fields(community_id, fields)
+
         cache_key = CacheKeys.community(str(community_id))
         cached = await self._cache.get(cache_key)
         if cached:
-            return CommunityResponse(**cached)
+            response = CommunityResponse(**cached)
+            apply_variants([response], cached.get(CACHED_VARIANTS_FIELD, {}))
+            return response
 
         community = await self._community_repo.get_by_id(community_id)
         if not community:
             raise NotFoundException("Community", community_id)
 
         response = CommunityResponse.model_validate(community)
-        await self._cache.set(cache_key, response.model_dump())
+        ready = await attach_variants(self._media_repo, [response])
+        await self._cache.set(cache_key, {**response.model_dump(), CACHED_VARIANTS_FIELD: ready})
+        return response
+
+    async def _get_community_fields(self, community_id: uuid.UUID, fields: tuple[str, ...]):
+        model = narrow_model(CommunityResponse, fields)
+        cache_key = CacheKeys.community_fieldsets(str(community_id))
+        cached = await self._cache.hget(cache_key, fields_key(fields))
+        if cached:
+            response = model(**cached)
+            apply_variants([response], cached.get(CACHED_VARIANTS_FIELD, {}))
+            return response
+
+        community = await self._community_repo.get_by_id(community_id, columns=column_fields(CommunityResponse, fields))
+        if not community:
+            raise NotFoundException("Community", community_id)
+
+        response = model.model_validate(community)
+        ready = await attach_variants(self._media_repo, [response])
+        await self._cache.hset(cache_key, fields_key(fields), {**response.model_dump(), CACHED_VARIANTS_FIELD: ready})
         return response
 
     async def create_community(self, data: CommunityCreate, user: UserContext) -> CommunityResponse:
@@ -97,6 +193,7 @@ class CommunityService:
             settings=data.settings or {}, member_count=1,
         )
         community = await self._community_repo.create(community)
+        await self._media_repo.adjust_references(reference_delta((), [community.avatar_url, community.banner_url]))
 
         default_role = Role(
             community_id=community.id, name="member", description="Default member role",
@@ -121,6 +218,8 @@ class CommunityService:
             channel_type="text", is_default=True, position=0,
         )
         await self._channel_repo.create(default_channel)
+        await self._autocomplete.update_communities(None, community_entry(community))
+        await self._leaderboard.community_added(community)
 
         await self._event_publisher.publish_event(
             EventType.COMMUNITY_CREATED,
@@ -128,7 +227,9 @@ class CommunityService:
         )
 
         logger.info("Сообщество создано", extra={"community_id": str(community.id), "user_id": str(user.user_id), "action": "community_created"})
-        return CommunityResponse.model_validate(community)
+        response = CommunityResponse.model_validate(community)
+        await attach_variants(self._media_repo, [response])
+        return response
 
     async def update_community(self, community_id: uuid.UUID, data: CommunityUpdate, user: UserContext) -> CommunityResponse:
         community = await self._community_repo.get_by_id(community_id)
@@ -141,18 +242,33 @@ class CommunityService:
                 raise ForbiddenException("Только владелец может обновлять сообщество")
 
         update_data = data.model_dump(exclude_unset=True)
+        indexed = community_entry(community)
+        previous_status, previous_type = community.status, community.community_type
+        images = [field for field in ("avatar_url", "banner_url") if field in update_data]
+        await self._media_repo.adjust_references(reference_delta(
+            [getattr(community, field) for field in images], [update_data[field] for field in images]))
         updated = await self._community_repo.update_by_id(community_id, update_data)
         if not updated:
             raise NotFoundException("Community", community_id)
 
-        await self._cache.delete(CacheKeys.community(str(community_id)))
+        await self._cache.delete(CacheKeys.community(str(community_id)), CacheKeys.community_fieldsets(str(community_id)))
+        await self._autocomplete.update_communities(indexed, community_entry(updated))
+        if updated.status != previous_status:
+            if updated.status == "active":
+                await self._leaderboard.community_added(updated)
+            elif previous_status == "active":
+                await self._leaderboard.community_removed(community_id, previous_type)
+        elif updated.community_type != previous_type and updated.status == "active":
+            await self._leaderboard.community_retyped(updated, previous_type)
 
         await self._event_publisher.publish_event(
             EventType.COMMUNITY_UPDATED,
             payload={"community_id": str(community_id), "updated_fields": list(update_data.keys())},
         )
         logger.info("Сообщество обновлено", extra={"community_id": str(community_id), "action": "community_updated"})
-        return CommunityResponse.model_validate(updated)
+        response = CommunityResponse.model_validate(updated)
+        await attach_variants(self._media_repo, [response])
+        return response
 
     async def delete_community(self, community_id: uuid.UUID, user: UserContext) -> None:
         community = await self._community_repo.get_by_id(community_id)
@@ -162,8 +278,13 @@ class CommunityService:
         if community.owner_id != user.user_id and not user.is_superadmin:
             raise ForbiddenException("Только владелец может удалить сообщество")
 
-        await self._community_repo.delete_by_id(community_id)
+        # Только смена статуса: строки участников, постов и прочего пачками удалит CommunityPurger.
+        await self._community_repo.soft_delete(community_id)
+        await self._cache.delete(CacheKeys.community(str(community_id)))
         await self._cache.delete_pattern(CacheKeys.invalidation_pattern(str(community_id)))
+        await self._cache.delete_pattern(CacheKeys.community_list_pattern())
+        await self._autocomplete.update_communities(community_entry(community), None)
+        await self._leaderboard.community_removed(community_id, community.community_type)
 
         await self._event_publisher.publish_event(
             EventType.COMMUNITY_DELETED,
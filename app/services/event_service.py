@@ -9,18 +9,23 @@ from app.core.security import UserContext
 from app.domain.models import Event
 from app.events.base import EventPublisher
 from app.events.event_types import EventType
+from app.infrastructure.media.keys import reference_delta
 from app.repositories.community_repo import CommunityRepository
 from app.repositories.event_repo import EventRepository
+from app.repositories.media_repo import MediaRepository
 from app.schemas.event import EventCreate, EventUpdate, EventResponse
 from app.schemas.common import PaginatedResponse
+from app.services.media_variants import attach_variants
 
 logger = get_logger(__name__)
 
 
 class EventService:
-    def __init__(self, event_repo: EventRepository, community_repo: CommunityRepository, event_publisher: EventPublisher):
+    def __init__(self, event_repo: EventRepository, community_repo: CommunityRepository, media_repo: MediaRepository,
+                 event_publisher: EventPublisher):
         self._event_repo = event_repo
         self._community_repo = community_repo
+        self._media_repo = media_repo
         self._event_publisher = event_publisher
 
     async def list_events(self, community_id: uuid.UUID, page: int = 1, page_size: int = 20,
@@ -32,13 +37,14 @@ class EventService:
         items, total = await self._event_repo.get_community_events(community_id, offset=offset, limit=page_size, status_filter=status_filter)
         pages = (total + page_size - 1) // page_size
         response_items = [EventResponse.model_validate(item) for item in items]
+        await attach_variants(self._media_repo, response_items)
         return PaginatedResponse[EventResponse](items=response_items, total=total, page=page, page_size=page_size, pages=pages)
 
     async def get_event(self, event_id: uuid.UUID) -> EventResponse:
         event = await self._event_repo.get_by_id(event_id)
         if not event:
             raise NotFoundException("Event", event_id)
-        return EventResponse.model_validate(event)
+        return await self._response(event)
 
     async def create_event(self, community_id: uuid.UUID, data: EventCreate, user: UserContext) -> EventResponse:
         community = await self._community_repo.get_by_id(community_id)
@@ -49,29 +55,38 @@ class EventService:
                       location=data.location, online_url=data.online_url, max_attendees=data.max_attendees,
                       cover_url=data.cover_url)
         event = await self._event_repo.create(event)
+        await self._media_repo.adjust_references(reference_delta((), [event.cover_url]))
         await self._event_publisher.publish_event(EventType.EVENT_CREATED,
             payload={"event_id": str(event.id), "community_id": str(community_id)})
         logger.info("Мероприятие создано", extra={"event_id": str(event.id), "action": "event_created"})
-        return EventResponse.model_validate(event)
+        return await self._response(event)
 
     async def update_event(self, event_id: uuid.UUID, data: EventUpdate, user: UserContext) -> EventResponse:
         event = await self._event_repo.get_by_id(event_id)
         if not event:
             raise NotFoundException("Event", event_id)
         update_data = data.model_dump(exclude_unset=True)
+        if "cover_url" in update_data:
+            await self._media_repo.adjust_references(reference_delta([event.cover_url], [update_data["cover_url"]]))
         updated = await self._event_repo.update_by_id(event_id, update_data)
         if not updated:
             raise NotFoundException("Event", event_id)
         await self._event_publisher.publish_event(EventType.EVENT_UPDATED,
             payload={"event_id": str(event_id), "updated_fields": list(update_data.keys())})
-        return EventResponse.model_validate(updated)
+        return await self._response(updated)
 
     async def delete_event(self, event_id: uuid.UUID, user: UserContext) -> None:
         event = await self._event_repo.get_by_id(event_id)
         if not event:
             raise NotFoundException("Event", event_id)
         community_id = event.community_id
+        await self._media_repo.adjust_references(reference_delta([event.cover_url], ()))
         await self._event_repo.delete_by_id(event_id)
         await self._event_publisher.publish_event(EventType.EVENT_DELETED,
             payload={"event_id": str(event_id), "community_id": str(community_id)})
         logger.info("Мероприятие удалено", extra={"event_id": str(event_id), "action": "event_deleted"})
+
+    async def _response(self, event: Event) -> EventResponse:
+        response = EventResponse.model_validate(event)
+        await attach_variants(self._media_repo, [response])
+        return response
@@ -0,0 +1,80 @@
+"""Сервис потокового экспорта (NDJSON / CSV)."""
+from __future__ import annotations
+import csv
+import io
+import json
+import uuid
+from typing import AsyncIterator, Iterable, Sequence
+
+from sqlalchemy import RowMapping
+
+from app.core.config import settings
+from app.core.exceptions import NotFoundException
+from app.core.logging import get_logger
+from app.domain.models import Donation, Member, Post
+from app.repositories.base import BaseRepository
+from app.repositories.community_repo import CommunityRepository
+from app.repositories.donation_repo import DonationRepository
+from app.repositories.member_repo import MemberRepository
+from app.repositories.post_repo import PostRepository
+
+logger = get_logger(__name__)
+
+MEMBER_EXPORT_COLUMNS = ("id", "user_id", "status", "is_owner", "nickname", "joined_at", "last_active_at")
+POST_EXPORT_COLUMNS = (
+    "id", "channel_id", "author_id", "title", "excerpt", "word_count", "status", "is_pinned",
+    "like_count", "comment_count", "view_count", "published_at", "created_at",
+)
+DONATION_EXPORT_COLUMNS = (
+    "id", "donor_id", "amount", "currency", "message", "status", "transaction_id", "is_anonymous", "created_at",
+)
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+class ExportService:
+    def __init__(self, community_repo: CommunityRepository, member_repo: MemberRepository,
+                 post_repo: PostRepository, donation_repo: DonationRepository):
+        self._community_repo = community_repo
+        self._member_repo = member_repo
+        self._post_repo = post_repo
+        self._donation_repo = donation_repo
+
+    async def ensure_community(self, community_id: uuid.UUID) -> None:
+        community = await self._community_repo.get_by_id(community_id, columns=("id", "status"))
+        # Удалённое сообщество ждёт фоновой очистки — его данные уже не отдаются
+        if not community or community.status != "active":
+            raise NotFoundException("Community", community_id)
+
+    def export_members(self, community_id: uuid.UUID, fmt: str) -> AsyncIterator[bytes]:
+        return self._export(self._member_repo, MEMBER_EXPORT_COLUMNS, [Member.community_id == community_id], fmt)
+
+    def export_posts(self, community_id: uuid.UUID, fmt: str) -> AsyncIterator[bytes]:
+        return self._export(self._post_repo, POST_EXPORT_COLUMNS, [Post.community_id == community_id], fmt)
+
+    def export_donations(self, community_id: uuid.UUID, fmt: str) -> AsyncIterator[bytes]:
+        return self._export(self._donation_repo, DONATION_EXPORT_COLUMNS, [Donation.community_id == community_id], fmt)
+
+    async def _export(self, repo: BaseRepository, columns: Sequence[str], filters: list, fmt: str) -> AsyncIterator[bytes]:
+        if fmt == "csv":
+            yield _csv_block([columns])
+
+        rows_total = 0
+        async for partition in repo.stream_columns(columns, filters=filters, chunk_size=settings.EXPORT_CHUNK_SIZE):
+            rows_total += len(partition)
+            if fmt == "csv":
+                yield _csv_block([row[name] for name in columns] for row in partition)
+            else:
+                yield _ndjson_block(partition)
+        logger.info("Экспорт завершён", extra={"action": "export_finished", "rows": rows_total})
+
+
+def _ndjson_block(rows: Sequence[RowMapping]) -> bytes:
+    lines = (json.dumps(dict(row), default=str, ensure_ascii=False) for row in rows)
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _csv_block(rows: Iterable[Sequence]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
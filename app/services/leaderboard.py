@@ -0,0 +1,199 @@
+"""Рейтинги сообществ: популярные и набирающие популярность."""
+from __future__ import annotations
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import partial
+from typing import AsyncContextManager, AsyncIterator, Callable, Literal, Mapping, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import after_commit
+from app.domain.models import Community
+from app.infrastructure.cache.cache_keys import CacheKeys
+from app.infrastructure.cache.redis_client import RedisClient
+from app.infrastructure.cache.sorted_set_builder import SortedSetBuilder
+from app.repositories.community_repo import CommunityRepository
+
+LeaderboardKind = Literal["popular", "trending"]
+
+ALL = "all"
+COMMUNITY_TYPES: tuple[str, ...] = tuple(Community.__table__.c.community_type.type.enums)
+
+
+class CommunityLeaderboard:
+    """Рейтинги в Redis sorted set: общий и по каждому community_type, чтение топа — ZREVRANGE.
+
+    popular: score = member_count, меняется ZADD XX INCR вместе со счётчиком. trending:
+    вступления и посты с экспоненциальным затуханием (период полураспада TRENDING_HALF_LIFE).
+    Чтобы не пересчитывать весь набор при затухании, вклад события растёт со временем —
+    вес × 2^((t − начало поколения) / half_life), — а порядок от этого не меняется. Поколение
+    длиной в один half_life держит множитель меньше 2; новое поколение собирается из БД
+    за TRENDING_WINDOW, а пока собирается, читается предыдущее. Отсутствующий popular-набор
+    собирается в фоне, до готовности топ читается из БД.
+    """
+
+    def __init__(
+        self,
+        session_scope: Callable[[], AsyncContextManager[AsyncSession]],
+        cache: RedisClient,
+        half_life: int = settings.TRENDING_HALF_LIFE,
+        window: int = settings.TRENDING_WINDOW,
+        join_weight: float = settings.TRENDING_JOIN_WEIGHT,
+        post_weight: float = settings.TRENDING_POST_WEIGHT,
+        popular_ttl: int = settings.LEADERBOARD_POPULAR_TTL,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._session_scope = session_scope
+        self._cache = cache
+        self._half_life = half_life
+        self._window = window
+        self._join_weight = join_weight
+        self._post_weight = post_weight
+        self._popular_ttl = popular_ttl
+        self._clock = clock
+        self._builder = SortedSetBuilder(cache)
+
+    async def top(self, kind: LeaderboardKind, community_type: Optional[str] = None,
+                  limit: int = 20) -> list[tuple[uuid.UUID, float]]:
+        """Пары (id, score) по убыванию: member_count или trending-score на текущий момент."""
+        scope = community_type or ALL
+        if kind == "popular":
+            found = await self._read(CacheKeys.popular_communities(scope), limit)
+            if found is not None:
+                return found
+            self._builder.schedule(CacheKeys.popular_communities(scope), self._popular_ttl,
+                                   lambda: self._popular_members(community_type))
+            async with self._session_scope() as session:
+                communities = await CommunityRepository(session).get_popular(limit, community_type)
+            return [(community.id, float(community.member_count)) for community in communities]
+
+        now = self._clock()
+        generation = int(now // self._half_life)
+        # Score поколения g отсчитан от его начала; к текущему моменту — множитель 2^(-elapsed / half_life)
+        decay = 2.0 ** (-(now - generation * self._half_life) / self._half_life)
+        found = await self._read(CacheKeys.trending_communities(scope, generation), limit)
+        if found is None:
+            self._builder.schedule(CacheKeys.trending_communities(scope, generation), 2 * self._half_life,
+                                   lambda: self._trending_members(generation, community_type))
+            found = await self._read(CacheKeys.trending_communities(scope, generation - 1), limit)
+            decay /= 2.0
+        if found is None:
+            async with self._session_scope() as session:
+                rows = await CommunityRepository(session).trending_scores(
+                    **self._trending_params(generation), community_type=community_type, limit=limit)
+            found = [(row.id, row.score) for row in rows]
+        return [(community_id, score * decay) for community_id, score in found]
+
+    async def community_added(self, community: Community) -> None:
+        member = str(community.id)
+        for scope in (ALL, community.community_type):
+            await self._cache.zadd_existing(CacheKeys.popular_communities(scope),
+                                            {member: community.member_count})
+
+    async def community_removed(self, community_id: uuid.UUID, community_type: Optional[str] = None) -> None:
+        """Убирает сообщество из наборов ALL и community_type (None — из всех типов)."""
+        generation = int(self._clock() // self._half_life)
+        scopes = (ALL, community_type) if community_type else (ALL, *COMMUNITY_TYPES)
+        await self._cache.zrem(
+            [key for scope in scopes for key in (CacheKeys.popular_communities(scope),
+                                                 CacheKeys.trending_communities(scope, generation))],
+            str(community_id),
+        )
+
+    async def community_retyped(self, community: Community, previous_type: str) -> None:
+        """Перенос между наборами типов; trending-score берётся из общего набора."""
+        member = str(community.id)
+        generation = int(self._clock() // self._half_life)
+        await self._cache.zrem([CacheKeys.popular_communities(previous_type),
+                                CacheKeys.trending_communities(previous_type, generation)], member)
+        await self._cache.zadd_existing(CacheKeys.popular_communities(community.community_type),
+                                        {member: community.member_count})
+        score = await self._cache.zscore(CacheKeys.trending_communities(ALL, generation), member)
+        if score:
+            await self._cache.zadd_existing(CacheKeys.trending_communities(community.community_type, generation),
+                                            {member: score})
+
+    async def members_changed(self, community_id: uuid.UUID, delta: int) -> None:
+        """Изменение member_count: XX — сообщество меняется только в тех наборах, где уже есть."""
+        if delta:
+            await self._cache.zincr_members(
+                [CacheKeys.popular_communities(scope) for scope in (ALL, *COMMUNITY_TYPES)], str(community_id), delta)
+
+    async def activity(self, community: Community, joins: int = 0, posts: int = 0) -> None:
+        """Вступления и опубликованные посты — вклад в trending текущего поколения."""
+        weight = joins * self._join_weight + posts * self._post_weight
+        if weight <= 0:
+            return
+        now = self._clock()
+        generation = int(now // self._half_life)
+        boost = weight * 2.0 ** ((now - generation * self._half_life) / self._half_life)
+        for scope in (ALL, community.community_type):
+            await self._cache.zincrby_existing(CacheKeys.trending_communities(scope, generation),
+                                               {str(community.id): boost})
+
+    async def stop(self) -> None:
+        await self._builder.stop()
+
+    async def _read(self, key: str, limit: int) -> Optional[list[tuple[uuid.UUID, float]]]:
+        found = await self._cache.zrevrange(key, limit + 1)
+        if found is None:
+            return None
+        # Пустой член — метка построенного набора, см. RedisClient.replace_zset
+        return [(uuid.UUID(member), score) for member, score in found if member][:limit]
+
+    def _trending_params(self, generation: int) -> dict:
+        origin = generation * self._half_life
+        return {
+            "since": datetime.fromtimestamp(self._clock() - self._window, timezone.utc),
+            "origin": datetime.fromtimestamp(origin, timezone.utc),
+            "half_life": float(self._half_life),
+            "join_weight": self._join_weight,
+            "post_weight": self._post_weight,
+        }
+
+    async def _popular_members(self, community_type: Optional[str]) -> AsyncIterator[Mapping[str, float]]:
+        filters = [Community.status == "active"]
+        if community_type is not None:
+            filters.append(Community.community_type == community_type)
+        async with self._session_scope() as session:
+            async for rows in CommunityRepository(session).stream_columns(("id", "member_count"), filters=filters):
+                yield {str(row["id"]): row["member_count"] for row in rows}
+
+    async def _trending_members(self, generation: int,
+                                community_type: Optional[str]) -> AsyncIterator[Mapping[str, float]]:
+        async with self._session_scope() as session:
+            rows = await CommunityRepository(session).trending_scores(
+                **self._trending_params(generation), community_type=community_type)
+        yield {str(row.id): row.score for row in rows}
+
+
+class SessionLeaderboard:
+    """Рейтинги для сервиса в транзакции: изменения наборов — только после коммита сессии.
+
+    ZINCRBY не идемпотентен: инкремент, применённый до отката, остался бы в наборе до пересборки.
+    """
+
+    def __init__(self, leaderboard: CommunityLeaderboard, session: AsyncSession):
+        self._leaderboard = leaderboard
+        self._session = session
+
+    async def top(self, kind: LeaderboardKind, community_type: Optional[str] = None,
+                  limit: int = 20) -> list[tuple[uuid.UUID, float]]:
+        return await self._leaderboard.top(kind, community_type, limit)
+
+    async def community_added(self, community: Community) -> None:
+        after_commit(self._session, partial(self._leaderboard.community_added, community))
+
+    async def community_removed(self, community_id: uuid.UUID, community_type: Optional[str] = None) -> None:
+        after_commit(self._session, partial(self._leaderboard.community_removed, community_id, community_type))
+
+    async def community_retyped(self, community: Community, previous_type: str) -> None:
+        after_commit(self._session, partial(self._leaderboard.community_retyped, community, previous_type))
+
+    async def members_changed(self, community_id: uuid.UUID, delta: int) -> None:
+        after_commit(self._session, partial(self._leaderboard.members_changed, community_id, delta))
+
+    async def activity(self, community: Community, joins: int = 0, posts: int = 0) -> None:
+        after_commit(self._session, partial(self._leaderboard.activity, community, joins=joins, posts=posts))
@@ -0,0 +1,95 @@
+"""Фоновое удаление медиа-объектов, на которые не осталось ссылок."""
+from __future__ import annotations
+import asyncio
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import AsyncContextManager, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.infrastructure.media.keys import variant_key
+from app.infrastructure.media.s3_client import S3Client
+from app.repositories.media_repo import MediaRepository
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ReaperMetrics:
+    deleted_total: int = 0
+    keys_deleted_total: int = 0
+    keys_failed_total: int = 0
+    failed_total: int = 0
+    runs_total: int = 0
+
+
+class MediaReaper:
+    """Объекты из S3 удаляются до коммита удаления строк индекса — пачкой DeleteObjects.
+
+    Строки заблокированы FOR UPDATE: загрузка того же содержимого в это время ждёт и после
+    коммита загружает объект заново, а не ссылается на удалённый. Строка объекта, чей ключ
+    или вариант удалить не удалось, остаётся и будет взята следующим проходом.
+    """
+
+    def __init__(
+        self,
+        session_scope: Callable[[], AsyncContextManager[AsyncSession]],
+        s3_client: S3Client,
+        batch_size: int = settings.MEDIA_REAPER_BATCH_SIZE,
+        interval: float = settings.MEDIA_REAPER_INTERVAL,
+    ):
+        self._session_scope = session_scope
+        self._s3 = s3_client
+        self._batch_size = batch_size
+        self._interval = interval
+        self._stopping: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = ReaperMetrics()
+
+    async def start(self) -> None:
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="media-reaper")
+
+    async def stop(self) -> None:
+        if self._stopping is None:
+            return
+        self._stopping.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._stopping = None
+
+    async def reap_once(self) -> int:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.MEDIA_ORPHAN_GRACE_SECONDS)
+        async with self._session_scope() as session:
+            repo = MediaRepository(session)
+            orphans = await repo.claim_orphans(cutoff, self._batch_size)
+            keys = {
+                media.sha256: [media.key, *(variant_key(media.sha256, name) for name in media.variants or ())]
+                for media in orphans
+            }
+            failed = set(await self._s3.delete_files([key for media_keys in keys.values() for key in media_keys]))
+            deleted = await repo.delete_many([
+                sha256 for sha256, media_keys in keys.items() if failed.isdisjoint(media_keys)
+            ])
+        self.metrics.runs_total += 1
+        self.metrics.deleted_total += deleted
+        self.metrics.keys_failed_total += len(failed)
+        self.metrics.keys_deleted_total += sum(map(len, keys.values())) - len(failed)
+        if deleted:
+            logger.info("Удалены медиа без ссылок", extra={"action": "media_reaped", "metrics": asdict(self.metrics)})
+        return deleted
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                deleted = await self.reap_once()
+            except Exception as e:
+                self.metrics.failed_total += 1
+                logger.warning(f"Media reaper: {e}")
+                deleted = 0
+            if deleted < self._batch_size:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self._interval)
@@ -0,0 +1,94 @@
+"""Сверка бакета медиа с базой: удаление объектов, на которые ничто не ссылается."""
+from __future__ import annotations
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import AsyncContextManager, Callable, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.infrastructure.media.keys import key_sha256, media_url, variant_key
+from app.infrastructure.media.s3_client import DELETE_BATCH_SIZE, S3Client, StoredObject
+from app.repositories.media_repo import MediaRepository
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ReconcileReport:
+    dry_run: bool
+    prefix: str
+    pages: int = 0
+    listed: int = 0
+    listed_bytes: int = 0
+    recent: int = 0
+    unreferenced: int = 0
+    unreferenced_bytes: int = 0
+    deleted: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class MediaReconciler:
+    """Страница листинга S3 — один запрос к индексу media_objects и один — к URL в данных.
+
+    Ловит то, что не видит MediaReaper: объекты, загруженные до индекса media_objects,
+    загрузки, упавшие между PUT и регистрацией, варианты удалённых объектов. Объекты моложе
+    grace-периода не трогаются — их URL мог ещё не дойти до поста.
+    """
+
+    def __init__(
+        self,
+        session_scope: Callable[[], AsyncContextManager[AsyncSession]],
+        s3_client: S3Client,
+        grace_seconds: int = settings.MEDIA_ORPHAN_GRACE_SECONDS,
+        dry_run: bool = False,
+        page_size: int = DELETE_BATCH_SIZE,
+    ):
+        self._session_scope = session_scope
+        self._s3 = s3_client
+        self._grace = timedelta(seconds=grace_seconds)
+        self._dry_run = dry_run
+        self._page_size = page_size
+
+    async def run(self, prefix: str = "media/") -> ReconcileReport:
+        report = ReconcileReport(dry_run=self._dry_run, prefix=prefix)
+        started = time.monotonic()
+        cutoff = datetime.now(timezone.utc) - self._grace
+        async for page in self._s3.list_objects(prefix, page_size=self._page_size):
+            report.pages += 1
+            report.listed += len(page)
+            report.listed_bytes += sum(item.size for item in page)
+            settled = [item for item in page if item.last_modified < cutoff]
+            report.recent += len(page) - len(settled)
+            orphans = await self.unreferenced(settled)
+            report.unreferenced += len(orphans)
+            report.unreferenced_bytes += sum(item.size for item in orphans)
+            if orphans and not self._dry_run:
+                failed = await self._s3.delete_files([item.key for item in orphans])
+                report.failed += len(failed)
+                report.deleted += len(orphans) - len(failed)
+        report.elapsed_seconds = round(time.monotonic() - started, 3)
+        logger.info("Сверка медиа завершена", extra={"action": "media_reconciled", "metrics": report.to_dict()})
+        return report
+
+    async def unreferenced(self, objects: Sequence[StoredObject]) -> list[StoredObject]:
+        """Объекты страницы, которых нет ни в индексе, ни среди URL постов, сообществ и мероприятий."""
+        if not objects:
+            return []
+        hashes = {sha256 for sha256 in map(key_sha256, (item.key for item in objects)) if sha256}
+        async with self._session_scope() as session:
+            repo = MediaRepository(session)
+            tracked = await repo.tracked(sorted(hashes))
+            known = {
+                key for sha256, (original, variants) in tracked.items()
+                for key in (original, *(variant_key(sha256, name) for name in variants))
+            }
+            candidates = [item for item in objects if item.key not in known]
+            referenced = await repo.referenced_urls([media_url(item.key) for item in candidates])
+        return [item for item in candidates if media_url(item.key) not in referenced]
@@ -0,0 +1,134 @@
+"""Сервис загрузки медиа-файлов сообщества."""
+from __future__ import annotations
+import asyncio
+import hashlib
+import tempfile
+import uuid
+from dataclasses import dataclass
+from typing import AsyncContextManager, AsyncIterator, BinaryIO, Callable, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.exceptions import NotFoundException, PayloadTooLargeException, ValidationException
+from app.core.logging import get_logger
+from app.infrastructure.media.keys import media_key, media_url
+from app.infrastructure.media.s3_client import S3Client
+from app.repositories.community_repo import CommunityRepository
+from app.repositories.media_repo import MediaRepository
+from app.schemas.media import MediaUploadResponse
+from app.services.media_variants import VariantPipeline, apply_variants
+
+logger = get_logger(__name__)
+
+SPOOL_WRITE_SIZE = 1024 * 1024
+
+
+@dataclass
+class SpooledUpload:
+    file: BinaryIO
+    size: int
+    sha256: str
+
+
+async def spool_upload(chunks: AsyncIterator[bytes], max_bytes: int) -> SpooledUpload:
+    """Тело — во временный файл с подсчётом SHA-256; в памяти не больше SPOOL_WRITE_SIZE."""
+    file = tempfile.TemporaryFile(dir=settings.MEDIA_SPOOL_DIR)
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise PayloadTooLargeException(f"Файл больше {max_bytes} байт")
+            digest.update(chunk)
+            buffer += chunk
+            if len(buffer) >= SPOOL_WRITE_SIZE:
+                await asyncio.to_thread(file.write, bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await asyncio.to_thread(file.write, bytes(buffer))
+        await asyncio.to_thread(file.seek, 0)
+    except BaseException:
+        file.close()
+        raise
+    return SpooledUpload(file, size, digest.hexdigest())
+
+
+async def read_spooled(file: BinaryIO, chunk_size: int) -> AsyncIterator[bytes]:
+    while chunk := await asyncio.to_thread(file.read, chunk_size):
+        yield chunk
+
+
+class MediaService:
+    """Content-addressed загрузка: повтор уже известного содержимого не загружается в S3.
+
+    Загрузка ссылок не создаёт: их считают посты, мероприятия и сообщества, к которым
+    прикреплён URL. Неприкреплённый объект удаляется после grace-периода.
+
+    Транзакции короткие и не держат соединение на время загрузки: проверка сообщества,
+    поиск по хэшу и регистрация объекта — отдельные сессии.
+    """
+
+    def __init__(self, session_scope: Callable[[], AsyncContextManager[AsyncSession]], s3_client: S3Client,
+                 variants: Optional[VariantPipeline] = None):
+        self._session_scope = session_scope
+        self._s3 = s3_client
+        self._variants = variants
+
+    async def ensure_community(self, community_id: uuid.UUID) -> None:
+        async with self._session_scope() as session:
+            community = await CommunityRepository(session).get_by_id(community_id)
+        if not community:
+            raise NotFoundException("Community", community_id)
+
+    @staticmethod
+    def validate(content_type: str, content_length: Optional[int]) -> str:
+        """Проверки до чтения тела: тип и заявленный размер."""
+        content_type = content_type.split(";")[0].strip().lower()
+        if content_type not in settings.MEDIA_ALLOWED_CONTENT_TYPES:
+            raise ValidationException(f"Неподдерживаемый тип файла: {content_type or 'не указан'}")
+        if content_length is not None and content_length > settings.MEDIA_MAX_UPLOAD_BYTES:
+            raise PayloadTooLargeException(f"Файл больше {settings.MEDIA_MAX_UPLOAD_BYTES} байт")
+        return content_type
+
+    async def upload(self, community_id: uuid.UUID, chunks: AsyncIterator[bytes],
+                     content_type: str) -> MediaUploadResponse:
+        spooled = await spool_upload(chunks, settings.MEDIA_MAX_UPLOAD_BYTES)
+        with spooled.file:
+            if spooled.size == 0:
+                raise ValidationException("Пустой файл")
+            async with self._session_scope() as session:
+                existing = await MediaRepository(session).touch(spooled.sha256)
+            if existing is not None:
+                logger.info("Медиа: дубликат, загрузка пропущена", extra={
+                    "community_id": str(community_id), "action": "media_deduplicated",
+                    "metrics": {"size": spooled.size, "ref_count": existing.ref_count},
+                })
+                return self._response(existing.key, existing.content_type, existing.size, existing.sha256,
+                                      existing.variants or ())
+
+            key = media_key(spooled.sha256, content_type)
+            result = await self._s3.upload_stream(
+                read_spooled(spooled.file, settings.S3_UPLOAD_PART_SIZE), key, content_type)
+            if result.sha256 != spooled.sha256:
+                raise ValidationException("Контрольная сумма загруженного файла не совпала")
+            build_variants = self._variants is not None and self._variants.accepts(content_type)
+            async with self._session_scope() as session:
+                media = await MediaRepository(session).register(
+                    spooled.sha256, key, spooled.size, content_type, claim_variants=build_variants)
+        if build_variants:
+            self._variants.submit(media.sha256, media.key)
+        logger.info("Медиа загружено", extra={
+            "community_id": str(community_id), "action": "media_uploaded",
+            "metrics": {"size": result.size, "parts": result.parts, "ref_count": media.ref_count},
+        })
+        return self._response(media.key, media.content_type, media.size, media.sha256)
+
+    def _response(self, key: str, content_type: str, size: int, sha256: str,
+                  variants: Sequence[str] = ()) -> MediaUploadResponse:
+        response = MediaUploadResponse(key=key, url=media_url(key),
+                                       content_type=content_type, size=size, sha256=sha256)
+        apply_variants([response], {sha256: variants})
+        return response
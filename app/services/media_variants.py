@@ -0,0 +1,210 @@
+"""Фоновая генерация вариантов изображений (thumbnail, medium, original)."""
+from __future__ import annotations
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import AsyncContextManager, Callable, Iterable, Mapping, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.infrastructure.media.images import (
+    VARIANT_CONTENT_TYPE, VARIANT_SOURCE_TYPES, UnsupportedImage, render_variants,
+)
+from app.infrastructure.media.keys import media_sha256, variant_key
+from app.infrastructure.media.s3_client import S3Client
+from app.repositories.media_repo import MediaRepository
+from app.schemas.media import MediaVariantsMixin
+
+logger = get_logger(__name__)
+
+RETRY_BASE_DELAY = 0.5
+# Поле закэшированного ответа с именами готовых вариантов (см. attach_variants)
+CACHED_VARIANTS_FIELD = "variant_names"
+SWEEP_MIN_AGE = timedelta(minutes=1)
+
+
+async def attach_variants(media_repo: MediaRepository, items: Iterable[object]) -> dict[str, list[str]]:
+    """Подставить в ответы построенные варианты их изображений — один запрос на все ответы.
+
+    Возвращает найденные имена: вместе с закэшированным ответом их кладут в кэш (apply_variants).
+    """
+    items = list(items)
+    hashes = {
+        sha256 for item in items if isinstance(item, MediaVariantsMixin)
+        for url in item.variant_source_urls() if (sha256 := media_sha256(url))
+    }
+    ready = await media_repo.ready_variants(sorted(hashes)) if hashes else {}
+    apply_variants(items, ready)
+    return ready
+
+
+def apply_variants(items: Iterable[object], ready: Mapping[str, Sequence[str]]) -> None:
+    # Узкие схемы (?fields=) ссылок на варианты не содержат
+    for item in items:
+        if isinstance(item, MediaVariantsMixin):
+            item.attach_variants(ready)
+
+
+@dataclass(frozen=True)
+class VariantJob:
+    sha256: str
+    key: str
+
+
+@dataclass
+class VariantMetrics:
+    queued: int = 0
+    dropped: int = 0
+    processed: int = 0
+    unsupported: int = 0
+    failed: int = 0
+    retries: int = 0
+    queue_depth: int = 0
+
+
+class VariantPipeline:
+    """Ограниченная очередь заданий, CPU-часть — в пуле процессов.
+
+    Событийный цикл только скачивает оригинал, передаёт байты в процесс и загружает
+    результат. Переполненная очередь не блокирует загрузку: задание отбрасывается и
+    подбирается периодическим обходом media_objects с variants IS NULL. Пул и обход есть
+    в каждом воркере gunicorn, поэтому процессов по умолчанию немного, а обход захватывает
+    строки (claim_missing_variants) — одно изображение не строится несколькими воркерами.
+    """
+
+    def __init__(
+        self,
+        session_scope: Callable[[], AsyncContextManager[AsyncSession]],
+        s3_client: S3Client,
+        processes: int = settings.MEDIA_VARIANT_PROCESSES,
+        queue_size: int = settings.MEDIA_VARIANT_QUEUE_SIZE,
+        max_attempts: int = settings.MEDIA_VARIANT_MAX_ATTEMPTS,
+        sweep_interval: float = settings.MEDIA_VARIANT_SWEEP_INTERVAL,
+        claim_ttl: float = settings.MEDIA_VARIANT_CLAIM_TTL,
+        max_claims: int = settings.MEDIA_VARIANT_MAX_CLAIMS,
+    ):
+        self._session_scope = session_scope
+        self._s3 = s3_client
+        self._processes = max(1, processes)
+        self._queue: asyncio.Queue[VariantJob] = asyncio.Queue(maxsize=queue_size)
+        self._max_attempts = max(1, max_attempts)
+        self._sweep_interval = sweep_interval
+        self._claim_ttl = timedelta(seconds=claim_ttl)
+        self._max_claims = max_claims
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+        self.metrics = VariantMetrics()
+
+    @staticmethod
+    def accepts(content_type: str) -> bool:
+        return content_type in VARIANT_SOURCE_TYPES
+
+    async def start(self) -> None:
+        # spawn: дочерний процесс не наследует сокеты и состояние событийного цикла родителя
+        self._executor = ProcessPoolExecutor(self._processes, mp_context=multiprocessing.get_context("spawn"))
+        self._stopping = asyncio.Event()
+        # Воркеров вдвое больше процессов: пока один ждёт S3, другой занимает CPU.
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"media-variants-{i}") for i in range(self._processes * 2)
+        ]
+        self._tasks.append(asyncio.create_task(self._sweep(), name="media-variants-sweep"))
+        logger.info("Генерация вариантов медиа запущена", extra={"metrics": {"processes": self._processes}})
+
+    async def stop(self) -> None:
+        if self._stopping is None:
+            return
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._stopping = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        logger.info("Генерация вариантов медиа остановлена", extra={"metrics": asdict(self.metrics)})
+
+    def submit(self, sha256: str, key: str) -> bool:
+        if self._stopping is None:
+            return False
+        try:
+            self._queue.put_nowait(VariantJob(sha256, key))
+        except asyncio.QueueFull:
+            self.metrics.dropped += 1
+            return False
+        self.metrics.queued += 1
+        return True
+
+    async def process(self, job: VariantJob) -> list[str]:
+        """Одно изображение: скачать, отрисовать в процессе, загрузить варианты, отметить в индексе."""
+        data = await self._s3.download(job.key)
+        if data is None:
+            return []
+        loop = asyncio.get_running_loop()
+        try:
+            rendered = await loop.run_in_executor(self._executor, render_variants, data)
+        except UnsupportedImage as e:
+            self.metrics.unsupported += 1
+            logger.warning(f"Варианты не построены, файл не изображение: {job.key}: {e}")
+            rendered = []
+        await asyncio.gather(*(
+            self._s3.put_bytes(body, variant_key(job.sha256, name), VARIANT_CONTENT_TYPE) for name, body in rendered
+        ))
+        names = [name for name, _ in rendered]
+        async with self._session_scope() as session:
+            await MediaRepository(session).set_variants(job.sha256, names)
+        self.metrics.processed += 1
+        return names
+
+    async def _worker(self) -> None:
+        while not self._stopping.is_set():
+            job = await self._queue.get()
+            self.metrics.queue_depth = self._queue.qsize()
+            for attempt in range(1, self._max_attempts + 1):
+                try:
+                    await self.process(job)
+                    break
+                except BrokenProcessPool:
+                    self._restart_executor()
+                except Exception as e:
+                    logger.warning(f"Варианты {job.key}: ошибка (попытка {attempt}): {e}")
+                self.metrics.retries += 1
+                if attempt < self._max_attempts:
+                    await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt)
+            else:
+                # Не помечаем в индексе: обход подберёт задание позже.
+                self.metrics.failed += 1
+
+    def _restart_executor(self) -> None:
+        """Процесс упал (например, OOM на огромном изображении) — пул больше не принимает задания."""
+        logger.error("Пул процессов вариантов медиа сломан, пересоздаём")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = ProcessPoolExecutor(self._processes, mp_context=multiprocessing.get_context("spawn"))
+
+    async def _sweep(self) -> None:
+        while not self._stopping.is_set():
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._stopping.wait(), timeout=self._sweep_interval)
+            if self._stopping.is_set():
+                return
+            free = self._queue.maxsize - self._queue.qsize()
+            if free <= 0:
+                continue
+            now = datetime.now(timezone.utc)
+            try:
+                async with self._session_scope() as session:
+                    claimed = await MediaRepository(session).claim_missing_variants(
+                        sorted(VARIANT_SOURCE_TYPES), now - SWEEP_MIN_AGE, now - self._claim_ttl,
+                        self._max_claims, free,
+                    )
+            except Exception as e:
+                logger.warning(f"Не удалось найти медиа без вариантов: {e}")
+                continue
+            for sha256, key in claimed:
+                self.submit(sha256, key)
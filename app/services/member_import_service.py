@@ -0,0 +1,144 @@
+"""Сервис массового импорта участников (NDJSON / CSV)."""
+from __future__ import annotations
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+
+from app.core.config import settings
+from app.core.exceptions import NotFoundException, ValidationException
+from app.core.logging import get_logger
+from app.events.base import EventPublisher
+from app.events.event_types import EventType
+from app.infrastructure.cache.cache_keys import CacheKeys
+from app.infrastructure.cache.redis_client import RedisClient
+from app.repositories.community_repo import CommunityRepository
+from app.repositories.member_repo import MemberRepository
+from app.repositories.role_repo import RoleRepository
+from app.schemas.member import MemberImportJob
+from app.services.leaderboard import SessionLeaderboard
+
+logger = get_logger(__name__)
+
+MAX_REPORTED_ERRORS = 20
+NICKNAME_MAX_LENGTH = 100
+
+ImportRow = tuple[uuid.UUID, Optional[str]]
+
+
+def parse_import_rows(payload: bytes, fmt: str) -> tuple[list[ImportRow], list[str]]:
+    """Разбор тела запроса в пары (user_id, nickname) и список ошибок по строкам."""
+    try:
+        text = payload.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise ValidationException("Файл импорта должен быть в UTF-8") from exc
+
+    if fmt == "csv":
+        records = ((line_no, record) for line_no, record in enumerate(csv.DictReader(io.StringIO(text)), start=2))
+    else:
+        records = ((line_no, line) for line_no, line in enumerate(text.splitlines(), start=1) if line.strip())
+
+    rows: list[ImportRow] = []
+    errors: list[str] = []
+    for line_no, record in records:
+        try:
+            if not isinstance(record, dict):
+                record = json.loads(record)
+            user_id = uuid.UUID(str(record["user_id"]).strip())
+            nickname = (record.get("nickname") or "").strip() or None
+            if nickname is not None and len(nickname) > NICKNAME_MAX_LENGTH:
+                raise ValueError("nickname длиннее 100 символов")
+        except (ValueError, KeyError, TypeError, AttributeError) as exc:
+            errors.append(f"строка {line_no}: {exc!r}")
+            continue
+        rows.append((user_id, nickname))
+    return rows, errors
+
+
+class MemberImportService:
+    def __init__(self, member_repo: MemberRepository, community_repo: CommunityRepository,
+                 role_repo: RoleRepository, cache: RedisClient, event_publisher: EventPublisher,
+                 leaderboard: SessionLeaderboard):
+        self._member_repo = member_repo
+        self._community_repo = community_repo
+        self._role_repo = role_repo
+        self._cache = cache
+        self._event_publisher = event_publisher
+        self._leaderboard = leaderboard
+
+    async def create_job(self, community_id: uuid.UUID) -> MemberImportJob:
+        community = await self._community_repo.get_by_id(community_id)
+        if not community:
+            raise NotFoundException("Community", community_id)
+        job = MemberImportJob(job_id=uuid.uuid4(), community_id=community_id, created_at=datetime.now(timezone.utc))
+        await self.save_job(job)
+        return job
+
+    async def get_job(self, community_id: uuid.UUID, job_id: uuid.UUID) -> MemberImportJob:
+        cached = await self._cache.get(CacheKeys.member_import_job(str(community_id), str(job_id)))
+        if not cached:
+            raise NotFoundException("Import job", job_id)
+        return MemberImportJob(**cached)
+
+    async def save_job(self, job: MemberImportJob) -> None:
+        await self._cache.set(
+            CacheKeys.member_import_job(str(job.community_id), str(job.job_id)),
+            job.model_dump(), ttl=settings.MEMBER_IMPORT_JOB_TTL,
+        )
+
+    async def start_job(self, job: MemberImportJob, total_rows: int, errors: Sequence[str]) -> tuple[str, Optional[uuid.UUID]]:
+        """Переводит задачу в running; возвращает статус новых участников и роль по умолчанию."""
+        community = await self._community_repo.get_by_id(job.community_id)
+        if not community:
+            raise NotFoundException("Community", job.community_id)
+        default_role = await self._role_repo.get_default_role(job.community_id)
+
+        job.status = "running"
+        job.total_rows = total_rows
+        job.invalid = len(errors)
+        job.errors = list(errors[:MAX_REPORTED_ERRORS])
+        await self.save_job(job)
+
+        member_status = "pending" if community.community_type == "private" else "active"
+        return member_status, default_role.id if default_role else None
+
+    async def import_chunk(self, job: MemberImportJob, rows: Sequence[ImportRow],
+                           member_status: str, default_role_id: Optional[uuid.UUID]) -> None:
+        """Пачка и её вклад в member_count — одна транзакция: оборванный импорт не расходится со счётчиком."""
+        imported = await self._member_repo.bulk_import(job.community_id, rows, member_status, default_role_id)
+        if imported and member_status == "active":
+            await self._community_repo.increment_member_count(job.community_id, imported)
+            await self._leaderboard.members_changed(job.community_id, imported)
+            community = await self._community_repo.get_by_id(job.community_id, columns=("id", "community_type"))
+            if community:
+                await self._leaderboard.activity(community, joins=imported)
+        job.imported += imported
+        job.skipped += len(rows) - imported
+        job.processed_rows += len(rows)
+        await self.save_job(job)
+
+    async def finish_job(self, job: MemberImportJob, member_status: str, error: Optional[str] = None) -> None:
+        """Одна инвалидация и одно агрегированное событие на весь импорт; счётчик уже обновлён пачками."""
+        # Ники импортированных участников попадут в автодополнение при пересборке набора
+        await self._cache.delete(CacheKeys.community(str(job.community_id)),
+                                 CacheKeys.community_fieldsets(str(job.community_id)),
+                                 CacheKeys.community_nicknames(str(job.community_id)))
+
+        job.status = "failed" if error else "completed"
+        if error:
+            job.errors = [*job.errors, error][-MAX_REPORTED_ERRORS:]
+        job.finished_at = datetime.now(timezone.utc)
+        await self.save_job(job)
+
+        if job.imported:
+            await self._event_publisher.publish_event(
+                EventType.MEMBERS_IMPORTED,
+                payload={"community_id": str(job.community_id), "job_id": str(job.job_id),
+                         "imported": job.imported, "status": member_status},
+            )
+        logger.info("Импорт участников завершён", extra={
+            "community_id": str(job.community_id), "action": "members_imported",
+            "imported": job.imported, "skipped": job.skipped, "invalid": job.invalid,
+        })
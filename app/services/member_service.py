@@ -14,7 +14,11 @@ from app.infrastructure.cache.redis_client import RedisClient
 from app.repositories.community_repo import CommunityRepository
 from app.repositories.member_repo import MemberRepository
 from app.repositories.role_repo import RoleRepository
-from app.schemas.member import MemberCreate, MemberUpdate, MemberResponse
+from app.services.autocomplete import SessionAutocomplete, member_entry
+from app.services.leaderboard import SessionLeaderboard
+from app.schemas.member import (
+    MemberCreate, MemberUpdate, MemberResponse, MemberRoleBulkUpdate, MemberRoleBulkResult,
+)
 from app.schemas.common import PaginatedResponse
 
 logger = get_logger(__name__)
@@ -22,12 +26,15 @@ logger = get_logger(__name__)
 
 class MemberService:
     def __init__(self, member_repo: MemberRepository, community_repo: CommunityRepository,
-                 role_repo: RoleRepository, cache: RedisClient, event_publisher: EventPublisher):
+                 role_repo: RoleRepository, cache: RedisClient, event_publisher: EventPublisher,
+                 autocomplete: SessionAutocomplete, leaderboard: SessionLeaderboard):
         self._member_repo = member_repo
         self._community_repo = community_repo
         self._role_repo = role_repo
         self._cache = cache
         self._event_publisher = event_publisher
+        self._autocomplete = autocomplete
+        self._leaderboard = leaderboard
 
     async def list_members(self, community_id: uuid.UUID, page: int = 1, page_size: int = 20,
                             status_filter: Optional[str] = None) -> PaginatedResponse[MemberResponse]:
@@ -62,8 +69,11 @@ class MemberService:
 
         if initial_status == "active":
             await self._community_repo.increment_member_count(community_id, 1)
+            await self._leaderboard.members_changed(community_id, 1)
+            await self._leaderboard.activity(community, joins=1)
 
-        await self._cache.delete(CacheKeys.community(str(community_id)))
+        await self._cache.delete(CacheKeys.community(str(community_id)), CacheKeys.community_fieldsets(str(community_id)))
+        await self._autocomplete.update_nicknames(community_id, None, member_entry(member))
 
         await self._event_publisher.publish_event(
             EventType.MEMBER_JOINED,
@@ -81,21 +91,33 @@ class MemberService:
             raise NotFoundException("Member")
 
         update_data = data.model_dump(exclude_unset=True, exclude={"role_ids"})
+        indexed = member_entry(member)
         if update_data:
             await self._member_repo.update_by_id(member.id, update_data)
 
         if data.role_ids is not None:
-            for role in list(member.roles):
-                await self._member_repo.remove_role(member.id, role)
-            for role_id in data.role_ids:
-                role = await self._role_repo.get_by_id(role_id)
-                if role and role.community_id == community_id:
-                    await self._member_repo.assign_role(member.id, role)
+            await self._member_repo.replace_roles(member.id, community_id, data.role_ids)
 
         member = await self._member_repo.get_by_user_and_community(user_id, community_id)
+        await self._autocomplete.update_nicknames(community_id, indexed, member_entry(member))
         logger.info("Участник обновлён", extra={"community_id": str(community_id), "user_id": str(user_id), "action": "member_updated"})
         return MemberResponse.model_validate(member)
 
+    async def bulk_update_role(self, community_id: uuid.UUID, role_id: uuid.UUID,
+                               data: MemberRoleBulkUpdate, current_user: UserContext) -> MemberRoleBulkResult:
+        role = await self._role_repo.get_by_id(role_id)
+        if not role or role.community_id != community_id:
+            raise NotFoundException("Role", role_id)
+
+        affected = await self._member_repo.bulk_set_role(
+            community_id, role_id, data.user_ids, assign=data.action == "assign",
+        )
+        logger.info("Роль массово изменена", extra={
+            "community_id": str(community_id), "role_id": str(role_id), "user_id": str(current_user.user_id),
+            "action": f"role_bulk_{data.action}", "affected": affected,
+        })
+        return MemberRoleBulkResult(role_id=role_id, action=data.action, requested=len(data.user_ids), affected=affected)
+
     async def remove_member(self, community_id: uuid.UUID, user_id: uuid.UUID, current_user: UserContext) -> None:
         member = await self._member_repo.get_by_user_and_community(user_id, community_id)
         if not member:
@@ -105,7 +127,9 @@ class MemberService:
 
         await self._member_repo.delete_by_id(member.id)
         await self._community_repo.increment_member_count(community_id, -1)
-        await self._cache.delete(CacheKeys.community(str(community_id)))
+        await self._leaderboard.members_changed(community_id, -1)
+        await self._cache.delete(CacheKeys.community(str(community_id)), CacheKeys.community_fieldsets(str(community_id)))
+        await self._autocomplete.update_nicknames(community_id, member_entry(member), None)
 
         await self._event_publisher.publish_event(
             EventType.MEMBER_LEFT,
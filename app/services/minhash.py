@@ -0,0 +1,180 @@
+"""MinHash-подписи множеств и поиск похожих пар через LSH, векторно на NumPy."""
+from __future__ import annotations
+import uuid
+from typing import Iterator, Sequence
+
+import numpy as np
+
+EMPTY = np.iinfo(np.uint64).max
+# Сколько кодов пар копится до очередного схлопывания повторов в candidate_pairs
+CANDIDATE_COMPACT = 4_000_000
+# Сколько элементов множеств разворачивается за шаг в MemberIndex.intersections
+INTERSECT_BUDGET = 4_000_000
+
+
+def uuid_keys(values: Sequence[uuid.UUID]) -> np.ndarray:
+    """Старшие 64 бита UUID как uint64 — для uuid4 это случайные биты."""
+    return np.frombuffer(b"".join(value.bytes[:8] for value in values), dtype=">u8").astype(np.uint64)
+
+
+def _mix(keys: np.ndarray) -> np.ndarray:
+    """splitmix64: перемешивает биты ключа, чтобы линейные перестановки ниже были независимы."""
+    z = keys + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class MinHasher:
+    """num_perm перестановок вида a·x + b mod 2^64 (a нечётное — биекция) над перемешанным ключом."""
+
+    def __init__(self, num_perm: int, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def empty(self, size: int) -> np.ndarray:
+        return np.full((size, self.num_perm), EMPTY, dtype=np.uint64)
+
+    def update(self, signatures: np.ndarray, rows: np.ndarray, keys: np.ndarray) -> None:
+        """Добавляет пары (строка подписи, ключ элемента): минимум по каждой перестановке.
+
+        Пары группируются сортировкой по строке, минимум внутри группы — minimum.reduceat,
+        поэтому на пачку уходит несколько проходов по массиву без цикла по строкам.
+        """
+        if not len(rows):
+            return
+        order = np.argsort(rows, kind="stable")
+        rows = rows[order]
+        hashed = _mix(keys[order])[:, None] * self._a[None, :] + self._b[None, :]
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        targets = rows[starts]
+        signatures[targets] = np.minimum(signatures[targets], np.minimum.reduceat(hashed, starts, axis=0))
+
+
+def jaccard(signatures: np.ndarray, left: np.ndarray, right: np.ndarray, batch: int = 50_000) -> np.ndarray:
+    """Оценка Jaccard для пар строк — доля совпавших минимумов."""
+    scores = np.empty(len(left), dtype=np.float64)
+    for start in range(0, len(left), batch):
+        stop = start + batch
+        scores[start:stop] = (signatures[left[start:stop]] == signatures[right[start:stop]]).mean(axis=1)
+    return scores
+
+
+def cosine(jaccard_scores: np.ndarray, left_sizes: np.ndarray, right_sizes: np.ndarray) -> np.ndarray:
+    """|A∩B| / sqrt(|A|·|B|) из оценки Jaccard и размеров: |A∩B| = J / (1 + J) · (|A| + |B|).
+
+    В отличие от Jaccard не занижает сходство маленького сообщества с большим,
+    в котором состоит почти вся его аудитория.
+    """
+    intersection = jaccard_scores / (1.0 + jaccard_scores) * (left_sizes + right_sizes)
+    return np.minimum(intersection / np.sqrt(np.maximum(left_sizes * right_sizes, 1.0)), 1.0)
+
+
+def _bucket_pairs(keys: np.ndarray, rows: np.ndarray, max_bucket: int) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Все пары строк с одинаковым ключом; корзины больше max_bucket пропускаются.
+
+    Корзины одного размера s обрабатываются разом: матрица (корзины × s) и triu_indices(s).
+    """
+    order = np.argsort(keys, kind="stable")
+    keys, rows = keys[order], rows[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(keys)])
+    for size in np.unique(sizes[(sizes >= 2) & (sizes <= max_bucket)]):
+        members = rows[starts[sizes == size][:, None] + np.arange(size)[None, :]]
+        i, j = np.triu_indices(size, k=1)
+        yield members[:, i].ravel(), members[:, j].ravel()
+
+
+def candidate_pairs(signatures: np.ndarray, bands: int, max_bucket: int,
+                    eligible: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """LSH: подпись делится на bands полос, пара — кандидат, если совпала хотя бы одна полоса.
+
+    При r = num_perm / bands строк в полосе пара с Jaccard J становится кандидатом с
+    вероятностью 1 − (1 − J^r)^bands. eligible — маска строк, участвующих в поиске.
+    Возвращает уникальные пары (left < right).
+    """
+    rows = np.flatnonzero(eligible)
+    width = signatures.shape[1] // bands
+    # Полоса из нескольких строк сворачивается в один ключ: сумма с нечётными множителями mod 2^64
+    weights = np.random.default_rng(bands).integers(0, 2 ** 63, size=width, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    # Одна и та же пара совпадает во многих полосах: повторы схлопываются по мере накопления,
+    # и память ограничена числом уникальных пар плюс CANDIDATE_COMPACT
+    unique = np.empty(0, dtype=np.int64)
+    codes, pending = [], 0
+    for band in range(bands):
+        part = signatures[rows, band * width:(band + 1) * width]
+        keys = (part * weights[None, :]).sum(axis=1, dtype=np.uint64) if width > 1 else part[:, 0]
+        for left, right in _bucket_pairs(keys, rows, max_bucket):
+            low, high = np.minimum(left, right), np.maximum(left, right)
+            codes.append(low.astype(np.int64) * len(signatures) + high)
+            pending += len(low)
+        if pending >= CANDIDATE_COMPACT:
+            unique, codes, pending = np.unique(np.concatenate([unique, *codes])), [], 0
+    if codes:
+        unique = np.unique(np.concatenate([unique, *codes]))
+    return unique // len(signatures), unique % len(signatures)
+
+
+def member_codes(rows: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Код пары (строка, ключ участника): членство проверяется поиском в отсортированном массиве кодов."""
+    return _mix(keys ^ _mix(rows.astype(np.uint64)))
+
+
+class MemberIndex:
+    """Множества участников строк для точных пересечений пар.
+
+    Ключи хранятся по строкам (CSR: offsets и ключи подряд), коды пар (строка, ключ) — одним
+    отсортированным массивом. |A∩B| — сколько ключей меньшего множества нашлось среди кодов
+    большего: searchsorted без цикла по парам, по INTERSECT_BUDGET элементов за шаг.
+    Работа — сумма размеров меньших множеств пар, поэтому пересчитываются только лучшие кандидаты.
+    """
+
+    def __init__(self, rows: np.ndarray, keys: np.ndarray, size: int):
+        order = np.argsort(rows, kind="stable")
+        self._keys = keys[order]
+        self.sizes = np.bincount(rows, minlength=size)
+        self._offsets = np.r_[0, np.cumsum(self.sizes)]
+        self._codes = np.sort(member_codes(rows, keys))
+
+    def intersections(self, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        counts = np.zeros(len(left), dtype=np.float64)
+        if not len(left) or not len(self._codes):
+            return counts
+        swap = self.sizes[left] > self.sizes[right]
+        small, big = np.where(swap, right, left), np.where(swap, left, right)
+        lengths = self.sizes[small]
+        ends = np.cumsum(lengths)
+        lo = 0
+        while lo < len(left):
+            start = ends[lo - 1] if lo else 0
+            hi = max(int(np.searchsorted(ends, start + INTERSECT_BUDGET, side="right")), lo + 1)
+            span = lengths[lo:hi]
+            pair = np.repeat(np.arange(hi - lo), span)
+            within = np.arange(len(pair)) - np.repeat(np.cumsum(span) - span, span)
+            keys = self._keys[np.repeat(self._offsets[small[lo:hi]], span) + within]
+            # Отсортированные запросы searchsorted обходит почти последовательно — на порядок быстрее случайных
+            probe = member_codes(big[lo:hi][pair], keys)
+            order = np.argsort(probe)
+            probe = probe[order]
+            found = np.minimum(np.searchsorted(self._codes, probe), len(self._codes) - 1)
+            counts[lo:hi] = np.bincount(pair[order], weights=self._codes[found] == probe, minlength=hi - lo)
+            lo = hi
+        return counts
+
+
+def top_k(left: np.ndarray, right: np.ndarray, scores: np.ndarray, k: int,
+          min_score: float = 0.0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Для каждой строки — k пар с наибольшим score (пары симметричны): (строка, сосед, score)."""
+    source = np.concatenate([left, right])
+    target = np.concatenate([right, left])
+    score = np.concatenate([scores, scores])
+    keep = score > min_score
+    source, target, score = source[keep], target[keep], score[keep]
+    order = np.lexsort((-score, source))
+    source, target, score = source[order], target[order], score[order]
+    starts = np.flatnonzero(np.r_[True, source[1:] != source[:-1]])
+    rank = np.arange(len(source)) - np.repeat(starts, np.diff(np.r_[starts, len(source)]))
+    keep = rank < k
+    return source[keep], target[keep], score[keep]
@@ -1,10 +1,12 @@
 """Сервис постов."""
 from __future__ import annotations
+import html
+import re
 import uuid
 from datetime import datetime, timezone
 from typing import Optional
 
-from app.core.exceptions import NotFoundException, ForbiddenException
+from app.core.exceptions import NotFoundException, ForbiddenException, ValidationException
 from app.core.logging import get_logger
 from app.core.security import UserContext
 from app.domain.models import Post
@@ -12,38 +14,97 @@ from app.events.base import EventPublisher
 from app.events.event_types import EventType
 from app.infrastructure.cache.cache_keys import CacheKeys
 from app.infrastructure.cache.redis_client import RedisClient
+from app.infrastructure.media.keys import reference_delta
+from app.repositories.base import RankCursor
 from app.repositories.community_repo import CommunityRepository
-from app.repositories.post_repo import PostRepository
-from app.schemas.post import PostCreate, PostUpdate, PostResponse
-from app.schemas.common import PaginatedResponse
+from app.repositories.media_repo import MediaRepository
+from app.repositories.post_repo import HIGHLIGHT_START, HIGHLIGHT_STOP, PostRepository, post_search_vector
+from app.schemas.post import PostCreate, PostUpdate, PostResponse, PostListResponse, PostSearchHit
+from app.schemas.common import CursorPage, PaginatedResponse
+from app.schemas.fields import column_fields, narrow_model
+from app.services.leaderboard import SessionLeaderboard
+from app.services.media_variants import attach_variants
 
 logger = get_logger(__name__)
 
+EXCERPT_LENGTH = 300
+
+
+def build_post_digest(content: str, media_urls: Optional[list]) -> dict:
+    """Excerpt, число слов и флаг медиа — считаются при записи, а не при чтении ленты."""
+    normalized = " ".join(content.split())
+    excerpt = normalized
+    if len(normalized) > EXCERPT_LENGTH:
+        cut = normalized[:EXCERPT_LENGTH - 1]
+        if " " in cut:
+            cut = cut.rsplit(" ", 1)[0]
+        excerpt = f"{cut}…"
+    return {
+        "excerpt": excerpt,
+        "word_count": len(re.findall(r"\w+", normalized)),
+        "has_media": bool(media_urls),
+    }
+
+
+def render_highlight(headline: Optional[str]) -> str:
+    """Фрагмент ts_headline: текст поста экранируется, совпадения оборачиваются в <mark>."""
+    escaped = html.escape(headline or "")
+    return escaped.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+
 
 class PostService:
-    def __init__(self, post_repo: PostRepository, community_repo: CommunityRepository,
-                 cache: RedisClient, event_publisher: EventPublisher):
+    def __init__(self, post_repo: PostRepository, community_repo: CommunityRepository, media_repo: MediaRepository,
+                 cache: RedisClient, event_publisher: EventPublisher, leaderboard: SessionLeaderboard):
         self._post_repo = post_repo
         self._community_repo = community_repo
+        self._media_repo = media_repo
         self._cache = cache
         self._event_publisher = event_publisher
+        self._leaderboard = leaderboard
 
     async def list_posts(self, community_id: uuid.UUID, page: int = 1, page_size: int = 20,
-                          channel_id: Optional[uuid.UUID] = None) -> PaginatedResponse[PostResponse]:
+                          channel_id: Optional[uuid.UUID] = None,
+                          fields: Optional[tuple[str, ...]] = None) -> PaginatedResponse[PostListResponse]:
         community = await self._community_repo.get_by_id(community_id)
         if not community:
             raise NotFoundException("Community", community_id)
+        item_model = narrow_model(PostListResponse, fields) if fields else PostListResponse
         offset = (page - 1) * page_size
-        items, total = await self._post_repo.get_community_posts(community_id, offset=offset, limit=page_size, channel_id=channel_id)
+        items, total = await self._post_repo.get_community_posts(community_id, offset=offset, limit=page_size,
+                                                                 channel_id=channel_id,
+                                                                 columns=column_fields(PostListResponse, fields))
         pages = (total + page_size - 1) // page_size
-        response_items = [PostResponse.model_validate(item) for item in items]
-        return PaginatedResponse[PostResponse](items=response_items, total=total, page=page, page_size=page_size, pages=pages)
+        response_items = [item_model.model_validate(item) for item in items]
+        await attach_variants(self._media_repo, response_items)
+        return PaginatedResponse[item_model](items=response_items, total=total, page=page, page_size=page_size, pages=pages)
 
-    async def get_post(self, post_id: uuid.UUID) -> PostResponse:
-        post = await self._post_repo.get_by_id(post_id)
+    async def search_posts(self, query: str, page_size: int = 20, cursor: Optional[str] = None,
+                           community_id: Optional[uuid.UUID] = None,
+                           channel_id: Optional[uuid.UUID] = None) -> CursorPage[PostSearchHit]:
+        if community_id is not None and not await self._community_repo.get_by_id(community_id, columns=("id",)):
+            raise NotFoundException("Community", community_id)
+        try:
+            position = RankCursor.decode(cursor) if cursor else None
+        except ValueError as e:
+            raise ValidationException(str(e)) from e
+        rows, next_position = await self._post_repo.search(query, limit=page_size, cursor=position,
+                                                           community_id=community_id, channel_id=channel_id)
+        hits = [
+            PostSearchHit(post=PostListResponse.model_validate(row.Post), rank=row.rank,
+                          highlight=render_highlight(row.headline))
+            for row in rows
+        ]
+        await attach_variants(self._media_repo, [hit.post for hit in hits])
+        return CursorPage[PostSearchHit](items=hits, next_cursor=next_position.encode() if next_position else None)
+
+    async def get_post(self, post_id: uuid.UUID, fields: Optional[tuple[str, ...]] = None) -> PostResponse:
+        post = await self._post_repo.get_by_id(post_id, columns=column_fields(PostResponse, fields))
         if not post:
             raise NotFoundException("Post", post_id)
-        return PostResponse.model_validate(post)
+        item_model = narrow_model(PostResponse, fields) if fields else PostResponse
+        response = item_model.model_validate(post)
+        await attach_variants(self._media_repo, [response])
+        return response
 
     async def create_post(self, community_id: uuid.UUID, data: PostCreate, user: UserContext) -> PostResponse:
         community = await self._community_repo.get_by_id(community_id)
@@ -52,15 +113,21 @@ class PostService:
         published_at = datetime.now(timezone.utc) if data.status == "published" else None
         post = Post(community_id=community_id, channel_id=data.channel_id, author_id=user.user_id,
                     title=data.title, content=data.content, status=data.status, is_pinned=data.is_pinned,
-                    media_urls=data.media_urls or [], published_at=published_at)
+                    media_urls=data.media_urls or [], published_at=published_at,
+                    search_vector=post_search_vector(data.title, data.content),
+                    **build_post_digest(data.content, data.media_urls))
         post = await self._post_repo.create(post)
+        await self._media_repo.adjust_references(reference_delta((), post.media_urls))
         if data.status == "published":
             await self._community_repo.increment_post_count(community_id, 1)
-        await self._cache.delete(CacheKeys.community(str(community_id)))
+            await self._leaderboard.activity(community, posts=1)
+        await self._cache.delete(CacheKeys.community(str(community_id)), CacheKeys.community_fieldsets(str(community_id)))
         await self._event_publisher.publish_event(EventType.POST_CREATED,
             payload={"post_id": str(post.id), "community_id": str(community_id), "author_id": str(user.user_id)})
         logger.info("Пост создан", extra={"post_id": str(post.id), "action": "post_created"})
-        return PostResponse.model_validate(post)
+        response = PostResponse.model_validate(post)
+        await attach_variants(self._media_repo, [response])
+        return response
 
     async def update_post(self, post_id: uuid.UUID, data: PostUpdate, user: UserContext) -> PostResponse:
         post = await self._post_repo.get_by_id(post_id)
@@ -69,13 +136,39 @@ class PostService:
         if post.author_id != user.user_id and not user.is_superadmin:
             raise ForbiddenException("Только автор может редактировать пост")
         update_data = data.model_dump(exclude_unset=True)
-        updated = await self._post_repo.update_by_id(post_id, update_data)
+        digest = {}
+        if "content" in update_data or "media_urls" in update_data:
+            digest = build_post_digest(update_data.get("content") or post.content,
+                                       update_data.get("media_urls", post.media_urls))
+        if update_data.get("title") is not None or update_data.get("content") is not None:
+            title = update_data["title"] if update_data.get("title") is not None else post.title
+            digest["search_vector"] = post_search_vector(title, update_data.get("content") or post.content)
+        if "media_urls" in update_data:
+            update_data["media_urls"] = update_data["media_urls"] or []
+            await self._media_repo.adjust_references(reference_delta(post.media_urls or (), update_data["media_urls"]))
+        # Публикация черновика — как создание опубликованного поста; в trending идёт только первая
+        published = update_data.get("status") == "published"
+        status_changed = "status" in update_data and published != (post.status == "published")
+        first_publication = published and status_changed and post.published_at is None
+        if first_publication:
+            digest["published_at"] = datetime.now(timezone.utc)
+        updated = await self._post_repo.update_by_id(post_id, {**update_data, **digest})
         if not updated:
             raise NotFoundException("Post", post_id)
+        if status_changed:
+            await self._community_repo.increment_post_count(post.community_id, 1 if published else -1)
+            await self._cache.delete(CacheKeys.community(str(post.community_id)),
+                                     CacheKeys.community_fieldsets(str(post.community_id)))
+        if first_publication:
+            community = await self._community_repo.get_by_id(post.community_id, columns=("id", "community_type"))
+            if community:
+                await self._leaderboard.activity(community, posts=1)
         await self._event_publisher.publish_event(EventType.POST_UPDATED,
             payload={"post_id": str(post_id), "updated_fields": list(update_data.keys())})
         logger.info("Пост обновлён", extra={"post_id": str(post_id), "action": "post_updated"})
-        return PostResponse.model_validate(updated)
+        response = PostResponse.model_validate(updated)
+        await attach_variants(self._media_repo, [response])
+        return response
 
     async def delete_post(self, post_id: uuid.UUID, user: UserContext) -> None:
         post = await self._post_repo.get_by_id(post_id)
@@ -84,8 +177,10 @@ class PostService:
         if post.author_id != user.user_id and not user.is_superadmin:
             raise ForbiddenException("Только автор может удалить пост")
         community_id = post.community_id
+        await self._media_repo.adjust_references(reference_delta(post.media_urls or (), ()))
         await self._post_repo.delete_by_id(post_id)
-        await self._community_repo.increment_post_count(community_id, -1)
+        if post.status == "published":
+            await self._community_repo.increment_post_count(community_id, -1)
         await self._event_publisher.publish_event(EventType.POST_DELETED,
             payload={"post_id": str(post_id), "community_id": str(community_id)})
         logger.info("Пост удалён", extra={"post_id": str(post_id), "action": "post_deleted"})
@@ -0,0 +1,206 @@
+"""Пересчёт денормализованных счётчиков и кэшей по базовым таблицам."""
+from __future__ import annotations
+import asyncio
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import AsyncContextManager, Callable, Optional, Sequence, Type
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.domain.models import Base, Community, Member, Post, Subscription, SubscriptionLevel
+from app.infrastructure.cache.cache_keys import CacheKeys
+from app.infrastructure.cache.redis_client import RedisClient
+from app.repositories.projection_repo import ProjectionRepository
+
+logger = get_logger(__name__)
+
+# Кэши, собранные из строки сообщества и его счётчиков; ключи задач импорта не трогаем.
+COMMUNITY_CACHE_KEYS: tuple[Callable[[str], str], ...] = (
+    CacheKeys.community,
+    CacheKeys.community_fieldsets,
+    CacheKeys.community_analytics,
+    CacheKeys.community_roles,
+    CacheKeys.top_donors,
+)
+
+
+@dataclass(frozen=True)
+class Projection:
+    """Таблица со счётчиками: имя колонки -> фактическое значение (коррелированный подзапрос)."""
+
+    name: str
+    model: Type[Base]
+    community_column: str
+    counters: dict[str, Callable[[], ColumnElement]]
+
+
+def _count(model: Type[Base], *where: ColumnElement) -> Callable[[], ColumnElement]:
+    return lambda: select(func.count()).select_from(model).where(*where).scalar_subquery()
+
+
+PROJECTIONS: tuple[Projection, ...] = (
+    Projection("communities", Community, "id", {
+        "member_count": _count(Member, Member.community_id == Community.id, Member.status == "active"),
+        "post_count": _count(Post, Post.community_id == Community.id, Post.status == "published"),
+    }),
+    Projection("subscription_levels", SubscriptionLevel, "community_id", {
+        "subscriber_count": _count(
+            Subscription, Subscription.level_id == SubscriptionLevel.id, Subscription.status == "active",
+        ),
+    }),
+)
+
+COUNTERS = tuple(name for projection in PROJECTIONS for name in projection.counters)
+
+
+@dataclass
+class CounterDrift:
+    scanned: int = 0
+    drifted: int = 0
+    corrected: int = 0
+    skipped_concurrent: int = 0
+    total_abs_drift: int = 0
+    max_abs_drift: int = 0
+
+
+@dataclass
+class DriftReport:
+    dry_run: bool
+    counters: dict[str, CounterDrift] = field(default_factory=dict)
+    chunks: int = 0
+    failed_chunks: int = 0
+    caches_invalidated: int = 0
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ProjectionRebuilder:
+    """Проходит таблицы keyset-страницами и раздаёт их пулу воркеров.
+
+    Каждая страница — короткая транзакция: один SELECT со сравнением сохранённых и фактических
+    значений и по одному UPDATE ... FROM (VALUES) на счётчик. UPDATE защищён условием
+    «значение не изменилось с момента чтения», поэтому задачу можно запускать на живой базе:
+    строки, которые успел поменять запрос пользователя, пропускаются и попадают в отчёт.
+    Очередь ограничена — в памяти не больше workers * 2 страниц.
+    """
+
+    def __init__(
+        self,
+        session_scope: Callable[[], AsyncContextManager[AsyncSession]],
+        cache: Optional[RedisClient],
+        workers: int = settings.PROJECTION_REBUILD_WORKERS,
+        chunk_size: int = settings.PROJECTION_REBUILD_CHUNK_SIZE,
+        dry_run: bool = False,
+        rebuild_caches: bool = False,
+        lock_timeout_ms: int = settings.PROJECTION_REBUILD_LOCK_TIMEOUT_MS,
+    ):
+        self._session_scope = session_scope
+        self._cache = cache
+        self._workers = max(1, workers)
+        self._chunk_size = max(1, chunk_size)
+        self._dry_run = dry_run
+        self._rebuild_caches = rebuild_caches
+        self._lock_timeout_ms = lock_timeout_ms
+
+    async def run(self, counters: Sequence[str] = COUNTERS) -> DriftReport:
+        unknown = set(counters) - set(COUNTERS)
+        if unknown:
+            raise ValueError(f"Неизвестные счётчики: {', '.join(sorted(unknown))}")
+        started = time.monotonic()
+        report = DriftReport(dry_run=self._dry_run)
+        for projection in PROJECTIONS:
+            selected = {name: actual for name, actual in projection.counters.items() if name in counters}
+            if selected or (self._rebuild_caches and projection.model is Community):
+                for name in selected:
+                    report.counters[name] = CounterDrift()
+                await self._rebuild(projection, selected, report)
+
+        if self._cache is not None and not self._dry_run and (self._rebuild_caches or report.caches_invalidated):
+            await self._cache.delete_pattern(CacheKeys.community_list_pattern())
+            await self._cache.delete_pattern(CacheKeys.popular_pattern())
+        report.elapsed_seconds = round(time.monotonic() - started, 3)
+        logger.info("Пересчёт счётчиков завершён", extra={"action": "projections_rebuilt", "metrics": report.to_dict()})
+        return report
+
+    async def _rebuild(self, projection: Projection, counters: dict[str, Callable[[], ColumnElement]],
+                       report: DriftReport) -> None:
+        queue: asyncio.Queue[Optional[Sequence[uuid.UUID]]] = asyncio.Queue(maxsize=self._workers * 2)
+
+        async def produce() -> None:
+            after: Optional[uuid.UUID] = None
+            try:
+                while True:
+                    async with self._session_scope() as session:
+                        ids = await ProjectionRepository(session).ids_after(projection.model, after, self._chunk_size)
+                    if not ids:
+                        return
+                    await queue.put(ids)
+                    after = ids[-1]
+            finally:
+                for _ in range(self._workers):
+                    await queue.put(None)
+
+        async def work() -> None:
+            while (ids := await queue.get()) is not None:
+                report.chunks += 1
+                try:
+                    await self._process_chunk(projection, counters, ids, report)
+                except Exception as e:
+                    report.failed_chunks += 1
+                    logger.warning(f"Пересчёт {projection.name}: страница пропущена: {e}",
+                                   extra={"action": "projection_chunk_failed"})
+
+        await asyncio.gather(produce(), *(work() for _ in range(self._workers)))
+
+    async def _process_chunk(self, projection: Projection, counters: dict[str, Callable[[], ColumnElement]],
+                             ids: Sequence[uuid.UUID], report: DriftReport) -> None:
+        touched: set[uuid.UUID] = set()
+        chunk_stats = {name: CounterDrift() for name in counters}
+        async with self._session_scope() as session:
+            repo = ProjectionRepository(session)
+            rows = []
+            if counters:
+                await repo.set_lock_timeout(self._lock_timeout_ms)
+                rows = await repo.read_counters(
+                    projection.model, ids, {name: actual() for name, actual in counters.items()},
+                    getattr(projection.model, projection.community_column),
+                )
+            for name, stats in chunk_stats.items():
+                fixes = [
+                    (row["id"], row[name], row[f"{name}__actual"])
+                    for row in rows if row[name] != row[f"{name}__actual"]
+                ]
+                stats.scanned = len(rows)
+                stats.drifted = len(fixes)
+                stats.total_abs_drift = sum(abs(stored - actual) for _, stored, actual in fixes)
+                stats.max_abs_drift = max((abs(stored - actual) for _, stored, actual in fixes), default=0)
+                if fixes and not self._dry_run:
+                    stats.corrected = await repo.apply_corrections(projection.model, name, fixes)
+                    stats.skipped_concurrent = len(fixes) - stats.corrected
+                    drifted = {row_id for row_id, _, _ in fixes}
+                    touched.update(row["community_id"] for row in rows if row["id"] in drifted)
+
+        # В отчёт — только после коммита: откаченная страница не должна считаться исправленной.
+        for name, stats in chunk_stats.items():
+            total = report.counters[name]
+            total.scanned += stats.scanned
+            total.drifted += stats.drifted
+            total.corrected += stats.corrected
+            total.skipped_concurrent += stats.skipped_concurrent
+            total.total_abs_drift += stats.total_abs_drift
+            total.max_abs_drift = max(total.max_abs_drift, stats.max_abs_drift)
+
+        if self._rebuild_caches and projection.model is Community:
+            touched.update(ids)
+        if touched and self._cache is not None and not self._dry_run:
+            await self._cache.delete(*(
+                key_of(str(community_id)) for community_id in touched for key_of in COMMUNITY_CACHE_KEYS
+            ))
+            report.caches_invalidated += len(touched)
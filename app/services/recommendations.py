@@ -0,0 +1,220 @@
+"""Периодический расчёт похожих сообществ по общим участникам."""
+from __future__ import annotations
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import AsyncContextManager, Callable, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.domain.models import Member
+from app.repositories.member_repo import MemberRepository
+from app.repositories.recommendation_repo import RecommendationRepository
+from app.services.minhash import MemberIndex, MinHasher, candidate_pairs, cosine, jaccard, top_k, uuid_keys
+
+logger = get_logger(__name__)
+
+WRITE_BATCH = 500
+
+# Членства, прочитанные при подписи: (id сообществ, строка сообщества, ключ участника)
+Scanned = Tuple[Sequence[uuid.UUID], np.ndarray, np.ndarray]
+
+
+@dataclass
+class RecommendationReport:
+    mode: str
+    communities_signed: int = 0
+    memberships_scanned: int = 0
+    candidate_pairs: int = 0
+    pairs_rescored: int = 0
+    communities_ranked: int = 0
+    similar_rows: int = 0
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class RecommendationBuilder:
+    """MinHash-подписи участников каждого сообщества и top-K похожих по LSH-кандидатам.
+
+    Полный прогон читает members одним потоком и подписывает все активные сообщества.
+    Инкрементальный — только изменённые после прошлого прогона (updated_at сообщества
+    меняется вместе с member_count) и сообщества без подписи: их подписи строятся заново,
+    потому что MinHash не умеет удалять элементы. Списки похожих пересчитываются для
+    изменённых, всех их кандидатов и сообществ, у которых изменённые были в списке, —
+    их top-K мог сдвинуться. Сходство — косинус |A∩B| / sqrt(|A|·|B|). Оценка по подписи
+    только отбирает rescore лучших кандидатов сообщества: на малых пересечениях она шумит
+    сильнее, чем различаются соседи, поэтому отобранные пары пересчитываются точно по
+    участникам (MemberIndex). Полный прогон берёт участников из того же прохода, что и
+    подписи, инкрементальный читает только сообщества отобранных пар.
+    """
+
+    def __init__(
+        self,
+        session_scope: Callable[[], AsyncContextManager[AsyncSession]],
+        num_perm: int = settings.RECOMMENDATIONS_NUM_PERM,
+        bands: int = settings.RECOMMENDATIONS_BANDS,
+        k: int = settings.RECOMMENDATIONS_TOP_K,
+        min_members: int = settings.RECOMMENDATIONS_MIN_MEMBERS,
+        rescore: int = settings.RECOMMENDATIONS_RESCORE,
+        max_bucket: int = settings.RECOMMENDATIONS_MAX_BUCKET,
+        chunk_size: int = settings.RECOMMENDATIONS_CHUNK_SIZE,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands")
+        self._session_scope = session_scope
+        self._hasher = MinHasher(num_perm)
+        self._bands = bands
+        self._k = k
+        self._min_members = min_members
+        self._rescore = max(rescore, k)
+        self._max_bucket = max_bucket
+        self._chunk_size = chunk_size
+
+    async def run(self, full: bool = False) -> RecommendationReport:
+        started = time.monotonic()
+        computed_at = datetime.now(timezone.utc)
+        async with self._session_scope() as session:
+            repo = RecommendationRepository(session)
+            since = None if full else await repo.last_computed()
+            targets = await repo.active_communities() if since is None else await repo.changed_since(since)
+        report = RecommendationReport(mode="full" if since is None else "incremental")
+
+        if targets:
+            scanned = await self._sign(targets, since is None, computed_at, report)
+            await self._rank(None if since is None else set(targets), scanned, report)
+        report.elapsed_seconds = round(time.monotonic() - started, 3)
+        logger.info("Рекомендации сообществ пересчитаны", extra={
+            "action": "recommendations_built", "metrics": report.to_dict(),
+        })
+        return report
+
+    async def _sign(self, targets: Sequence[uuid.UUID], full: bool, computed_at: datetime,
+                    report: RecommendationReport) -> Optional[Scanned]:
+        """Подписи targets; в полном прогоне возвращает прочитанные членства для точного пересчёта."""
+        index = {community_id: row for row, community_id in enumerate(targets)}
+        scanned_rows, scanned_keys = [], []
+        signatures = self._hasher.empty(len(targets))
+        sizes = np.zeros(len(targets), dtype=np.int64)
+        filters = [Member.status == "active"]
+        # Полный прогон — один проход по members; инкрементальный — по индексу community_id
+        groups = [None] if full else [targets[i:i + WRITE_BATCH] for i in range(0, len(targets), WRITE_BATCH)]
+        for group in groups:
+            async with self._session_scope() as session:
+                group_filters = filters if group is None else [*filters, Member.community_id.in_(group)]
+                async for chunk in MemberRepository(session).stream_columns(
+                        ("community_id", "user_id"), filters=group_filters, chunk_size=self._chunk_size):
+                    rows = np.fromiter((index.get(item["community_id"], -1) for item in chunk),
+                                       dtype=np.int64, count=len(chunk))
+                    keys = uuid_keys([item["user_id"] for item in chunk])
+                    known = rows >= 0
+                    self._hasher.update(signatures, rows[known], keys[known])
+                    sizes += np.bincount(rows[known], minlength=len(targets))
+                    report.memberships_scanned += len(chunk)
+                    if full:
+                        scanned_rows.append(rows[known])
+                        scanned_keys.append(keys[known])
+
+        encoded = signatures.astype("<u8")
+        for start in range(0, len(targets), WRITE_BATCH):
+            async with self._session_scope() as session:
+                await RecommendationRepository(session).save_signatures([
+                    (targets[row], encoded[row].tobytes(), int(sizes[row]))
+                    for row in range(start, min(start + WRITE_BATCH, len(targets)))
+                ], computed_at)
+        report.communities_signed = len(targets)
+        if not full:
+            return None
+        return targets, _concat(scanned_rows, np.int64), _concat(scanned_keys, np.uint64)
+
+    async def _rank(self, changed: Optional[set[uuid.UUID]], scanned: Optional[Scanned],
+                    report: RecommendationReport) -> None:
+        async with self._session_scope() as session:
+            repo = RecommendationRepository(session)
+            stored = await repo.load_signatures()
+            if changed is not None:
+                # Прежние соседи изменённых могли перестать быть кандидатами — их списки тоже пересчитываются
+                targets = list(changed)
+                for start in range(0, len(targets), WRITE_BATCH):
+                    changed.update(await repo.listing(targets[start:start + WRITE_BATCH]))
+        if not stored:
+            return
+        ids = [row.community_id for row in stored]
+        signatures = np.stack([np.frombuffer(row.signature, dtype="<u8") for row in stored]).astype(np.uint64)
+        sizes = np.array([row.member_count for row in stored], dtype=np.float64)
+
+        left, right = candidate_pairs(signatures, self._bands, self._max_bucket, sizes >= self._min_members)
+        report.candidate_pairs = len(left)
+        if changed is None:
+            affected = np.ones(len(ids), dtype=bool)
+        else:
+            touched = np.array([community_id in changed for community_id in ids])
+            affected = touched.copy()
+            hit = touched[left] | touched[right]
+            affected[left[hit]] = True
+            affected[right[hit]] = True
+            # top-K затронутых считается по всем их парам, а не только по парам с изменёнными
+            keep = affected[left] | affected[right]
+            left, right = left[keep], right[keep]
+
+        scores = cosine(jaccard(signatures, left, right), sizes[left], sizes[right])
+        source, target, _ = top_k(left, right, scores, self._rescore)
+        keep = affected[source]
+        codes = np.unique(np.minimum(source[keep], target[keep]) * len(ids) + np.maximum(source[keep], target[keep]))
+        left, right = codes // len(ids), codes % len(ids)
+        report.pairs_rescored = len(left)
+
+        members = await self._members(ids, np.union1d(left, right), scanned)
+        exact = members.intersections(left, right) / np.sqrt(
+            np.maximum(members.sizes[left] * members.sizes[right], 1).astype(np.float64))
+        source, target, score = top_k(left, right, exact, self._k)
+        keep = affected[source]
+        source, target, score = source[keep], target[keep], score[keep]
+
+        # top_k возвращает строки, отсортированные по source: срез пачки — два searchsorted
+        rows = np.flatnonzero(affected)
+        for start in range(0, len(rows), WRITE_BATCH):
+            batch = rows[start:start + WRITE_BATCH]
+            first = np.searchsorted(source, batch[0], side="left")
+            last = np.searchsorted(source, batch[-1], side="right")
+            async with self._session_scope() as session:
+                await RecommendationRepository(session).replace_similar(
+                    [ids[row] for row in batch],
+                    [(ids[s], ids[t], round(float(v), 6))
+                     for s, t, v in zip(source[first:last], target[first:last], score[first:last])],
+                )
+        report.communities_ranked = len(rows)
+        report.similar_rows = len(source)
+
+    async def _members(self, ids: Sequence[uuid.UUID], involved: np.ndarray,
+                       scanned: Optional[Scanned]) -> MemberIndex:
+        """Участники сообществ involved (строки ids): из прохода подписей или из БД."""
+        position = {community_id: row for row, community_id in enumerate(ids)}
+        if scanned is not None:
+            targets, rows, keys = scanned
+            translate = np.array([position.get(community_id, -1) for community_id in targets], dtype=np.int64)
+            rows = translate[rows]
+            known = rows >= 0
+            return MemberIndex(rows[known], keys[known], len(ids))
+
+        group_ids = [ids[row] for row in involved]
+        parts_rows, parts_keys = [], []
+        for start in range(0, len(group_ids), WRITE_BATCH):
+            async with self._session_scope() as session:
+                async for chunk in MemberRepository(session).stream_columns(
+                        ("community_id", "user_id"),
+                        filters=[Member.status == "active", Member.community_id.in_(group_ids[start:start + WRITE_BATCH])],
+                        chunk_size=self._chunk_size):
+                    parts_rows.append(np.fromiter((position[item["community_id"]] for item in chunk),
+                                                  dtype=np.int64, count=len(chunk)))
+                    parts_keys.append(uuid_keys([item["user_id"] for item in chunk]))
+        return MemberIndex(_concat(parts_rows, np.int64), _concat(parts_keys, np.uint64), len(ids))
+
+
+def _concat(parts: list[np.ndarray], dtype) -> np.ndarray:
+    return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
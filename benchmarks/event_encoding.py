@@ -0,0 +1,75 @@
+"""Сравнение кодирования событий: прежний pydantic+JSON, новый JSON и бинарный конверт.
+
+Запуск: python -m benchmarks.event_encoding [--count N]
+"""
+from __future__ import annotations
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from pydantic import BaseModel
+
+from app.events.base import DomainEvent
+from app.events.event_types import EventType
+from app.events.serialization import decode_event, encode_event
+
+
+class LegacyDomainEvent(BaseModel):
+    """Прежний конверт: pydantic-модель с генерацией id и времени в __init__."""
+    event_id: str = ""
+    event_type: str
+    timestamp: str = ""
+    service: str = "community-service"
+    payload: dict[str, Any] = {}
+    metadata: dict[str, Any] = {}
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        if not self.event_id:
+            self.event_id = str(uuid.uuid4())
+        if not self.timestamp:
+            self.timestamp = datetime.now(timezone.utc).isoformat()
+
+
+def _payload() -> dict[str, Any]:
+    return {"post_id": str(uuid.uuid4()), "community_id": str(uuid.uuid4()), "author_id": str(uuid.uuid4())}
+
+
+def legacy(payload: dict[str, Any]) -> bytes:
+    event = LegacyDomainEvent(event_type=EventType.POST_CREATED.value, payload=payload)
+    return json.dumps(event.model_dump(), default=str).encode("utf-8")
+
+
+def current(fmt: str) -> Callable[[dict[str, Any]], bytes]:
+    def _encode(payload: dict[str, Any]) -> bytes:
+        event = DomainEvent(event_type=EventType.POST_CREATED.value, aggregate_id=payload["post_id"], payload=payload)
+        return encode_event(event, fmt)
+    return _encode
+
+
+def run(name: str, encode: Callable[[dict[str, Any]], bytes], payloads: list[dict[str, Any]]) -> None:
+    started = time.perf_counter()
+    sizes = [len(encode(payload)) for payload in payloads]
+    elapsed = time.perf_counter() - started
+    print(f"{name:<22} {len(payloads) / elapsed:>12,.0f} msg/s {sum(sizes) / len(sizes):>8.1f} B/msg")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    payloads = [_payload() for _ in range(args.count)]
+    sample = DomainEvent(event_type=EventType.POST_CREATED.value, payload=payloads[0])
+    assert decode_event(encode_event(sample, "binary")) == sample
+
+    run("legacy pydantic+json", legacy, payloads)
+    run("envelope json", current("json"), payloads)
+    run("envelope binary", current("binary"), payloads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Пропускная способность генерации вариантов изображений на ядро.
+
+Запуск: python -m benchmarks.image_variants [--count N] [--processes P] [--size WxH]
+"""
+from __future__ import annotations
+import argparse
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageFilter
+
+from app.infrastructure.media.images import render_variants
+
+
+def _photo(width: int, height: int, seed: int) -> bytes:
+    """JPEG из градиента, размытого шума и фрактала — сжимается примерно как фотография."""
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 40 + seed % 20).filter(ImageFilter.GaussianBlur(3))
+    fractal = Image.effect_mandelbrot((width, height), (-2, -1.2, 1, 1.2), 40 + seed % 30)
+    image = Image.merge("RGB", (gradient, noise, fractal))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def run(name: str, images: list[bytes], processes: int) -> None:
+    started = time.perf_counter()
+    if processes == 0:
+        outputs = [render_variants(data) for data in images]
+        cores = 1
+    else:
+        with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+            list(pool.map(render_variants, images[:processes]))  # прогрев: старт процессов не в замере
+            started = time.perf_counter()
+            outputs = list(pool.map(render_variants, images))
+        cores = min(processes, os.cpu_count() or 1)
+    elapsed = time.perf_counter() - started
+    rate = len(images) / elapsed
+    sizes = "  ".join(
+        f"{variant}={sum(len(dict(output)[variant]) for output in outputs) / len(outputs) / 1024:.0f}KiB"
+        for variant, _ in outputs[0]
+    )
+    print(f"{name:<24} {rate:>8.2f} img/s {rate / cores:>8.2f} img/s/core  {sizes}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=40)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--size", default="3000x2000")
+    args = parser.parse_args()
+
+    width, height = (int(side) for side in args.size.split("x"))
+    images = [_photo(width, height, seed) for seed in range(args.count)]
+    print(f"{args.count} x {args.size} JPEG, {sum(map(len, images)) / len(images) / 1024:.0f} KiB в среднем, "
+          f"ядер: {os.cpu_count()}")
+    run("в процессе, 1 ядро", images, 0)
+    run(f"ProcessPool x{args.processes}", images, args.processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Задержка полнотекстового поиска постов на синтетическом наборе в несколько миллионов строк.
+
+Нужен PostgreSQL из DATABASE_URL со схемой приложения. Данные создаются в отдельных сообществах
+со slug bench-search-* и удаляются после замера (--keep — оставить для повторных запусков).
+
+Запуск: python -m benchmarks.post_search [--posts 2000000] [--communities 200] [--runs 30]
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+
+from app.db.session import engine, get_db_session
+from app.repositories.post_repo import PostRepository
+
+SLUG_PREFIX = "bench-search-"
+SEED_BATCH = 100_000
+
+# Слова выбираются со смещением к началу словаря (random()^3) — частоты похожи на естественный текст:
+# первые слова встречаются почти в каждом посте, последние — в единицах.
+_SEED_POSTS = text("""
+    INSERT INTO posts (id, community_id, author_id, title, content, excerpt, word_count, has_media, status,
+                       is_pinned, media_urls, like_count, comment_count, view_count, published_at,
+                       search_vector, created_at, updated_at)
+    SELECT gen_random_uuid(), c.ids[1 + (g % array_length(c.ids, 1))], gen_random_uuid(), t.title, t.content,
+           left(t.content, 300), 80, false, 'published', false, '{}', 0, 0, 0, now(),
+           setweight(to_tsvector('simple', t.title), 'A') || setweight(to_tsvector('simple', t.content), 'B'),
+           now(), now()
+    FROM generate_series(1, :count) AS g
+    CROSS JOIN (SELECT array_agg(id) AS ids FROM communities WHERE slug LIKE :slugs) AS c
+    CROSS JOIN LATERAL (
+        SELECT (SELECT string_agg(w, ' ') FROM (
+                    SELECT (:vocabulary)[1 + floor(power(random(), 3) * :size)::int] AS w
+                    FROM generate_series(1, 6) WHERE g > 0) AS words) AS title,
+               (SELECT string_agg(w, ' ') FROM (
+                    SELECT (:vocabulary)[1 + floor(power(random(), 3) * :size)::int] AS w
+                    FROM generate_series(1, 80) WHERE g > 0) AS words) AS content
+    ) AS t
+""")
+
+
+def _vocabulary(size: int) -> list[str]:
+    rng = random.Random(42)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(4, 10))))
+    return sorted(words, key=lambda word: (len(word), word))
+
+
+async def seed(posts: int, communities: int, vocabulary: list[str]) -> None:
+    async with get_db_session() as session:
+        for index in range(communities):
+            await session.execute(text("""
+                INSERT INTO communities (id, name, slug, community_type, status, owner_id, member_count, post_count,
+                                         created_at, updated_at)
+                VALUES (:id, :name, :slug, 'public', 'active', :owner, 0, 0, now(), now())
+            """), {"id": uuid.uuid4(), "name": f"Bench {index}", "slug": f"{SLUG_PREFIX}{index}", "owner": uuid.uuid4()})
+    done = 0
+    while done < posts:
+        count = min(SEED_BATCH, posts - done)
+        started = time.perf_counter()
+        async with get_db_session() as session:
+            await session.execute(_SEED_POSTS, {"count": count, "slugs": f"{SLUG_PREFIX}%",
+                                                "vocabulary": vocabulary, "size": len(vocabulary)})
+        done += count
+        print(f"  посты: {done}/{posts} ({count / (time.perf_counter() - started):.0f} строк/с)")
+    async with engine.connect() as connection:
+        await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("VACUUM ANALYZE posts"))
+
+
+async def cleanup() -> None:
+    async with get_db_session() as session:
+        await session.execute(text("DELETE FROM posts WHERE community_id IN "
+                                   "(SELECT id FROM communities WHERE slug LIKE :slugs)"), {"slugs": f"{SLUG_PREFIX}%"})
+        await session.execute(text("DELETE FROM communities WHERE slug LIKE :slugs"), {"slugs": f"{SLUG_PREFIX}%"})
+
+
+async def measure(name: str, runs: int, query: Callable[[PostRepository], Awaitable[int]]) -> None:
+    timings, found = [], 0
+    for _ in range(runs):
+        async with get_db_session() as session:
+            started = time.perf_counter()
+            found = await query(PostRepository(session))
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{name:<44} p50 {statistics.median(timings):>8.1f} ms   p95 {p95:>8.1f} ms   строк {found}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    vocabulary = _vocabulary(args.vocabulary)
+    if not args.skip_seed:
+        print(f"Заполнение: {args.posts} постов в {args.communities} сообществах, словарь {len(vocabulary)} слов")
+        await seed(args.posts, args.communities, vocabulary)
+    async with get_db_session() as session:
+        community_id = (await session.execute(
+            text("SELECT id FROM communities WHERE slug = :slug"), {"slug": f"{SLUG_PREFIX}0"})).scalar_one()
+
+    common, middle, rare = vocabulary[0], vocabulary[len(vocabulary) // 20], vocabulary[-1]
+
+    def search(query: str, community: Optional[uuid.UUID] = None, pages: int = 1):
+        async def _run(repo: PostRepository) -> int:
+            cursor, total = None, 0
+            for _ in range(pages):
+                rows, cursor = await repo.search(query, limit=20, cursor=cursor, community_id=community)
+                total += len(rows)
+                if cursor is None:
+                    break
+            return total
+        return _run
+
+    try:
+        await measure("все сообщества, редкое слово", args.runs, search(rare))
+        await measure("все сообщества, среднее слово", args.runs, search(middle))
+        await measure("все сообщества, частое слово", args.runs, search(common))
+        await measure("все сообщества, два слова", args.runs, search(f"{middle} {rare}"))
+        await measure("сообщество, среднее слово", args.runs, search(middle, community_id))
+        await measure("сообщество, среднее слово, 3 страницы", args.runs, search(middle, community_id, 3))
+    finally:
+        if not args.keep:
+            await cleanup()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=2_000_000)
+    parser.add_argument("--communities", type=int, default=200)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--skip-seed", action="store_true", help="данные остались от запуска с --keep")
+    parser.add_argument("--keep", action="store_true", help="не удалять данные после замера")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
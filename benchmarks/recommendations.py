@@ -0,0 +1,119 @@
+"""Время расчёта похожих сообществ и полнота top-K на синтетических членствах, без БД.
+
+Пользователи делятся по темам: большинство вступлений — в сообщества своей темы, остальные
+случайны; размеры сообществ — степенное распределение. Полнота — доля точного top-K
+(косинус по полным множествам) в найденном через MinHash + LSH и точный пересчёт лучших
+кандидатов, на выборке сообществ.
+
+Запуск: python -m benchmarks.recommendations [--rows 10000000] [--communities 100000] [--sample 50]
+"""
+from __future__ import annotations
+import argparse
+import resource
+import time
+
+import numpy as np
+
+from app.services.minhash import MemberIndex, MinHasher, candidate_pairs, cosine, jaccard, top_k
+
+CHUNK = 50_000
+
+
+def memberships(rows: int, communities: int, topics: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """(community, user) без повторов; user — случайный uint64, как старшие биты uuid4."""
+    rng = np.random.default_rng(seed)
+    users = max(rows // 8, 1)
+    weights = 1.0 / np.arange(1, communities + 1) ** 0.8
+    topic_of = rng.integers(0, topics, size=communities)
+    by_topic = [np.flatnonzero(topic_of == topic) for topic in range(topics)]
+    user_topic = rng.integers(0, topics, size=rows // 8 + 1)
+    user = rng.integers(0, users, size=rows)
+    community = rng.choice(communities, size=rows, p=weights / weights.sum())
+    # 80% вступлений переносятся в сообщество темы пользователя с тем же рангом популярности
+    local = rng.random(rows) < 0.8
+    for topic, members in enumerate(by_topic):
+        mask = local & (user_topic[user] == topic)
+        if len(members) and mask.any():
+            community[mask] = members[np.minimum(community[mask] * len(members) // communities, len(members) - 1)]
+    pairs = np.unique(community.astype(np.int64) * users + user)
+    keys = np.random.default_rng(seed + 1).integers(0, 2 ** 63, size=users, dtype=np.uint64)
+    return pairs // users, keys[pairs % users]
+
+
+def exact_top(community: np.ndarray, keys: np.ndarray, sizes: np.ndarray, row: int, k: int) -> set[int]:
+    mine = keys[community == row]
+    overlap = np.bincount(community[np.isin(keys, mine)], minlength=len(sizes)).astype(np.float64)
+    overlap[row] = 0
+    scores = overlap / np.sqrt(np.maximum(sizes * sizes[row], 1.0))
+    best = np.argsort(-scores)[:k]
+    return {int(other) for other in best if scores[other] > 0}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--communities", type=int, default=100_000)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--bands", type=int, default=128)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--rescore", type=int, default=100)
+    parser.add_argument("--max-bucket", type=int, default=500)
+    parser.add_argument("--min-members", type=int, default=3)
+    parser.add_argument("--sample", type=int, default=50)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    community, keys = memberships(args.rows, args.communities, args.topics, seed=7)
+    sizes = np.bincount(community, minlength=args.communities).astype(np.float64)
+    print(f"Членства: {len(community)} строк, {args.communities} сообществ, "
+          f"медиана {np.median(sizes):.0f} / максимум {sizes.max():.0f} участников "
+          f"(генерация {time.perf_counter() - started:.1f} с)")
+
+    hasher = MinHasher(args.num_perm)
+    signatures = hasher.empty(args.communities)
+    started = time.perf_counter()
+    for start in range(0, len(community), CHUNK):
+        hasher.update(signatures, community[start:start + CHUNK], keys[start:start + CHUNK])
+    signed = time.perf_counter() - started
+    print(f"подписи         {signed:>8.1f} с   {len(community) / signed:>12.0f} строк/с")
+
+    started = time.perf_counter()
+    left, right = candidate_pairs(signatures, args.bands, args.max_bucket, sizes >= args.min_members)
+    print(f"LSH-кандидаты   {time.perf_counter() - started:>8.1f} с   {len(left):>12} пар")
+
+    started = time.perf_counter()
+    scores = cosine(jaccard(signatures, left, right), sizes[left], sizes[right])
+    source, target, _ = top_k(left, right, scores, args.rescore)
+    print(f"оценка          {time.perf_counter() - started:>8.1f} с   {len(source):>12} строк")
+
+    started = time.perf_counter()
+    index = MemberIndex(community, keys, args.communities)
+    codes = np.unique(np.minimum(source, target) * args.communities + np.maximum(source, target))
+    low, high = codes // args.communities, codes % args.communities
+    exact = index.intersections(low, high) / np.sqrt(np.maximum(sizes[low] * sizes[high], 1.0))
+    source, target, _ = top_k(low, high, exact, args.top_k)
+    print(f"пересчёт, top-K {time.perf_counter() - started:>8.1f} с   {len(low):>12} пар")
+
+    rng = np.random.default_rng(11)
+    eligible = np.flatnonzero(sizes >= args.min_members)
+    # left < right: код пары — то же, что в candidate_pairs, поиск по отсортированному массиву
+    candidates = left * args.communities + right
+    found, covered, expected = 0, 0, 0
+    for row in rng.choice(eligible, size=min(args.sample, len(eligible)), replace=False):
+        exact = exact_top(community, keys, sizes, int(row), args.top_k)
+        approx = set(target[source == row].tolist())
+        found += len(exact & approx)
+        others = np.array(sorted(exact), dtype=np.int64)
+        codes = np.minimum(row, others) * args.communities + np.maximum(row, others)
+        covered += int(np.isin(codes, candidates).sum())
+        expected += len(exact)
+    # Первая доля — потери LSH, разница со второй — шум оценки при почти равных малых пересечениях
+    print(f"точный top-{args.top_k} среди кандидатов LSH: {covered / max(expected, 1):.3f}")
+    print(f"полнота top-{args.top_k} на {args.sample} сообществах: {found / max(expected, 1):.3f}")
+    # Включая синтетические членства (около 0,8 ГБ при 10M строк)
+    print(f"пик памяти: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} МБ")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ from __future__ import annotations
 import os
 import uuid
 from pathlib import Path
-from typing import Generator
+from typing import Awaitable, Callable, Generator, Sequence
 
 from app.core.bootstrap import add_local_venv_site_packages
 
@@ -13,6 +13,30 @@ import pytest
 from fastapi.testclient import TestClient
 
 
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+needs_postgres = pytest.mark.skipif(not TEST_DATABASE_URL, reason="нужен PostgreSQL в TEST_DATABASE_URL")
+
+
+def run_in_schema(tables: Sequence, scenario: Callable[..., Awaitable[None]]) -> None:
+    """Сценарий в транзакции на TEST_DATABASE_URL: таблицы создаются внутри и откатываются вместе с данными."""
+    import asyncio
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from app.domain.models import Base
+
+    async def run():
+        engine = create_async_engine(TEST_DATABASE_URL)
+        try:
+            async with engine.connect() as connection:
+                transaction = await connection.begin()
+                await connection.run_sync(Base.metadata.create_all, tables=list(tables))
+                async with AsyncSession(bind=connection, expire_on_commit=False) as session:
+                    await scenario(session)
+                await transaction.rollback()
+        finally:
+            await engine.dispose()
+    asyncio.run(run())
+
+
 def create_test_token(user_id=None, is_superadmin=False):
     import jwt
     from app.core.config import settings
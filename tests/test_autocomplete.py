@@ -0,0 +1,119 @@
+"""Тесты префиксного автодополнения: построение набора, поиск по префиксу и инкрементальные правки."""
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from app.infrastructure.cache.cache_keys import CacheKeys
+from app.services import autocomplete
+from app.services.autocomplete import AutocompleteIndex, community_entry
+
+
+class MemoryCache:
+    """Sorted set с нулевыми score: порядок и диапазоны — по байтам UTF-8, как в Redis."""
+    is_connected = True
+
+    def __init__(self):
+        self.sets = {}
+
+    async def zrangebylex(self, key, start, stop, limit):
+        if key not in self.sets:
+            return None
+        found = [m for m in self.sets[key] if start[1:] <= m.encode() <= stop[1:]]
+        return sorted(found, key=str.encode)[:limit]
+
+    async def zadd_existing(self, key, members):
+        if key in self.sets:
+            self.sets[key].update(members)
+
+    async def zrem(self, keys, *members):
+        for key in keys:
+            self.sets.get(key, set()).difference_update(members)
+
+    async def replace_zset(self, key, batches, ttl):
+        staging = {""}
+        async for batch in batches:
+            staging.update(batch)
+        self.sets[key] = staging
+        return True
+
+    async def acquire(self, key, ttl):
+        return True
+
+
+def _community(name, status="active"):
+    return SimpleNamespace(id=uuid.uuid4(), name=name, status=status)
+
+
+def test_index_is_built_in_background_then_serves_prefixes(monkeypatch):
+    communities = [_community("Питон для всех"), _community("python-devs"), _community("PyData"),
+                   _community("Rust"), _community("Pyre", status="archived")]
+    fallback_calls = []
+
+    class CommunityRepository:
+        def __init__(self, session):
+            pass
+
+        async def names_with_prefix(self, prefix, limit):
+            fallback_calls.append(prefix)
+            return [SimpleNamespace(id=c.id, name=c.name) for c in communities
+                    if c.status == "active" and c.name.lower().startswith(prefix)][:limit]
+
+        async def stream_columns(self, columns, filters=None, chunk_size=1000):
+            yield [{"id": c.id, "name": c.name} for c in communities if c.status == "active"]
+
+    monkeypatch.setattr(autocomplete, "CommunityRepository", CommunityRepository)
+
+    @asynccontextmanager
+    async def scope():
+        yield None
+
+    cache = MemoryCache()
+    index = AutocompleteIndex(scope, cache)
+
+    async def scenario():
+        cold = await index.communities("Py", 10)
+        await index._builder.wait()
+        warm = await index.communities("  PY", 10)
+        cyrillic = await index.communities("пит", 10)
+
+        renamed = SimpleNamespace(**{**vars(communities[1]), "name": "Snakes"})
+        await index.update_communities(community_entry(communities[1]), community_entry(renamed))
+        after_rename = await index.communities("py", 10)
+        await index.update_communities(None, community_entry(_community("pytest")))
+        return cold, warm, cyrillic, after_rename, await index.communities("pyt", 10)
+
+    cold, warm, cyrillic, after_rename, added = asyncio.run(scenario())
+
+    assert [s.label for s in cold] == ["python-devs", "PyData"] and fallback_calls == ["py"]
+    assert [s.label for s in warm] == ["PyData", "python-devs"]
+    assert [s.label for s in cyrillic] == ["Питон для всех"]
+    assert [s.label for s in after_rename] == ["PyData"]
+    assert [s.label for s in added] == ["pytest"]
+    assert len(fallback_calls) == 1
+
+
+def test_session_updates_are_applied_after_commit_only():
+    from app.infrastructure.container import Container
+    from app.services.autocomplete import SessionAutocomplete
+
+    key = CacheKeys.community_names()
+    cache = MemoryCache()
+    cache.sets[key] = {""}
+    index = AutocompleteIndex(None, cache)
+    container = Container()
+
+    async def scenario():
+        async with container.db_session() as session:
+            await SessionAutocomplete(index, session).update_communities(None, "committed")
+            pending = set(cache.sets[key])
+        try:
+            async with container.db_session() as session:
+                await SessionAutocomplete(index, session).update_communities(None, "rolled-back")
+                raise RuntimeError("откат")
+        except RuntimeError:
+            pass
+        return pending
+
+    assert asyncio.run(scenario()) == {""}
+    assert cache.sets[key] == {"", "committed"}
@@ -0,0 +1,86 @@
+"""Тесты пакетной очистки удалённых сообществ."""
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from app.domain.models import Community, Event, Member, Post
+from app.infrastructure.media.keys import media_url
+from app.services import community_purger
+from app.services.community_purger import CommunityPurger
+
+SHA = "d" * 64
+URL = media_url(f"media/dd/{SHA}.jpg")
+
+
+class MemoryPurgeRepository:
+    """Строки удалённого сообщества по таблицам и журнал удалений."""
+    tables = {}
+    community = None
+    log = []
+
+    def __init__(self, session):
+        pass
+
+    async def set_lock_timeout(self, milliseconds):
+        pass
+
+    async def claim_next(self):
+        return self.community
+
+    async def delete_batch(self, model, community_id, limit, returning=()):
+        rows = self.tables.get(model.__tablename__, [])
+        batch, self.tables[model.__tablename__] = rows[:limit], rows[limit:]
+        if batch:
+            self.log.append((model.__tablename__, len(batch)))
+        return batch
+
+    async def delete_community(self, community_id):
+        self.log.append(("communities", 1))
+        type(self).community = None
+        return (URL, None)
+
+
+class MemoryMediaRepository:
+    delta = {}
+
+    def __init__(self, session):
+        pass
+
+    async def adjust_references(self, delta):
+        for sha, count in delta.items():
+            self.delta[sha] = self.delta.get(sha, 0) + count
+
+
+def test_purge_deletes_children_in_batches_and_community_last(monkeypatch):
+    monkeypatch.setattr(community_purger, "CommunityPurgeRepository", MemoryPurgeRepository)
+    monkeypatch.setattr(community_purger, "MediaRepository", MemoryMediaRepository)
+    community_id = uuid.uuid4()
+    MemoryPurgeRepository.community = SimpleNamespace(id=community_id)
+    MemoryPurgeRepository.log = []
+    MemoryPurgeRepository.tables = {
+        Post.__tablename__: [(uuid.uuid4(), [URL, "https://cdn.example.com/a.png"]) for _ in range(5)],
+        Event.__tablename__: [(uuid.uuid4(), URL)],
+        Member.__tablename__: [(uuid.uuid4(),) for _ in range(3)],
+    }
+    MemoryMediaRepository.delta = {}
+
+    @asynccontextmanager
+    async def scope():
+        yield None
+
+    purger = CommunityPurger(scope, batch_size=2)
+
+    async def drain():
+        while await purger.purge_batch():
+            pass
+
+    asyncio.run(drain())
+
+    assert MemoryPurgeRepository.log == [
+        ("posts", 2), ("posts", 2), ("posts", 1), ("events", 1), ("members", 2), ("members", 1),
+        (Community.__tablename__, 1),
+    ]
+    # 5 постов, обложка и аватар сообщества
+    assert MemoryMediaRepository.delta == {SHA: -7}
+    assert purger.metrics.communities_purged_total == 1 and purger.metrics.rows_deleted_total == 9
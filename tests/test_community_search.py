@@ -0,0 +1,133 @@
+"""Тесты поиска сообществ: курсор keyset-пагинации, кэш числа результатов и ранжирование в PostgreSQL."""
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.exceptions import ValidationException
+from app.domain.models import Community, Member, Role, member_roles
+from app.repositories.base import RankCursor
+from app.repositories.community_repo import CommunityRepository
+from app.services.community_service import CommunityService
+from tests.conftest import needs_postgres, run_in_schema
+
+
+class MemoryCache:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ttl=None):
+        self.values[key] = value
+
+
+class SearchRepository:
+    def __init__(self, communities):
+        self.communities = communities
+        self.cursors = []
+        self.counts = 0
+
+    async def search(self, query, limit, cursor=None, offset=0, columns=None):
+        self.cursors.append(cursor)
+        start = 0 if cursor is None else next(i for i, c in enumerate(self.communities) if c.id == cursor.id) + 1
+        page = self.communities[start:start + limit]
+        more = start + limit < len(self.communities)
+        return page, RankCursor(1.0 / (start + limit), page[-1].id) if more else None
+
+    async def count_search(self, query):
+        self.counts += 1
+        return len(self.communities)
+
+
+def _community(name):
+    return SimpleNamespace(id=uuid.uuid4(), name=name, slug=name, description=None, community_type="public",
+                           avatar_url=None, member_count=1, post_count=0, status="active", created_at=None)
+
+
+def _service(repo, cache):
+    return CommunityService(community_repo=repo, member_repo=None, role_repo=None, channel_repo=None,
+                            media_repo=None, cache=cache, event_publisher=None, autocomplete=None,
+                            leaderboard=None, recommendation_repo=None)
+
+
+def test_search_pages_follow_cursor_and_reuse_cached_count():
+    repo = SearchRepository([_community(f"python-{i}") for i in range(5)])
+    service = _service(repo, MemoryCache())
+
+    first = asyncio.run(service.list_communities(page_size=2, search="python", fields=("id", "name")))
+    second = asyncio.run(service.list_communities(page_size=2, search="  Python ", fields=("id", "name"),
+                                                  cursor=first.next_cursor))
+
+    assert [item.name for item in first.items + second.items] == [f"python-{i}" for i in range(4)]
+    assert repo.cursors[1] == RankCursor.decode(first.next_cursor)
+    assert first.total == second.total == 5 and repo.counts == 1
+
+
+def test_search_rejects_foreign_cursor():
+    service = _service(SearchRepository([]), MemoryCache())
+    with pytest.raises(ValidationException):
+        asyncio.run(service.list_communities(search="python", cursor="not-a-cursor"))
+
+
+def _with_schema(scenario):
+    run_in_schema([Community.__table__, Role.__table__, Member.__table__, member_roles], scenario)
+
+
+async def _add(session, name, description=None, member_count=0, status="active"):
+    community = Community(name=name, slug=f"c-{uuid.uuid4().hex}", owner_id=uuid.uuid4(),
+                          description=description, member_count=member_count, status=status)
+    session.add(community)
+    await session.flush()
+    return community
+
+
+@needs_postgres
+def test_search_ranks_name_and_popularity_above_description():
+    async def scenario(session):
+        popular = await _add(session, "Python developers", member_count=5000)
+        by_name = await _add(session, "Python developers", member_count=10)
+        by_description = await _add(session, "Backend club", "we write python", member_count=10)
+        typo = await _add(session, "Pythn", member_count=10)
+        await _add(session, "Gardening", "tomatoes", member_count=10000)
+        await _add(session, "Python archive", member_count=10000, status="deleted")
+        repo = CommunityRepository(session)
+
+        found, cursor = await repo.search("python", limit=10)
+
+        ids = [community.id for community in found]
+        # Популярность умножает релевантность; описание (вес B) и опечатка (pg_trgm) — ниже названия
+        assert ids[:2] == [popular.id, by_name.id]
+        assert set(ids[2:]) == {by_description.id, typo.id}
+        assert cursor is None
+        assert await repo.count_search("python") == 4
+
+    _with_schema(scenario)
+
+
+@needs_postgres
+def test_search_cursor_pages_neither_overlap_nor_skip():
+    async def scenario(session):
+        # Равные ранги у одинаковых сообществ: порядок внутри них держит только id
+        for _ in range(7):
+            await _add(session, "Chess club", member_count=100)
+        for i in range(6):
+            await _add(session, f"Chess club {i}", "chess openings", member_count=10 * i)
+        repo = CommunityRepository(session)
+        expected, _ = await repo.search("chess", limit=100)
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = await repo.search("chess", limit=3, cursor=cursor)
+            seen.extend(community.id for community in page)
+            if cursor is None:
+                break
+            # Курсор переживает кодирование для клиента
+            cursor = RankCursor.decode(cursor.encode())
+
+        assert len(expected) == 13
+        assert seen == [community.id for community in expected]
+
+    _with_schema(scenario)
@@ -0,0 +1,63 @@
+"""Тесты слияния update-событий в outbox."""
+from datetime import timedelta
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.domain.models import OutboxEvent
+from app.events.base import DomainEvent
+from app.events.event_types import EventType
+from app.events.outbox import coalesce_window_ms, merge_updates
+from app.repositories.outbox_repo import OutboxRepository
+from tests.conftest import needs_postgres, run_in_schema
+
+
+def _update(fields: list[str], **extra) -> DomainEvent:
+    return DomainEvent(event_type=EventType.POST_UPDATED.value, aggregate_id="p-1",
+                       payload={"post_id": "p-1", "updated_fields": fields, **extra})
+
+
+def test_window_applies_only_to_update_types(monkeypatch):
+    monkeypatch.setattr(settings, "EVENT_COALESCE_WINDOWS_MS", {"post.updated": 500, "post.deleted": 500})
+    assert coalesce_window_ms("post.updated") == 500
+    assert coalesce_window_ms("post.deleted") == 0
+    assert coalesce_window_ms("community.updated") == 0
+
+
+def test_merge_unions_updated_fields_and_keeps_first_event_id():
+    first = _update(["title", "content"])
+    merged = merge_updates(first.to_dict(), _update(["content", "status"]))
+    merged = merge_updates(merged, _update(["is_pinned"]))
+    assert merged["event_id"] == first.event_id
+    assert merged["payload"]["updated_fields"] == ["title", "content", "status", "is_pinned"]
+    assert merged["metadata"]["coalesced"] == 3
+
+
+async def _available(session, row):
+    await session.refresh(row)
+    return (await session.execute(select(row.available_at > func.now()))).scalar_one()
+
+
+@needs_postgres
+def test_window_merges_and_releases_but_leaves_retry_backoff():
+    async def scenario(session):
+        repo = OutboxRepository(session)
+        window, retrying = (
+            OutboxEvent(event_type=EventType.POST_UPDATED.value, aggregate_id=aggregate,
+                        payload=_update(["title"]).to_dict(), available_at=func.now() + timedelta(seconds=30))
+            for aggregate in ("p-1", "p-2")
+        )
+        session.add_all([window, retrying])
+        await session.flush()
+        await repo.mark_failed(retrying.id, "broker down", 60)
+
+        assert await repo.find_coalescable(EventType.POST_UPDATED.value, "p-1") is window
+        assert await repo.find_coalescable(EventType.POST_UPDATED.value, "p-2") is None
+
+        await repo.release_pending("p-1")
+        await repo.release_pending("p-2")
+        assert not await _available(session, window)
+        assert await _available(session, retrying)
+        assert await repo.find_coalescable(EventType.POST_UPDATED.value, "p-1") is None
+
+    run_in_schema([OutboxEvent.__table__], scenario)
@@ -0,0 +1,84 @@
+"""Тесты пачечной обработки входящих событий."""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.events import consumer_base
+from app.events.base import DomainEvent
+from app.events.consumer_base import BatchProcessor, EventHandler, InboundMessage
+
+
+class MemoryConsumerRepository:
+    processed: set = set()
+    dead_letters: list = []
+
+    def __init__(self, session):
+        self._session = session
+
+    async def claim(self, consumer, event_ids):
+        fresh = {event_id for event_id in event_ids if (consumer, event_id) not in self.processed}
+        self._session.pending.update((consumer, event_id) for event_id in fresh)
+        return fresh
+
+    async def add_dead_letters(self, rows):
+        self.dead_letters.extend(rows)
+
+
+class RecordingHandler(EventHandler):
+    name = "recording"
+    event_types = ("user.deleted",)
+
+    def __init__(self):
+        self.batches: list[list[str]] = []
+
+    async def handle(self, session, events):
+        if any(event.payload.get("poison") for event in events):
+            raise ValueError("poison")
+        self.batches.append([event.event_id for event in events])
+
+
+class FakeSession:
+    def __init__(self):
+        self.pending: set = set()
+
+
+@asynccontextmanager
+async def session_scope():
+    """Как Container.db_session: отметки об обработке фиксируются только при успехе."""
+    session = FakeSession()
+    yield session
+    MemoryConsumerRepository.processed.update(session.pending)
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    MemoryConsumerRepository.processed = set()
+    MemoryConsumerRepository.dead_letters = []
+    monkeypatch.setattr(consumer_base, "ConsumerRepository", MemoryConsumerRepository)
+    monkeypatch.setattr(consumer_base, "RETRY_BASE_DELAY", 0)
+    handler = RecordingHandler()
+    return BatchProcessor(session_scope, [handler], max_attempts=2), handler
+
+
+def _message(event_id: str, **payload) -> InboundMessage:
+    event = DomainEvent(event_type="user.deleted", event_id=event_id, payload={"user_id": event_id, **payload})
+    return InboundMessage.decode(json.dumps(event.to_dict()).encode(), "test")
+
+
+def test_batch_is_handled_once(processor):
+    batch_processor, handler = processor
+    asyncio.run(batch_processor.process([_message("a"), _message("b"), _message("a")]))
+    asyncio.run(batch_processor.process([_message("b")]))
+    assert handler.batches == [["a", "b"]]
+    assert batch_processor.metrics.processed == 2
+
+
+def test_poison_event_is_dead_lettered(processor):
+    batch_processor, handler = processor
+    raw = InboundMessage.decode(b"not json", "test")
+    asyncio.run(batch_processor.process([_message("a"), _message("bad", poison=True), _message("c"), raw]))
+    assert handler.batches == [["a"], ["c"]]
+    consumers = sorted(row.consumer for row in MemoryConsumerRepository.dead_letters)
+    assert consumers == ["decoder", "recording"]
@@ -0,0 +1,18 @@
+"""Тесты ключей партиционирования событий."""
+from app.events.base import DomainEvent
+from app.events.event_types import AGGREGATE_KEYS, EventType
+from app.events.kafka_publisher import KafkaEventPublisher
+
+
+def test_every_event_type_has_aggregate_key():
+    assert set(AGGREGATE_KEYS) == set(EventType)
+
+
+def test_record_is_keyed_by_aggregate():
+    event = DomainEvent(event_type=EventType.MEMBER_JOINED.value, aggregate_id="c-1")
+    assert KafkaEventPublisher._record(event, None)["key"] == "c-1"
+
+
+def test_partition_key_falls_back_to_event_id():
+    event = DomainEvent(event_type=EventType.EVENT_CREATED.value)
+    assert event.partition_key == event.event_id
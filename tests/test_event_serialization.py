@@ -0,0 +1,48 @@
+"""Тесты форматов сообщений событий."""
+import pytest
+
+from app.core.config import settings
+from app.events import serialization
+from app.events.base import DomainEvent
+from app.events.event_types import EventType
+from app.events.publisher import create_event_publisher
+from app.events.schema_registry import SCHEMAS
+from app.events.serialization import BINARY_MAGIC, decode_event, encode_event
+
+
+def _event() -> DomainEvent:
+    return DomainEvent(
+        event_type=EventType.MEMBER_JOINED.value, aggregate_id="c-1",
+        payload={"community_id": "c-1", "user_id": "u-1", "status": "active", "source": "invite"},
+    )
+
+
+def test_binary_roundtrip_keeps_fields_outside_schema():
+    event = _event()
+    data = encode_event(event, "binary")
+    assert data[0] == BINARY_MAGIC
+    assert decode_event(data) == event
+    assert len(data) < len(encode_event(event, "json"))
+
+
+def test_json_roundtrip_and_unknown_type_fallback():
+    event = _event()
+    assert decode_event(encode_event(event, "json")) == event
+    custom = DomainEvent(event_type="custom.type")
+    assert encode_event(custom, "binary")[:1] == b"{"
+
+
+def test_schema_ids_are_unique():
+    ids = [schema.schema_id for schema in SCHEMAS]
+    assert len(ids) == len(set(ids))
+
+
+def test_binary_topics_without_msgpack_fail_at_startup(monkeypatch):
+    monkeypatch.setattr(serialization, "msgpack", None)
+    monkeypatch.setattr(settings, "EVENT_SPOOL_ENABLED", False)
+    monkeypatch.setattr(settings, "EVENT_BINARY_TOPICS", [])
+    create_event_publisher()
+
+    monkeypatch.setattr(settings, "EVENT_BINARY_TOPICS", ["member.joined"])
+    with pytest.raises(RuntimeError, match="msgpack"):
+        create_event_publisher()
@@ -0,0 +1,134 @@
+"""Тесты дискового spool событий."""
+import os
+
+from app.events.base import DomainEvent
+from app.events.spool import QUARANTINE_DIR, DiskSpool
+
+
+def _spool(tmp_path, name="w1", **overrides) -> DiskSpool:
+    options = {"segment_bytes": 600, "max_bytes": 1 << 20, "fsync_batch": 10, "fsync_interval": 60.0}
+    options.update(overrides)
+    spool = DiskSpool(str(tmp_path), name=name, **options)
+    spool.open()
+    return spool
+
+
+def _event(n: int) -> DomainEvent:
+    return DomainEvent(event_type="post.created", aggregate_id=str(n), payload={"n": n})
+
+
+def _numbers(batch):
+    return [event.payload["n"] for event, _ in batch]
+
+
+def test_replays_in_order_across_segments_and_restart(tmp_path):
+    spool = _spool(tmp_path)
+    for n in range(10):
+        assert spool.append(_event(n), "post.created")
+    assert spool.metrics.segments > 1
+
+    first = spool.read_batch(4)
+    spool.commit(3)
+    assert _numbers(first) == [0, 1, 2, 3]
+    spool.close()
+
+    reopened = _spool(tmp_path)
+    rest = reopened.read_batch(100)
+    assert _numbers(rest) == list(range(3, 10))
+    reopened.commit(len(rest))
+    assert not reopened.pending
+    reopened.close()
+    assert not (tmp_path / "w1").exists()
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    spool = _spool(tmp_path, segment_bytes=1 << 20)
+    spool.append(_event(1), None)
+    spool.close()
+    segment = next((tmp_path / "w1").glob("*.seg"))
+    with open(segment, "ab") as raw:
+        raw.write(b"\x00\x00\x01\x00garbage")
+
+    reopened = _spool(tmp_path, segment_bytes=1 << 20)
+    reopened.append(_event(2), None)
+    assert _numbers(reopened.read_batch(10)) == [1, 2]
+    assert reopened.metrics.quarantined == 1
+
+
+def test_size_cap_drops_new_events(tmp_path):
+    spool = _spool(tmp_path, max_bytes=400)
+    accepted = [spool.append(_event(n), None) for n in range(5)]
+    assert accepted[0] and not accepted[-1]
+    assert spool.metrics.dropped == accepted.count(False)
+
+
+def test_processes_write_to_separate_directories(tmp_path):
+    first, second = _spool(tmp_path, "w1"), _spool(tmp_path, "w2")
+    for n in range(3):
+        first.append(_event(n), None)
+        second.append(_event(100 + n), None)
+
+    first.commit(len(first.read_batch(10)))
+    # Сдвиг курсора и удаление сегментов первого не задевают второй
+    assert _numbers(second.read_batch(10)) == [100, 101, 102]
+    assert second.metrics.adopted == 0
+
+
+def test_directory_held_by_live_process_is_not_reused(tmp_path):
+    holder = _spool(tmp_path, "w1")
+    other = _spool(tmp_path, "w1")
+
+    assert other.directory == str(tmp_path / "w1-1")
+    holder.append(_event(1), None)
+    assert other.read_batch(10) == []
+
+
+def test_orphaned_directory_is_adopted_on_open(tmp_path):
+    dead = _spool(tmp_path, "w1")
+    for n in range(10):
+        dead.append(_event(n), None)
+    dead.commit(len(dead.read_batch(2)))
+    dead.close()   # процесс завершился, не отдав события: каталог остался, flock свободен
+
+    survivor = _spool(tmp_path, "w2")
+
+    assert not (tmp_path / "w1").exists()
+    assert survivor.metrics.adopted == 8
+    assert _numbers(survivor.read_batch(100)) == list(range(2, 10))
+
+
+def test_segments_of_flat_layout_are_adopted(tmp_path):
+    legacy = DiskSpool(str(tmp_path), segment_bytes=1 << 20, max_bytes=1 << 20,
+                       fsync_batch=1, fsync_interval=60.0, name="")
+    legacy._lock_directory()
+    legacy._open_segments()
+    legacy._append(_event(7), None)
+    legacy._close_writer()
+    legacy._release()
+
+    spool = _spool(tmp_path)
+
+    assert _numbers(spool.read_batch(10)) == [7]
+    assert not list(tmp_path.glob("*.seg"))
+
+
+def test_corrupt_record_in_active_segment_is_quarantined(tmp_path):
+    spool = _spool(tmp_path, segment_bytes=1 << 20)
+    for n in range(3):
+        spool.append(_event(n), None)
+    spool.sync()
+    segment = next((tmp_path / "w1").glob("*.seg"))
+    first_end = len(segment.read_bytes()) // 3
+    with open(segment, "r+b") as raw:
+        raw.seek(first_end + 12)
+        raw.write(b"#")
+
+    batch = spool.read_batch(10)
+    assert _numbers(batch) == [0]
+    spool.commit(len(batch))
+    assert spool.read_batch(10) == [] and not spool.pending
+    assert spool.metrics.quarantined == 1
+    assert os.listdir(tmp_path / QUARANTINE_DIR)
+
+    spool.append(_event(3), None)
+    assert _numbers(spool.read_batch(10)) == [3]
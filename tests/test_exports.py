@@ -0,0 +1,145 @@
+"""Тесты потокового экспорта: кодирование NDJSON/CSV, чанки stream_columns, RBAC и 404."""
+import asyncio
+import csv
+import io
+import json
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.services.export_service import MEMBER_EXPORT_COLUMNS, ExportService
+from tests.conftest import create_test_token
+
+
+class StreamRepository:
+    """stream_columns по списку словарей — партиции по chunk_size, как у BaseRepository."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def stream_columns(self, columns, filters=None, chunk_size=1000):
+        self.calls.append((tuple(columns), chunk_size))
+        for start in range(0, len(self.rows), chunk_size):
+            yield [{name: row[name] for name in columns} for row in self.rows[start:start + chunk_size]]
+
+
+def _member(**overrides):
+    row = {"id": uuid.uuid4(), "user_id": uuid.uuid4(), "status": "active", "is_owner": False,
+           "nickname": "nick", "joined_at": datetime(2026, 1, 2, tzinfo=timezone.utc), "last_active_at": None}
+    row.update(overrides)
+    return row
+
+
+def _collect(service, fmt, community_id=None):
+    async def run():
+        return [chunk async for chunk in service.export_members(community_id or uuid.uuid4(), fmt)]
+    return asyncio.run(run())
+
+
+def _service(member_repo, community_repo=None):
+    return ExportService(community_repo=community_repo, member_repo=member_repo, post_repo=None, donation_repo=None)
+
+
+def test_csv_has_header_and_escapes_values():
+    rows = [_member(nickname='say "hi", bye'), _member(nickname="две\nстроки")]
+    chunks = _collect(_service(StreamRepository(rows)), "csv")
+
+    parsed = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert parsed[0] == list(MEMBER_EXPORT_COLUMNS)
+    assert [line[4] for line in parsed[1:]] == ['say "hi", bye', "две\nстроки"]
+    assert parsed[1][0] == str(rows[0]["id"])
+
+
+def test_ndjson_lines_are_json_objects():
+    rows = [_member(nickname="ёж"), _member()]
+    chunks = _collect(_service(StreamRepository(rows)), "ndjson")
+
+    lines = b"".join(chunks).decode("utf-8").splitlines()
+    assert [json.loads(line)["nickname"] for line in lines] == ["ёж", "nick"]
+    assert json.loads(lines[0])["joined_at"] == "2026-01-02 00:00:00+00:00"
+    assert "ёж".encode("utf-8") in chunks[0]
+
+
+def test_empty_result_is_header_only_csv_and_empty_ndjson():
+    assert _collect(_service(StreamRepository([])), "ndjson") == []
+    assert _collect(_service(StreamRepository([])), "csv") == [(",".join(MEMBER_EXPORT_COLUMNS) + "\r\n").encode()]
+
+
+def test_rows_are_streamed_in_configured_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", 2)
+    repo = StreamRepository([_member() for _ in range(5)])
+    chunks = _collect(_service(repo), "ndjson")
+
+    assert repo.calls == [(MEMBER_EXPORT_COLUMNS, 2)]
+    assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
+
+
+class ExportContainer:
+    """Контейнер для эндпоинтов экспорта: сообщества, права участника и строки в памяти."""
+
+    def __init__(self, communities, permissions):
+        self.communities = communities
+        self.permissions = permissions
+        self.members = StreamRepository([_member()])
+
+    @asynccontextmanager
+    async def db_session(self):
+        yield None
+
+    def community_repo(self, session):
+        communities = self.communities
+
+        class CommunityRepository:
+            async def get_by_id(self, community_id, columns=None):
+                status = communities.get(community_id)
+                return SimpleNamespace(id=community_id, status=status) if status else None
+        return CommunityRepository()
+
+    def member_repo(self, session):
+        container = self
+
+        class MemberRepository(StreamRepository):
+            async def get_by_user_and_community(self, user_id, community_id):
+                role = SimpleNamespace(permissions_list=container.permissions)
+                return SimpleNamespace(roles=[role], is_owner=False)
+        return MemberRepository(self.members.rows)
+
+    def post_repo(self, session):
+        return StreamRepository([])
+
+    def donation_repo(self, session):
+        return StreamRepository([])
+
+
+@pytest.fixture
+def export_client(client: TestClient):
+    def build(communities, permissions):
+        client.app.state.container = ExportContainer(communities, permissions)
+        client.headers.update({"Authorization": f"Bearer {create_test_token()}"})
+        return client
+    return build
+
+
+def test_export_requires_community_permission(export_client):
+    community_id = uuid.uuid4()
+    client = export_client({community_id: "active"}, ["post.moderate"])
+
+    assert client.get(f"/api/v1/communities/{community_id}/members/export").status_code == 403
+    response = client.get(f"/api/v1/communities/{community_id}/posts/export?format=csv")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.startswith("id,channel_id,author_id")
+
+
+def test_export_of_missing_or_deleted_community_is_not_found(export_client):
+    deleted = uuid.uuid4()
+    client = export_client({deleted: "deleted"}, ["member.manage"])
+
+    assert client.get(f"/api/v1/communities/{uuid.uuid4()}/members/export").status_code == 404
+    assert client.get(f"/api/v1/communities/{deleted}/members/export").status_code == 404
@@ -0,0 +1,67 @@
+"""Тесты sparse fieldsets (?fields=)."""
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.infrastructure.media.images import variant_key
+from app.repositories.community_repo import CommunityRepository
+from app.schemas.community import CommunityListResponse
+from app.schemas.fields import column_fields, narrow_model, parse_fields
+from app.schemas.post import PostResponse
+from app.services.media_variants import apply_variants
+
+SHA = "ab" + "0" * 62
+
+
+def test_parse_fields_adds_id_and_sorts():
+    assert parse_fields("title, status", PostResponse) == ("id", "status", "title")
+
+
+def test_parse_fields_empty_means_all():
+    assert parse_fields(None, PostResponse) is None
+    assert parse_fields(" ", PostResponse) is None
+
+
+def test_parse_fields_rejects_unknown():
+    with pytest.raises(ValueError) as exc:
+        parse_fields("title,secret", PostResponse)
+    assert exc.value.args[0] == ["secret"]
+
+
+def test_narrow_model_keeps_only_selected():
+    model = narrow_model(PostResponse, ("id", "title"))
+    assert set(model.model_fields) == {"id", "title"}
+    assert narrow_model(PostResponse, ("id", "title")) is model
+
+
+def test_unknown_field_is_rejected(client: TestClient):
+    response = client.get(f"/api/v1/posts/{uuid.uuid4()}?fields=title,bogus")
+    assert response.status_code == 422
+    assert response.json()["error"]["detail"]["unknown"] == ["bogus"]
+
+
+def test_variant_fields_can_be_requested_with_their_source():
+    fields = parse_fields("avatar_variants", CommunityListResponse)
+    assert fields == ("avatar_url", "avatar_variants", "id")
+    assert column_fields(CommunityListResponse, fields) == ("avatar_url", "id")
+
+    base = f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET}/"
+    model = narrow_model(CommunityListResponse, fields)
+    item = model.model_validate(SimpleNamespace(id=uuid.uuid4(), avatar_url=f"{base}media/ab/{SHA}.png", name="x"))
+    apply_variants([item], {SHA: ["thumbnail"]})
+    dumped = jsonable_encoder(item)
+    assert set(dumped) == {"id", "avatar_url", "avatar_variants"}
+    assert dumped["avatar_variants"] == {"thumbnail": f"{base}{variant_key(SHA, 'thumbnail')}"}
+    # Без вычисляемых полей вариантов не ищем вовсе
+    assert narrow_model(CommunityListResponse, ("id", "name")).VARIANT_SOURCES == {}
+
+
+def test_column_selection_does_not_load_relationships():
+    # У Community связи lazy="selectin": без raiseload проверка существования читала бы всех участников
+    options = CommunityRepository(None)._column_options(("id",))
+    assert any(getattr(option, "strategy", None) == (("lazy", "raise"),) for option in options)
+    assert CommunityRepository(None)._column_options(None) == []
@@ -0,0 +1,236 @@
+"""Тесты асинхронного режима Kafka publisher: очередь, backpressure, flush и spill недоставленных."""
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.events.base import DomainEvent
+from app.events.kafka_publisher import KafkaEventPublisher
+
+
+class FakeProducer:
+    """producer.send() возвращает future доставки; gate держит отправку, пока тест его не откроет."""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.sent = []
+        self.deliveries = []
+        self.fail_delivery = False
+
+    async def send(self, topic, value, key, headers):
+        await self.gate.wait()
+        self.sent.append(topic)
+        delivery = asyncio.get_running_loop().create_future()
+        if self.fail_delivery:
+            delivery.set_exception(RuntimeError("NotLeaderForPartition"))
+        else:
+            delivery.set_result(None)
+        self.deliveries.append(delivery)
+        return delivery
+
+    async def flush(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class MemorySpool:
+    def __init__(self, error=None):
+        self.items = []
+        self.error = error
+
+    def append(self, event, routing_key):
+        if self.error:
+            raise self.error
+        self.items.append(routing_key or event.event_type)
+        return True
+
+
+def _publisher(monkeypatch, backpressure="block", queue_size=10, spool=None):
+    monkeypatch.setattr(settings, "KAFKA_BACKPRESSURE", backpressure)
+    monkeypatch.setattr(settings, "KAFKA_QUEUE_SIZE", queue_size)
+    publisher = KafkaEventPublisher(spool=spool)
+    publisher._producer = publisher.fake = FakeProducer()
+    publisher._queue = asyncio.Queue(maxsize=queue_size)
+    publisher._start_sender()
+    return publisher
+
+
+def _sent(publisher):
+    """Суффиксы топиков отправленных событий — producer после disconnect остаётся в publisher.fake."""
+    return [topic.split(".")[-1] for topic in publisher.fake.sent]
+
+
+def _event(n):
+    return DomainEvent(event_type=f"post.e{n}")
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_queued_events_are_sent_by_background_sender(monkeypatch):
+    async def scenario():
+        publisher = _publisher(monkeypatch)
+        for n in range(3):
+            await publisher.publish(_event(n))
+        await publisher.flush(1.0)
+        await publisher.disconnect()
+        return publisher
+
+    publisher = asyncio.run(scenario())
+    assert publisher.metrics.enqueued == 3 and publisher.metrics.sent == 3
+    assert _sent(publisher) == ["e0", "e1", "e2"]
+
+
+def test_block_policy_waits_for_free_slot(monkeypatch):
+    async def scenario():
+        publisher = _publisher(monkeypatch, "block", queue_size=1)
+        producer = publisher._producer
+        producer.gate.clear()
+        await publisher.publish(_event(0))   # забран sender-ом, ждёт gate
+        await _settle()
+        await publisher.publish(_event(1))   # занимает единственное место в очереди
+        blocked = asyncio.create_task(publisher.publish(_event(2)))
+        await _settle()
+        was_blocked = not blocked.done()
+        producer.gate.set()
+        await asyncio.wait_for(blocked, 1.0)
+        await publisher.flush(1.0)
+        await publisher.disconnect()
+        return was_blocked, publisher
+
+    was_blocked, publisher = asyncio.run(scenario())
+    assert was_blocked
+    assert _sent(publisher) == ["e0", "e1", "e2"]
+
+
+def test_drop_oldest_policy_discards_queued_event(monkeypatch):
+    async def scenario():
+        publisher = _publisher(monkeypatch, "drop_oldest", queue_size=1)
+        publisher._producer.gate.clear()
+        await publisher.publish(_event(0))
+        await _settle()
+        await publisher.publish(_event(1))
+        await publisher.publish(_event(2))
+        publisher._producer.gate.set()
+        await publisher.flush(1.0)
+        await publisher.disconnect()
+        return publisher
+
+    publisher = asyncio.run(scenario())
+    assert _sent(publisher) == ["e0", "e2"]
+    assert publisher.metrics.dropped == 1
+
+
+def test_spill_policy_writes_overflow_to_spool(monkeypatch):
+    spool = MemorySpool()
+
+    async def scenario():
+        publisher = _publisher(monkeypatch, "spill", queue_size=1, spool=spool)
+        publisher._producer.gate.clear()
+        await publisher.publish(_event(0))
+        await _settle()
+        await publisher.publish(_event(1))
+        await publisher.publish(_event(2))
+        publisher._producer.gate.set()
+        await publisher.flush(1.0)
+        await publisher.disconnect()
+        return publisher
+
+    publisher = asyncio.run(scenario())
+    assert _sent(publisher) == ["e0", "e1"]
+    assert spool.items == ["post.e2"] and publisher.metrics.spilled == 1
+
+
+def test_flush_gives_up_after_timeout(monkeypatch):
+    async def scenario():
+        publisher = _publisher(monkeypatch)
+        publisher._producer.gate.clear()
+        await publisher.publish(_event(0))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await publisher.flush(0.05)
+        elapsed = loop.time() - started
+        publisher._producer.gate.set()
+        await publisher.disconnect()
+        return elapsed
+
+    assert asyncio.run(scenario()) < 0.5
+
+
+def test_failed_delivery_is_spilled(monkeypatch):
+    spool = MemorySpool()
+
+    async def scenario():
+        publisher = _publisher(monkeypatch, spool=spool)
+        publisher._producer.fail_delivery = True
+        await publisher.publish(_event(0))
+        await publisher.flush(1.0)
+        await publisher.disconnect()
+        return publisher
+
+    publisher = asyncio.run(scenario())
+    assert spool.items == ["post.e0"]
+    assert publisher.metrics.failed == 1 and publisher.metrics.sent == 0
+
+
+def test_sender_survives_spool_and_encoding_errors(monkeypatch):
+    spool = MemorySpool(error=OSError(28, "No space left on device"))
+    real_record = KafkaEventPublisher._record
+
+    def record(event, routing_key):
+        if event.event_type == "post.e1":
+            raise TypeError("not serializable")
+        return real_record(event, routing_key)
+
+    monkeypatch.setattr(KafkaEventPublisher, "_record", staticmethod(record))
+
+    async def scenario():
+        publisher = _publisher(monkeypatch, spool=spool)
+        publisher._producer.fail_delivery = True
+        await publisher.publish(_event(0))   # доставка не удалась, spool переполнен
+        await publisher.flush(1.0)
+        publisher._producer.fail_delivery = False
+        await publisher.publish(_event(1))   # не кодируется
+        await publisher.publish(_event(2))
+        await publisher.flush(1.0)
+        alive = not publisher._sender_task.done()
+        await publisher.disconnect()
+        return publisher, alive
+
+    publisher, alive = asyncio.run(scenario())
+    assert alive
+    assert _sent(publisher) == ["e0", "e2"]
+    assert publisher.metrics.failed == 2 and publisher.metrics.sent == 1
+
+
+def test_crashed_sender_is_restarted(monkeypatch):
+    async def scenario():
+        publisher = _publisher(monkeypatch)
+        crashed = publisher._sender_task
+        crashed.cancel()
+        await asyncio.sleep(0)
+
+        async def boom():
+            raise RuntimeError("sender bug")
+
+        # Падение с ошибкой (не отмена) — done-callback поднимает новый sender
+        failing = asyncio.create_task(boom())
+        publisher._sender_task = failing
+        failing.add_done_callback(publisher._on_sender_done)
+        with pytest.raises(RuntimeError):
+            await failing
+        await asyncio.sleep(0)
+        restarted = publisher._sender_task
+        await publisher.publish(_event(0))
+        await publisher.flush(1.0)
+        await publisher.disconnect()
+        return failing, restarted, publisher
+
+    failing, restarted, publisher = asyncio.run(scenario())
+    assert restarted is not failing
+    assert publisher.metrics.sent == 1
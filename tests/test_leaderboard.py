@@ -0,0 +1,190 @@
+"""Тесты рейтингов сообществ: инкрементальные popular-наборы и затухающий trending."""
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.security import UserContext
+from app.db.session import run_after_commit
+from app.schemas.post import PostUpdate
+from app.services import leaderboard
+from app.services.leaderboard import CommunityLeaderboard, SessionLeaderboard
+from app.services.post_service import PostService
+
+HOUR = 3600
+
+
+class MemoryCache:
+    is_connected = True
+
+    def __init__(self):
+        self.sets = {}
+
+    async def zrevrange(self, key, limit):
+        if key not in self.sets:
+            return None
+        return sorted(self.sets[key].items(), key=lambda item: -item[1])[:limit]
+
+    async def zadd_existing(self, key, members):
+        if key in self.sets:
+            self.sets[key].update(members)
+
+    async def zincrby_existing(self, key, members):
+        if key in self.sets:
+            for member, delta in members.items():
+                self.sets[key][member] = self.sets[key].get(member, 0) + delta
+
+    async def zincr_members(self, keys, member, delta):
+        for key in keys:
+            if member in self.sets.get(key, {}):
+                self.sets[key][member] += delta
+
+    async def zrem(self, keys, *members):
+        for key in keys:
+            for member in members:
+                self.sets.get(key, {}).pop(member, None)
+
+    async def zscore(self, key, member):
+        return self.sets.get(key, {}).get(member)
+
+    async def replace_zset(self, key, batches, ttl):
+        staging = {"": 0}
+        async for batch in batches:
+            staging.update(batch)
+        self.sets[key] = staging
+        return True
+
+    async def acquire(self, key, ttl):
+        return True
+
+
+def _community(community_type, member_count):
+    return SimpleNamespace(id=uuid.uuid4(), community_type=community_type, member_count=member_count, status="active")
+
+
+@pytest.fixture
+def communities(monkeypatch):
+    rows = [_community("public", 10), _community("private", 50), _community("public", 30)]
+
+    class CommunityRepository:
+        def __init__(self, session):
+            pass
+
+        async def get_popular(self, limit, community_type=None):
+            matching = [c for c in rows if community_type in (None, c.community_type)]
+            return sorted(matching, key=lambda c: -c.member_count)[:limit]
+
+        async def stream_columns(self, columns, filters=None, chunk_size=1000):
+            types = {f.right.value for f in filters if f.left.name == "community_type"}
+            yield [{"id": c.id, "member_count": c.member_count} for c in rows if not types or c.community_type in types]
+
+        async def trending_scores(self, since, origin, half_life, join_weight, post_weight,
+                                  community_type=None, limit=None):
+            return []
+
+    monkeypatch.setattr(leaderboard, "CommunityRepository", CommunityRepository)
+    return rows
+
+
+@asynccontextmanager
+async def scope():
+    yield None
+
+
+def test_popular_sets_are_built_then_follow_member_counter(communities):
+    index = CommunityLeaderboard(scope, MemoryCache())
+    public_small, private, public_big = communities
+
+    async def scenario():
+        cold = await index.top("popular", "public")
+        await index._builder.wait()
+        await index.members_changed(public_small.id, 25)
+        everyone = await index.top("popular")
+        await index._builder.wait()
+        public = await index.top("popular", "public")
+        await index.community_removed(public_big.id, "public")
+        return cold, everyone, public, await index.top("popular", "public")
+
+    cold, everyone, public, after_removal = asyncio.run(scenario())
+
+    assert [cid for cid, _ in cold] == [public_big.id, public_small.id]
+    # Общий набор строится после первого запроса к нему — до этого отвечает БД
+    assert [cid for cid, _ in everyone] == [private.id, public_big.id, public_small.id]
+    assert public == [(public_small.id, 35), (public_big.id, 30)]
+    assert after_removal == [(public_small.id, 35)]
+
+
+def test_trending_decays_and_rolls_over_to_new_generation(communities):
+    now = [100 * HOUR]
+    index = CommunityLeaderboard(scope, MemoryCache(), half_life=HOUR, clock=lambda: now[0])
+    old, _, fresh = communities
+
+    async def scenario():
+        await index.top("trending")
+        await index._builder.wait()
+        await index.activity(old, joins=4)
+        now[0] += HOUR / 2
+        await index.activity(fresh, joins=3)
+        half = await index.top("trending")
+        now[0] += HOUR
+        # Новое поколение ещё не собрано — читается предыдущее с поправкой на затухание
+        rolled = await index.top("trending")
+        return half, rolled
+
+    half, rolled = asyncio.run(scenario())
+
+    assert [cid for cid, _ in half] == [fresh.id, old.id]
+    assert half[0][1] == pytest.approx(3.0) and half[1][1] == pytest.approx(4 / 2 ** 0.5)
+    assert rolled[0][1] == pytest.approx(1.5) and rolled[1][1] == pytest.approx(2 / 2 ** 0.5)
+
+
+def test_published_draft_counts_in_trending_after_commit():
+    now = datetime.now(timezone.utc)
+    author, community = uuid.uuid4(), SimpleNamespace(id=uuid.uuid4(), community_type="public")
+    draft = SimpleNamespace(id=uuid.uuid4(), community_id=community.id, channel_id=None, author_id=author,
+                            title="Черновик", content="текст", excerpt="текст", word_count=1, has_media=False,
+                            status="draft", is_pinned=False, media_urls=[], like_count=0, comment_count=0,
+                            view_count=0, published_at=None, created_at=now, updated_at=now)
+    calls = []
+
+    class Posts:
+        async def get_by_id(self, post_id, columns=None):
+            return draft
+
+        async def update_by_id(self, post_id, values):
+            calls.append(("update", sorted(values)))
+            return SimpleNamespace(**{**vars(draft), **values})
+
+    class Communities:
+        async def get_by_id(self, community_id, columns=None):
+            return community
+
+        async def increment_post_count(self, community_id, delta):
+            calls.append(("post_count", delta))
+
+    class Recorder:
+        async def activity(self, community, joins=0, posts=0):
+            calls.append(("activity", posts))
+
+    class Cache:
+        async def delete(self, *keys):
+            pass
+
+    class Events:
+        async def publish_event(self, *args, **kwargs):
+            pass
+
+    session = SimpleNamespace(info={})
+    service = PostService(post_repo=Posts(), community_repo=Communities(), media_repo=None, cache=Cache(),
+                          event_publisher=Events(), leaderboard=SessionLeaderboard(Recorder(), session))
+    user = UserContext(user_id=author, email="a@example.com", roles=[], permissions=[], is_superadmin=False)
+
+    response = asyncio.run(service.update_post(draft.id, PostUpdate(status="published"), user))
+    assert response.published_at is not None
+    assert calls == [("update", ["published_at", "status"]), ("post_count", 1)]
+
+    asyncio.run(run_after_commit(session))
+    assert calls[-1] == ("activity", 1)
@@ -0,0 +1,105 @@
+"""Тесты учёта ссылок на медиа, пакетного удаления и сверки бакета."""
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+from app.infrastructure.media.keys import key_sha256, media_url, reference_delta, variant_key
+from app.infrastructure.media.s3_client import S3Client
+from app.services import media_reconciler
+from app.services.media_reconciler import MediaReconciler
+
+A, B, C = "a" * 64, "b" * 64, "c" * 64
+
+
+class FakeBucket:
+    def __init__(self, objects, failing=()):
+        self.objects = dict(objects)
+        self.failing = set(failing)
+        self.delete_calls = []
+
+    async def delete_objects(self, Bucket, Delete):
+        keys = [item["Key"] for item in Delete["Objects"]]
+        self.delete_calls.append(len(keys))
+        for key in keys:
+            if key not in self.failing:
+                self.objects.pop(key, None)
+        return {"Errors": [{"Key": key, "Code": "AccessDenied"} for key in keys if key in self.failing]}
+
+    def get_paginator(self, name):
+        bucket = self
+
+        class Paginator:
+            async def paginate(self, Bucket, Prefix, PaginationConfig):
+                keys = sorted(key for key in bucket.objects if key.startswith(Prefix))
+                size = PaginationConfig["PageSize"]
+                for offset in range(0, len(keys), size):
+                    yield {"Contents": [
+                        {"Key": key, "Size": 10, "LastModified": bucket.objects[key]} for key in keys[offset:offset + size]
+                    ]}
+
+        return Paginator()
+
+
+def _client(bucket):
+    client = S3Client()
+    client._client = bucket
+    return client
+
+
+def test_reference_delta_counts_only_own_media():
+    own = media_url(f"media/aa/{A}.jpg")
+    other = media_url(f"media/bb/{B}.png")
+    before = [own, own, "https://cdn.example.com/x.jpg", None]
+    assert reference_delta(before, [own, other]) == {A: -1, B: 1}
+    assert reference_delta([own], [own]) == {}
+
+
+def test_delete_files_batches_and_reports_failures():
+    keys = [f"media/00/{i}.jpg" for i in range(2300)]
+    bucket = FakeBucket({key: None for key in keys}, failing={keys[5]})
+    failed = asyncio.run(_client(bucket).delete_files(keys))
+    assert bucket.delete_calls == [1000, 1000, 300]
+    assert failed == [keys[5]] and list(bucket.objects) == [keys[5]]
+
+
+class MemoryIndex:
+    tracked_rows = {}
+    referenced = set()
+
+    def __init__(self, session):
+        pass
+
+    async def tracked(self, hashes):
+        return {sha: self.tracked_rows[sha] for sha in hashes if sha in self.tracked_rows}
+
+    async def referenced_urls(self, urls):
+        return self.referenced & set(urls)
+
+
+def test_reconciler_deletes_only_settled_unreferenced(monkeypatch):
+    old = datetime.now(timezone.utc) - timedelta(days=2)
+    fresh = datetime.now(timezone.utc)
+    bucket = FakeBucket({
+        f"media/aa/{A}.jpg": old,                           # в индексе
+        variant_key(A, "thumbnail"): old,                    # вариант из индекса
+        variant_key(A, "medium"): old,                       # вариант, которого нет в индексе
+        f"media/bb/{B}.png": old,                            # загрузка упала до регистрации
+        f"media/cc/{C}.png": fresh,                          # ещё в grace-периоде
+        "media/legacy/avatar.png": old,                      # старый ключ, есть в данных
+        "media/legacy/lost.png": old,                        # старый ключ, ссылок нет
+    })
+    monkeypatch.setattr(media_reconciler, "MediaRepository", MemoryIndex)
+    MemoryIndex.tracked_rows = {A: (f"media/aa/{A}.jpg", ["thumbnail"])}
+    MemoryIndex.referenced = {media_url("media/legacy/avatar.png")}
+
+    @asynccontextmanager
+    async def scope():
+        yield None
+
+    report = asyncio.run(MediaReconciler(scope, _client(bucket), grace_seconds=3600, page_size=3).run())
+
+    assert sorted(bucket.objects) == sorted([
+        f"media/aa/{A}.jpg", variant_key(A, "thumbnail"), f"media/cc/{C}.png", "media/legacy/avatar.png",
+    ])
+    assert (report.pages, report.listed, report.recent, report.deleted) == (3, 7, 1, 3)
+    assert key_sha256(variant_key(A, "medium")) == A and key_sha256("media/legacy/lost.png") is None
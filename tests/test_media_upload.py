@@ -0,0 +1,114 @@
+"""Тесты потоковой multipart-загрузки в S3 и дедупликации медиа."""
+import asyncio
+import hashlib
+import uuid
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.core.config import settings
+from app.domain.models import MediaObject
+from app.infrastructure.media.s3_client import S3Client, UploadTooLarge
+from app.services import media_service
+from app.services.media_service import MediaService
+
+
+class FakeS3:
+    """Замена MinIO в памяти: собирает части и следит за числом одновременных загрузок."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.aborted = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create_multipart_upload(self, Bucket, Key, ContentType):
+        self.uploads["u1"] = {}
+        return {"UploadId": "u1"}
+
+    async def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, ContentMD5):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001 * (5 - PartNumber % 5))
+        self.in_flight -= 1
+        self.uploads[UploadId][PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    async def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        self.objects[Key] = b"".join(parts[p["PartNumber"]] for p in MultipartUpload["Parts"])
+
+    async def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+
+    async def put_object(self, Bucket, Key, Body, ContentType, ContentMD5):
+        self.objects[Key] = Body
+
+
+async def _stream(data: bytes, chunk: int = 7):
+    for offset in range(0, len(data), chunk):
+        yield data[offset:offset + chunk]
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setattr(settings, "S3_UPLOAD_PART_SIZE", 32)
+    monkeypatch.setattr(settings, "S3_UPLOAD_CONCURRENCY", 2)
+    client = S3Client()
+    client._client = FakeS3()
+    return client
+
+
+def test_stream_is_uploaded_in_parts_with_bounded_concurrency(s3):
+    data = bytes(range(256)) * 2
+    result = asyncio.run(s3.upload_stream(_stream(data), "k", "image/png"))
+    assert s3._client.objects["k"] == data
+    assert result.parts == 16 and result.size == len(data)
+    assert result.sha256 == hashlib.sha256(data).hexdigest()
+    assert s3._client.max_in_flight <= 2
+
+
+def test_small_stream_uses_single_put(s3):
+    result = asyncio.run(s3.upload_stream(_stream(b"tiny"), "k", "image/png"))
+    assert s3._client.objects["k"] == b"tiny" and result.parts == 1
+
+
+def test_oversized_stream_aborts_upload(s3):
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(s3.upload_stream(_stream(b"x" * 200), "k", "image/png", max_bytes=100))
+    assert s3._client.aborted == ["u1"] and "k" not in s3._client.objects
+
+
+class MemoryMediaRepository:
+    rows = {}
+
+    def __init__(self, session):
+        pass
+
+    async def touch(self, sha256):
+        return self.rows.get(sha256)
+
+    async def register(self, sha256, key, size, content_type, claim_variants=False):
+        self.rows[sha256] = MediaObject(sha256=sha256, key=key, size=size, content_type=content_type, ref_count=0)
+        return self.rows[sha256]
+
+
+def test_duplicate_upload_skips_put(monkeypatch, s3):
+    monkeypatch.setattr(media_service, "MediaRepository", MemoryMediaRepository)
+    MemoryMediaRepository.rows = {}
+
+    @asynccontextmanager
+    async def scope():
+        yield None
+
+    service = MediaService(scope, s3)
+    data = b"meme" * 50
+    first = asyncio.run(service.upload(uuid.uuid4(), _stream(data), "image/png"))
+    puts = len(s3._client.objects)
+    second = asyncio.run(service.upload(uuid.uuid4(), _stream(data), "image/png"))
+
+    assert first.key == second.key == f"media/{first.sha256[:2]}/{first.sha256}.png"
+    assert len(s3._client.objects) == puts == 1
+    # Ссылки создаёт прикрепление URL к посту или сообществу, а не загрузка.
+    assert MemoryMediaRepository.rows[first.sha256].ref_count == 0
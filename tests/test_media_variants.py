@@ -0,0 +1,127 @@
+"""Тесты генерации вариантов изображений."""
+import asyncio
+import io
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.infrastructure.media.images import render_variants, variant_key, variant_urls
+from app.repositories.media_repo import MediaRepository
+from app.services import media_variants
+from app.schemas.community import CommunityListResponse
+from app.schemas.post import PostListResponse
+from app.services.media_variants import VariantJob, VariantPipeline, attach_variants
+
+Image = pytest.importorskip("PIL.Image")
+
+SHA = "ab" + "0" * 62
+
+
+def _png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGBA", (width, height), (200, 10, 10, 128)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_variants_are_bounded_webp():
+    rendered = dict(render_variants(_png(3000, 1500)))
+    sizes = {name: Image.open(io.BytesIO(body)).size for name, body in rendered.items()}
+    assert sizes == {"original": (2560, 1280), "medium": (1024, 512), "thumbnail": (160, 80)}
+    assert all(Image.open(io.BytesIO(body)).format == "WEBP" for body in rendered.values())
+
+
+def test_variant_urls_only_for_built_variants_of_content_addressed_images():
+    base = f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET}/"
+    ready = {SHA: ["original", "thumbnail"]}
+    urls = variant_urls(f"{base}media/ab/{SHA}.png", ready)
+    assert urls == {"original": f"{base}{variant_key(SHA, 'original')}",
+                    "thumbnail": f"{base}{variant_key(SHA, 'thumbnail')}"}
+    # Не построены, построить нельзя ([]) или не изображение — клиент показывает исходный URL
+    assert variant_urls(f"{base}media/ab/{SHA}.png", {}) is None
+    assert variant_urls(f"{base}media/ab/{SHA}.png", {SHA: []}) is None
+    assert variant_urls(f"{base}media/ab/{SHA}.mp4", ready) is None
+    assert variant_urls("https://example.com/cat.png", ready) is None
+
+
+def test_responses_get_variants_from_index():
+    base = f"{settings.S3_ENDPOINT}/{settings.S3_BUCKET}/"
+    pending = "cd" + "0" * 62
+    requested = []
+
+    class ReadyRepository:
+        async def ready_variants(self, hashes):
+            requested.append(hashes)
+            return {SHA: ["thumbnail"]}
+
+    post = PostListResponse.model_construct(media_urls=[f"{base}media/ab/{SHA}.png", f"{base}media/cd/{pending}.png",
+                                                        "https://example.com/cat.png"])
+    community = CommunityListResponse.model_construct(avatar_url=None)
+    ready = asyncio.run(attach_variants(ReadyRepository(), [post, community]))
+
+    assert requested == [[SHA, pending]] and ready == {SHA: ["thumbnail"]}
+    assert post.media_variants == [{"thumbnail": f"{base}{variant_key(SHA, 'thumbnail')}"}, None, None]
+    assert community.avatar_variants is None
+
+
+class FakeS3:
+    def __init__(self, original):
+        self.original = original
+        self.stored = {}
+
+    async def download(self, key):
+        return self.original
+
+    async def put_bytes(self, data, key, content_type):
+        self.stored[key] = data
+
+
+class MemoryMediaRepository:
+    variants = {}
+
+    def __init__(self, session):
+        pass
+
+    async def set_variants(self, sha256, names):
+        self.variants[sha256] = list(names)
+
+
+def test_pipeline_uploads_variants_and_marks_index(monkeypatch):
+    monkeypatch.setattr(media_variants, "MediaRepository", MemoryMediaRepository)
+
+    @asynccontextmanager
+    async def scope():
+        yield None
+
+    s3 = FakeS3(_png(400, 300))
+    pipeline = VariantPipeline(scope, s3, processes=1)
+    # Пул потоков вместо процессов: в тесте важен контракт, а не изоляция CPU.
+    names = asyncio.run(pipeline.process(VariantJob(SHA, f"media/ab/{SHA}.png")))
+    assert names == ["original", "medium", "thumbnail"]
+    assert set(s3.stored) == {variant_key(SHA, name) for name in names}
+    assert MemoryMediaRepository.variants[SHA] == names
+
+    s3.original = b"not an image"
+    assert asyncio.run(pipeline.process(VariantJob(SHA, f"media/ab/{SHA}.png"))) == []
+    assert MemoryMediaRepository.variants[SHA] == []
+
+
+def test_sweep_claims_rows_with_skip_locked():
+    statements = []
+
+    class Session:
+        async def execute(self, stmt):
+            statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+            return []
+
+    now = datetime.now(timezone.utc)
+    asyncio.run(MediaRepository(Session()).claim_missing_variants(["image/png"], now, now, 5, 10))
+
+    sql, = statements
+    assert sql.startswith("UPDATE media_objects SET variants_claimed_at=now(), "
+                          "variant_attempts=(media_objects.variant_attempts +")
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "media_objects.variants_claimed_at IS NULL OR media_objects.variants_claimed_at <" in sql
+    assert "RETURNING media_objects.sha256, media_objects.key" in sql
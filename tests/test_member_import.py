@@ -0,0 +1,216 @@
+"""Тесты импорта участников: разбор файла, лимит тела, счётчик по пачкам и COPY-путь в PostgreSQL."""
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.api.v1 import members as members_api
+from app.core.config import settings
+from app.domain.models import Community, Member, Role, member_roles
+from app.repositories.community_repo import CommunityRepository
+from app.repositories.member_repo import MemberRepository
+from app.repositories.role_repo import RoleRepository
+from app.schemas.member import MemberImportJob
+from app.services.member_import_service import MemberImportService, parse_import_rows
+from tests.conftest import create_test_token, needs_postgres, run_in_schema
+
+
+def test_parse_ndjson_collects_errors_per_line():
+    user_id = uuid.uuid4()
+    payload = f'{{"user_id": "{user_id}", "nickname": " Bob "}}\n\n{{"user_id": "nope"}}\n'.encode()
+    rows, errors = parse_import_rows(payload, "ndjson")
+    assert rows == [(user_id, "Bob")]
+    assert len(errors) == 1 and errors[0].startswith("строка 3")
+
+
+def test_parse_csv_with_header():
+    user_id = uuid.uuid4()
+    rows, errors = parse_import_rows(f"user_id,nickname\n{user_id},\n".encode(), "csv")
+    assert rows == [(user_id, None)]
+    assert errors == []
+
+
+class Cache:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ttl=None):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+class Leaderboard:
+    def __init__(self):
+        self.calls = []
+
+    async def members_changed(self, community_id, delta):
+        self.calls.append(("members", delta))
+
+    async def activity(self, community, joins=0, posts=0):
+        self.calls.append(("joins", joins))
+
+
+class Publisher:
+    def __init__(self):
+        self.events = []
+
+    async def publish_event(self, event_type, payload):
+        self.events.append((event_type, payload))
+
+
+class ImportContainer:
+    """Все сессии импорта — одна сессия теста; кэш, события и рейтинги — в памяти."""
+
+    def __init__(self, session=None, member_repo=None):
+        self.session = session
+        self.redis = Cache()
+        self.publisher = Publisher()
+        self.board = Leaderboard()
+        self._member_repo = member_repo
+
+    @asynccontextmanager
+    async def db_session(self):
+        yield self.session
+
+    def member_repo(self, session):
+        return self._member_repo or MemberRepository(session)
+
+    def community_repo(self, session):
+        return CommunityRepository(session)
+
+    def role_repo(self, session):
+        return RoleRepository(session)
+
+    def session_event_publisher(self, session):
+        return self.publisher
+
+    def session_leaderboard(self, session):
+        return self.board
+
+
+async def _value(value):
+    return value
+
+
+def test_import_rejects_body_over_limit(client: TestClient, monkeypatch):
+    owner = SimpleNamespace(roles=[], is_owner=True)
+    repo = SimpleNamespace(get_by_user_and_community=lambda user_id, community_id: _value(owner))
+    client.app.state.container = ImportContainer(member_repo=repo)
+    client.headers.update({"Authorization": f"Bearer {create_test_token()}"})
+    monkeypatch.setattr(settings, "MEMBER_IMPORT_MAX_BYTES", 64)
+
+    url = f"/api/v1/communities/{uuid.uuid4()}/members/import"
+    lines = [f'{{"user_id": "{uuid.uuid4()}"}}\n'.encode() for _ in range(3)]
+
+    assert client.post(url, content=b"".join(lines)).status_code == 413
+    # Без Content-Length лимит проверяется по мере чтения потока
+    assert client.post(url, content=iter(lines)).status_code == 413
+
+
+def test_member_count_grows_with_each_chunk():
+    community_id = uuid.uuid4()
+    counts = []
+
+    class MemberRepo:
+        async def bulk_import(self, community_id, rows, status, default_role_id=None):
+            return len(rows) - 1
+
+    class CommunityRepo:
+        async def increment_member_count(self, community_id, delta=1):
+            counts.append(delta)
+
+        async def get_by_id(self, community_id, columns=None):
+            return SimpleNamespace(id=community_id, community_type="public")
+
+    board = Leaderboard()
+    service = MemberImportService(member_repo=MemberRepo(), community_repo=CommunityRepo(), role_repo=None,
+                                  cache=Cache(), event_publisher=Publisher(), leaderboard=board)
+    job = MemberImportJob(job_id=uuid.uuid4(), community_id=community_id, created_at="2026-01-01T00:00:00Z")
+
+    async def scenario():
+        for chunk in ([(uuid.uuid4(), None)] * 3, [(uuid.uuid4(), None)] * 2):
+            await service.import_chunk(job, chunk, "active", None)
+        await service.finish_job(job, "active")
+
+    asyncio.run(scenario())
+    assert counts == [2, 1]
+    assert board.calls == [("members", 2), ("joins", 2), ("members", 1), ("joins", 1)]
+    assert (job.imported, job.skipped, job.status) == (3, 2, "completed")
+
+
+def _with_schema(scenario):
+    run_in_schema([Community.__table__, Role.__table__, Member.__table__, member_roles], scenario)
+
+
+async def _seed(session):
+    community = Community(name="import", slug=f"import-{uuid.uuid4().hex}", owner_id=uuid.uuid4())
+    session.add(community)
+    await session.flush()
+    role = Role(community_id=community.id, name="member", is_default=True)
+    existing = Member(community_id=community.id, user_id=uuid.uuid4())
+    session.add_all([role, existing])
+    await session.flush()
+    return community, role, existing
+
+
+async def _members(session, community_id):
+    rows = await session.execute(select(Member.user_id, Member.nickname).where(Member.community_id == community_id))
+    return dict(rows.all())
+
+
+async def _roles(session, community_id):
+    stmt = (select(func.count()).select_from(member_roles)
+            .join(Member, Member.id == member_roles.c.member_id).where(Member.community_id == community_id))
+    return (await session.execute(stmt)).scalar_one()
+
+
+@needs_postgres
+def test_bulk_import_skips_existing_and_duplicate_users():
+    async def scenario(session):
+        community, role, existing = await _seed(session)
+        repo, new = MemberRepository(session), uuid.uuid4()
+        rows = [(new, "first"), (new, "second"), (existing.user_id, "existing")]
+
+        assert await repo.bulk_import(community.id, rows, "active", role.id) == 1
+        members = await _members(session, community.id)
+        assert set(members) == {existing.user_id, new} and members[existing.user_id] is None
+        # Роль по умолчанию — только новому участнику
+        assert await _roles(session, community.id) == 1
+        # Временная таблица удалена: повторная пачка в той же транзакции идёт тем же путём
+        assert await repo.bulk_import(community.id, rows, "active", role.id) == 0
+
+    _with_schema(scenario)
+
+
+@needs_postgres
+def test_run_import_counts_members_per_chunk(monkeypatch):
+    monkeypatch.setattr(settings, "MEMBER_IMPORT_CHUNK_SIZE", 2)
+
+    async def scenario(session):
+        community, role, existing = await _seed(session)
+        container = ImportContainer(session)
+        job = await members_api._build_import_service(container, session).create_job(community.id)
+        users = [uuid.uuid4() for _ in range(4)]
+        payload = "\n".join(f'{{"user_id": "{user_id}"}}' for user_id in [*users, existing.user_id])
+        payload += '\n{"user_id": "broken"}\n'
+
+        await members_api._run_import(container, job, payload.encode(), "ndjson")
+
+        assert (job.status, job.imported, job.skipped, job.invalid) == ("completed", 4, 1, 1)
+        assert set(await _members(session, community.id)) == {existing.user_id, *users}
+        assert await _roles(session, community.id) == 4
+        await session.refresh(community)
+        assert community.member_count == 4
+        assert [delta for kind, delta in container.board.calls if kind == "members"] == [2, 2]
+        assert [payload["imported"] for _, payload in container.publisher.events] == [4]
+
+    _with_schema(scenario)
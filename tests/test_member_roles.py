@@ -0,0 +1,200 @@
+"""Тесты ролей участников: дифф replace_roles, массовое назначение bulk_set_role и эндпоинт."""
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.core.exceptions import NotFoundException
+from app.core.security import UserContext
+from app.domain.models import Community, Member, Role, member_roles
+from app.repositories.member_repo import MemberRepository
+from app.schemas.member import MemberRoleBulkUpdate
+from app.services.member_service import MemberService
+from tests.conftest import create_test_token, needs_postgres, run_in_schema
+
+
+
+def test_replace_roles_limits_both_statements_to_community_roles():
+    statements = []
+
+    class Session:
+        identity_map = {}
+
+        async def execute(self, stmt):
+            statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+
+    repo = MemberRepository(Session())
+    asyncio.run(repo.replace_roles(uuid.uuid4(), uuid.uuid4(), []))
+
+    delete_sql, insert_sql = statements
+    assert delete_sql.startswith("DELETE FROM member_roles")
+    assert "member_roles.role_id NOT IN (SELECT roles.id" in delete_sql
+    assert "roles.community_id = " in delete_sql and "roles.community_id = " in insert_sql
+    assert "ON CONFLICT DO NOTHING" in insert_sql
+
+
+class RoleRepository:
+    def __init__(self, roles):
+        self.roles = roles
+
+    async def get_by_id(self, role_id, columns=None):
+        return self.roles.get(role_id)
+
+
+class BulkMemberRepository:
+    """bulk_set_role меняет роль только существующим участникам, как INSERT ... SELECT FROM members."""
+
+    def __init__(self, user_ids):
+        self.user_ids = set(user_ids)
+        self.calls = []
+
+    async def bulk_set_role(self, community_id, role_id, user_ids, assign=True):
+        self.calls.append((community_id, role_id, assign))
+        return len(self.user_ids.intersection(user_ids))
+
+    async def get_by_user_and_community(self, user_id, community_id):
+        return SimpleNamespace(roles=[SimpleNamespace(permissions_list=["role.manage"])], is_owner=False)
+
+
+def _service(member_repo, roles):
+    return MemberService(member_repo=member_repo, community_repo=None, role_repo=RoleRepository(roles),
+                         cache=None, event_publisher=None, autocomplete=None, leaderboard=None)
+
+
+def test_bulk_assign_counts_only_existing_members():
+    community_id, role_id = uuid.uuid4(), uuid.uuid4()
+    present = [uuid.uuid4(), uuid.uuid4()]
+    repo = BulkMemberRepository(present)
+    service = _service(repo, {role_id: SimpleNamespace(id=role_id, community_id=community_id)})
+
+    result = asyncio.run(service.bulk_update_role(
+        community_id, role_id, MemberRoleBulkUpdate(user_ids=[*present, uuid.uuid4()], action="remove"),
+        UserContext(user_id=uuid.uuid4()),
+    ))
+
+    assert (result.requested, result.affected, result.action) == (3, 2, "remove")
+    assert repo.calls == [(community_id, role_id, False)]
+
+
+def test_bulk_assign_rejects_role_of_another_community():
+    role_id = uuid.uuid4()
+    repo = BulkMemberRepository([])
+    service = _service(repo, {role_id: SimpleNamespace(id=role_id, community_id=uuid.uuid4())})
+
+    with pytest.raises(NotFoundException):
+        asyncio.run(service.bulk_update_role(uuid.uuid4(), role_id, MemberRoleBulkUpdate(user_ids=[uuid.uuid4()]),
+                                             UserContext(user_id=uuid.uuid4())))
+    assert repo.calls == []
+
+
+class RolesContainer:
+    redis = None
+    autocomplete = None
+    leaderboard = None
+
+    def __init__(self, member_repo, roles):
+        self._member_repo = member_repo
+        self._roles = roles
+
+    @asynccontextmanager
+    async def db_session(self):
+        yield None
+
+    def member_repo(self, session):
+        return self._member_repo
+
+    def community_repo(self, session):
+        return None
+
+    def role_repo(self, session):
+        return RoleRepository(self._roles)
+
+    def session_event_publisher(self, session):
+        return None
+
+    def session_autocomplete(self, session):
+        return None
+
+    def session_leaderboard(self, session):
+        return None
+
+
+def test_bulk_endpoint_reports_missing_users(client: TestClient):
+    community_id, role_id, present = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    client.app.state.container = RolesContainer(
+        BulkMemberRepository([present]), {role_id: SimpleNamespace(id=role_id, community_id=community_id)},
+    )
+    client.headers.update({"Authorization": f"Bearer {create_test_token()}"})
+
+    response = client.post(f"/api/v1/communities/{community_id}/roles/{role_id}/members",
+                           json={"user_ids": [str(present), str(uuid.uuid4())]})
+
+    assert response.status_code == 200
+    assert response.json() == {"role_id": str(role_id), "action": "assign", "requested": 2, "affected": 1}
+
+
+def _with_schema(scenario):
+    run_in_schema([Community.__table__, Role.__table__, Member.__table__, member_roles], scenario)
+
+
+async def _seed(session):
+    community, other = (Community(name=name, slug=f"{name}-{uuid.uuid4().hex}", owner_id=uuid.uuid4())
+                        for name in ("roles", "other"))
+    session.add_all([community, other])
+    await session.flush()
+    roles = [Role(community_id=community.id, name=f"role-{i}") for i in range(3)]
+    foreign = Role(community_id=other.id, name="foreign")
+    members = [Member(community_id=community.id, user_id=uuid.uuid4()) for _ in range(3)]
+    session.add_all([*roles, foreign, *members])
+    await session.flush()
+    return community, roles, foreign, members
+
+
+async def _role_ids(session, member_id):
+    rows = await session.execute(select(member_roles.c.role_id).where(member_roles.c.member_id == member_id))
+    return set(rows.scalars())
+
+
+@needs_postgres
+def test_replace_roles_applies_diff():
+    async def scenario(session):
+        community, roles, foreign, members = await _seed(session)
+        repo, member = MemberRepository(session), members[0]
+
+        await repo.replace_roles(member.id, community.id, [roles[0].id, roles[1].id])
+        assert await _role_ids(session, member.id) == {roles[0].id, roles[1].id}
+        # Только удаление
+        await repo.replace_roles(member.id, community.id, [roles[1].id])
+        assert await _role_ids(session, member.id) == {roles[1].id}
+        # Без изменений
+        await repo.replace_roles(member.id, community.id, [roles[1].id])
+        assert await _role_ids(session, member.id) == {roles[1].id}
+        # Роль другого сообщества не назначается и не мешает остальным
+        await repo.replace_roles(member.id, community.id, [roles[1].id, roles[2].id, foreign.id])
+        assert await _role_ids(session, member.id) == {roles[1].id, roles[2].id}
+        await repo.replace_roles(member.id, community.id, [])
+        assert await _role_ids(session, member.id) == set()
+
+    _with_schema(scenario)
+
+
+@needs_postgres
+def test_bulk_set_role_skips_missing_users_and_foreign_roles():
+    async def scenario(session):
+        community, roles, foreign, members = await _seed(session)
+        repo = MemberRepository(session)
+        user_ids = [members[0].user_id, members[1].user_id, uuid.uuid4()]
+
+        assert await repo.bulk_set_role(community.id, roles[0].id, user_ids) == 2
+        assert await repo.bulk_set_role(community.id, roles[0].id, user_ids) == 0
+        assert await repo.bulk_set_role(community.id, foreign.id, user_ids) == 0
+        assert await repo.bulk_set_role(community.id, roles[0].id, user_ids[:1], assign=False) == 1
+        assert await _role_ids(session, members[1].id) == {roles[0].id}
+        assert await _role_ids(session, members[0].id) == set()
+
+    _with_schema(scenario)
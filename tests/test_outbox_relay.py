@@ -0,0 +1,130 @@
+"""Тесты outbox relay."""
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.events import outbox_relay
+from app.events.base import DomainEvent, EventPublisher
+from app.events.outbox_relay import OutboxRelay
+from app.repositories.outbox_repo import OutboxRepository
+
+
+class FakeRepo:
+    rows: list = []
+    published: list = []
+    failed: list = []
+    parked: list = []
+
+    def __init__(self, session):
+        pass
+
+    async def claim_batch(self, limit):
+        return FakeRepo.rows[:limit]
+
+    async def mark_published(self, ids):
+        FakeRepo.published.extend(ids)
+
+    async def mark_failed(self, event_id, error, retry_in):
+        FakeRepo.failed.append((event_id, retry_in))
+
+    async def park(self, event_id, error):
+        FakeRepo.parked.append(event_id)
+
+
+class FlakyPublisher(EventPublisher):
+    is_connected = True
+
+    def __init__(self, fail_on):
+        self.fail_on = fail_on
+        self.sent = []
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    async def publish(self, event, routing_key=None):
+        await self.send(event, routing_key)
+
+    async def send(self, event, routing_key=None):
+        if event.event_id == self.fail_on:
+            raise RuntimeError("broker down")
+        self.sent.append(event.event_id)
+
+
+@asynccontextmanager
+async def fake_scope():
+    yield None
+
+
+def _row(event_type="post.created", attempts=0):
+    event = DomainEvent(event_type=event_type)
+    return SimpleNamespace(id=uuid.UUID(event.event_id), event_type=event_type, aggregate_id=None,
+                           routing_key=event_type, payload=event.to_dict(), attempts=attempts)
+
+
+def test_relay_stops_batch_on_first_failure(monkeypatch):
+    monkeypatch.setattr(outbox_relay, "OutboxRepository", FakeRepo)
+    rows = [_row(), _row(), _row()]
+    FakeRepo.rows, FakeRepo.published, FakeRepo.failed, FakeRepo.parked = rows, [], [], []
+    publisher = FlakyPublisher(fail_on=str(rows[1].id))
+
+    sent, failed = asyncio.run(OutboxRelay(fake_scope, publisher, batch_size=10).relay_once())
+
+    assert (sent, failed) == (1, True)
+    assert FakeRepo.published == [rows[0].id]
+    assert FakeRepo.failed == [(rows[1].id, 1.0)]
+
+
+def test_failed_event_backs_off_then_is_parked(monkeypatch):
+    monkeypatch.setattr(outbox_relay, "OutboxRepository", FakeRepo)
+    relay = OutboxRelay(fake_scope, None, batch_size=10, max_attempts=5, retry_backoff=2.0, retry_backoff_max=10.0)
+
+    def attempt(row):
+        FakeRepo.rows, FakeRepo.published, FakeRepo.failed, FakeRepo.parked = [row], [], [], []
+        relay._publisher = FlakyPublisher(fail_on=str(row.id))
+        asyncio.run(relay.relay_once())
+
+    retrying = _row(attempts=3)
+    attempt(retrying)
+    # Четвёртая попытка: 2·2^3 = 16 с, ограничено retry_backoff_max
+    assert FakeRepo.failed == [(retrying.id, 10.0)] and FakeRepo.parked == []
+
+    last = _row(attempts=4)
+    attempt(last)
+    assert FakeRepo.failed == [] and FakeRepo.parked == [last.id]
+    assert relay.metrics.parked_total == 1
+
+
+def test_backoff_grows_until_cap(monkeypatch):
+    monkeypatch.setattr(outbox_relay, "OutboxRepository", FakeRepo)
+    relay = OutboxRelay(fake_scope, None, batch_size=10, max_attempts=10, retry_backoff=2.0, retry_backoff_max=10.0)
+    delays = []
+    for attempts in range(4):
+        row = _row(attempts=attempts)
+        FakeRepo.rows, FakeRepo.failed = [row], []
+        relay._publisher = FlakyPublisher(fail_on=str(row.id))
+        asyncio.run(relay.relay_once())
+        delays.append(FakeRepo.failed[0][1])
+    assert delays == [2.0, 4.0, 8.0, 10.0]
+
+
+def test_claim_skips_parked_events_and_waits_for_any_pending_predecessor():
+    captured = {}
+
+    class Session:
+        async def execute(self, stmt):
+            captured["sql"] = str(stmt.compile(dialect=postgresql.dialect()))
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: []))
+
+    asyncio.run(OutboxRepository(Session()).claim_batch(10))
+    sql = captured["sql"]
+    assert "outbox.failed_at IS NULL" in sql
+    assert "NOT (EXISTS (SELECT outbox_1.id" in sql
+    assert "outbox_1.aggregate_id = outbox.aggregate_id" in sql and "attempts" not in sql.split("EXISTS")[1]
+    assert "(outbox_1.created_at, outbox_1.id) < (outbox.created_at, outbox.id)" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
@@ -0,0 +1,92 @@
+"""Тесты excerpt / word_count / has_media для постов и их заполнения у старых постов."""
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy import select, update
+
+from app.domain.models import Channel, Community, Member, Post, Role, member_roles
+from app.jobs.backfill_post_digest import backfill_page
+from app.repositories.post_repo import PostRepository
+from app.services.post_service import EXCERPT_LENGTH, build_post_digest
+from tests.conftest import needs_postgres, run_in_schema
+
+
+def test_short_content_is_kept_whole():
+    digest = build_post_digest("Hello   world\n again", None)
+    assert digest == {"excerpt": "Hello world again", "word_count": 3, "has_media": False}
+
+
+def test_long_content_is_cut_on_word_boundary():
+    digest = build_post_digest("слово " * 200, ["https://cdn/x.png"])
+    assert len(digest["excerpt"]) <= EXCERPT_LENGTH
+    assert digest["excerpt"].endswith("слово…")
+    assert digest["word_count"] == 200
+    assert digest["has_media"] is True
+
+
+class DigestRepository:
+    def __init__(self, posts):
+        self.posts = posts
+        self.filled = []
+
+    async def missing_digests(self, after, limit):
+        page = [post for post in self.posts if after is None or post.id > after][:limit]
+        if not page:
+            return None, []
+        return page[-1].id, [post for post in page if post.excerpt is None]
+
+    async def fill_digests(self, digests):
+        self.filled.extend(digests)
+
+
+def test_backfill_page_uses_the_write_path_digest():
+    posts = sorted((SimpleNamespace(id=uuid.uuid4(), content=f"пост {i}", media_urls=["m"] if i else None,
+                                    excerpt="готово" if i == 2 else None) for i in range(3)), key=lambda p: p.id)
+    repo = DigestRepository(posts)
+
+    last, count = asyncio.run(backfill_page(repo, None, limit=3))
+
+    assert (last, count) == (posts[-1].id, 2)
+    expected = {post.id: build_post_digest(post.content, post.media_urls) for post in posts if post.excerpt is None}
+    assert dict(repo.filled) == expected
+    assert asyncio.run(backfill_page(repo, last, limit=3)) == (None, 0)
+
+
+@needs_postgres
+def test_backfill_fills_only_posts_without_digest():
+    async def scenario(session):
+        community = Community(name="digest", slug=f"digest-{uuid.uuid4().hex}", owner_id=uuid.uuid4())
+        session.add(community)
+        await session.flush()
+        legacy = [Post(community_id=community.id, author_id=uuid.uuid4(), content=f"старый  пост {i}",
+                       media_urls=["https://cdn/x.png"] if i % 2 else []) for i in range(5)]
+        fresh = Post(community_id=community.id, author_id=uuid.uuid4(), content="новый пост",
+                     **build_post_digest("новый пост", None))
+        session.add_all([*legacy, fresh])
+        await session.flush()
+        stamps = {post.id: post.updated_at for post in [*legacy, fresh]}
+        # Ручная правка excerpt у нового поста не должна перезаписаться
+        await session.execute(update(Post).where(Post.id == fresh.id).values(excerpt="вручную"))
+        repo = PostRepository(session)
+
+        after, updated = None, 0
+        while True:
+            after, count = await backfill_page(repo, after, limit=2)
+            if after is None:
+                break
+            updated += count
+
+        assert updated == 5
+        rows = await session.execute(select(Post.id, Post.excerpt, Post.word_count, Post.has_media, Post.updated_at)
+                                     .where(Post.community_id == community.id))
+        stored = {row.id: row for row in rows}
+        for post in legacy:
+            digest = build_post_digest(post.content, post.media_urls)
+            row = stored[post.id]
+            assert (row.excerpt, row.word_count, row.has_media) == (digest["excerpt"], digest["word_count"], digest["has_media"])
+        assert stored[fresh.id].excerpt == "вручную"
+        assert {post_id: row.updated_at for post_id, row in stored.items()} == stamps
+
+    run_in_schema([Community.__table__, Role.__table__, Member.__table__, member_roles,
+                   Channel.__table__, Post.__table__], scenario)
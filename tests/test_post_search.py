@@ -0,0 +1,177 @@
+"""Тесты поиска постов: подсветка совпадений, курсор страниц и запросы к PostgreSQL."""
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from app.core.exceptions import NotFoundException
+from app.domain.models import Channel, Community, Member, Post, Role, member_roles
+from app.repositories.base import RankCursor
+from app.repositories.post_repo import HIGHLIGHT_START, HIGHLIGHT_STOP, PostRepository, post_search_vector
+from app.services.post_service import PostService, render_highlight
+from tests.conftest import needs_postgres, run_in_schema
+
+
+def test_highlight_escapes_post_text_and_marks_matches():
+    headline = f"<script>alert(1)</script> про {HIGHLIGHT_START}python{HIGHLIGHT_STOP} & asyncio"
+    assert render_highlight(headline) == (
+        "&lt;script&gt;alert(1)&lt;/script&gt; про <mark>python</mark> &amp; asyncio"
+    )
+    assert render_highlight(None) == ""
+
+
+def _post(community_id):
+    now = datetime.now(timezone.utc)
+    return SimpleNamespace(id=uuid.uuid4(), community_id=community_id, channel_id=None, author_id=uuid.uuid4(),
+                           title="Заголовок", excerpt="текст", word_count=1, has_media=False, status="published",
+                           is_pinned=False, media_urls=[], like_count=0, comment_count=0, view_count=0,
+                           published_at=now, created_at=now, updated_at=now)
+
+
+class SearchRepository:
+    def __init__(self, posts):
+        self.posts = posts
+        self.calls = []
+
+    async def search(self, query, limit, cursor=None, community_id=None, channel_id=None):
+        self.calls.append((cursor, community_id, channel_id))
+        start = 0 if cursor is None else next(i for i, p in enumerate(self.posts) if p.id == cursor.id) + 1
+        rows = [SimpleNamespace(Post=post, rank=1.0 / (start + i + 1), headline=f"{HIGHLIGHT_START}q{HIGHLIGHT_STOP}")
+                for i, post in enumerate(self.posts[start:start + limit])]
+        more = start + limit < len(self.posts)
+        return rows, RankCursor(rows[-1].rank, rows[-1].Post.id) if more else None
+
+
+class CommunityRepository:
+    def __init__(self, existing):
+        self.existing = existing
+
+    async def get_by_id(self, community_id, columns=None):
+        return SimpleNamespace(id=community_id) if community_id in self.existing else None
+
+
+def _service(post_repo, community_repo):
+    return PostService(post_repo=post_repo, community_repo=community_repo, media_repo=None, cache=None,
+                       event_publisher=None, leaderboard=None)
+
+
+def test_search_pages_follow_cursor_within_community():
+    community_id = uuid.uuid4()
+    repo = SearchRepository([_post(community_id) for _ in range(3)])
+    service = _service(repo, CommunityRepository({community_id}))
+
+    first = asyncio.run(service.search_posts("q", page_size=2, community_id=community_id))
+    second = asyncio.run(service.search_posts("q", page_size=2, cursor=first.next_cursor, community_id=community_id))
+
+    assert [hit.post.id for hit in first.items + second.items] == [post.id for post in repo.posts]
+    assert first.items[0].highlight == "<mark>q</mark>"
+    assert repo.calls[1] == (RankCursor.decode(first.next_cursor), community_id, None)
+    assert second.next_cursor is None
+
+
+def test_search_in_missing_community_is_not_found():
+    service = _service(SearchRepository([]), CommunityRepository(set()))
+    with pytest.raises(NotFoundException):
+        asyncio.run(service.search_posts("q", community_id=uuid.uuid4()))
+
+
+def _with_schema(scenario):
+    run_in_schema([Community.__table__, Role.__table__, Member.__table__, member_roles,
+                   Channel.__table__, Post.__table__], scenario)
+
+
+async def _community(session, community_type="public"):
+    community = Community(name="search", slug=f"search-{uuid.uuid4().hex}", owner_id=uuid.uuid4(),
+                         community_type=community_type)
+    session.add(community)
+    await session.flush()
+    return community
+
+
+async def _add_post(session, community, title, content, status="published", indexed=True):
+    post = Post(community_id=community.id, author_id=uuid.uuid4(), title=title, content=content, status=status,
+                search_vector=post_search_vector(title, content) if indexed else None)
+    session.add(post)
+    await session.flush()
+    return post
+
+
+@needs_postgres
+def test_search_ranks_title_matches_and_highlights_page_rows():
+    async def scenario(session):
+        community, private = await _community(session), await _community(session, "private")
+        in_title = await _add_post(session, community, "asyncio tips", "event loop internals")
+        in_content = await _add_post(session, community, "Weekly notes", "some words about asyncio here")
+        await _add_post(session, community, "asyncio draft", "asyncio", status="draft")
+        hidden = await _add_post(session, private, "asyncio secrets", "asyncio")
+        repo = PostRepository(session)
+
+        rows, cursor = await repo.search("asyncio", limit=10)
+        assert [row.Post.id for row in rows] == [in_title.id, in_content.id] and cursor is None
+        assert rows[0].rank > rows[1].rank
+        # Фрагмент строится по тексту поста и размечает совпадения
+        assert f"{HIGHLIGHT_START}asyncio{HIGHLIGHT_STOP}" in rows[1].headline
+
+        rows, _ = await repo.search("asyncio", limit=10, community_id=private.id)
+        assert [row.Post.id for row in rows] == [hidden.id]
+
+    _with_schema(scenario)
+
+
+@needs_postgres
+def test_search_cursor_pages_neither_overlap_nor_skip():
+    async def scenario(session):
+        community = await _community(session)
+        # Одинаковые посты дают равный ранг: порядок внутри держит только id
+        for _ in range(5):
+            await _add_post(session, community, "kafka", "kafka consumer groups")
+        for i in range(6):
+            await _add_post(session, community, f"notes {i}", "kafka " * (i + 1))
+        repo = PostRepository(session)
+        expected, _ = await repo.search("kafka", limit=100, community_id=community.id)
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = await repo.search("kafka", limit=4, cursor=cursor, community_id=community.id)
+            seen.extend(row.Post.id for row in rows)
+            assert all(HIGHLIGHT_START in row.headline for row in rows)
+            if cursor is None:
+                break
+            cursor = RankCursor.decode(cursor.encode())
+
+        assert len(expected) == 11
+        assert seen == [row.Post.id for row in expected]
+
+    _with_schema(scenario)
+
+
+@needs_postgres
+def test_backfill_fills_missing_vectors_in_keyset_batches():
+    async def scenario(session):
+        community = await _community(session)
+        indexed = await _add_post(session, community, "indexed", "already searchable")
+        missing = [await _add_post(session, community, f"old {i}", f"legacy post {i}", indexed=False) for i in range(5)]
+        stamps = {post.id: post.updated_at for post in missing}
+        repo = PostRepository(session)
+
+        after, updated, batches = None, 0, 0
+        while True:
+            after, count = await repo.backfill_search_vector(after, limit=2)
+            if after is None:
+                break
+            updated += count
+            batches += 1
+
+        assert (updated, batches) == (5, 3)
+        rows, _ = await repo.search("legacy", limit=10, community_id=community.id)
+        assert {row.Post.id for row in rows} == {post.id for post in missing}
+        refreshed = await session.execute(select(Post.id, Post.updated_at).where(Post.id.in_(stamps)))
+        # Служебное заполнение не двигает updated_at
+        assert dict(refreshed.all()) == stamps
+        rows, _ = await repo.search("searchable", limit=10)
+        assert [row.Post.id for row in rows] == [indexed.id]
+
+    _with_schema(scenario)
@@ -0,0 +1,106 @@
+"""Тесты пересчёта денормализованных счётчиков."""
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+
+from sqlalchemy.dialects import postgresql
+
+from app.domain.models import Community
+from app.repositories.projection_repo import ProjectionRepository
+from app.services import projection_service
+from app.services.projection_service import ProjectionRebuilder
+
+IDS = sorted(uuid.uuid4() for _ in range(5))
+STORED = {IDS[0]: 3, IDS[1]: 0, IDS[2]: 7, IDS[3]: 2, IDS[4]: 1}
+ACTUAL = {IDS[0]: 3, IDS[1]: 4, IDS[2]: 5, IDS[3]: 2, IDS[4]: 1}
+
+
+class MemoryProjectionRepository:
+    """Только member_count; IDS[2] «меняется пользователем» между чтением и записью."""
+
+    def __init__(self, session):
+        self.stored = session.stored
+
+    async def set_lock_timeout(self, milliseconds):
+        pass
+
+    async def ids_after(self, model, after, limit):
+        return [i for i in IDS if after is None or i > after][:limit]
+
+    async def read_counters(self, model, ids, counters, community_id):
+        return [{"id": i, "community_id": i, "member_count": self.stored[i], "member_count__actual": ACTUAL[i]}
+                for i in ids]
+
+    async def apply_corrections(self, model, counter, corrections):
+        applied = 0
+        for row_id, expected, actual in corrections:
+            if row_id == IDS[2]:
+                continue
+            if self.stored[row_id] == expected:
+                self.stored[row_id] = actual
+                applied += 1
+        return applied
+
+
+class FakeCache:
+    def __init__(self):
+        self.deleted = []
+
+    async def delete(self, *keys):
+        self.deleted.extend(keys)
+
+    async def delete_pattern(self, pattern):
+        self.deleted.append(pattern)
+
+
+def _rebuilder(monkeypatch, stored, cache, **kwargs):
+    monkeypatch.setattr(projection_service, "ProjectionRepository", MemoryProjectionRepository)
+
+    class Session:
+        pass
+
+    session = Session()
+    session.stored = stored
+
+    @asynccontextmanager
+    async def scope():
+        yield session
+
+    return ProjectionRebuilder(scope, cache, workers=3, chunk_size=2, **kwargs)
+
+
+def test_corrections_skip_concurrent_changes(monkeypatch):
+    stored, cache = dict(STORED), FakeCache()
+    report = asyncio.run(_rebuilder(monkeypatch, stored, cache).run(["member_count"]))
+
+    drift = report.counters["member_count"]
+    assert (drift.scanned, drift.drifted, drift.corrected, drift.skipped_concurrent) == (5, 2, 1, 1)
+    assert (drift.total_abs_drift, drift.max_abs_drift) == (6, 4)
+    assert stored[IDS[1]] == 4 and stored[IDS[2]] == 7
+    assert report.chunks == 3 and report.failed_chunks == 0
+    assert any(str(IDS[1]) in key for key in cache.deleted)
+
+
+def test_dry_run_writes_nothing(monkeypatch):
+    stored, cache = dict(STORED), FakeCache()
+    report = asyncio.run(_rebuilder(monkeypatch, stored, cache, dry_run=True).run(["member_count"]))
+    assert report.counters["member_count"].drifted == 2
+    assert stored == STORED and cache.deleted == []
+
+
+def test_correction_is_guarded_by_read_value():
+    repo = ProjectionRepository(session=None)
+    captured = {}
+
+    class Session:
+        async def execute(self, stmt):
+            captured["sql"] = str(stmt.compile(dialect=postgresql.dialect()))
+
+            class Result:
+                rowcount = 1
+            return Result()
+
+    repo._session = Session()
+    asyncio.run(repo.apply_corrections(Community, "member_count", [(IDS[0], 1, 2)]))
+    assert "communities.member_count = fixes.expected" in captured["sql"]
+    assert "FROM (VALUES" in captured["sql"]
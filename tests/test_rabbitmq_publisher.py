@@ -0,0 +1,91 @@
+"""Тесты пачечной публикации в RabbitMQ с подтверждениями."""
+import asyncio
+from contextlib import asynccontextmanager
+
+from aiormq.abc import DeliveredMessage
+from aiormq.exceptions import DeliveryError, PublishError
+from pamqp.commands import Basic
+
+from app.events.base import DomainEvent
+from app.events.rabbitmq_publisher import RabbitMQDeliveryError, RabbitMQEventPublisher
+
+
+class FakeExchange:
+    def __init__(self, nack_ids: set[str], returned_ids: set[str] = frozenset()):
+        self.nack_ids = nack_ids
+        self.returned_ids = returned_ids
+        self.published: list[str] = []
+
+    async def publish(self, message, routing_key, mandatory, timeout):
+        self.published.append(message.message_id)
+        await asyncio.sleep(0)
+        if message.message_id in self.nack_ids:
+            # Как aiormq Channel._confirm_delivery: nack приходит исключением, а не результатом
+            raise DeliveryError(None, Basic.Nack())
+        if message.message_id in self.returned_ids:
+            # Как aiormq Channel._on_return_frame при on_return_raises=True
+            reply = Basic.Return(reply_code=312, reply_text="NO_ROUTE", exchange="x", routing_key=routing_key)
+            raise PublishError(DeliveredMessage(delivery=reply, header=None, body=b"", channel=None), reply)
+        return Basic.Ack()
+
+
+class FakeChannel:
+    def __init__(self, exchange: FakeExchange):
+        self.exchange = exchange
+
+    async def get_exchange(self, name, ensure=False):
+        return self.exchange
+
+
+class FakePool:
+    def __init__(self, channel: FakeChannel):
+        self.channel = channel
+        self.acquired = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.acquired += 1
+        yield self.channel
+
+
+def _publisher(nack_ids: set[str] = frozenset(),
+               returned_ids: set[str] = frozenset()) -> tuple[RabbitMQEventPublisher, FakePool]:
+    publisher = RabbitMQEventPublisher()
+    pool = FakePool(FakeChannel(FakeExchange(set(nack_ids), set(returned_ids))))
+    publisher._connection = object()
+    publisher._channel_pool = pool
+    return publisher, pool
+
+
+def _events(count: int) -> list[DomainEvent]:
+    return [DomainEvent(event_type="post.created", event_id=f"e{n}") for n in range(count)]
+
+
+def test_send_many_stops_at_first_nack():
+    publisher, _ = _publisher({"e2"})
+    delivered, error = asyncio.run(publisher.send_many([(event, None) for event in _events(4)]))
+    assert delivered == 2
+    assert isinstance(error, RabbitMQDeliveryError)
+    assert publisher.metrics.confirmed == 2 and publisher.metrics.nacked == 1
+    # Nack считается один раз; failed — только неподтверждённый остаток пачки
+    assert publisher.metrics.failed == 1
+
+
+def test_returned_message_is_not_delivered():
+    publisher, _ = _publisher(returned_ids={"e1"})
+    delivered, error = asyncio.run(publisher.send_many([(event, None) for event in _events(3)]))
+    assert delivered == 1
+    assert isinstance(error, RabbitMQDeliveryError) and "NO_ROUTE" in str(error)
+    assert publisher.metrics.returned == 1 and publisher.metrics.nacked == 0 and publisher.metrics.failed == 1
+
+
+def test_concurrent_publishes_are_coalesced():
+    publisher, pool = _publisher()
+
+    async def run():
+        await asyncio.gather(*(publisher.publish(event) for event in _events(10)))
+
+    asyncio.run(run())
+    assert pool.channel.exchange.published == [f"e{n}" for n in range(10)]
+    assert pool.acquired == 1
+    assert publisher.metrics.confirmed == 10
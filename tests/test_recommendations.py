@@ -0,0 +1,130 @@
+"""Тесты рекомендаций сообществ: MinHash-оценка сходства и инкрементальный пересчёт."""
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services import recommendations
+from app.services.minhash import MemberIndex, MinHasher, candidate_pairs, cosine, jaccard, top_k, uuid_keys
+from app.services.recommendations import RecommendationBuilder
+
+
+def _signatures(hasher, groups):
+    signatures = hasher.empty(len(groups))
+    rows = np.concatenate([np.full(len(users), row) for row, users in enumerate(groups)])
+    hasher.update(signatures, rows, uuid_keys([user for users in groups for user in users]))
+    return signatures
+
+
+def test_overlapping_communities_rank_first():
+    users = [uuid.uuid4() for _ in range(400)]
+    # 0 и 1 делят 150 из 200 участников, 2 — маленькое почти целиком внутри 0, 3 — чужая аудитория
+    groups = [users[:200], users[50:250], users[:20] + users[390:], users[250:390]]
+    hasher = MinHasher(128)
+    signatures = _signatures(hasher, groups)
+    sizes = np.array([len(g) for g in groups], dtype=np.float64)
+
+    left, right = candidate_pairs(signatures, bands=128, max_bucket=500, eligible=np.ones(4, dtype=bool))
+    scores = cosine(jaccard(signatures, left, right), sizes[left], sizes[right])
+    source, target, score = top_k(left, right, scores, k=2)
+
+    best = {int(s): int(t) for s, t in zip(source, target) if t == target[source == s][0]}
+    assert best[0] == 1 and best[1] == 0 and best[2] == 0
+    assert 3 not in set(source.tolist()) | set(target.tolist())
+    assert score[(source == 0) & (target == 1)][0] == pytest.approx(150 / 200, abs=0.1)
+
+
+def test_member_index_counts_exact_overlap():
+    users = [uuid.uuid4() for _ in range(50)]
+    groups = [users[:30], users[10:50], users[40:], []]
+    rows = np.concatenate([np.full(len(users), row, dtype=np.int64) for row, users in enumerate(groups)])
+    index = MemberIndex(rows, uuid_keys([user for users in groups for user in users]), len(groups))
+
+    left, right = np.array([0, 1, 0, 3]), np.array([1, 2, 2, 0])
+    assert index.intersections(left, right).tolist() == [20, 10, 0, 0]
+    assert index.sizes.tolist() == [30, 40, 10, 0]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    users = [uuid.uuid4() for _ in range(300)]
+    communities = [uuid.uuid4() for _ in range(4)]
+    state = SimpleNamespace(
+        members={communities[0]: users[:100], communities[1]: users[20:120],
+                 communities[2]: users[200:300], communities[3]: users[205:300]},
+        signatures={}, similar={}, changed=[], replaced=[],
+    )
+
+    class RecommendationRepository:
+        def __init__(self, session):
+            pass
+
+        async def last_computed(self):
+            return max((row[2] for row in state.signatures.values()), default=None)
+
+        async def active_communities(self):
+            return list(state.members)
+
+        async def changed_since(self, since):
+            return list(state.changed)
+
+        async def save_signatures(self, rows, computed_at):
+            for community_id, signature, member_count in rows:
+                state.signatures[community_id] = (signature, member_count, computed_at)
+
+        async def load_signatures(self):
+            return [SimpleNamespace(community_id=cid, signature=sig, member_count=count)
+                    for cid, (sig, count, _) in state.signatures.items()]
+
+        async def listing(self, community_ids):
+            return [cid for cid, rows in state.similar.items() if any(t in community_ids for t, _ in rows)]
+
+        async def replace_similar(self, community_ids, rows):
+            state.replaced.append(set(community_ids))
+            for community_id in community_ids:
+                state.similar[community_id] = [(t, s) for c, t, s in rows if c == community_id]
+
+    class MemberRepository:
+        def __init__(self, session):
+            pass
+
+        async def stream_columns(self, columns, filters=None, chunk_size=1000):
+            wanted = next((set(f.right.value) for f in filters if f.left.name == "community_id"), None)
+            yield [{"community_id": cid, "user_id": user} for cid, members in state.members.items()
+                   if wanted is None or cid in wanted for user in members]
+
+    monkeypatch.setattr(recommendations, "RecommendationRepository", RecommendationRepository)
+    monkeypatch.setattr(recommendations, "MemberRepository", MemberRepository)
+    state.communities, state.users = communities, users
+    return state
+
+
+@asynccontextmanager
+async def scope():
+    yield None
+
+
+def test_incremental_run_reranks_changed_communities_and_their_partners(store):
+    builder = RecommendationBuilder(scope, k=5)
+    first, second = store.communities[:2]
+
+    full = asyncio.run(builder.run())
+    assert full.mode == "full" and full.communities_signed == 4
+    assert [cid for cid, _ in store.similar[first]] == [second]
+    # Сходство пересчитано точно: 80 общих из 100 и 100
+    assert store.similar[first][0][1] == pytest.approx(0.8, abs=1e-6)
+    assert [cid for cid, _ in store.similar[store.communities[2]]] == [store.communities[3]]
+
+    # Аудитория второго сообщества ушла к третьему
+    store.members[second] = store.users[200:290]
+    store.changed = [second]
+    store.replaced.clear()
+    report = asyncio.run(builder.run())
+
+    assert report.mode == "incremental" and report.communities_signed == 1
+    assert store.replaced == [{first, second, store.communities[2], store.communities[3]}]
+    assert store.similar[first] == []
+    assert dict(store.similar[second])[store.communities[2]] == pytest.approx(90 / (90 * 100) ** 0.5, abs=1e-6)
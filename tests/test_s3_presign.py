@@ -0,0 +1,39 @@
+"""Тесты пакетной подписи ссылок S3 и их кэша."""
+import asyncio
+
+from app.infrastructure.media import s3_client
+from app.infrastructure.media.s3_client import PresignCache, S3Client
+
+
+class FakeBotoClient:
+    def __init__(self):
+        self.signed = []
+
+    async def generate_presigned_url(self, operation, Params, ExpiresIn):
+        self.signed.append(Params["Key"])
+        return f"https://s3/{Params['Bucket']}/{Params['Key']}?sig={len(self.signed)}"
+
+
+def test_batch_presign_reuses_cached_urls():
+    client = S3Client()
+    client._client = FakeBotoClient()
+    first = asyncio.run(client.generate_presigned_urls(["a", "b", "a"], bucket="media"))
+    second = asyncio.run(client.generate_presigned_urls(["a", "b", "c"], bucket="media"))
+    assert client._client.signed == ["a", "b", "c"]
+    assert second["a"] == first["a"] and second["b"] == first["b"]
+
+
+def test_cache_expires_before_signature_and_is_bounded(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(s3_client.time, "monotonic", lambda: now[0])
+    cache = PresignCache(max_size=2, margin=60)
+    cache.put("b", "k1", 600, "u1")
+    now[0] += 539
+    assert cache.get("b", "k1", 600) == "u1"
+    now[0] += 1
+    assert cache.get("b", "k1", 600) is None
+
+    for key in ("k1", "k2", "k3"):
+        cache.put("b", key, 600, key)
+    assert cache.get("b", "k1", 600) is None
+    assert cache.get("b", "k3", 600) == "k3"